@@ -30,20 +30,26 @@ from __future__ import annotations
 import math
 import json
 import copy
+from array import array
 from dataclasses import dataclass, field
 from typing import Optional, Set
 from enum import Enum
 
+from game_data import load_game_data
+
 
 # =============================================================================
 # 第一部分：基础常量与数据定义
 # =============================================================================
 
-# ---- 参数转换比率 ----
-DMG_PER_POINT = 10      # 每点伤害参数 = 10基础伤害
-SPD_PER_POINT = 200     # 每点速度参数 = 200像素/秒
-DUR_PER_POINT = 0.7     # 每点持续参数 = 0.7秒 (v2.2: 从0.5提升至0.7)
-SIZE_PER_POINT = 12     # 每点大小参数 = 12像素碰撞半径 (v2.2: 从8提升至12)
+# 音符、和弦与参数转换比率取自 godot_project/scripts/data/music_data.gd（见 game_data.py）
+GAME_DATA = load_game_data()
+
+# ---- 参数转换比率 (PARAM_CONVERSION) ----
+DMG_PER_POINT = GAME_DATA.param_conversion["dmg_per_point"]    # 每点伤害参数 → 基础伤害
+SPD_PER_POINT = GAME_DATA.param_conversion["spd_per_point"]    # 每点速度参数 → 像素/秒
+DUR_PER_POINT = GAME_DATA.param_conversion["dur_per_point"]    # 每点持续参数 → 秒
+SIZE_PER_POINT = GAME_DATA.param_conversion["size_per_point"]  # 每点大小参数 → 像素碰撞半径
 
 # ---- 全局节奏参数 ----
 DEFAULT_BPM = 120
@@ -59,10 +65,10 @@ PLAYER_MOVE_SPEED = 250  # 像素/秒
 class NoteStats:
     """单个音符的四维属性（含成长加成）。"""
     name: str
-    base_dmg: int
-    base_spd: int
-    base_dur: int
-    base_size: int
+    base_dmg: float
+    base_spd: float
+    base_dur: float
+    base_size: float
     # 局内成长加成（来自肉鸽升级）
     bonus_dmg: float = 0.0
     bonus_spd: float = 0.0
@@ -123,16 +129,8 @@ class NoteStats:
 
 
 def create_base_notes() -> dict[str, NoteStats]:
-    """创建7个白键音符的基础属性。"""
-    return {
-        "C": NoteStats("C", 3, 3, 3, 3),
-        "D": NoteStats("D", 2, 5, 3, 2),
-        "E": NoteStats("E", 1, 1, 4, 6),  # v2.2: 巨型缓行
-        "F": NoteStats("F", 2, 1, 6, 3),  # v2.2: 超持久缓行
-        "G": NoteStats("G", 6, 3, 1, 2),  # v2.2: 高伤快消
-        "A": NoteStats("A", 4, 2, 4, 2),
-        "B": NoteStats("B", 4, 4, 2, 2),
-    }
+    """创建7个白键音符的基础属性（WHITE_KEY_STATS）。"""
+    return {name: NoteStats(name, *stats) for name, stats in GAME_DATA.notes.items()}
 
 
 # =============================================================================
@@ -165,87 +163,65 @@ class ChordType:
     extra_effect: str = ""
 
 
-def create_chord_registry() -> dict[str, ChordType]:
-    """创建完整的和弦类型注册表（含3/4/5/6音扩展和弦）。"""
-    chords = {}
+# ---- Godot ChordType 枚举名 → 中文和弦名 ----
+CHORD_NAMES = {
+    "MAJOR": "大三和弦", "MINOR": "小三和弦", "AUGMENTED": "增三和弦",
+    "DIMINISHED": "减三和弦", "SUSPENDED": "挂留和弦",
+    "DOMINANT_7": "属七和弦", "DIMINISHED_7": "减七和弦", "MAJOR_7": "大七和弦",
+    "MINOR_7": "小七和弦", "HALF_DIMINISHED_7": "半减七和弦", "AUGMENTED_MAJOR_7": "增大七和弦",
+    "DOMINANT_9": "属九和弦", "MAJOR_9": "大九和弦", "DIMINISHED_9": "减九和弦",
+    "DOMINANT_11": "属十一和弦", "DOMINANT_13": "属十三和弦", "DIMINISHED_13": "减十三和弦",
+}
+
+# ---- 和弦效果参数 ----
+# music_data.gd 只定义伤害倍率、不和谐度、音数与扩展和弦疲劳代价；
+# 下列效果参数（及非扩展和弦的疲劳不和谐增量）按 projectile_manager.gd 的实现折算。
+CHORD_EFFECTS: dict[str, dict] = {
+    "大三和弦": dict(fatigue_dissonance=0.05),
+    "小三和弦": dict(fatigue_dissonance=0.05, dot_total_ratio=1.8),
+    "增三和弦": dict(fatigue_dissonance=0.10, explosion_radius_mult=3.0, explosion_dmg_ratio=0.5),
+    "减三和弦": dict(fatigue_dissonance=0.20, aoe_radius_mult=5.0),
+    "挂留和弦": dict(fatigue_dissonance=0.02, delay_beats=1.0),
+    "属七和弦": dict(fatigue_dissonance=0.15, zone_duration_mult=2.0, zone_tick_ratio=0.4),
+    "减七和弦": dict(fatigue_dissonance=0.30, delay_beats=2.0),
+    "大七和弦": dict(fatigue_dissonance=0.08, heal_ratio=15.0, shield_ratio=20.0),
+    "小七和弦": dict(fatigue_dissonance=0.12, summon_duration_mult=3.0, summon_dps_ratio=0.5),
+    "半减七和弦": dict(fatigue_dissonance=0.20, zone_duration_mult=2.0, zone_tick_ratio=0.3,
+                     extra_effect="区域内敌人减速40%"),
+    "增大七和弦": dict(fatigue_dissonance=0.15, explosion_radius_mult=4.5, explosion_dmg_ratio=0.5,
+                     shield_ratio=10.0, extra_effect="附带2.5秒临时护盾"),
+    "属九和弦": dict(zone_duration_mult=2.5, zone_tick_ratio=0.6,
+                   extra_effect="区域内敌人减速30%"),
+    "大九和弦": dict(heal_ratio=20.0, shield_ratio=25.0,
+                   extra_effect="领域内队友持续回血(2/秒)"),
+    "减九和弦": dict(delay_beats=3.0,
+                   extra_effect="直线贯穿，无视防御"),
+    "属十一和弦": dict(zone_duration_mult=3.0, zone_tick_ratio=0.5,
+                     extra_effect="区域内时间减速50%（敌人攻速/移速减半）"),
+    "属十三和弦": dict(zone_duration_mult=4.0, zone_tick_ratio=0.8, aoe_radius_mult=8.0,
+                     extra_effect="全屏持续AOE，每跳附加随机元素效果"),
+    "减十三和弦": dict(delay_beats=4.0, aoe_radius_mult=10.0,
+                     extra_effect="延迟后全屏毁灭打击，施法者自身受到20%最大生命值伤害"),
+}
 
-    # ---- 三和弦 (3音) ----
-    chords["大三和弦"] = ChordType(
-        "大三和弦", 3, 2.00, "强化弹体", 1.5, 0.05)
-    chords["小三和弦"] = ChordType(
-        "小三和弦", 3, 2.00, "DOT弹体", 0.6, 0.05,
-        dot_total_ratio=1.8)
-    chords["增三和弦"] = ChordType(
-        "增三和弦", 3, 2.00, "爆炸弹体", 0.8, 0.10,
-        explosion_radius_mult=3.0, explosion_dmg_ratio=0.5)
-    chords["减三和弦"] = ChordType(
-        "减三和弦", 3, 4.67, "冲击波", 1.2, 0.20,
-        aoe_radius_mult=5.0)
-    chords["挂留和弦"] = ChordType(
-        "挂留和弦", 3, 1.17, "蓄力弹体", 2.0, 0.02,
-        delay_beats=1.0)
-
-    # ---- 七和弦 (4音) ----
-    chords["属七和弦"] = ChordType(
-        "属七和弦", 4, 3.50, "持续区域", 0.4, 0.15,
-        zone_duration_mult=2.0, zone_tick_ratio=0.4)
-    chords["减七和弦"] = ChordType(
-        "减七和弦", 4, 6.00, "天降打击", 3.0, 0.30,
-        delay_beats=2.0)
-    chords["大七和弦"] = ChordType(
-        "大七和弦", 4, 2.50, "护盾/治疗", 0.0, 0.08,
-        heal_ratio=15.0, shield_ratio=20.0)
-    chords["小七和弦"] = ChordType(
-        "小七和弦", 4, 3.00, "召唤/构造", 0.5, 0.12,
-        summon_duration_mult=3.0, summon_dps_ratio=0.5)
-
-    # ---- 九和弦 (5音) ----
-    chords["属九和弦"] = ChordType(
-        "属九和弦", 5, 5.00, "风暴区域", 0.5, 0.25,
-        zone_duration_mult=2.5, zone_tick_ratio=0.6,
-        is_extended=True,
-        extra_effect="区域内敌人减速30%")
-    chords["大九和弦"] = ChordType(
-        "大九和弦", 5, 3.50, "圣光领域", 0.0, 0.15,
-        heal_ratio=20.0, shield_ratio=25.0,
-        is_extended=True,
-        extra_effect="领域内队友持续回血(2/秒)")
-    chords["小九和弦"] = ChordType(
-        "小九和弦", 5, 4.50, "深渊召唤", 0.7, 0.22,
-        summon_duration_mult=4.0, summon_dps_ratio=0.7,
-        is_extended=True,
-        extra_effect="召唤物具有嘲讽效果")
-    chords["减九和弦"] = ChordType(
-        "减九和弦", 5, 7.50, "湮灭射线", 4.0, 0.40,
-        delay_beats=3.0,
-        is_extended=True,
-        extra_effect="直线贯穿，无视防御")
-
-    # ---- 十一和弦 (5-6音) ----
-    chords["属十一和弦"] = ChordType(
-        "属十一和弦", 5, 6.00, "时空裂隙", 0.6, 0.30,
-        zone_duration_mult=3.0, zone_tick_ratio=0.5,
-        is_extended=True,
-        extra_effect="区域内时间减速50%（敌人攻速/移速减半）")
-    chords["大十一和弦"] = ChordType(
-        "大十一和弦", 5, 4.00, "天穹护罩", 0.0, 0.18,
-        shield_ratio=35.0,
-        is_extended=True,
-        extra_effect="护罩存续期间免疫一次致死伤害")
-
-    # ---- 十三和弦 (6-7音) ----
-    chords["属十三和弦"] = ChordType(
-        "属十三和弦", 6, 7.00, "交响风暴", 1.0, 0.45,
-        zone_duration_mult=4.0, zone_tick_ratio=0.8,
-        aoe_radius_mult=8.0,
-        is_extended=True,
-        extra_effect="全屏持续AOE，每跳附加随机元素效果")
-    chords["减十三和弦"] = ChordType(
-        "减十三和弦", 6, 9.50, "终焉乐章", 5.0, 0.60,
-        delay_beats=4.0, aoe_radius_mult=10.0,
-        is_extended=True,
-        extra_effect="延迟后全屏毁灭打击，施法者自身受到20%最大生命值伤害")
 
+def create_chord_registry() -> dict[str, ChordType]:
+    """
+    创建完整的和弦类型注册表（含扩展和弦）。
+
+    伤害倍率、不和谐度、音数与扩展和弦疲劳取自 music_data.gd，效果参数取自
+    CHORD_EFFECTS；游戏新增而此处尚未映射的和弦按枚举名注册，只计倍率伤害。
+    """
+    chords = {}
+    for key, game in GAME_DATA.chords.items():
+        name = CHORD_NAMES.get(key, key)
+        effects = dict(CHORD_EFFECTS.get(name, {}))
+        fatigue = effects.pop("fatigue_dissonance", 0.0)
+        chords[name] = ChordType(
+            name, game.note_count, game.dissonance, game.spell_name, game.multiplier,
+            game.extended_fatigue if game.extended_fatigue is not None else fatigue,
+            is_extended=game.extended_fatigue is not None,
+            **effects)
     return chords
 
 
@@ -473,12 +449,28 @@ class PlayerBuild:
 
     def get_note_damage(self, note_name: str) -> float:
         """获取音符的实际伤害（含全局加成）。"""
-        note = self.notes[note_name]
-        return (note.total_dmg + self.global_dmg_bonus) * DMG_PER_POINT
+        return self.view().note(note_name).damage
+
+    def view(self) -> "BuildView":
+        """
+        获取当前Build的派生数值视图（缓存，升级后自动失效）。
+
+        notes 字典被整体替换时也会重建视图；直接修改 NoteStats 或全局修正
+        字段后需调用 invalidate_view()。
+        """
+        view = self.__dict__.get("_view")
+        if view is None or view.notes_source is not self.notes:
+            view = self._view = BuildView(self)
+        return view
+
+    def invalidate_view(self):
+        """丢弃缓存的派生数值视图。"""
+        self._view = None
 
     def apply_in_game_upgrade(self, upgrade: Upgrade, level: int = 1,
                               target_note: Optional[str] = None):
         """【局内】应用一个肉鸽升级到Build上。"""
+        self.invalidate_view()
         for key, val in upgrade.effect_per_level.items():
             total = val * level
             if key == "dmg" and target_note:
@@ -533,6 +525,7 @@ class PlayerBuild:
         【架构预留】
         在模拟开始前，应用局外成长系统的永久加成。
         """
+        self.invalidate_view()
         # 应用基础属性加成
         self.max_hp += meta_manager.base_hp_bonus
         self.global_dmg_bonus += (self.notes["C"].base_dmg * (meta_manager.base_damage_multiplier - 1.0))
@@ -548,6 +541,144 @@ class PlayerBuild:
         self.meta_unlocked_chords = meta_manager.unlocked_chords
 
 
+@dataclass(frozen=True)
+class NoteView:
+    """音符在某个Build下的派生数值（含成长加成与全局修正）。"""
+    name: str
+    total_dmg: float
+    total_spd: float
+    total_dur: float
+    total_size: float
+    dmg_with_global: float   # 总DMG参数 + 全局DMG加成
+    damage: float            # 实际伤害（= PlayerBuild.get_note_damage）
+    hit_factor: float
+    effective_range: float
+    coverage_area: float
+    dps: float               # 按Build当前BPM计算的有效DPS（不含疲劳惩罚）
+
+
+@dataclass(frozen=True)
+class ChordView:
+    """和弦在某个Build下的派生数值。"""
+    active: bool             # 已解锁（未解锁的和弦伤害倍率为0）
+    dmg_mult: float          # 基础伤害倍率 + 和弦威力加成
+    dissonance_add: float    # 疲劳不和谐增量 × 和声控制乘数
+
+
+class BuildView:
+    """
+    PlayerBuild 的只读派生数值视图，由 PlayerBuild.view() 创建并缓存。
+
+    创建时固定全局修正；音符与和弦的派生数值在首次查询时计算一次并缓存
+    （按需读取 notes，不会触碰未使用的音符）。模拟器、成长曲线与
+    延迟/射程分析共用同一份数值。
+    """
+
+    def __init__(self, build: PlayerBuild):
+        self.notes_source = build.notes
+        self.beat_interval = build.beat_interval
+        self.global_dmg_bonus = build.global_dmg_bonus
+        self.chord_dmg_bonus = build.chord_dmg_bonus
+        self.chord_dissonance_mult = build.chord_dissonance_mult
+        self.extended_chord_enabled = build.extended_chord_enabled
+        self.meta_unlocked_chords = frozenset(build.meta_unlocked_chords)
+        self._notes: dict[str, NoteView] = {}
+        self._chords: dict[tuple, ChordView] = {}
+
+    def note(self, name: str) -> NoteView:
+        view = self._notes.get(name)
+        if view is None:
+            note = self.notes_source[name]
+            dmg_with_global = note.total_dmg + self.global_dmg_bonus
+            damage = dmg_with_global * DMG_PER_POINT
+            hit_factor = note.hit_factor
+            view = self._notes[name] = NoteView(
+                name=name,
+                total_dmg=note.total_dmg,
+                total_spd=note.total_spd,
+                total_dur=note.total_dur,
+                total_size=note.total_size,
+                dmg_with_global=dmg_with_global,
+                damage=damage,
+                hit_factor=hit_factor,
+                effective_range=note.effective_range,
+                coverage_area=note.coverage_area,
+                dps=damage * hit_factor / self.beat_interval,
+            )
+        return view
+
+    def derive(self, build: PlayerBuild, changed_notes) -> "BuildView":
+        """
+        为在本视图所属Build上叠加了升级的新Build创建视图。
+
+        全局修正不变时，未改动音符与和弦的派生数值直接复用。
+        """
+        view = BuildView(build)
+        if (view.global_dmg_bonus, view.beat_interval) == (self.global_dmg_bonus, self.beat_interval):
+            view._notes = {k: v for k, v in self._notes.items() if k not in changed_notes}
+        if (view.chord_dmg_bonus, view.chord_dissonance_mult, view.extended_chord_enabled,
+                view.meta_unlocked_chords) == (self.chord_dmg_bonus, self.chord_dissonance_mult,
+                                               self.extended_chord_enabled, self.meta_unlocked_chords):
+            view._chords = dict(self._chords)
+        return view
+
+    def chord(self, chord: "ChordType") -> ChordView:
+        key = (chord.name, chord.is_extended, chord.dmg_multiplier, chord.fatigue_dissonance)
+        view = self._chords.get(key)
+        if view is None:
+            is_unlocked = (chord.name in self.meta_unlocked_chords) or \
+                          (chord.is_extended and self.extended_chord_enabled)
+            view = self._chords[key] = ChordView(
+                active=is_unlocked or chord.is_extended or chord.name in {"大三和弦", "小三和弦"},
+                dmg_mult=chord.dmg_multiplier + self.chord_dmg_bonus,
+                dissonance_add=chord.fatigue_dissonance * self.chord_dissonance_mult,
+            )
+        return view
+
+
+class BuildVariant:
+    """
+    写时复制的Build变体：基础Build + 一组叠加的升级。
+
+    扫描大量升级组合时无需 deepcopy 整个Build：物化时只复制被升级指定的
+    音符，其余 NoteStats 与基础Build共享；派生数值视图也从基础Build的
+    视图派生，未改动音符在模拟器编译阶段直接复用。
+
+    基础Build在变体存续期间不应被修改。
+    """
+
+    __slots__ = ("base", "upgrades", "_build")
+
+    def __init__(self, base: PlayerBuild,
+                 upgrades: tuple[tuple[Upgrade, int, Optional[str]], ...] = ()):
+        self.base = base
+        self.upgrades = upgrades
+        self._build: Optional[PlayerBuild] = None
+
+    def with_upgrade(self, upgrade: Upgrade, level: int = 1,
+                     target_note: Optional[str] = None) -> "BuildVariant":
+        """返回多叠加一项升级的新变体（原变体不变）。"""
+        return BuildVariant(self.base, self.upgrades + ((upgrade, level, target_note),))
+
+    @property
+    def touched_notes(self) -> set[str]:
+        return {note for _, _, note in self.upgrades if note is not None}
+
+    def materialize(self) -> PlayerBuild:
+        """构造（并缓存）该变体对应的 PlayerBuild。"""
+        if self._build is None:
+            touched = self.touched_notes
+            build = copy.copy(self.base)
+            build.notes = dict(self.base.notes)
+            for note in touched:
+                build.notes[note] = copy.copy(build.notes[note])
+            for upgrade, level, note in self.upgrades:
+                build.apply_in_game_upgrade(upgrade, level, note)
+            build._view = self.base.view().derive(build, touched)
+            self._build = build
+        return self._build
+
+
 # =============================================================================
 # 第五部分：策略模拟器
 # =============================================================================
@@ -608,8 +739,38 @@ class SimulationResult:
     avg_afi: float = 0.0
     # 综合
     composite_score: float = 0.0
-    # 详细日志
+    # 详细日志（StrategySimulator(log_beats=False) 时为空）
     beat_log: list[dict] = field(default_factory=list)
+    # 逐拍疲劳轨迹：float32，每拍依次为 (单调值, 密度值, 不和谐值)，
+    # 长度 = 拍数 × 3（StrategySimulator(record_trace=True) 时记录，否则为 None）
+    fatigue_trace: Optional[array] = None
+    # 逐拍有效伤害：float64，休止拍为 0（与 fatigue_trace 同时记录；
+    # 和弦的延迟/DOT/区域/召唤在此按施法拍一次性计入，时间展开见 damage_timeline.py）
+    damage_trace: Optional[array] = None
+
+
+@dataclass
+class CompiledStrategy:
+    """
+    预编译的策略动作表（由 StrategySimulator.compile 生成）。
+
+    每列一个列表，下标为拍号；休止拍的 note_idx 为 -1。
+    表中数值已绑定生成它的 Build、和弦注册表与模拟器常量。
+    """
+    note_idx: list[int] = field(default_factory=list)         # 音符编号（按首次出现顺序）
+    base_dmg: list[float] = field(default_factory=list)       # 音符实际伤害（含全局加成）
+    chord_mult: list[float] = field(default_factory=list)     # 和弦伤害倍率
+    mod_mult: list[float] = field(default_factory=list)       # 修饰符伤害倍率
+    dissonance_add: list[float] = field(default_factory=list) # 和弦不和谐增量
+    heal: list[float] = field(default_factory=list)           # 治疗量
+    shield: list[float] = field(default_factory=list)         # 护盾量
+    delay_hit: list[float] = field(default_factory=list)      # 延迟命中率
+    delay_exposure: list[float] = field(default_factory=list) # 延迟空窗期(秒)
+    range_hit: list[float] = field(default_factory=list)      # 射程命中率
+    proximity: list[float] = field(default_factory=list)      # 近身风险
+    label: list[str] = field(default_factory=list)            # 日志中的动作名
+    note_count: int = 0
+    rest_count: int = 0
 
 
 class StrategySimulator:
@@ -644,9 +805,9 @@ class StrategySimulator:
     DELAY_EXPOSURE_RISK = 2.0   # 延迟空窗期每秒风险值
     
     # v2.1 新增：距离风险参数
-    REFERENCE_RANGE = 1260.0    # 参考射程（v2.2: C音符的射程 = 3×200×3×0.7 = 1260像素）
+    REFERENCE_RANGE = create_base_notes()["C"].effective_range  # 参考射程：C音符的射程（像素）
     SIZE_COMP_FACTOR = 0.1      # SIZE补偿因子（每点超出基准SIZE补偿10%）
-    SIZE_COMP_CAP = 0.4         # SIZE补偿上限（v2.2: 从30%提升至40%，配合E音符SIZE=6的极化设计）
+    SIZE_COMP_CAP = 0.4         # SIZE补偿上限（v2.2: 从30%提升至40%；各音符SIZE见 music_data.gd）
     SIZE_BASELINE = 2.0         # SIZE基准值（大多数音符的SIZE）
     PROXIMITY_RISK_WEIGHT = 1.0 # 近身风险权重（每拍）
 
@@ -669,230 +830,411 @@ class StrategySimulator:
         "C#": 2.31, "D#": 1.0, "F#": 2.2, "G#": 2.2, "A#": 1.75
     }
 
-    def __init__(self, build: PlayerBuild, chord_registry: dict[str, ChordType]):
+    # 逐拍疲劳轨迹的维度顺序
+    TRACE_FIELDS = ("monotony", "density", "dissonance")
+
+    def __init__(self, build: PlayerBuild, chord_registry: dict[str, ChordType],
+                 log_beats: bool = True, record_trace: bool = False, hit_table=None):
         self.build = build
         self.chords = chord_registry
+        # 输出内容：逐拍日志（dict 列表，占用大）/ 紧凑的 float32 疲劳轨迹
+        self.log_beats = log_beats
+        self.record_trace = record_trace
+        # 距离命中率来源：None 用解析近似；传入 spatial_encounter.HitRateTable 用空间模拟标定值
+        self.hit_table = hit_table
         # 综合得分权重
         self.w_dps = 0.50
         self.w_survival = 0.25
         self.w_risk = 0.25
 
-    def simulate(self, strategy: StrategyDefinition) -> SimulationResult:
-        """模拟一个策略的完整执行。"""
-        result = SimulationResult(strategy_name=strategy.name)
+    def compile(self, strategy: StrategyDefinition) -> "CompiledStrategy":
+        """
+        把策略编译为逐拍的索引化动作表。
+
+        与疲劳状态无关的量（基础伤害、和弦/修饰符倍率、延迟与射程命中、
+        不和谐增量、治疗/护盾）只取决于 Build、和弦注册表与动作本身，
+        在这里按不同动作各计算一次；simulate 的逐拍循环只处理疲劳状态。
+        """
+        view = self.build.view()
+        note_index: dict[str, int] = {}
+        compiled: dict[tuple, tuple] = {}
+        table = CompiledStrategy()
+
+        for action in strategy.actions:
+            key = (action.note, action.is_chord, action.chord_type, action.is_rest, action.modifier)
+            row = compiled.get(key)
+            if row is None:
+                row = compiled[key] = self._compile_action(action, view)
+            if action.is_rest:
+                table.rest_count += 1
+                note_idx = -1
+            else:
+                note_idx = note_index.setdefault(action.note, len(note_index))
+            table.note_idx.append(note_idx)
+            (base_dmg, chord_mult, mod_mult, dissonance_add, heal, shield, delay_hit,
+             delay_exposure, range_hit, proximity, label) = row
+            table.base_dmg.append(base_dmg)
+            table.chord_mult.append(chord_mult)
+            table.mod_mult.append(mod_mult)
+            table.dissonance_add.append(dissonance_add)
+            table.heal.append(heal)
+            table.shield.append(shield)
+            table.delay_hit.append(delay_hit)
+            table.delay_exposure.append(delay_exposure)
+            table.range_hit.append(range_hit)
+            table.proximity.append(proximity)
+            table.label.append(label)
+
+        table.note_count = len(note_index)
+        return table
+
+    def _compile_action(self, action: StrategyAction, view: BuildView) -> tuple:
+        """计算单个动作与疲劳状态无关的全部数值（见 CompiledStrategy 各列）。"""
+        if action.is_rest:
+            return (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 1.0, 0.0, "REST")
+
+        note_name = action.note
+        note = view.note(note_name)
+        chord = None
+        if action.is_chord and action.chord_type in self.chords:
+            chord = self.chords[action.chord_type]
+
+        chord_mult = 1.0
+        chord_dissonance_add = 0.0
+        heal = shield = 0.0
+        if chord is not None:
+            # 检查和弦是否解锁 (局内或局外)
+            chord_view = view.chord(chord)
+            if not chord_view.active:
+                chord_mult = 0.0 # 未解锁则无效
+            else:
+                chord_mult = chord_view.dmg_mult
+                chord_dissonance_add = chord_view.dissonance_add
+
+                if chord.heal_ratio > 0:
+                    heal = note.dmg_with_global * chord.heal_ratio
+                if chord.shield_ratio > 0:
+                    shield = note.dmg_with_global * chord.shield_ratio
+                if chord.dot_total_ratio > 0:
+                    chord_mult = chord.dot_total_ratio
+                if chord.zone_tick_ratio > 0:
+                    ticks = chord.zone_duration_mult * note.total_dur / 0.5
+                    chord_mult = chord.zone_tick_ratio * ticks
+                if chord.summon_dps_ratio > 0 and chord.zone_tick_ratio == 0:
+                    summon_dur = chord.summon_duration_mult * note.total_dur * DUR_PER_POINT
+                    chord_mult = chord.summon_dps_ratio * summon_dur
+
+        mod_mult = 1.0
+        if action.modifier and action.modifier in self.MODIFIER_MULTIPLIERS:
+            mod_mult = self.MODIFIER_MULTIPLIERS[action.modifier]
+
+        delay_hit = 1.0
+        delay_exposure = 0.0
+        if chord is not None:
+            delay_beats = chord.delay_beats
+            if delay_beats > 0:
+                delay_hit = 1.0 / (1.0 + self.DELAY_PENALTY_RATE * delay_beats)
+                aoe_comp = min(self.AOE_COMP_CAP, chord.aoe_radius_mult * self.AOE_COMP_FACTOR)
+                delay_hit = delay_hit + aoe_comp * (1.0 - delay_hit)
+                delay_exposure = delay_beats * view.beat_interval
+
+        if self.hit_table is not None:
+            range_hit = self.hit_table.range_hit(note, chord)
+        else:
+            range_hit = self.note_range_hit(note)
+            if chord is not None:
+                if chord.aoe_radius_mult > 0 or chord.zone_tick_ratio > 0:
+                    range_hit = min(1.0, range_hit + 0.3)
+        proximity_penalty = max(0, 1.0 - range_hit) * self.PROXIMITY_RISK_WEIGHT
+
+        label = f"{note_name}" + (f"[{action.chord_type}]" if action.is_chord else "") + (f"+{action.modifier}" if action.modifier else "")
+        return (note.damage, chord_mult, mod_mult, chord_dissonance_add, heal, shield,
+                delay_hit, delay_exposure, range_hit, proximity_penalty * view.beat_interval, label)
+
+    def note_range_hit(self, note: NoteView) -> float:
+        """音符的距离命中率：射程因子 + SIZE补偿（不含和弦AOE加成）。"""
+        range_hit = min(1.0, note.effective_range / self.REFERENCE_RANGE)
+        size_comp = min(self.SIZE_COMP_CAP, max(0, note.total_size - self.SIZE_BASELINE) * self.SIZE_COMP_FACTOR)
+        return range_hit + size_comp * (1.0 - range_hit)
+
+    def window_is_periodic(self, beat_interval: float, total_beats: int) -> bool:
+        """
+        密度窗口的进出是否只取决于两次施法相隔的拍数（周期外推的前提）。
+
+        逐拍模拟比较的是浮点时刻之差 i·Δt - j·Δt 与 DENSITY_WINDOW。
+        DENSITY_WINDOW / Δt 恰为（或极接近）整数 m 时，相隔 m 拍的施法是否仍在窗口内
+        取决于两个时刻各自的舍入误差，随绝对拍号变化（如 135 BPM：4秒 = 9拍），
+        状态重复并不意味着后续轨迹重复。Δt 为二进制有限小数（如 120 BPM）时
+        各时刻都是精确值，不受影响。
+        """
+        window = self.DENSITY_WINDOW
+        total_time = total_beats * beat_interval
+        gap = abs(round(window / beat_interval) * beat_interval - window)
+        if gap > 1e-15 * (total_time + window):
+            return True
+        return (beat_interval * (1 << 20)).is_integer() and total_time < 2.0 ** 32
+
+    def simulate(self, strategy: StrategyDefinition, beats: Optional[int] = None) -> SimulationResult:
+        """模拟一个策略的完整执行（beats 指定时循环演奏到该拍数）。"""
+        return self.simulate_compiled(self.compile(strategy), strategy.name, beats)
+
+    def simulate_encounter(self, strategy: StrategyDefinition, duration: float) -> SimulationResult:
+        """按当前BPM循环演奏策略 duration 秒（如一场10分钟的战斗）。"""
+        beats = max(1, round(duration / self.build.beat_interval))
+        return self.simulate_compiled(self.compile(strategy), strategy.name, beats)
+
+    def simulate_compiled(self, table: "CompiledStrategy", strategy_name: str,
+                          beats: Optional[int] = None, detect_cycles: bool = True,
+                          cycle_tolerance: float = 1e-9) -> SimulationResult:
+        """
+        在预编译的动作表上执行逐拍模拟（动作表须由本模拟器的 compile 生成）。
+
+        beats 为 None 时把动作表演奏一遍；否则循环演奏到 beats 拍。
+
+        循环演奏时，疲劳状态（各音符单调值、不和谐值、上一个音符、已用音符集、
+        密度窗口内的施法时刻）通常在若干遍后进入周期。每个相位边界
+        （动作表长度与小节长度的最小公倍数）记录一次状态，与之前某个边界的
+        状态在 cycle_tolerance 内一致时，后续每个周期的累计量增量与峰值都已确定：
+        直接按周期数外推，只逐拍模拟剩余的不足一个周期的部分。
+        密度窗口的判定受浮点舍入影响而不具周期性时（见 window_is_periodic）不做外推。
+        记录逐拍日志（log_beats）时不做外推；疲劳轨迹按周期复制。
+        """
+        result = SimulationResult(strategy_name=strategy_name)
+        log_beats = self.log_beats
+        trace = array("f") if self.record_trace else None
+        damage_trace = array("d") if self.record_trace else None
         build = self.build
+        beat_interval = build.beat_interval
+        monotony_step = self.MONOTONY_PER_REPEAT * build.monotony_rate_mult
+        monotony_decay = build.monotony_decay_rate * beat_interval
+        dissonance_decay = build.dissonance_decay_rate * beat_interval
+        rest_unit = 0.5 + build.rest_charge_bonus
+        afi_amps = [max(1.0, self.AFI_AMPLIFIERS.get(level, 1.0) - build.afi_amplify_reduction)
+                    for level in range(5)]
 
         # 状态变量
-        monotony_per_note: dict[str, float] = {}
+        monotony_per_note = [0.0] * table.note_count
         dissonance = 0.0
-        last_note = ""
+        last_note = -1
         total_damage = 0.0
         total_raw_damage = 0.0
-        total_beats = len(strategy.actions)
+        period = len(table.note_idx)
+        total_beats = period if beats is None or period == 0 else beats
         rest_count_in_measure = 0
         cast_count_in_measure = 0
         unique_notes_used = set()
         event_timestamps = []
-        last_cast_time = -999.0
-        continuous_cast_start = 0.0
-        last_effective_rest = 0.0
+        window_start = 0
         density = 0.0
         afi_level = 0
-
-        for i, action in enumerate(strategy.actions):
-            beat_time = i * build.beat_interval
-            measure_idx = i // 4
-            beat_in_measure = i % 4
-
-            if beat_in_measure == 0:
-                rest_count_in_measure = 0
-                cast_count_in_measure = 0
-
-            beat_info = {
-                "beat": i, "time": round(beat_time, 2),
-                "action": "", "raw_dmg": 0, "eff_dmg": 0,
-                "monotony": 0, "density": round(density, 1),
-                "dissonance": round(dissonance, 1),
-            }
-
-            if action.is_rest:
-                rest_count_in_measure += 1
-                if last_cast_time > 0 and (beat_time - last_cast_time) >= self.EFFECTIVE_REST:
-                    last_effective_rest = beat_time
-                    continuous_cast_start = beat_time
-                beat_info["action"] = "REST"
-                beat_info["density"] = 0
-                result.beat_log.append(beat_info)
-                continue
-
-            cast_count_in_measure += 1
-            note_name = action.note
-            unique_notes_used.add(note_name)
-            
-            if last_cast_time < 0:
-                continuous_cast_start = beat_time
-            last_cast_time = beat_time
-
-            base_dmg = build.get_note_damage(note_name)
-
-            chord_mult = 1.0
-            chord_dissonance_add = 0.0
-            if action.is_chord and action.chord_type in self.chords:
-                chord = self.chords[action.chord_type]
-                
-                # 检查和弦是否解锁 (局内或局外)
-                is_unlocked = (chord.name in build.meta_unlocked_chords) or \
-                              (chord.is_extended and build.extended_chord_enabled)
-                
-                if not is_unlocked and not chord.is_extended and chord.name not in {"大三和弦", "小三和弦"}:
-                    chord_mult = 0.0 # 未解锁则无效
+        peak_eff_dmg = 0.0
+
+        # 循环检测：相位单元 = 动作表长度与小节长度（4拍）的最小公倍数
+        unit = period * 4 // math.gcd(period, 4) if period else 1
+        cycle_check = detect_cycles and not log_beats and total_beats > unit \
+            and self.window_is_periodic(beat_interval, total_beats)
+        boundaries = []   # 各相位边界的 (拍号, 离散状态, 连续状态, 累计量, 轨迹长度)
+
+        i = 0
+        while i < total_beats:
+            if cycle_check and i > 0:
+                # 离散状态 + 密度窗口（以相对拍数表示；已出窗口的施法时刻不再影响结果）
+                window = tuple(i - round(t / beat_interval) for t in event_timestamps[window_start:]
+                               if i * beat_interval - t <= self.DENSITY_WINDOW)
+                discrete = (last_note, afi_level, frozenset(unique_notes_used), window)
+                continuous = (dissonance, *monotony_per_note)
+                totals = (total_damage, total_raw_damage, result.total_healing, result.total_shielding,
+                          result.delay_exposure_time, result.total_delay_discount,
+                          result.total_range_discount, result.proximity_risk,
+                          result.dissonance_damage, result.lockout_beats, result.density_penalty_beats)
+                for start, prev_discrete, prev_continuous, prev_totals, prev_trace in reversed(boundaries):
+                    if prev_discrete != discrete or any(
+                            abs(x - y) > cycle_tolerance for x, y in zip(prev_continuous, continuous)):
+                        continue
+                    cycle = i - start
+                    repeats = (total_beats - i) // cycle
+                    d = [(now - prev) * repeats for now, prev in zip(totals, prev_totals)]
+                    total_damage += d[0]
+                    total_raw_damage += d[1]
+                    result.total_healing += d[2]
+                    result.total_shielding += d[3]
+                    result.delay_exposure_time += d[4]
+                    result.total_delay_discount += d[5]
+                    result.total_range_discount += d[6]
+                    result.proximity_risk += d[7]
+                    result.dissonance_damage += d[8]
+                    result.lockout_beats += d[9]
+                    result.density_penalty_beats += d[10]
+                    if trace is not None:
+                        trace.extend(trace[prev_trace:] * repeats)
+                        damage_trace.extend(damage_trace[prev_trace // 3:] * repeats)
+                    shift = repeats * cycle
+                    event_timestamps = [(round(t / beat_interval) + shift) * beat_interval
+                                        for t in event_timestamps[window_start:]]
+                    window_start = 0
+                    i += shift
+                    cycle_check = False
+                    break
                 else:
-                    chord_mult = chord.dmg_multiplier + build.chord_dmg_bonus
-                    chord_dissonance_add = chord.fatigue_dissonance * build.chord_dissonance_mult
-
-                    if chord.heal_ratio > 0:
-                        heal = (build.notes[note_name].total_dmg + build.global_dmg_bonus) * chord.heal_ratio
-                        result.total_healing += heal
-                    if chord.shield_ratio > 0:
-                        shield = (build.notes[note_name].total_dmg + build.global_dmg_bonus) * chord.shield_ratio
-                        result.total_shielding += shield
-                    if chord.dot_total_ratio > 0:
-                        chord_mult = chord.dot_total_ratio
-                    if chord.zone_tick_ratio > 0:
-                        ticks = chord.zone_duration_mult * build.notes[note_name].total_dur / 0.5
-                        chord_mult = chord.zone_tick_ratio * ticks
-                    if chord.summon_dps_ratio > 0 and chord.zone_tick_ratio == 0:
-                        summon_dur = chord.summon_duration_mult * build.notes[note_name].total_dur * DUR_PER_POINT
-                        chord_mult = chord.summon_dps_ratio * summon_dur
-
-            mod_mult = 1.0
-            if action.modifier and action.modifier in self.MODIFIER_MULTIPLIERS:
-                mod_mult = self.MODIFIER_MULTIPLIERS[action.modifier]
-
-            rest_bonus = rest_count_in_measure * (0.5 + build.rest_charge_bonus)
-            rest_dmg_add = rest_bonus * DMG_PER_POINT
-
-            raw_dmg = (base_dmg + rest_dmg_add) * chord_mult * mod_mult
-            total_raw_damage += raw_dmg
-
-            delay_hit = 1.0
-            delay_beats = 0.0
-            if action.is_chord and action.chord_type in self.chords:
-                chord = self.chords[action.chord_type]
-                delay_beats = chord.delay_beats
-                if delay_beats > 0:
-                    delay_hit = 1.0 / (1.0 + self.DELAY_PENALTY_RATE * delay_beats)
-                    aoe_comp = min(self.AOE_COMP_CAP, chord.aoe_radius_mult * self.AOE_COMP_FACTOR)
-                    delay_hit = delay_hit + aoe_comp * (1.0 - delay_hit)
-                    result.delay_exposure_time += delay_beats * build.beat_interval
-            result.total_delay_discount += (1.0 - delay_hit)
-
-            note_obj = build.notes[note_name]
-            eff_range = note_obj.effective_range
-            range_hit = min(1.0, eff_range / self.REFERENCE_RANGE)
-            size_comp = min(self.SIZE_COMP_CAP, max(0, note_obj.total_size - self.SIZE_BASELINE) * self.SIZE_COMP_FACTOR)
-            range_hit = range_hit + size_comp * (1.0 - range_hit)
-            if action.is_chord and action.chord_type in self.chords:
-                chord = self.chords[action.chord_type]
-                if chord.aoe_radius_mult > 0 or chord.zone_tick_ratio > 0:
-                    range_hit = min(1.0, range_hit + 0.3)
-            result.total_range_discount += (1.0 - range_hit)
-            proximity_penalty = max(0, 1.0 - range_hit) * self.PROXIMITY_RISK_WEIGHT
-            result.proximity_risk += proximity_penalty * build.beat_interval
-
-            note_mono = monotony_per_note.get(note_name, 0.0)
-            afi_amp = max(1.0, self.AFI_AMPLIFIERS.get(afi_level, 1.0) - build.afi_amplify_reduction)
-
-            if note_name == last_note:
-                note_mono += self.MONOTONY_PER_REPEAT * build.monotony_rate_mult * afi_amp
-            else:
-                if last_note:
-                    old_mono = monotony_per_note.get(last_note, 0)
-                    monotony_per_note[last_note] = max(0, old_mono - self.MONOTONY_SWITCH_REDUCTION)
-            note_mono = max(0, note_mono - build.monotony_decay_rate * build.beat_interval)
-            note_mono = min(100, note_mono)
-            monotony_per_note[note_name] = note_mono
-
-            mono_dmg_mult = 1.0
-            if note_mono >= self.MONOTONY_LOCK:
-                mono_dmg_mult = 0.0
-                result.lockout_beats += 1
-            elif note_mono >= self.MONOTONY_SILENCE:
-                mono_dmg_mult = 0.5
-            elif note_mono >= self.MONOTONY_WARN:
-                mono_dmg_mult = 0.85
-
-            event_timestamps.append(beat_time)
-            recent_events = [t for t in event_timestamps if beat_time - t <= self.DENSITY_WINDOW]
-            instant_rate = len(recent_events) / self.DENSITY_WINDOW
-            
-            density_fatigue = max(0, min(1, (instant_rate - self.OPTIMAL_RATE) / (self.MAX_RATE - self.OPTIMAL_RATE)))
-            density_fatigue *= build.density_rate_mult
-            density = density_fatigue * 100
-
-            density_dmg_mult = 1.0
-            if density >= self.DENSITY_CRASH:
-                density_dmg_mult = 0.6
-                result.density_penalty_beats += 1
-            elif density >= self.DENSITY_OVERLOAD:
-                density_dmg_mult = 0.7
-                result.density_penalty_beats += 1
-            elif density >= self.DENSITY_MILD:
-                density_dmg_mult = 0.9
-
-            if chord_dissonance_add > 0:
-                dissonance += chord_dissonance_add * 100 * build.dissonance_rate_mult * afi_amp
-                for n in monotony_per_note:
-                    monotony_per_note[n] = max(0, monotony_per_note[n] - 10)
-            else:
-                dissonance = max(0, dissonance - self.DISSONANCE_HARMONY_REDUCTION)
-            dissonance = max(0, dissonance - build.dissonance_decay_rate * build.beat_interval)
-            dissonance = min(100, dissonance)
-
-            dissonance_hp_loss = 0.0
-            density_amplifier = 1.5 if density >= self.DENSITY_OVERLOAD else 1.0
-            if dissonance >= self.DISSONANCE_DANGER:
-                dissonance_hp_loss = 6.0 * build.beat_interval * density_amplifier
-            elif dissonance >= self.DISSONANCE_CORRODE:
-                dissonance_hp_loss = 3.0 * build.beat_interval * density_amplifier
-            elif dissonance >= self.DISSONANCE_PAIN:
-                dissonance_hp_loss = 1.0 * build.beat_interval * density_amplifier
-            result.dissonance_damage += dissonance_hp_loss
-
-            eff_dmg = raw_dmg * mono_dmg_mult * density_dmg_mult * delay_hit * range_hit
-            total_damage += eff_dmg
-
-            result.peak_monotony = max(result.peak_monotony, note_mono)
-            result.peak_density = max(result.peak_density, density)
-            result.peak_dissonance = max(result.peak_dissonance, dissonance)
-
-            last_note = note_name
-
-            beat_info["action"] = f"{note_name}" + (f"[{action.chord_type}]" if action.is_chord else "") + (f"+{action.modifier}" if action.modifier else "")
-            beat_info["raw_dmg"] = round(raw_dmg, 1)
-            beat_info["eff_dmg"] = round(eff_dmg, 1)
-            beat_info["monotony"] = round(note_mono, 1)
-            beat_info["density"] = round(density, 1)
-            beat_info["dissonance"] = round(dissonance, 1)
-            beat_info["delay_hit"] = round(delay_hit, 3)
-            beat_info["range_hit"] = round(range_hit, 3)
-            result.beat_log.append(beat_info)
-
-            diversity_ratio = len(unique_notes_used) / 7.0
-            afi_level = max(0, int(4 * (1 - diversity_ratio)))
-
-        total_time = total_beats * build.beat_interval
+                    boundaries.append((i, discrete, continuous, totals,
+                                       len(trace) if trace is not None else 0))
+                if i >= total_beats:
+                    break
+
+            segment_end = min(total_beats, i + unit) if cycle_check else total_beats
+            for i in range(i, segment_end):
+                k = i % period
+                note_idx = table.note_idx[k]
+                beat_time = i * beat_interval
+                beat_in_measure = i % 4
+
+                if beat_in_measure == 0:
+                    rest_count_in_measure = 0
+                    cast_count_in_measure = 0
+
+                if note_idx < 0:
+                    rest_count_in_measure += 1
+                    if log_beats:
+                        result.beat_log.append({
+                            "beat": i, "time": round(beat_time, 2),
+                            "action": "REST", "raw_dmg": 0, "eff_dmg": 0,
+                            "monotony": 0, "density": 0,
+                            "dissonance": round(dissonance, 1),
+                        })
+                    if trace is not None:
+                        trace.extend((0.0, 0.0, dissonance))
+                        damage_trace.append(0.0)
+                    continue
+
+                cast_count_in_measure += 1
+                unique_notes_used.add(note_idx)
+
+                result.total_healing += table.heal[k]
+                result.total_shielding += table.shield[k]
+
+                rest_bonus = rest_count_in_measure * rest_unit
+                rest_dmg_add = rest_bonus * DMG_PER_POINT
+
+                raw_dmg = (table.base_dmg[k] + rest_dmg_add) * table.chord_mult[k] * table.mod_mult[k]
+                total_raw_damage += raw_dmg
+
+                delay_hit = table.delay_hit[k]
+                result.delay_exposure_time += table.delay_exposure[k]
+                result.total_delay_discount += (1.0 - delay_hit)
+
+                range_hit = table.range_hit[k]
+                result.total_range_discount += (1.0 - range_hit)
+                result.proximity_risk += table.proximity[k]
+
+                note_mono = monotony_per_note[note_idx]
+                afi_amp = afi_amps[afi_level]
+
+                if note_idx == last_note:
+                    note_mono += monotony_step * afi_amp
+                else:
+                    if last_note >= 0:
+                        old_mono = monotony_per_note[last_note]
+                        monotony_per_note[last_note] = max(0, old_mono - self.MONOTONY_SWITCH_REDUCTION)
+                note_mono = max(0, note_mono - monotony_decay)
+                note_mono = min(100, note_mono)
+                monotony_per_note[note_idx] = note_mono
+
+                mono_dmg_mult = 1.0
+                if note_mono >= self.MONOTONY_LOCK:
+                    mono_dmg_mult = 0.0
+                    result.lockout_beats += 1
+                elif note_mono >= self.MONOTONY_SILENCE:
+                    mono_dmg_mult = 0.5
+                elif note_mono >= self.MONOTONY_WARN:
+                    mono_dmg_mult = 0.85
+
+                event_timestamps.append(beat_time)
+                density_window = self.DENSITY_WINDOW
+                while window_start < len(event_timestamps) and \
+                        beat_time - event_timestamps[window_start] > density_window:
+                    window_start += 1
+                instant_rate = (len(event_timestamps) - window_start) / density_window
+
+                density_fatigue = max(0, min(1, (instant_rate - self.OPTIMAL_RATE) / (self.MAX_RATE - self.OPTIMAL_RATE)))
+                density_fatigue *= build.density_rate_mult
+                density = density_fatigue * 100
+
+                density_dmg_mult = 1.0
+                if density >= self.DENSITY_CRASH:
+                    density_dmg_mult = 0.6
+                    result.density_penalty_beats += 1
+                elif density >= self.DENSITY_OVERLOAD:
+                    density_dmg_mult = 0.7
+                    result.density_penalty_beats += 1
+                elif density >= self.DENSITY_MILD:
+                    density_dmg_mult = 0.9
+
+                chord_dissonance_add = table.dissonance_add[k]
+                if chord_dissonance_add > 0:
+                    dissonance += chord_dissonance_add * 100 * build.dissonance_rate_mult * afi_amp
+                    for n in range(table.note_count):
+                        monotony_per_note[n] = max(0, monotony_per_note[n] - 10)
+                else:
+                    dissonance = max(0, dissonance - self.DISSONANCE_HARMONY_REDUCTION)
+                dissonance = max(0, dissonance - dissonance_decay)
+                dissonance = min(100, dissonance)
+
+                dissonance_hp_loss = 0.0
+                density_amplifier = 1.5 if density >= self.DENSITY_OVERLOAD else 1.0
+                if dissonance >= self.DISSONANCE_DANGER:
+                    dissonance_hp_loss = 6.0 * beat_interval * density_amplifier
+                elif dissonance >= self.DISSONANCE_CORRODE:
+                    dissonance_hp_loss = 3.0 * beat_interval * density_amplifier
+                elif dissonance >= self.DISSONANCE_PAIN:
+                    dissonance_hp_loss = 1.0 * beat_interval * density_amplifier
+                result.dissonance_damage += dissonance_hp_loss
+
+                eff_dmg = raw_dmg * mono_dmg_mult * density_dmg_mult * delay_hit * range_hit
+                total_damage += eff_dmg
+
+                result.peak_monotony = max(result.peak_monotony, note_mono)
+                result.peak_density = max(result.peak_density, density)
+                result.peak_dissonance = max(result.peak_dissonance, dissonance)
+
+                last_note = note_idx
+
+                peak_eff_dmg = max(peak_eff_dmg, round(eff_dmg, 1))
+                if log_beats:
+                    result.beat_log.append({
+                        "beat": i, "time": round(beat_time, 2),
+                        "action": table.label[k],
+                        "raw_dmg": round(raw_dmg, 1),
+                        "eff_dmg": round(eff_dmg, 1),
+                        "monotony": round(note_mono, 1),
+                        "density": round(density, 1),
+                        "dissonance": round(dissonance, 1),
+                        "delay_hit": round(delay_hit, 3),
+                        "range_hit": round(range_hit, 3),
+                    })
+                if trace is not None:
+                    trace.extend((note_mono, density, dissonance))
+                    damage_trace.append(eff_dmg)
+
+                diversity_ratio = len(unique_notes_used) / 7.0
+                afi_level = max(0, int(4 * (1 - diversity_ratio)))
+            i = segment_end
+
+        total_time = total_beats * beat_interval
         result.raw_dps = total_raw_damage / total_time if total_time > 0 else 0
         result.effective_dps = total_damage / total_time if total_time > 0 else 0
         result.sustained_dps = result.effective_dps
-        result.burst_dps = max((b.get("eff_dmg", 0) for b in result.beat_log if b.get("eff_dmg", 0) > 0), default=0) / build.beat_interval
+        result.burst_dps = peak_eff_dmg / build.beat_interval
+        result.fatigue_trace = trace
+        result.damage_trace = damage_trace
 
         heal_score = min(100, (result.total_healing / build.max_hp) * 50)
         shield_score = min(100, (result.total_shielding / build.max_hp) * 50)
         dodge_score = build.dodge_chance * 200
         result.survival_score = min(100, heal_score + shield_score + dodge_score)
 
-        cast_beats = max(1, total_beats - sum(1 for a in strategy.actions if a.is_rest))
+        rest_beats = (total_beats // period) * table.rest_count \
+            + sum(1 for k in range(total_beats % period) if table.note_idx[k] < 0) if period else 0
+        cast_beats = max(1, total_beats - rest_beats)
         result.avg_range_factor = 1.0 - (result.total_range_discount / cast_beats) if cast_beats > 0 else 1.0
 
         hp_loss_ratio = min(1.0, result.dissonance_damage / build.max_hp)
@@ -1066,10 +1408,17 @@ def run_full_benchmark(
     build: PlayerBuild = None,
     strategies: list[StrategyDefinition] = None,
     chord_registry: dict[str, ChordType] = None,
-    meta_manager: Optional[MetaProgressionManager] = None
+    meta_manager: Optional[MetaProgressionManager] = None,
+    cache=None,
+    log_beats: bool = True,
+    record_trace: bool = False,
+    hit_table=None
 ) -> list[SimulationResult]:
     """
     执行完整的跑分基准测试。
+
+    cache 为可选的 sim_cache.SimulationCache，提供时相同 (Build, 策略) 组合
+    直接复用已缓存的结果。log_beats / record_trace / hit_table 见 StrategySimulator。
     """
     if build is None:
         build = PlayerBuild()
@@ -1083,12 +1432,18 @@ def run_full_benchmark(
     if chord_registry is None:
         chord_registry = create_chord_registry()
 
-    simulator = StrategySimulator(build, chord_registry)
+    simulator = StrategySimulator(build, chord_registry, log_beats=log_beats,
+                                  record_trace=record_trace, hit_table=hit_table)
     results = []
 
-    for strategy in strategies:
-        result = simulator.simulate(strategy)
-        results.append(result)
+    if cache is not None:
+        context = cache.context_key(simulator)
+        for strategy in strategies:
+            results.append(cache.simulate(simulator, strategy, context))
+    else:
+        for strategy in strategies:
+            result = simulator.simulate(strategy)
+            results.append(result)
 
     results.sort(key=lambda r: r.composite_score, reverse=True)
     return results
@@ -1118,6 +1473,7 @@ def print_benchmark_report(results: list[SimulationResult], title: str = "跑分
 
 if __name__ == "__main__":
     import sys
+    from sim_cache import SimulationCache
 
     print()
     print("╔══════════════════════════════════════════════════════════════════════════╗")
@@ -1127,12 +1483,14 @@ if __name__ == "__main__":
 
     chord_registry = create_chord_registry()
     strategies = create_strategy_library()
+    cache = SimulationCache()
 
     # ---- 场景A: 初始Build (无任何局内或局外升级) ----
     results_base = run_full_benchmark(
         build=PlayerBuild(), 
         strategies=strategies, 
-        chord_registry=chord_registry
+        chord_registry=chord_registry,
+        cache=cache
     )
     print_benchmark_report(results_base, "场景A: 初始Build 跑分报告")
 
@@ -1145,7 +1503,8 @@ if __name__ == "__main__":
     build_mid.apply_in_game_upgrade(upgrade_map["monotony_tolerance"], 2)
     build_mid.apply_in_game_upgrade(upgrade_map["chord_dmg"], 2)
     build_mid.apply_in_game_upgrade(upgrade_map["hp_boost"], 3)
-    results_mid = run_full_benchmark(build=build_mid, strategies=strategies, chord_registry=chord_registry)
+    results_mid = run_full_benchmark(build=build_mid, strategies=strategies, chord_registry=chord_registry,
+                                     cache=cache)
     print_benchmark_report(results_mid, "场景B: 中期Build (仅局内升级) 跑分报告")
 
     # ---- 场景C: 【新增】满级局外成长Build (无局内升级) ----
@@ -1155,7 +1514,8 @@ if __name__ == "__main__":
         build=build_meta, 
         strategies=strategies, 
         chord_registry=chord_registry, 
-        meta_manager=meta_manager_full
+        meta_manager=meta_manager_full,
+        cache=cache
     )
     print_benchmark_report(results_meta, "场景C: 满级局外成长Build 跑分报告")
 
@@ -1173,8 +1533,10 @@ if __name__ == "__main__":
         build=build_late, 
         strategies=strategies, 
         chord_registry=chord_registry, 
-        meta_manager=meta_manager_full
+        meta_manager=meta_manager_full,
+        cache=cache
     )
     print_benchmark_report(results_late, "场景D: 毕业Build (满级局外+后期局内) 跑分报告")
 
+    print(f"模拟缓存: {cache.stats}")
     print("\n所有跑分场景执行完毕。")
@@ -0,0 +1,452 @@
+"""
+=============================================================================
+Project Harmony — 局内升级分配优化器 (Build Optimizer)
+=============================================================================
+
+本模块在 create_upgrade_pool() 定义的升级空间上搜索最优的局内升级分配，
+回答"在给定升级次数预算下，每种策略能达到的最高综合得分是多少"。
+
+搜索方法：
+    - 集束搜索 (Beam Search)：逐级加点，每层保留得分最高的若干分配，
+      速度快，用于快速给出近似最优解，并作为分支定界的初始下界。
+    - 分支定界 (Branch and Bound)：按升级槽位逐个枚举等级，
+      用"乐观Build"的综合得分作为上界剪枝，给出预算内的精确 Top-K。
+
+上界的构造：
+    除 BPM 与生命强化外，模拟器读取的每个升级都只会让综合得分变好
+    （伤害/射程/耐受/消散/闪避越高越好），因此对剩余槽位中的这些升级
+    同时加满剩余预算得到"乐观Build"，其得分不低于任何补全分配。
+    BPM 同时提高DPS和疲劳，不单调，故对其每个可达等级各评估一次取最大值；
+    生命强化降低生存分但也降低扣血风险，故生存分按当前生命计算、
+    扣血风险按可达最大生命计算。
+
+缓存：
+    - 部分Build按分配键缓存，子节点只在父Build上增量加一级。
+    - 模拟结果存入 sim_cache.SimulationCache（按 Build/策略内容指纹寻址），
+      不同分配若产出相同数值（例如被钳位的耐受升级）直接复用。
+
+用法：
+    python3 BalanceKit/build_optimizer.py [预算] [Top-K]
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import copy
+import time
+from dataclasses import dataclass, replace
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from balance_scorer import (
+    PlayerBuild, StrategySimulator, StrategyDefinition, SimulationResult,
+    ChordType, Upgrade, MetaProgressionManager,
+    create_upgrade_pool, create_chord_registry, create_strategy_library,
+)
+from sim_cache import (
+    SimulationCache, simulation_key, context_fingerprint,
+    chord_registry_fingerprint, simulator_fingerprint,
+)
+
+
+# =============================================================================
+# 第一部分：升级槽位
+# =============================================================================
+
+# 需要指定目标音符的效果键
+NOTE_TARGETED_KEYS = {"dmg", "spd", "dur", "size"}
+
+# 模拟器不读取的效果键（对应升级不影响跑分，搜索时跳过）
+UNSIMULATED_KEYS = {
+    "density_decay_bonus",
+    "rest_density_reduction_bonus",
+    "rhythm_fatigue_recovery",
+    "progression_bonus",
+    "resolution_reduction_bonus",
+    "hp_regen_bonus",
+}
+
+# 对综合得分不单调的效果键（上界计算中单独处理）
+NON_MONOTONE_KEYS = {"bpm_bonus", "max_hp_bonus"}
+
+
+@dataclass(frozen=True)
+class UpgradeSlot:
+    """一个可加点的升级槽位：升级项 + 目标音符（非音符升级为 None）。"""
+    upgrade_id: str
+    target_note: Optional[str]
+    max_level: int
+
+    @property
+    def label(self) -> str:
+        return f"{self.upgrade_id}@{self.target_note}" if self.target_note else self.upgrade_id
+
+
+def create_upgrade_slots(
+    upgrade_pool: list[Upgrade],
+    notes: Optional[set[str]] = None,
+    max_rarity: int = 4,
+) -> list[UpgradeSlot]:
+    """
+    将升级池展开为槽位列表。
+
+    音符升级按目标音符展开（每个音符独立计算等级上限）；
+    notes 给定时只展开这些音符，用于排除策略中从未使用的音符。
+    """
+    if notes is None:
+        notes = {"C", "D", "E", "F", "G", "A", "B"}
+    slots = []
+    for upg in upgrade_pool:
+        keys = set(upg.effect_per_level)
+        if upg.rarity > max_rarity or keys <= UNSIMULATED_KEYS:
+            continue
+        if keys & NOTE_TARGETED_KEYS:
+            for note in sorted(notes):
+                slots.append(UpgradeSlot(upg.id, note, upg.max_level))
+        else:
+            slots.append(UpgradeSlot(upg.id, None, upg.max_level))
+    return slots
+
+
+def strategy_notes(strategy: StrategyDefinition) -> set[str]:
+    """策略中实际施放过的音符集合。"""
+    return {a.note for a in strategy.actions if not a.is_rest and a.note}
+
+
+# =============================================================================
+# 第二部分：搜索结果
+# =============================================================================
+
+Allocation = tuple[tuple[UpgradeSlot, int], ...]
+
+
+@dataclass
+class BuildCandidate:
+    """一个候选升级分配及其跑分结果。"""
+    allocation: Allocation
+    score: float
+    result: SimulationResult
+
+    @property
+    def total_levels(self) -> int:
+        return sum(lv for _, lv in self.allocation)
+
+    def describe(self) -> str:
+        if not self.allocation:
+            return "(无升级)"
+        return ", ".join(f"{slot.label}×{lv}" for slot, lv in self.allocation)
+
+
+@dataclass
+class SearchStats:
+    """搜索过程统计。"""
+    evaluations: int = 0
+    cache_hits: int = 0
+    nodes: int = 0
+    pruned: int = 0
+    truncated: bool = False
+    elapsed: float = 0.0
+
+
+# =============================================================================
+# 第三部分：优化器
+# =============================================================================
+
+class BuildOptimizer:
+    """
+    局内升级分配优化器。
+
+    对每个策略独立搜索：同一分配在不同策略下的得分差异很大，
+    统一搜索只会偏向"平均最好"的分配。
+    """
+
+    def __init__(self,
+                 chord_registry: Optional[dict[str, ChordType]] = None,
+                 upgrade_pool: Optional[list[Upgrade]] = None,
+                 meta_manager: Optional[MetaProgressionManager] = None,
+                 max_rarity: int = 4,
+                 cache: Optional[SimulationCache] = None):
+        self.chords = chord_registry if chord_registry is not None else create_chord_registry()
+        self.upgrades = {u.id: u for u in (upgrade_pool or create_upgrade_pool())}
+        self.meta_manager = meta_manager
+        self.max_rarity = max_rarity
+        self.stats = SearchStats()
+        self._build_cache: dict[Allocation, PlayerBuild] = {}
+        self.cache = cache if cache is not None else SimulationCache(maxsize=200_000)
+        self._static_fingerprints = (
+            chord_registry_fingerprint(self.chords),
+            simulator_fingerprint(StrategySimulator(PlayerBuild(), self.chords)),
+        )
+
+    # ---- Build 构造 ----
+
+    def _materialize(self, allocation: Allocation) -> PlayerBuild:
+        """按分配构造局内Build（不含局外加成），复用已缓存的父分配。"""
+        cached = self._build_cache.get(allocation)
+        if cached is not None:
+            return cached
+        if not allocation:
+            build = PlayerBuild()
+        else:
+            slot = allocation[-1][0]
+            build = copy.deepcopy(self._materialize(_step_down(allocation)))
+            upg = self.upgrades[slot.upgrade_id]
+            build.apply_in_game_upgrade(upg, 1, slot.target_note)
+        self._build_cache[allocation] = build
+        return build
+
+    def _finalize(self, build: PlayerBuild) -> PlayerBuild:
+        """在局内Build上叠加局外成长（如有）。"""
+        if self.meta_manager is None:
+            return build
+        final = copy.deepcopy(build)
+        final.apply_meta_upgrades(self.meta_manager)
+        return final
+
+    def _optimistic(self, build: PlayerBuild, slots: list[UpgradeSlot],
+                    levels: dict[UpgradeSlot, int], budget: int,
+                    bpm_levels: int) -> tuple[PlayerBuild, float]:
+        """
+        构造乐观Build：BPM 加 bpm_levels 级，其余单调升级同时加满剩余预算。
+
+        返回 (乐观Build, 剩余预算内可达的额外最大生命)。
+        """
+        opt = copy.deepcopy(build)
+        budget -= bpm_levels
+        hp_gain = 0.0
+        for slot in slots:
+            upg = self.upgrades[slot.upgrade_id]
+            keys = set(upg.effect_per_level)
+            room = slot.max_level - levels.get(slot, 0)
+            if "bpm_bonus" in keys:
+                if bpm_levels > 0:
+                    opt.apply_in_game_upgrade(upg, bpm_levels, slot.target_note)
+            elif "max_hp_bonus" in keys:
+                hp_gain += upg.effect_per_level["max_hp_bonus"] * min(budget, room)
+            elif not keys & NON_MONOTONE_KEYS and min(budget, room) > 0:
+                opt.apply_in_game_upgrade(upg, min(budget, room), slot.target_note)
+        return opt, hp_gain
+
+    # ---- 评估 ----
+
+    def evaluate(self, build: PlayerBuild, strategy: StrategyDefinition) -> SimulationResult:
+        """
+        评估一个局内Build在策略下的表现（结果按数值指纹缓存）。
+
+        与 SimulationCache.simulate 一致，返回缓存结果的浅拷贝，
+        strategy_name 取当前策略名（内容相同的策略共用一个缓存条目）。
+        """
+        final = self._finalize(build)
+        simulator = StrategySimulator(final, self.chords, log_beats=False)
+        context = context_fingerprint(simulator, *self._static_fingerprints)
+        key = simulation_key(simulator, strategy, context)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats.cache_hits += 1
+        else:
+            self.stats.evaluations += 1
+            cached = simulator.simulate(strategy)
+            self.cache.put(key, cached)
+        return replace(cached, strategy_name=strategy.name)
+
+    def upper_bound(self, build: PlayerBuild, strategy: StrategyDefinition,
+                    slots: list[UpgradeSlot], levels: dict[UpgradeSlot, int],
+                    budget: int) -> float:
+        """剩余预算下任意补全分配的综合得分上界。"""
+        bpm_room = 0
+        for slot in slots:
+            if "bpm_bonus" in self.upgrades[slot.upgrade_id].effect_per_level:
+                bpm_room = min(budget, slot.max_level - levels.get(slot, 0))
+        bound = float("-inf")
+        for bpm_levels in range(bpm_room + 1):
+            opt, hp_gain = self._optimistic(build, slots, levels, budget, bpm_levels)
+            final = self._finalize(opt)
+            sim = StrategySimulator(final, self.chords, log_beats=False)
+            result = sim.simulate(strategy)
+            # 扣血风险按可达最大生命重新计算（风险分其余分量不变）
+            hp_term = min(1.0, result.dissonance_damage / final.max_hp) * 30
+            best_hp_term = min(1.0, result.dissonance_damage / (final.max_hp + hp_gain)) * 30
+            score = result.composite_score + sim.w_risk * (hp_term - best_hp_term)
+            bound = max(bound, score)
+        return bound
+
+    # ---- 集束搜索 ----
+
+    def beam_search(self, strategy: StrategyDefinition, budget: int,
+                    beam_width: int = 16, top_k: int = 5) -> list[BuildCandidate]:
+        """
+        集束搜索：每层对束内每个分配尝试所有槽位 +1 级，保留得分最高的 beam_width 个。
+
+        预算内所有深度的分配都参与 Top-K 排名（加点并不总是提高得分）。
+        """
+        start = time.perf_counter()
+        slots = create_upgrade_slots(list(self.upgrades.values()),
+                                     strategy_notes(strategy), self.max_rarity)
+        root: Allocation = ()
+        best: dict[Allocation, BuildCandidate] = {}
+        best[root] = self._candidate(root, strategy)
+        beam = [root]
+
+        for _ in range(budget):
+            children: dict[Allocation, BuildCandidate] = {}
+            for alloc in beam:
+                levels = dict(alloc)
+                for slot in slots:
+                    if levels.get(slot, 0) >= slot.max_level:
+                        continue
+                    child = _step_up(alloc, slot)
+                    if child in children or child in best:
+                        continue
+                    self.stats.nodes += 1
+                    children[child] = self._candidate(child, strategy)
+            if not children:
+                break
+            ranked = sorted(children.values(), key=lambda c: c.score, reverse=True)
+            beam = [c.allocation for c in ranked[:beam_width]]
+            for c in ranked[:max(beam_width, top_k)]:
+                best[c.allocation] = c
+
+        self.stats.elapsed += time.perf_counter() - start
+        return sorted(best.values(), key=lambda c: c.score, reverse=True)[:top_k]
+
+    # ---- 分支定界 ----
+
+    def branch_and_bound(self, strategy: StrategyDefinition, budget: int,
+                         top_k: int = 5, incumbent: Optional[list[BuildCandidate]] = None,
+                         max_nodes: int = 20_000) -> list[BuildCandidate]:
+        """
+        分支定界：按槽位顺序逐个决定等级，上界不超过当前第K名时剪枝。
+
+        incumbent 为已知的可行解（通常来自集束搜索），用于一开始就收紧下界。
+        超过 max_nodes 时提前停止，stats.truncated 置位，此时结果不保证最优。
+        """
+        start = time.perf_counter()
+        slots = create_upgrade_slots(list(self.upgrades.values()),
+                                     strategy_notes(strategy), self.max_rarity)
+        top: dict[Allocation, BuildCandidate] = {}
+        node_limit = self.stats.nodes + max_nodes
+        for c in incumbent or []:
+            top[c.allocation] = c
+
+        def threshold() -> float:
+            if len(top) < top_k:
+                return float("-inf")
+            return sorted(c.score for c in top.values())[-top_k]
+
+        def record(cand: BuildCandidate):
+            top[cand.allocation] = cand
+            if len(top) > top_k:
+                worst = min(top.values(), key=lambda c: c.score)
+                del top[worst.allocation]
+
+        def visit(idx: int, remaining: int, levels: dict[UpgradeSlot, int],
+                  build: PlayerBuild):
+            if self.stats.nodes >= node_limit:
+                self.stats.truncated = True
+                return
+            self.stats.nodes += 1
+            alloc = _canonical(levels)
+            if idx == len(slots) or remaining == 0:
+                if alloc not in top:
+                    record(self._candidate(alloc, strategy, build))
+                return
+            bound = self.upper_bound(build, strategy, slots[idx:], levels, remaining)
+            if bound <= threshold():
+                self.stats.pruned += 1
+                return
+            slot = slots[idx]
+            upg = self.upgrades[slot.upgrade_id]
+            for lv in range(min(slot.max_level, remaining), -1, -1):
+                if lv == 0:
+                    visit(idx + 1, remaining, levels, build)
+                    continue
+                child = copy.deepcopy(build)
+                child.apply_in_game_upgrade(upg, lv, slot.target_note)
+                levels[slot] = lv
+                visit(idx + 1, remaining - lv, levels, child)
+                del levels[slot]
+
+        visit(0, budget, {}, PlayerBuild())
+        self.stats.elapsed += time.perf_counter() - start
+        return sorted(top.values(), key=lambda c: c.score, reverse=True)
+
+    # ---- 批量入口 ----
+
+    def optimize_all(self, strategies: list[StrategyDefinition], budget: int,
+                     top_k: int = 5, beam_width: int = 16,
+                     exact: bool = True, max_nodes: int = 20_000
+                     ) -> dict[str, list[BuildCandidate]]:
+        """对每个策略先集束搜索，再（可选）用分支定界求精确 Top-K。"""
+        results = {}
+        for strategy in strategies:
+            found = self.beam_search(strategy, budget, beam_width, top_k)
+            if exact:
+                found = self.branch_and_bound(strategy, budget, top_k, found, max_nodes)
+            results[strategy.name] = found
+        return results
+
+    def _candidate(self, alloc: Allocation, strategy: StrategyDefinition,
+                   build: Optional[PlayerBuild] = None) -> BuildCandidate:
+        if build is None:
+            build = self._materialize(alloc)
+        result = self.evaluate(build, strategy)
+        return BuildCandidate(alloc, result.composite_score, result)
+
+
+# =============================================================================
+# 第四部分：分配键工具函数
+# =============================================================================
+
+def _canonical(levels: dict[UpgradeSlot, int]) -> Allocation:
+    """将槽位等级映射转换为规范化（排序、去零）的分配键。"""
+    return tuple(sorted(((s, lv) for s, lv in levels.items() if lv > 0),
+                        key=lambda item: (item[0].upgrade_id, item[0].target_note or "")))
+
+
+def _step_up(alloc: Allocation, slot: UpgradeSlot) -> Allocation:
+    levels = dict(alloc)
+    levels[slot] = levels.get(slot, 0) + 1
+    return _canonical(levels)
+
+
+def _step_down(alloc: Allocation) -> Allocation:
+    """去掉最后一个槽位的一级，得到父分配。"""
+    levels = dict(alloc)
+    slot = alloc[-1][0]
+    levels[slot] -= 1
+    return _canonical(levels)
+
+
+# =============================================================================
+# 第五部分：主执行入口
+# =============================================================================
+
+def print_optimizer_report(results: dict[str, list[BuildCandidate]], budget: int,
+                           stats: SearchStats):
+    """打印每个策略的 Top-K 升级分配。"""
+    print(f"\n{'=' * 100}")
+    print(f"  升级分配优化报告 (预算 {budget} 级)")
+    print(f"{'=' * 100}")
+    for name, candidates in results.items():
+        print(f"  [{name}]")
+        for rank, c in enumerate(candidates, 1):
+            r = c.result
+            print(f"    {rank}. 综合 {c.score:6.1f} | 有效DPS {r.effective_dps:6.1f} | "
+                  f"生存 {r.survival_score:5.1f} | 风险 {r.risk_score:5.1f} | {c.describe()}")
+    print(f"{'-' * 100}")
+    print(f"  模拟 {stats.evaluations} 次 | 缓存命中 {stats.cache_hits} 次 | "
+          f"节点 {stats.nodes} | 剪枝 {stats.pruned} | 耗时 {stats.elapsed:.1f}s"
+          + (" | 节点数达到上限，结果可能非最优" if stats.truncated else ""))
+    print(f"{'=' * 100}\n")
+
+
+if __name__ == "__main__":
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    top_k = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    optimizer = BuildOptimizer()
+    results = optimizer.optimize_all(create_strategy_library(), budget, top_k)
+    print_optimizer_report(results, budget, optimizer.stats)
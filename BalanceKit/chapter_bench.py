@@ -0,0 +1,335 @@
+"""
+=============================================================================
+Project Harmony — 章节波次跑分 (Chapter Wave Benchmark)
+=============================================================================
+
+其余跑分都在"空场"里评估策略：只看 DPS 与疲劳，不看敌人。本模块从
+godot_project 读取真实的章节与敌人数据（gd_constants 解析，按文件哈希缓存）：
+
+    - chapter_data.gd：CHAPTERS（BPM、波次模板）、CHAPTER_ENEMY_STATS
+    - enemy_spawner.gd：ENEMY_TYPE_DATA（基础五种敌人）
+    - elites/*.gd：精英的 max_hp
+
+按 enemy_spawner.gd 的规则重放每章的全部模板波次：波次预算 =
+enemy_count_base × 刷怪倍率 × 波次类型系数，每 spawn_interval 秒刷一批，
+敌人生命值按 chapter_manager.get_difficulty_multiplier 随章节与时间增长；
+预算刷完且场上清空、或满 20 秒时波次结束，休息 3 秒后进入下一波。
+
+玩家伤害来自 damage_timeline 的离散事件时间线（延迟、DOT、区域按真实
+落地时刻计入），按章节 BPM 演奏。单目标集火：按刷出顺序逐个击杀，
+击杀一个敌人后溢出的伤害作废（计入"溢出伤害"），场上没有敌人时打出的
+伤害同样作废（单独计入"空场伤害"）。得到每章清场时间
+（最后一个模板波次的敌人全部死亡的时刻）。
+
+策略 × Build × 章节的组合按 (Build, 章节) 分组在多个进程中并行；
+刷怪随机数按 (种子, 章节, 波次) 派生，所有策略面对同一套刷怪序列。
+
+用法：
+    python3 BalanceKit/chapter_bench.py                # 三阶段 Build × 全部章节
+    python3 BalanceKit/chapter_bench.py 后期 4 0       # 阶段(all=全部) 进程数 种子
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import copy
+import time
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from balance_scorer import (
+    PlayerBuild, StrategyDefinition, StrategySimulator, ChordType, DEFAULT_BPM,
+    create_chord_registry, create_strategy_library,
+)
+from damage_timeline import build_timeline
+from gd_constants import load_constants, godot_path
+
+CHAPTER_DATA = "scripts/data/chapter_data.gd"
+ENEMY_SPAWNER = "scripts/systems/enemy_spawner.gd"
+
+# enemy_spawner.gd 的波次参数
+WAVE_DURATION = 20.0
+WAVE_REST = 3.0
+FIRST_WAVE_DELAY = 2.0
+DEFAULT_ENEMY_HP = 30.0            # get_enemy_base_stats 的缺省值
+ELITE_DEFAULT_HP = 300.0           # 精英脚本里找不到 max_hp 时
+
+# 波次类型 → (预算系数, 预算下限, 每批数量范围)，见 _start_new_wave / _get_batch_spawn_count
+WAVE_TYPES = {
+    "normal":        (1.0, 0, (1, 3)),
+    "swarm":         (2.5, 0, (3, 6)),
+    "elite":         (0.3, 2, (1, 1)),
+    "chapter_intro": (0.7, 0, (1, 2)),
+    "pre_boss":      (1.5, 0, (2, 5)),
+    "silence_tide":  (0.8, 0, (2, 4)),
+    "pulse_storm":   (0.5, 3, (1, 2)),
+}
+
+_MAX_HP_RE = re.compile(r"max_hp\s*=\s*([\d.]+)")
+
+
+# =============================================================================
+# 第一部分：章节与敌人数据
+# =============================================================================
+
+@dataclass
+class ChapterSpec:
+    """一章的跑分相关配置（来自 ChapterData.CHAPTERS）。"""
+    index: int
+    key: str
+    name: str
+    bpm: int
+    duration: float             # 章节时长（秒），到时触发Boss
+    templates: list[dict]
+
+    @property
+    def last_wave(self) -> int:
+        return max(t["waves"][1] for t in self.templates)
+
+    def wave_template(self, wave: int) -> dict:
+        """与 ChapterData.get_wave_template 相同：超出范围时用最后一个模板。"""
+        for template in self.templates:
+            if template["waves"][0] <= wave <= template["waves"][1]:
+                return template
+        return self.templates[-1] if self.templates else {}
+
+    def difficulty(self, chapter_time: float) -> tuple[float, float]:
+        """(生命倍率, 刷怪倍率)，见 ChapterManager.get_difficulty_multiplier（非无尽模式）。"""
+        chapter_mult = 1.0 + self.index * 0.15
+        time_mult = 1.0 + chapter_time / 300.0
+        return chapter_mult * (1.0 + time_mult * 0.3), 1.0 + time_mult * 0.15
+
+
+def load_chapters() -> list[ChapterSpec]:
+    data = load_constants(CHAPTER_DATA)
+    names = {v: k for k, v in data["Chapter"].items()}
+    return [
+        ChapterSpec(index=idx, key=names.get(idx, str(idx)), name=cfg["name"], bpm=cfg["bpm"],
+                    duration=cfg["duration"], templates=cfg.get("wave_templates", []))
+        for idx, cfg in sorted(data["CHAPTERS"].items())
+    ]
+
+
+def load_enemy_hp() -> dict[str, float]:
+    """敌人类型 → 基础生命值（基础五种、章节特色敌人、精英）。"""
+    chapter = load_constants(CHAPTER_DATA)
+    hp = {name: stats["hp"] for name, stats in load_constants(ENEMY_SPAWNER)["ENEMY_TYPE_DATA"].items()}
+    for name, stats in chapter["CHAPTER_ENEMY_STATS"].items():
+        hp.setdefault(name, stats["hp"])
+    for name, script in chapter["ELITE_SCRIPT_PATHS"].items():
+        try:
+            with open(godot_path(script), encoding="utf-8") as f:
+                match = _MAX_HP_RE.search(f.read())
+        except OSError:
+            match = None
+        hp[name] = float(match.group(1)) if match else ELITE_DEFAULT_HP
+    return hp
+
+
+# =============================================================================
+# 第二部分：波次重放与清场时间
+# =============================================================================
+
+@dataclass
+class ChapterClear:
+    """一个策略在一章中的清场结果。"""
+    phase: str
+    chapter: int
+    strategy_name: str
+    clear_time: Optional[float]     # None 表示在模拟时长内未清场
+    waves: int                      # 完整清掉的波次数
+    enemies: int
+    total_hp: float
+    wasted_damage: float            # 击杀溢出而作废的伤害
+    idle_damage: float              # 场上没有可攻击敌人时打出的伤害
+
+    @property
+    def cleared(self) -> bool:
+        return self.clear_time is not None
+
+
+class _DamageStream:
+    """单目标集火：按时间顺序消耗离散伤害事件。"""
+
+    def __init__(self, times: np.ndarray, amounts: np.ndarray):
+        self.times = times
+        self.cumulative = np.cumsum(amounts)
+        self.next = 0             # 下一个未使用的伤害事件
+        self.overkill = 0.0       # 击杀溢出的伤害
+        self.idle = 0.0           # 敌人出现前打空的伤害
+
+    def kill(self, available: float, hp: float) -> Optional[float]:
+        """敌人 available 秒起可被攻击，返回击杀时刻；伤害耗尽返回 None。"""
+        j = max(self.next, int(np.searchsorted(self.times, available, side="left")))
+        base = self.cumulative[j - 1] if j > 0 else 0.0
+        k = int(np.searchsorted(self.cumulative, base + hp - 1e-9, side="left"))
+        if k >= len(self.times):
+            return None
+        self.idle += base - self.dealt_until(self.next)
+        self.overkill += float(self.cumulative[k]) - base - hp
+        self.next = k + 1
+        return float(self.times[k])
+
+    def dealt_until(self, index: int) -> float:
+        return float(self.cumulative[index - 1]) if index > 0 else 0.0
+
+
+def clear_chapter(chapter: ChapterSpec, enemy_hp: dict[str, float],
+                  times: np.ndarray, amounts: np.ndarray, seed: int = 0) -> tuple:
+    """
+    重放一章的全部模板波次，返回
+    (清场时刻或 None, 清掉的波次数, 敌人数, 总生命, 溢出伤害, 空场伤害)。
+    """
+    stream = _DamageStream(times, amounts)
+    t = FIRST_WAVE_DELAY
+    last_kill = 0.0
+    enemies, total_hp, waves = 0, 0.0, 0
+
+    for wave in range(1, chapter.last_wave + 1):
+        template = chapter.wave_template(wave)
+        kind = template.get("type", "normal")
+        factor, floor, (batch_lo, batch_hi) = WAVE_TYPES.get(kind, WAVE_TYPES["normal"])
+        hp_mult, spawn_mult = chapter.difficulty(t)
+        budget = max(floor, int(int(template.get("enemy_count_base", 8) * spawn_mult) * factor))
+        interval = template.get("spawn_interval", WAVE_DURATION / max(1, budget))
+        types = template.get("enemy_types") or ["static"]
+        rng = np.random.default_rng((seed, chapter.index, wave))
+
+        spawns: list[tuple[float, float]] = []
+        if kind == "elite" and template.get("elite_type"):
+            spawns.append((t, enemy_hp.get(template["elite_type"], ELITE_DEFAULT_HP)))
+        spawn_time = t + interval
+        while budget > 0 and spawn_time < t + WAVE_DURATION:
+            for _ in range(min(budget, int(rng.integers(batch_lo, batch_hi + 1)))):
+                enemy = types[int(rng.integers(len(types)))]
+                spawns.append((spawn_time, enemy_hp.get(enemy, DEFAULT_ENEMY_HP) * hp_mult))
+                budget -= 1
+            spawn_time += interval
+
+        for spawned_at, hp in spawns:
+            killed_at = stream.kill(spawned_at, hp)
+            if killed_at is None:
+                return None, waves, enemies, total_hp, stream.overkill, stream.idle
+            last_kill = max(last_kill, killed_at)
+            enemies += 1
+            total_hp += hp
+
+        last_spawn = spawns[-1][0] if spawns else t
+        wave_end = max(last_spawn, last_kill)
+        if budget > 0 or wave_end > t + WAVE_DURATION:
+            wave_end = t + WAVE_DURATION
+        waves += 1
+        t = wave_end + WAVE_REST
+
+    return last_kill, waves, enemies, total_hp, stream.overkill, stream.idle
+
+
+def chapter_build(build: PlayerBuild, chapter: ChapterSpec) -> PlayerBuild:
+    """按章节 BPM 演奏（保留 Build 自身的 BPM 加成）。"""
+    staged = copy.deepcopy(build)
+    staged.bpm = chapter.bpm + (build.bpm - DEFAULT_BPM)
+    staged.invalidate_view()
+    return staged
+
+
+def horizon(chapter: ChapterSpec) -> float:
+    """模拟时长上限：每个模板波次都打满 20 秒的两倍。"""
+    return 2.0 * (FIRST_WAVE_DELAY + chapter.last_wave * (WAVE_DURATION + WAVE_REST))
+
+
+def bench_chapter(phase: str, build: PlayerBuild, chapter: ChapterSpec,
+                  strategies: list[StrategyDefinition], chords: dict[str, ChordType],
+                  enemy_hp: dict[str, float], seed: int = 0) -> list[ChapterClear]:
+    """一个 (Build, 章节) 组合下全部策略的清场结果。"""
+    staged = chapter_build(build, chapter)
+    simulator = StrategySimulator(staged, chords, log_beats=False, record_trace=True)
+    beats = max(1, round(horizon(chapter) / staged.beat_interval))
+    results = []
+    for strategy in strategies:
+        timeline = build_timeline(simulator, strategy, beats)
+        clear_time, waves, enemies, total_hp, overkill, idle = clear_chapter(
+            chapter, enemy_hp, timeline.times, timeline.amounts, seed)
+        results.append(ChapterClear(phase, chapter.index, strategy.name, clear_time,
+                                    waves, enemies, total_hp, overkill, idle))
+    return results
+
+
+def run_chapter_benchmark(builds: dict[str, PlayerBuild],
+                          strategies: Optional[list[StrategyDefinition]] = None,
+                          chords: Optional[dict[str, ChordType]] = None,
+                          chapters: Optional[list[ChapterSpec]] = None,
+                          workers: int = 1, seed: int = 0) -> list[ChapterClear]:
+    """策略 × Build × 章节；workers > 1 时按 (Build, 章节) 分组多进程并行，结果与 workers 无关。"""
+    strategies = strategies if strategies is not None else create_strategy_library()
+    chords = chords if chords is not None else create_chord_registry()
+    chapters = chapters if chapters is not None else load_chapters()
+    enemy_hp = load_enemy_hp()
+    tasks = [(phase, build, chapter, strategies, chords, enemy_hp, seed)
+             for phase, build in builds.items() for chapter in chapters]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(bench_chapter, *zip(*tasks)))
+    else:
+        parts = [bench_chapter(*task) for task in tasks]
+    return [r for part in parts for r in part]
+
+
+# =============================================================================
+# 第三部分：报告
+# =============================================================================
+
+def print_chapter_report(results: list[ChapterClear], chapters: list[ChapterSpec]):
+    """每个阶段一张表：策略 × 章节的清场时间（秒），— 表示未清场。"""
+    by_phase: dict[str, dict[str, dict[int, ChapterClear]]] = {}
+    for r in results:
+        by_phase.setdefault(r.phase, {}).setdefault(r.strategy_name, {})[r.chapter] = r
+
+    for phase, table in by_phase.items():
+        print(f"\n{'=' * (24 + 9 * len(chapters))}")
+        print(f"  [{phase}] 章节清场时间（秒）")
+        print(f"{'=' * (24 + 9 * len(chapters))}")
+        print(f"  {'策略':20s} | " + " ".join(f"{'第' + str(c.index + 1) + '章':>6s}" for c in chapters))
+        print(f"  {'(BPM / 章节时长)':20s} | " +
+              " ".join(f"{f'{c.bpm}/{c.duration:.0f}':>8s}" for c in chapters))
+        print(f"  {'-' * (20 + 9 * len(chapters))}")
+        rows = sorted(table.items(), key=lambda kv: sum(
+            r.clear_time if r.cleared else 1e9 for r in kv[1].values()))
+        for name, per_chapter in rows:
+            cells = []
+            for c in chapters:
+                r = per_chapter.get(c.index)
+                cells.append(f"{r.clear_time:8.1f}" if r is not None and r.cleared else f"{'—':>8s}")
+            print(f"  {name:20s} | " + " ".join(cells))
+        # 未清场的策略只统计到伤害耗尽为止，取各策略中最完整的一次
+        fullest = {c.index: max((per[c.index] for per in table.values()), key=lambda r: r.enemies)
+                   for c in chapters}
+        print(f"  {'敌人数 / 总生命':20s} | " + " ".join(
+            f"{fullest[c.index].enemies:>3d}/{fullest[c.index].total_hp / 1000:3.0f}k" for c in chapters))
+    print()
+
+
+if __name__ == "__main__":
+    from generate_report import build_scenarios
+
+    scenarios = build_scenarios()
+    phase = sys.argv[1] if len(sys.argv) > 1 else "all"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    builds = scenarios if phase == "all" else {phase: scenarios[phase]}
+
+    chapters = load_chapters()
+    start = time.perf_counter()
+    results = run_chapter_benchmark(builds, chapters=chapters, workers=workers, seed=seed)
+    elapsed = time.perf_counter() - start
+    print_chapter_report(results, chapters)
+    print(f"{len(results)} 个组合（{len(builds)} Build × {len(chapters)} 章 × "
+          f"{len(results) // max(1, len(builds) * len(chapters))} 策略），"
+          f"{workers} 进程，耗时 {elapsed:.1f} 秒")
@@ -0,0 +1,280 @@
+"""
+=============================================================================
+Project Harmony — 离散事件伤害时间线 (Discrete-Event Damage Timeline)
+=============================================================================
+
+StrategySimulator 把延迟打击 (delay_beats)、DOT (dot_total_ratio)、
+持续区域 (zone_tick_ratio × zone_duration_mult) 与召唤物 (summon_dps_ratio)
+都折算成施法拍上一次性的 chord_mult。总伤害没有问题，但伤害"何时"落地
+被抹平了：峰值DPS、击杀时间 (TTK) 都不准确，重叠效果也无从观察。
+
+本模块在模拟结果之上做离散事件展开：
+    1. 模拟器逐拍记录有效伤害（damage_trace，已含疲劳/命中折扣）
+    2. 每次施法按和弦的施法形态生成一个"效果"：首跳时刻、跳数、间隔、每跳伤害
+    3. 用最小堆按时间顺序弹出事件 —— 堆中每个存活效果只占一项（下一跳），
+       弹出后若还有剩余跳数再压回，数万个并发效果也只需 O(log n) / 跳
+    4. 得到真实的伤害-时间曲线、峰值DPS、TTK 与并发效果数
+
+各效果的每跳伤害之和等于施法拍的有效伤害，因此时间线总伤害与模拟器一致
+（只是落地时间不同；遭遇结束后才落地的部分单独统计为 overflow）。
+
+跳伤节奏取自 Godot 实现（projectile_manager.gd / summon_manager.gd）：
+    DOT 每 0.5 秒一跳，每跳 30% 弹体伤害；区域每 0.5 秒一跳；召唤物每 0.8 秒攻击一次。
+
+用法：
+    python3 BalanceKit/damage_timeline.py                 # 后期Build × 策略库，60秒遭遇
+    python3 BalanceKit/damage_timeline.py 600 5000        # 遭遇秒数 目标生命值(TTK)
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import math
+import heapq
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from balance_scorer import (
+    ChordType, NoteView, StrategyDefinition, StrategySimulator, DUR_PER_POINT,
+)
+
+# 跳伤节奏（秒）与 DOT 每跳占弹体伤害的比例（见 Godot 实现）
+DOT_TICK_INTERVAL = 0.5
+DOT_TICK_RATIO = 0.3
+ZONE_TICK_INTERVAL = 0.5
+SUMMON_ATTACK_INTERVAL = 0.8
+
+
+# =============================================================================
+# 第一部分：效果形态
+# =============================================================================
+
+@dataclass(frozen=True)
+class EffectProfile:
+    """
+    一次施法的伤害时间分布：施法 first 秒后首跳，之后每 interval 秒一跳，共 ticks 跳。
+    各跳均分伤害，只有最后一跳按 last_weight 缩放（见 tick_fractions）。
+    """
+    first: float = 0.0
+    ticks: int = 1
+    interval: float = 0.0
+    last_weight: float = 1.0   # 最后一跳相对整跳的比例（区域持续时间不是整跳时 < 1）
+
+    def tick_fractions(self) -> list[float]:
+        """各跳占总伤害的比例。"""
+        weights = [1.0] * (self.ticks - 1) + [self.last_weight]
+        total = sum(weights)
+        return [w / total for w in weights]
+
+
+INSTANT = EffectProfile()
+
+
+def effect_profile(chord: Optional[ChordType], note: NoteView, beat_interval: float) -> EffectProfile:
+    """
+    和弦施法形态 → 伤害时间分布。优先级与 StrategySimulator._compile_action 折算
+    chord_mult 时一致：区域 > 召唤 > DOT；延迟打击作为整体偏移叠加在前。
+    """
+    if chord is None:
+        return INSTANT
+    delay = chord.delay_beats * beat_interval
+
+    if chord.zone_tick_ratio > 0:
+        ticks = chord.zone_duration_mult * note.total_dur / ZONE_TICK_INTERVAL
+        whole = max(1, math.ceil(ticks - 1e-9))
+        last = ticks - (whole - 1) if ticks > 0 else 1.0
+        return EffectProfile(delay + ZONE_TICK_INTERVAL, whole, ZONE_TICK_INTERVAL, last)
+    if chord.summon_dps_ratio > 0:
+        duration = chord.summon_duration_mult * note.total_dur * DUR_PER_POINT
+        attacks = max(1, int(duration / SUMMON_ATTACK_INTERVAL))
+        return EffectProfile(delay + SUMMON_ATTACK_INTERVAL, attacks, SUMMON_ATTACK_INTERVAL)
+    if chord.dot_total_ratio > 0:
+        ticks = max(1, round(chord.dot_total_ratio / DOT_TICK_RATIO))
+        return EffectProfile(delay + DOT_TICK_INTERVAL, ticks, DOT_TICK_INTERVAL)
+    if delay > 0:
+        return EffectProfile(delay)
+    return INSTANT
+
+
+def strategy_profiles(simulator: StrategySimulator, strategy: StrategyDefinition) -> list[EffectProfile]:
+    """策略每个动作的伤害时间分布（下标与动作表一致）。"""
+    view = simulator.build.view()
+    cache: dict[tuple, EffectProfile] = {}
+    profiles = []
+    for action in strategy.actions:
+        key = (action.note, action.chord_type if action.is_chord else "", action.is_rest)
+        profile = cache.get(key)
+        if profile is None:
+            chord = simulator.chords.get(action.chord_type) if action.is_chord else None
+            profile = INSTANT if action.is_rest else \
+                effect_profile(chord, view.note(action.note), view.beat_interval)
+            cache[key] = profile
+        profiles.append(profile)
+    return profiles
+
+
+# =============================================================================
+# 第二部分：事件调度
+# =============================================================================
+
+class EventScheduler:
+    """
+    最小堆事件调度器。堆中每个存活效果只有一项：
+    (下一跳时刻, 序号, 每跳伤害比例表, 已跳数, 间隔, 总伤害)。
+    序号保证同一时刻按施法顺序弹出，结果与堆实现细节无关。
+    """
+
+    def __init__(self):
+        self._heap: list[tuple] = []
+        self._seq = 0
+        self.peak_active = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, cast_time: float, damage: float, profile: EffectProfile):
+        """登记一次施法的全部后续伤害（只压入首跳）。"""
+        if damage == 0:
+            return
+        heapq.heappush(self._heap, (cast_time + profile.first, self._seq, profile.tick_fractions(),
+                                    0, profile.interval, damage))
+        self._seq += 1
+        self.peak_active = max(self.peak_active, len(self._heap))
+
+    def pop_until(self, until: float, times: list[float], amounts: list[float]):
+        """按时间顺序弹出所有时刻 ≤ until 的跳伤，追加到 times / amounts。"""
+        heap = self._heap
+        while heap and heap[0][0] <= until:
+            t, seq, fractions, k, interval, damage = heap[0]
+            times.append(t)
+            amounts.append(damage * fractions[k])
+            if k + 1 < len(fractions):
+                heapq.heapreplace(heap, (t + interval, seq, fractions, k + 1, interval, damage))
+            else:
+                heapq.heappop(heap)
+
+
+# =============================================================================
+# 第三部分：时间线结果
+# =============================================================================
+
+@dataclass
+class DamageTimeline:
+    """
+    一次遭遇的伤害事件序列（按时间升序）。
+
+    Attributes:
+        times / amounts: 每跳伤害的时刻（秒）与数值。
+        duration:        遭遇时长（秒）；之后落地的伤害计入 overflow。
+        peak_active:     同时存活的效果数峰值。
+    """
+    strategy_name: str
+    times: np.ndarray
+    amounts: np.ndarray
+    duration: float
+    peak_active: int
+
+    @property
+    def total_damage(self) -> float:
+        """遭遇时长内落地的伤害。"""
+        return float(self.amounts[self.times < self.duration].sum())
+
+    @property
+    def overflow(self) -> float:
+        """遭遇结束后才落地的伤害（延迟打击、未跳完的 DOT/区域/召唤）。"""
+        return float(self.amounts[self.times >= self.duration].sum())
+
+    def curve(self, resolution: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+        """伤害-时间曲线：(区间起点, 该区间内的 DPS)，覆盖到最后一跳。"""
+        end = max(self.duration, float(self.times[-1]) if len(self.times) else 0.0)
+        bins = max(1, math.ceil(end / resolution + 1e-9))
+        idx = np.minimum((self.times / resolution).astype(int), bins - 1)
+        damage = np.bincount(idx, weights=self.amounts, minlength=bins)
+        return np.arange(bins) * resolution, damage / resolution
+
+    def burst_dps(self, window: float = 1.0) -> float:
+        """任意长度为 window 秒的时间窗内的最大 DPS（双指针滑窗）。"""
+        best = acc = 0.0
+        lo = 0
+        times, amounts = self.times, self.amounts
+        for hi in range(len(times)):
+            acc += amounts[hi]
+            while times[hi] - times[lo] >= window:
+                acc -= amounts[lo]
+                lo += 1
+            best = max(best, acc)
+        return best / window
+
+    def time_to_kill(self, hp: float) -> Optional[float]:
+        """累计伤害首次达到 hp 的时刻（秒）；始终打不死返回 None。"""
+        cumulative = np.cumsum(self.amounts)
+        hit = int(np.searchsorted(cumulative, hp - 1e-9))
+        return float(self.times[hit]) if hit < len(self.times) else None
+
+
+def build_timeline(simulator: StrategySimulator, strategy: StrategyDefinition,
+                   beats: Optional[int] = None) -> DamageTimeline:
+    """
+    模拟策略（beats 指定时循环演奏）并把每拍有效伤害展开为离散事件时间线。
+    模拟器须开启 record_trace（逐拍有效伤害来自 damage_trace）。
+    """
+    if not simulator.record_trace:
+        raise ValueError("build_timeline 需要 StrategySimulator(record_trace=True)")
+    result = simulator.simulate(strategy, beats)
+    profiles = strategy_profiles(simulator, strategy)
+    period = len(profiles)
+    beat_interval = simulator.build.beat_interval
+
+    scheduler = EventScheduler()
+    times: list[float] = []
+    amounts: list[float] = []
+    for i, damage in enumerate(result.damage_trace):
+        cast_time = i * beat_interval
+        scheduler.pop_until(cast_time, times, amounts)
+        scheduler.schedule(cast_time, damage, profiles[i % period])
+    scheduler.pop_until(math.inf, times, amounts)
+
+    return DamageTimeline(
+        strategy_name=strategy.name,
+        times=np.array(times),
+        amounts=np.array(amounts),
+        duration=len(result.damage_trace) * beat_interval,
+        peak_active=scheduler.peak_active,
+    )
+
+
+def print_timeline_report(timelines: list[DamageTimeline], target_hp: float):
+    """打印各策略的时间线指标。"""
+    print(f"\n{'=' * 100}")
+    print(f"  离散事件伤害时间线（目标生命 {target_hp:.0f}）")
+    print(f"{'=' * 100}")
+    print(f"  {'策略':20s} | {'总伤害':>9s} | {'溢出':>7s} | {'峰值DPS(1s)':>11s} | "
+          f"{'平均DPS':>8s} | {'TTK(秒)':>8s} | {'并发效果':>6s}")
+    print(f"  {'-' * 94}")
+    for tl in timelines:
+        ttk = tl.time_to_kill(target_hp)
+        print(f"  {tl.strategy_name:20s} | {tl.total_damage:9.1f} | {tl.overflow:7.1f} | "
+              f"{tl.burst_dps():11.1f} | {tl.total_damage / tl.duration:8.1f} | "
+              f"{(f'{ttk:.2f}' if ttk is not None else '—'):>8s} | {tl.peak_active:8d}")
+    print(f"{'=' * 100}\n")
+
+
+if __name__ == "__main__":
+    from balance_scorer import create_chord_registry, create_strategy_library
+    from generate_report import build_scenarios
+
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 60.0
+    target_hp = float(sys.argv[2]) if len(sys.argv) > 2 else 2000.0
+
+    build = build_scenarios()["后期"]
+    simulator = StrategySimulator(build, create_chord_registry(), log_beats=False, record_trace=True)
+    beats = max(1, round(duration / build.beat_interval))
+    timelines = [build_timeline(simulator, s, beats) for s in create_strategy_library()]
+    timelines.sort(key=lambda tl: tl.total_damage, reverse=True)
+    print_timeline_report(timelines, target_hp)
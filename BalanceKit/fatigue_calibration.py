@@ -0,0 +1,404 @@
+"""
+=============================================================================
+Project Harmony — 听感疲劳配置自动标定 (FatigueConfig Calibration)
+=============================================================================
+
+create_easy_config … create_maestro_config 的权重与等级阈值都是手工挑的。
+本模块在一批回放上拟合 FatigueConfig 的八个权重与四个阈值，使各疲劳等级的
+停留时间占比接近目标值：
+
+    1. 充分统计量：AFI = clip(Σ 权重 × 分量, 0, 1)，八个分量只取决于窗口、衰减、
+       密度、留白等"形状"参数，与权重、阈值无关。每条回放用
+       AestheticFatigueEngine 重放一次，记录每个事件的八个分量与到下一事件的
+       时长（超过 max_gap 截断，与 fatigue_telemetry 的口径一致）
+    2. 缓存：按 (形状参数指纹, 回放语料指纹) 存入 .sim_cache/fatigue_calibration/，
+       之后任何权重/阈值组合都只需一次矩阵乘法重新打分，不必重放
+    3. 重放：回放分块交给多个进程，各块结果按回放顺序拼接
+    4. 拟合：交叉熵方法，权重在"总和不变"的单纯形上、阈值在 (0, 1) 内保持
+       递增；每一代的候选配置分批并入一次矩阵乘法同时打分（可选多进程），
+       目标为各等级停留时间占比的 L1 误差，加上偏离原预设的小惩罚
+
+回放语料：markov_workload 写出的列式存储，或按序列数现场采样。
+
+用法：
+    python3 BalanceKit/fatigue_calibration.py                                   # 2000 条回放，拟合 normal
+    python3 BalanceKit/fatigue_calibration.py 10000 hard 10,45,35,9,1 4         # 回放数 预设 目标占比(%) 进程数
+    python3 BalanceKit/fatigue_calibration.py workload.hcol maestro 5,25,45,20,5
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import hashlib
+import dataclasses
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BASE_DIR), "Scripts"))
+
+from aesthetic_fatigue_system import AestheticFatigueEngine, FatigueConfig, FatigueLevel
+from fatigue_telemetry import PRESETS
+from markov_workload import HarmonyChain, Workload, WorkloadConfig, iter_workloads, read_workload
+
+CACHE_DIR = os.path.join(BASE_DIR, ".sim_cache", "fatigue_calibration")
+
+# 缓存格式版本：充分统计量的定义变化时递增
+FORMAT_VERSION = 2
+
+# AFI 公式中的 (权重字段, 分量字段)，顺序即分量矩阵的列顺序
+WEIGHT_FIELDS = (
+    ("weight_pitch_entropy", "pitch_fatigue"),
+    ("weight_transition_entropy", "transition_fatigue"),
+    ("weight_rhythm_entropy", "rhythm_fatigue"),
+    ("weight_recurrence", "recurrence_rate"),
+    ("weight_chord_diversity", "chord_fatigue"),
+    ("weight_density", "density_fatigue"),
+    ("weight_rest_deficit", "rest_deficit_fatigue"),
+    ("weight_sustained_pressure", "sustained_fatigue"),
+)
+THRESHOLD_FIELDS = ("threshold_mild", "threshold_moderate", "threshold_severe", "threshold_critical")
+LEVELS = tuple(FatigueLevel)
+
+# 不影响分量的字段：权重、阈值、惩罚参数与维度跳过开关（重放时关闭），不参与缓存键
+_SCORING_PREFIXES = ("weight_", "threshold_", "weaken_multiplier_", "penalty_mode",
+                     "lockout_threshold", "global_debuff_scale", "skip_zero_weight_dimensions")
+
+
+def shape_fingerprint(config: FatigueConfig) -> dict:
+    """决定分量取值的配置字段。"""
+    return {name: value for name, value in dataclasses.asdict(config).items()
+            if not name.startswith(_SCORING_PREFIXES)}
+
+
+# =============================================================================
+# 第一部分：充分统计量（每个事件的分量与停留时长）
+# =============================================================================
+
+@dataclass
+class ReplayStats:
+    """
+    回放语料在一组形状参数下的充分统计量。
+
+    components[i] 为第 i 个事件的八个分量（列顺序同 WEIGHT_FIELDS），
+    dwell[i] 为该结果持续到下一事件的秒数；offsets 为各回放在行中的起点。
+    """
+    components: np.ndarray      # float32 (事件 × 8)
+    dwell: np.ndarray           # float32 (事件,)
+    offsets: np.ndarray         # int64 (回放数 + 1,)
+
+    @property
+    def replays(self) -> int:
+        return len(self.offsets) - 1
+
+    def __len__(self) -> int:
+        return len(self.dwell)
+
+
+def replay_chunk(workload: Workload, config: FatigueConfig, max_gap: float = 5.0) -> ReplayStats:
+    """逐条重放 workload 中的序列，提取充分统计量（总是计算全部八个分量）。"""
+    config = dataclasses.replace(config, skip_zero_weight_dimensions=False)
+    rows, dwell, offsets = [], [], [0]
+    for i in range(len(workload)):
+        engine = AestheticFatigueEngine(config)
+        events = workload.spell_events(i)
+        for j, event in enumerate(events):
+            c = engine.record_spell(event).components
+            rows.append([getattr(c, name) for _, name in WEIGHT_FIELDS])
+            dt = events[j + 1].timestamp - event.timestamp if j + 1 < len(events) else 0.0
+            dwell.append(min(max(dt, 0.0), max_gap))
+        offsets.append(len(rows))
+    return ReplayStats(np.array(rows, dtype=np.float32).reshape(-1, len(WEIGHT_FIELDS)),
+                       np.array(dwell, dtype=np.float32), np.array(offsets, dtype=np.int64))
+
+
+def _concat(parts: list[ReplayStats]) -> ReplayStats:
+    offsets = [np.zeros(1, dtype=np.int64)]
+    base = 0
+    for part in parts:
+        offsets.append(part.offsets[1:] + base)
+        base += len(part)
+    return ReplayStats(np.concatenate([p.components for p in parts]),
+                       np.concatenate([p.dwell for p in parts]), np.concatenate(offsets))
+
+
+def corpus_fingerprint(batches: list[Workload]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for wl in batches:
+        for array in (wl.kind, wl.pitch, wl.chord, wl.time):
+            h.update(np.ascontiguousarray(array).tobytes())
+    return h.hexdigest()
+
+
+def replay_stats(batches: list[Workload], config: FatigueConfig, workers: int = 1,
+                 chunk: int = 250, max_gap: float = 5.0,
+                 cache_dir: Optional[str] = CACHE_DIR) -> tuple[ReplayStats, bool]:
+    """
+    回放语料的充分统计量（按形状参数与语料指纹缓存）。返回 (统计量, 是否命中缓存)。
+    """
+    key = hashlib.blake2b(json.dumps(
+        [FORMAT_VERSION, max_gap, shape_fingerprint(config), corpus_fingerprint(batches)],
+        sort_keys=True, default=str).encode(), digest_size=12).hexdigest()
+    path = os.path.join(cache_dir, f"{key}.npz") if cache_dir else None
+    if path and os.path.exists(path):
+        with np.load(path) as data:
+            return ReplayStats(data["components"], data["dwell"], data["offsets"]), True
+
+    pieces = [wl_slice for wl in batches for wl_slice in _split(wl, chunk)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(replay_chunk, pieces, [config] * len(pieces),
+                                  [max_gap] * len(pieces)))
+    else:
+        parts = [replay_chunk(piece, config, max_gap) for piece in pieces]
+    stats = _concat(parts)
+
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, components=stats.components, dwell=stats.dwell, offsets=stats.offsets)
+        os.replace(tmp, path)
+    return stats, False
+
+
+def _split(workload: Workload, chunk: int) -> list[Workload]:
+    fields = ("kind", "note", "modifier", "chord", "pitch", "time")
+    return [Workload(*(getattr(workload, f)[s:s + chunk] for f in fields),
+                     first_seq=workload.first_seq + s)
+            for s in range(0, len(workload), chunk)]
+
+
+# =============================================================================
+# 第二部分：批量重新打分
+# =============================================================================
+
+# AFI 直方图的分辨率：阈值取在桶边界上，量化误差不超过 1/HIST_BINS
+HIST_BINS = 4096
+
+
+def level_shares(stats: ReplayStats, weights: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """一组权重与阈值下各等级的停留时间占比（精确计算，与引擎的判定一致）。"""
+    afi = np.clip(stats.components.astype(np.float64) @ weights, 0.0, 1.0)
+    level = np.searchsorted(thresholds, afi, side="right")
+    return np.bincount(level, weights=stats.dwell, minlength=len(LEVELS)) / max(float(stats.dwell.sum()), 1e-12)
+
+
+def afi_histograms(stats: ReplayStats, weights: np.ndarray, block: int = 16) -> np.ndarray:
+    """
+    候选权重 (候选数 × 8) 下按停留时长加权的 AFI 直方图 (候选数 × HIST_BINS)。
+
+    每 block 个候选合并为一次 (事件 × 8) @ (8 × block) 的矩阵乘法。
+    """
+    weights = np.atleast_2d(weights)
+    hist = np.zeros((len(weights), HIST_BINS))
+    for s in range(0, len(weights), block):
+        afi = stats.components @ weights[s:s + block].T.astype(np.float32)
+        bins = np.minimum((np.clip(afi, 0.0, 1.0) * HIST_BINS).astype(np.int64), HIST_BINS - 1)
+        for j in range(bins.shape[1]):
+            hist[s + j] = np.bincount(bins[:, j], weights=stats.dwell, minlength=HIST_BINS)
+    return hist
+
+
+def fit_thresholds(hist: np.ndarray, target: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    给定 AFI 直方图，取使累计占比最接近目标累计占比的桶边界作为四个阈值。
+
+    返回 (阈值 (候选数 × 4), 对应的停留时间占比 (候选数 × 5))。
+    """
+    cdf = np.cumsum(hist, axis=1)
+    cdf = np.concatenate((np.zeros((len(hist), 1)), cdf / np.maximum(cdf[:, -1:], 1e-12)), axis=1)
+    goal = np.cumsum(target)[:len(THRESHOLD_FIELDS)]
+    # 边界 e 左侧的占比为 cdf[e]；找最接近 goal 的边界（cdf 单调，阈值自然递增）
+    right = np.stack([np.searchsorted(row, goal) for row in cdf]).clip(0, HIST_BINS)
+    left = (right - 1).clip(0, HIST_BINS)
+    rows = np.arange(len(hist))[:, None]
+    pick = np.where(np.abs(cdf[rows, left] - goal) <= np.abs(cdf[rows, right] - goal), left, right)
+    below = cdf[rows, pick]
+    shares = np.diff(np.concatenate((np.zeros((len(hist), 1)), below, np.ones((len(hist), 1))), axis=1), axis=1)
+    return pick / HIST_BINS, shares
+
+
+_worker_stats: Optional[ReplayStats] = None
+
+
+def _init_worker(path: str):
+    global _worker_stats
+    with np.load(path) as data:
+        _worker_stats = ReplayStats(data["components"], data["dwell"], data["offsets"])
+
+
+def _histogram_worker(weights: np.ndarray) -> np.ndarray:
+    return afi_histograms(_worker_stats, weights)
+
+
+# =============================================================================
+# 第三部分：交叉熵方法拟合
+# =============================================================================
+
+@dataclass
+class CalibrationResult:
+    config: FatigueConfig
+    base_shares: np.ndarray
+    shares: np.ndarray
+    target: np.ndarray
+    loss: float
+    generations: int
+    evaluations: int
+
+
+def _decode(theta: np.ndarray, weight_total: float) -> np.ndarray:
+    """参数向量 → 权重：softmax 后乘以原预设的权重总和。"""
+    w = np.exp(theta - theta.max(axis=-1, keepdims=True))
+    return weight_total * w / w.sum(axis=-1, keepdims=True)
+
+
+def calibrate(stats: ReplayStats, base: FatigueConfig, target: np.ndarray,
+              population: int = 32, elite: int = 8, generations: int = 60,
+              regularization: float = 1.0, seed: int = 0,
+              workers: int = 1, stats_path: Optional[str] = None) -> CalibrationResult:
+    """
+    拟合 base 的权重与阈值，使停留时间占比接近 target（五个等级，按比例归一化）。
+
+    对每组候选权重，四个阈值直接取 AFI 直方图上最接近目标累计占比的分位点，
+    因此只需搜索权重。停留时间占比几乎总能精确命中，于是优化目标实际上是
+    "命中目标的前提下，权重与阈值离原预设最近"：
+        损失 = Σ|占比 - 目标| + regularization × (‖Δ权重‖² + ‖Δ阈值‖²)
+
+    workers > 1 时候选分给多个进程打分（各进程从 stats_path 加载统计量）。
+    """
+    target = np.asarray(target, dtype=float) / np.sum(target)
+    w0, t0 = _config_vectors(base)
+    weight_total = w0.sum()
+    mean = np.log(np.maximum(w0, 1e-6))
+    sigma = np.full(len(mean), 0.3)
+    rng = np.random.default_rng(seed)
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(stats_path,)) if workers > 1 and stats_path else None
+
+    def evaluate(thetas: np.ndarray):
+        weights = _decode(thetas, weight_total)
+        if pool is None:
+            hist = afi_histograms(stats, weights)
+        else:
+            parts = np.array_split(weights, workers)
+            hist = np.concatenate(list(pool.map(_histogram_worker, parts)))
+        thresholds, shares = fit_thresholds(hist, target)
+        drift = ((weights - w0) ** 2).sum(axis=1) + ((thresholds - t0) ** 2).sum(axis=1)
+        return np.abs(shares - target).sum(axis=1) + regularization * drift, weights, thresholds
+
+    try:
+        best = (np.inf, w0, t0)
+        evaluations = 0
+        for generation in range(1, generations + 1):
+            thetas = mean + sigma * rng.standard_normal((population, len(mean)))
+            thetas[0] = mean
+            losses, weights, thresholds = evaluate(thetas)
+            evaluations += population
+            order = np.argsort(losses)
+            if losses[order[0]] < best[0]:
+                best = (float(losses[order[0]]), weights[order[0]], thresholds[order[0]])
+            chosen = thetas[order[:elite]]
+            mean = 0.7 * chosen.mean(axis=0) + 0.3 * mean
+            sigma = 0.7 * chosen.std(axis=0) + 0.3 * sigma
+            if sigma.max() < 1e-3:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    _, weights, thresholds = best
+    fitted = dataclasses.replace(
+        base, **{f: round(float(w), 4) for (f, _), w in zip(WEIGHT_FIELDS, weights)},
+        **{f: round(float(t), 4) for f, t in zip(THRESHOLD_FIELDS, thresholds)})
+    shares = level_shares(stats, *_config_vectors(fitted))
+    return CalibrationResult(fitted, level_shares(stats, w0, t0), shares, target,
+                             float(np.abs(shares - target).sum()), generation, evaluations)
+
+
+def _config_vectors(config: FatigueConfig) -> tuple[np.ndarray, np.ndarray]:
+    return (np.array([getattr(config, f) for f, _ in WEIGHT_FIELDS]),
+            np.array([getattr(config, f) for f in THRESHOLD_FIELDS]))
+
+
+def verify(batches: list[Workload], result: CalibrationResult, stats: ReplayStats,
+           replays: int = 20, max_gap: float = 5.0) -> float:
+    """用拟合后的配置真实重放前几条回放，返回引擎等级与缓存打分的停留时间最大差值（秒）。"""
+    head = _split(batches[0], replays)[0]
+    engine_seconds = np.zeros(len(LEVELS))
+    for i in range(len(head)):
+        engine = AestheticFatigueEngine(result.config)
+        events = head.spell_events(i)
+        for j, event in enumerate(events):
+            level = engine.record_spell(event).fatigue_level.value
+            dt = events[j + 1].timestamp - event.timestamp if j + 1 < len(events) else 0.0
+            engine_seconds[level] += min(max(dt, 0.0), max_gap)
+    rows = stats.offsets[len(head)]
+    cached = ReplayStats(stats.components[:rows], stats.dwell[:rows], stats.offsets[:len(head) + 1])
+    w, t = _config_vectors(result.config)
+    rescored = level_shares(cached, w, t) * float(cached.dwell.sum())
+    return float(np.abs(engine_seconds - rescored).max())
+
+
+def print_calibration_report(result: CalibrationResult, preset: str, stats: ReplayStats,
+                             replay_seconds: float, cached: bool, fit_seconds: float):
+    base = PRESETS[preset]
+    print(f"\n{'=' * 90}")
+    print(f"  FatigueConfig 标定：{preset}，{stats.replays} 条回放，{len(stats)} 个事件")
+    print(f"{'=' * 90}")
+    print(f"  充分统计量：{'缓存命中' if cached else '重放'} {replay_seconds:.1f} 秒；"
+          f"拟合 {result.generations} 代 / {result.evaluations} 个候选，{fit_seconds:.1f} 秒"
+          f"（{result.evaluations / max(fit_seconds, 1e-9):,.0f} 配置/秒）")
+
+    print(f"\n  {'停留时间占比':12s}" + "".join(f" | {level.name:>8s}" for level in LEVELS) + f" | {'L1误差':>7s}")
+    print(f"  {'-' * 76}")
+    for label, shares in (("目标", result.target), ("原预设", result.base_shares), ("标定后", result.shares)):
+        err = np.abs(shares - result.target).sum()
+        print(f"  {label:14s}" + "".join(f" | {s:8.1%}" for s in shares) + f" | {err:8.3f}")
+
+    print(f"\n  {'字段':28s} | {'原值':>7s} | {'标定值':>7s}")
+    print(f"  {'-' * 50}")
+    for name in [f for f, _ in WEIGHT_FIELDS] + list(THRESHOLD_FIELDS):
+        print(f"  {name:28s} | {getattr(base, name):7.3f} | {getattr(result.config, name):8.4f}")
+    print(f"{'=' * 90}\n")
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "2000"
+    preset = sys.argv[2] if len(sys.argv) > 2 else "normal"
+    target = [float(x) for x in sys.argv[3].split(",")] if len(sys.argv) > 3 else [55, 30, 12, 3, 0]
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+
+    if source.isdigit():
+        chain = HarmonyChain.from_music_data()
+        batches = list(iter_workloads(chain, int(source), WorkloadConfig(beats=128), seed=0))
+    else:
+        batches = [read_workload(source)]
+
+    base = PRESETS[preset]
+    start = time.perf_counter()
+    stats, cached = replay_stats(batches, base, workers)
+    replay_seconds = time.perf_counter() - start
+
+    stats_path = None
+    if workers > 1:
+        stats_path = os.path.join(CACHE_DIR, f"scoring.{os.getpid()}.npz")
+        np.savez(stats_path, components=stats.components, dwell=stats.dwell, offsets=stats.offsets)
+    start = time.perf_counter()
+    try:
+        result = calibrate(stats, base, np.array(target), workers=workers, stats_path=stats_path)
+    finally:
+        if stats_path:
+            os.remove(stats_path)
+    fit_seconds = time.perf_counter() - start
+
+    print_calibration_report(result, preset, stats, replay_seconds, cached, fit_seconds)
+    print(f"  抽样重放校验：停留时间最大差值 {verify(batches, result, stats):.2e} 秒\n")
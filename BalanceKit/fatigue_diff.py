@@ -0,0 +1,606 @@
+"""
+=============================================================================
+Project Harmony — 听感疲劳差分模糊测试 (Fatigue Differential Fuzzer)
+=============================================================================
+
+听感疲劳有两份实现：设计侧的 Scripts/aesthetic_fatigue_system.py
+(AestheticFatigueEngine) 与游戏侧的 godot_project/scripts/autoload/fatigue_manager.gd。
+两边各自维护八个维度的公式，本模块检查它们在大量施法序列上是否一致：
+
+    1. GodotFatigueModel 逐行移植 fatigue_manager.gd 的 AFI 计算
+       (record_spell → _calculate_afi → _determine_level)，
+       包括 GDScript 的取整语义（roundf 四舍五入远离零）与字典插入顺序
+    2. 用例生成：均匀随机序列 + 对抗序列（单音连打、短循环、
+       时间间隔恰好落在阈值上、突发连击、全和弦、长停顿）
+    3. 差分执行：同一序列逐事件喂给两边，比较每个维度、AFI 与疲劳等级；
+       某个维度首次超出容差即记为分歧，全部维度都已分歧时提前结束该用例
+    4. 收缩：对每个维度的首个分歧用例做 ddmin 式删减（按块删除事件，
+       删除的间隔并入下一事件以保持后续时刻），再逐项化简音符/和弦/间隔，
+       得到仍然复现该维度分歧的最小序列
+    5. 并行：用例按 (种子, 序号) 派生随机数，分块交给多个进程，结果与进程数无关
+
+单音寂静、密度过载、休止清洗等游戏侧状态机在 Python 引擎中没有对应实现，不参与比较。
+
+用法：
+    python3 BalanceKit/fatigue_diff.py                  # 20000 个用例，单进程
+    python3 BalanceKit/fatigue_diff.py 1000000 8 3 3    # 用例数 进程数 种子 预热事件数
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import math
+import time
+import random
+from collections import deque
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(os.path.dirname(BASE_DIR), "Scripts")
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+
+from aesthetic_fatigue_system import AestheticFatigueEngine, Note, SpellEvent
+from game_data import MUSIC_DATA, load_game_data
+from gd_constants import load_constants
+
+# 比较容差：两边都是双精度，公式相同时差异只来自求和顺序
+ATOL = 1e-6
+
+FATIGUE_MANAGER = "scripts/autoload/fatigue_manager.gd"
+
+# fatigue_manager.gd 的 AFI 权重键 → 比较维度名（按 _calculate_afi 的求和顺序）
+GD_WEIGHT_KEYS = (
+    ("pitch_entropy", "pitch"), ("transition_entropy", "transition"),
+    ("rhythm_entropy", "rhythm"), ("chord_diversity", "chord"), ("recurrence", "ngram"),
+    ("density", "density"), ("rest_deficit", "rest"), ("sustained_pressure", "sustained"),
+)
+
+# WhiteKey 下标 → 十二平均律音符（MusicData.WHITE_KEY_TO_NOTE）
+WHITE_KEY_NOTES = (Note.C, Note.D, Note.E, Note.F, Note.G, Note.A, Note.B)
+WHITE_KEY_NAMES = tuple(n.name for n in WHITE_KEY_NOTES)
+CHORD_TYPES = tuple(load_game_data().chords)
+
+# 比较的维度：(名称, Python FatigueResult 取值, Godot 结果键)
+DIMENSIONS: tuple[tuple[str, Callable, str], ...] = (
+    ("pitch", lambda r: r.components.pitch_fatigue, "pitch"),
+    ("transition", lambda r: r.components.transition_fatigue, "transition"),
+    ("rhythm", lambda r: r.components.rhythm_fatigue, "rhythm"),
+    ("chord", lambda r: r.components.chord_fatigue, "chord"),
+    ("ngram", lambda r: r.components.recurrence_rate, "ngram"),
+    ("density", lambda r: r.components.density_fatigue, "density"),
+    ("rest", lambda r: r.components.rest_deficit_fatigue, "rest"),
+    ("sustained", lambda r: r.components.sustained_fatigue, "sustained"),
+    ("afi", lambda r: r.fatigue_index, "afi"),
+    ("level", lambda r: r.fatigue_level.value, "level"),
+)
+DIMENSION_NAMES = tuple(d[0] for d in DIMENSIONS)
+
+
+# =============================================================================
+# 第一部分：fatigue_manager.gd 语义移植
+# =============================================================================
+
+def _roundf(x: float) -> float:
+    """GDScript roundf：四舍五入、远离零（Python round 是银行家舍入）。"""
+    f = math.floor(abs(x))
+    return math.copysign(f + 1.0 if abs(x) - f >= 0.5 else f, x)
+
+
+def _clampf(x: float, lo: float, hi: float) -> float:
+    return lo if x < lo else hi if x > hi else x
+
+
+def load_godot_config() -> tuple[float, float, dict[str, float], tuple[tuple[int, float], ...]]:
+    """
+    从 fatigue_manager.gd 读取 (窗口时长, 衰减半衰期, AFI 权重, 等级阈值)。
+
+    阈值按 FatigueLevel 从高到低排列，与 _determine_level 的判定顺序一致。
+    """
+    gd = load_constants(FATIGUE_MANAGER)
+    levels = load_constants(MUSIC_DATA)["FatigueLevel"]
+    weights = {name: float(gd["weights"][key]) for key, name in GD_WEIGHT_KEYS}
+    thresholds = tuple(sorted(
+        ((levels[ref.name.rpartition(".")[2]], float(th)) for ref, th in gd["thresholds"].items()),
+        reverse=True))
+    return float(gd["window_duration"]), float(gd["decay_half_life"]), weights, thresholds
+
+
+class GodotFatigueModel:
+    """
+    fatigue_manager.gd 的 AFI 计算。事件为 (time, note, is_chord, chord_type)，
+    note 为 WhiteKey 下标，chord_type 为 ChordType 下标（非和弦为 -1）。
+
+    窗口、半衰期、权重与阈值取自 fatigue_manager.gd 的默认值（见 load_godot_config）。
+    """
+
+    WINDOW_DURATION, DECAY_HALF_LIFE, WEIGHTS, THRESHOLDS = load_godot_config()
+
+    def __init__(self, bpm: float = 120.0):
+        self.bpm = bpm
+        self._decay_lambda = math.log(2.0) / self.DECAY_HALF_LIFE
+        self.reset()
+
+    def reset(self):
+        self._history: deque[tuple] = deque()
+        self._last_cast_time = -10.0
+        self._continuous_cast_count = 0
+        self._continuous_cast_start = 0.0
+
+    def record_spell(self, t: float, note: int, is_chord: bool = False,
+                     chord_type: int = -1) -> dict[str, float]:
+        """记录一次施法，返回各维度分量、afi 与 level。"""
+        self._history.append((t, note, is_chord, chord_type))
+        while self._history and t - self._history[0][0] > self.WINDOW_DURATION:
+            self._history.popleft()
+
+        if t - self._last_cast_time < 1.0:
+            self._continuous_cast_count += 1
+        else:
+            self._continuous_cast_count = 1
+            self._continuous_cast_start = t
+        self._last_cast_time = t
+        return self._calculate_afi(t)
+
+    def _calculate_afi(self, t: float) -> dict[str, float]:
+        events = []
+        for e in self._history:
+            w = math.exp(-self._decay_lambda * (t - e[0]))
+            if w > 0.01:
+                events.append(e + (w,))
+        if not events:
+            return dict.fromkeys(DIMENSION_NAMES, 0.0)
+
+        comps = {
+            "pitch": self._pitch(events),
+            "transition": self._transition(events),
+            "rhythm": self._rhythm(events),
+            "chord": self._chord(events),
+            "ngram": self._ngram(events),
+            "density": self._density(events, t),
+            "rest": self._rest(events),
+            "sustained": self._sustained(t),
+        }
+        afi = 0.0
+        for name, w in self.WEIGHTS.items():
+            afi += w * comps[name]
+        afi = _clampf(afi, 0.0, 1.0)
+        comps["afi"] = afi
+        comps["level"] = next((lv for lv, th in self.THRESHOLDS if afi >= th), 0)
+        return comps
+
+    @staticmethod
+    def _entropy_fatigue(weights: dict, total: float, max_entropy: float) -> float:
+        entropy = 0.0
+        for w in weights.values():
+            p = w / total
+            if p > 0.0:
+                entropy -= p * math.log(p) / math.log(2.0)
+        return 1.0 - _clampf(entropy / max_entropy, 0.0, 1.0)
+
+    def _pitch(self, events) -> float:
+        weights: dict[int, float] = {}
+        total = 0.0
+        for e in events:
+            if e[1] >= 0:
+                weights[e[1]] = weights.get(e[1], 0.0) + e[4]
+                total += e[4]
+        if total <= 0.0 or len(weights) <= 1:
+            return 1.0
+        return self._entropy_fatigue(weights, total, math.log(7.0) / math.log(2.0))
+
+    def _transition(self, events) -> float:
+        if len(events) < 2:
+            return 0.0
+        transitions: dict[tuple, float] = {}
+        from_counts: dict[int, float] = {}
+        for prev, cur in zip(events, events[1:]):
+            if prev[1] >= 0 and cur[1] >= 0:
+                w = min(cur[4], prev[4])
+                key = (prev[1], cur[1])
+                transitions[key] = transitions.get(key, 0.0) + w
+                from_counts[prev[1]] = from_counts.get(prev[1], 0.0) + w
+        if not from_counts:
+            return 0.0
+        entropy = 0.0
+        for (src, _), w in transitions.items():
+            if from_counts.get(src, 0.0) > 0.0:
+                p = w / from_counts[src]
+                if p > 0.0:
+                    entropy -= (from_counts[src] / sum(from_counts.values())) * p * math.log(p) / math.log(2.0)
+        return 1.0 - _clampf(entropy / (math.log(7.0) / math.log(2.0)), 0.0, 1.0)
+
+    def _rhythm(self, events) -> float:
+        if len(events) < 3:
+            return 0.0
+        beat_interval = 60.0 / self.bpm
+        quantized: dict[float, float] = {}
+        total = 0.0
+        for prev, cur in zip(events, events[1:]):
+            q = _roundf((cur[0] - prev[0]) / (beat_interval * 0.25)) * 0.25
+            q = _clampf(q, 0.0, 4.0)
+            quantized[q] = quantized.get(q, 0.0) + 1.0
+            total += 1.0
+        if total <= 1.0:
+            return 0.0
+        return self._entropy_fatigue(quantized, total, math.log(8.0) / math.log(2.0))
+
+    def _chord(self, events) -> float:
+        weights: dict[int, float] = {}
+        total = 0.0
+        for e in events:
+            if e[2] and e[3] >= 0:
+                weights[e[3]] = weights.get(e[3], 0.0) + e[4]
+                total += e[4]
+        if total <= 0.0 or len(weights) <= 1:
+            return 0.5
+        return self._entropy_fatigue(weights, total, math.log(9.0) / math.log(2.0))
+
+    def _ngram(self, events) -> float:
+        if len(events) < 4:
+            return 0.0
+        notes = [e[1] for e in events if e[1] >= 0]
+        if len(notes) < 4:
+            return 0.0
+        recurrence = possible = 0.0
+        for size in (2, 3, 4):
+            counts: dict[tuple, int] = {}
+            for i in range(len(notes) - size + 1):
+                gram = tuple(notes[i:i + size])
+                counts[gram] = counts.get(gram, 0) + 1
+            for c in counts.values():
+                recurrence += c - 1
+                possible += 1
+        if possible <= 0.0:
+            return 0.0
+        return _clampf(recurrence / (possible * 2.0), 0.0, 1.0)
+
+    def _density(self, events, t: float) -> float:
+        if len(events) < 2:
+            return 0.0
+        recent = sum(1 for e in events if t - e[0] < 3.0)
+        expected = self.bpm / 60.0 * 3.0 * 1.2
+        return _clampf((recent - expected) / expected, 0.0, 1.0)
+
+    def _rest(self, events) -> float:
+        if len(events) < 3:
+            return 0.0
+        beat_interval = 60.0 / self.bpm
+        gaps = sum(1 for prev, cur in zip(events, events[1:]) if cur[0] - prev[0] > beat_interval * 1.5)
+        ratio = gaps / (len(events) - 1)
+        return 0.0 if ratio >= 0.2 else _clampf((0.2 - ratio) / 0.2, 0.0, 1.0)
+
+    def _sustained(self, t: float) -> float:
+        if self._continuous_cast_count < 5:
+            return 0.0
+        duration = t - self._continuous_cast_start
+        if duration < 10.0:
+            return 0.0
+        return _clampf((duration - 10.0) / 20.0, 0.0, 1.0)
+
+
+# =============================================================================
+# 第二部分：用例生成
+# =============================================================================
+
+# 一个用例是 [(dt, note, chord_type)]：dt 为距上一事件的秒数（首个事件距 0 秒）
+Case = list[tuple[float, int, int]]
+
+# 两边实现中出现的时间阈值（秒，120 BPM）：量化半格、1.5 拍留白、1 秒连续施法、
+# 1.5 秒休止、3 秒密度窗口、15 秒主窗口，以及它们两侧的浮点邻值
+BOUNDARY_GAPS = (0.0, 0.0625, 0.125, 0.1875, 0.25, 0.5, 0.75, 1.0, 1.5, 3.0, 15.0)
+BEAT_GAPS = (0.125, 0.25, 0.25, 0.5, 0.5, 0.5, 0.75, 1.0, 1.5, 2.0)
+
+
+def _chord_or_none(rng: random.Random, p: float) -> int:
+    return rng.randrange(len(CHORD_TYPES)) if rng.random() < p else -1
+
+
+def gen_random(rng: random.Random) -> Case:
+    """均匀随机：节拍网格间隔（偶尔抖动），20% 和弦。"""
+    case = []
+    for _ in range(rng.randint(3, 48)):
+        dt = rng.choice(BEAT_GAPS)
+        if rng.random() < 0.2:
+            dt = max(0.0, dt + rng.uniform(-0.1, 0.1))
+        case.append((dt, rng.randrange(7), _chord_or_none(rng, 0.2)))
+    return case
+
+
+def gen_spam(rng: random.Random) -> Case:
+    """单音连打：固定音符、固定间隔。"""
+    note, dt = rng.randrange(7), rng.choice((0.25, 0.5, 0.5, 1.0))
+    return [(dt, note, -1) for _ in range(rng.randint(8, 60))]
+
+
+def gen_cycle(rng: random.Random) -> Case:
+    """短循环：2~4 个音符的固定乐句反复。"""
+    phrase = [rng.randrange(7) for _ in range(rng.randint(2, 4))]
+    dt = rng.choice(BEAT_GAPS)
+    return [(dt, phrase[i % len(phrase)], -1) for i in range(rng.randint(8, 48))]
+
+
+def gen_boundary(rng: random.Random) -> Case:
+    """阈值间隔：间隔取自阈值表，偶尔偏移一个 ulp。"""
+    case = []
+    for _ in range(rng.randint(3, 32)):
+        dt = rng.choice(BOUNDARY_GAPS)
+        if rng.random() < 0.3:
+            dt = math.nextafter(dt, rng.choice((0.0, math.inf)))
+        case.append((dt, rng.randrange(7), _chord_or_none(rng, 0.1)))
+    return case
+
+
+def gen_burst(rng: random.Random) -> Case:
+    """突发连击：几十毫秒一发的连击，中间夹长停顿。"""
+    case = []
+    for _ in range(rng.randint(2, 6)):
+        case.append((rng.uniform(1.0, 16.0), rng.randrange(7), -1))
+        for _ in range(rng.randint(2, 12)):
+            case.append((rng.uniform(0.02, 0.1), rng.randrange(7), -1))
+    return case
+
+
+def gen_chords(rng: random.Random) -> Case:
+    """全和弦：每个事件都是和弦，和弦种类少而集中。"""
+    pool = rng.sample(range(len(CHORD_TYPES)), rng.randint(1, 3))
+    return [(rng.choice(BEAT_GAPS), rng.randrange(7), rng.choice(pool))
+            for _ in range(rng.randint(3, 32))]
+
+
+GENERATORS: dict[str, tuple[Callable[[random.Random], Case], int]] = {
+    "random": (gen_random, 4),
+    "spam": (gen_spam, 1),
+    "cycle": (gen_cycle, 1),
+    "boundary": (gen_boundary, 2),
+    "burst": (gen_burst, 1),
+    "chords": (gen_chords, 1),
+}
+_GEN_TABLE = [name for name, (_, weight) in GENERATORS.items() for _ in range(weight)]
+
+
+def make_case(seed: int, index: int) -> tuple[str, Case]:
+    """第 index 个用例（只由种子与序号决定）。"""
+    rng = random.Random(f"{seed}:{index}")
+    kind = rng.choice(_GEN_TABLE)
+    return kind, GENERATORS[kind][0](rng)
+
+
+# =============================================================================
+# 第三部分：差分执行
+# =============================================================================
+
+@dataclass
+class Divergence:
+    """某个维度的首次分歧：第 step 个事件之后两边的取值。"""
+    step: int
+    python: float
+    godot: float
+
+    @property
+    def gap(self) -> float:
+        return abs(self.python - self.godot)
+
+
+def run_case(case: Case, dims: tuple[str, ...] = DIMENSION_NAMES,
+             bpm: float = 120.0, warmup: int = 0) -> dict[str, Divergence]:
+    """
+    逐事件比较两边，返回各维度的首次分歧（所有维度都分歧后提前结束）。
+    前 warmup 个事件只推进状态不比较（跳过 Python 引擎"少于3个事件返回0"的冷启动分支，
+    让收缩结果指向公式本身的差异）。
+    """
+    engine = AestheticFatigueEngine()
+    model = GodotFatigueModel(bpm)
+    readers = [(name, py, gd) for name, py, gd in DIMENSIONS if name in dims]
+    found: dict[str, Divergence] = {}
+    t = 0.0
+    for step, (dt, note, chord) in enumerate(case):
+        t += dt
+        is_chord = chord >= 0
+        result = engine.record_spell(SpellEvent(
+            t, WHITE_KEY_NOTES[note], is_chord, CHORD_TYPES[chord] if is_chord else None))
+        godot = model.record_spell(t, note, is_chord, chord)
+        if step < warmup:
+            continue
+        for name, py, gd in readers:
+            if name in found:
+                continue
+            a, b = float(py(result)), float(godot[gd])
+            if abs(a - b) > ATOL:
+                found[name] = Divergence(step, a, b)
+        if len(found) == len(readers):
+            break
+    return found
+
+
+# =============================================================================
+# 第四部分：用例收缩
+# =============================================================================
+
+def _drop(case: Case, start: int, stop: int) -> Case:
+    """删除 [start, stop) 的事件，其间隔并入下一事件，保持后续事件的时刻。"""
+    removed = sum(dt for dt, _, _ in case[start:stop])
+    rest = case[stop:]
+    if rest:
+        dt, note, chord = rest[0]
+        rest = [(dt + removed, note, chord)] + rest[1:]
+    return case[:start] + rest
+
+
+def _simplifications(event: tuple[float, int, int]):
+    """单个事件的化简候选：去掉和弦、音符归 C、间隔取整到 0.25 秒 / 归零。"""
+    dt, note, chord = event
+    if chord >= 0:
+        yield dt, note, -1
+    if note != 0:
+        yield dt, 0, chord
+    snapped = round(dt * 4) / 4
+    if snapped != dt:
+        yield snapped, note, chord
+    if dt != 0.0:
+        yield 0.0, note, chord
+
+
+def shrink(case: Case, dim: str, bpm: float = 120.0, warmup: int = 0, budget: int = 2000) -> Case:
+    """
+    把 case 收缩为仍在 dim 维度上分歧的最小序列（最多尝试 budget 次）。
+    事件按块删除（块大小从一半逐步减到 1），截断到分歧发生的那一步后再逐项化简。
+    """
+    def fails(c: Case) -> bool:
+        nonlocal budget
+        budget -= 1
+        return bool(c) and dim in run_case(c, (dim,), bpm, warmup)
+
+    div = run_case(case, (dim,), bpm, warmup).get(dim)
+    if div is None:
+        return case
+    case = case[:div.step + 1]
+
+    chunk = max(1, len(case) // 2)
+    while budget > 0:
+        i, removed = 0, False
+        while i < len(case) and budget > 0:
+            candidate = _drop(case, i, i + chunk)
+            if fails(candidate):
+                case, removed = candidate, True
+            else:
+                i += chunk
+        if chunk == 1 and not removed:
+            break
+        chunk = max(1, chunk // 2)
+
+    changed = True
+    while changed and budget > 0:
+        changed = False
+        for i in range(len(case)):
+            for simpler in _simplifications(case[i]):
+                candidate = case[:i] + [simpler] + case[i + 1:]
+                if fails(candidate):
+                    case, changed = candidate, True
+                    break
+    return case
+
+
+def format_case(case: Case) -> str:
+    """用例的紧凑文本：时刻 音符[和弦]。"""
+    t, parts = 0.0, []
+    for dt, note, chord in case:
+        t += dt
+        label = WHITE_KEY_NAMES[note] + (f"[{CHORD_TYPES[chord]}]" if chord >= 0 else "")
+        parts.append(f"{t:g}s {label}")
+    return ", ".join(parts)
+
+
+# =============================================================================
+# 第五部分：并行模糊测试与报告
+# =============================================================================
+
+@dataclass
+class FuzzStats:
+    """一批用例的分歧统计（可跨进程合并）。"""
+    cases: int = 0
+    events: int = 0
+    diverged: dict[str, int] = field(default_factory=dict)         # 维度 → 分歧用例数
+    first_step_sum: dict[str, int] = field(default_factory=dict)   # 维度 → 首次分歧步数之和
+    max_gap: dict[str, float] = field(default_factory=dict)        # 维度 → 最大差值
+    example: dict[str, int] = field(default_factory=dict)          # 维度 → 序号最小的分歧用例
+    by_kind: dict[str, list[int]] = field(default_factory=dict)    # 生成器 → [用例数, 全一致用例数]
+
+    def merge(self, other: "FuzzStats"):
+        self.cases += other.cases
+        self.events += other.events
+        for name, n in other.diverged.items():
+            self.diverged[name] = self.diverged.get(name, 0) + n
+            self.first_step_sum[name] = self.first_step_sum.get(name, 0) + other.first_step_sum[name]
+            self.max_gap[name] = max(self.max_gap.get(name, 0.0), other.max_gap[name])
+            self.example[name] = min(self.example.get(name, other.example[name]), other.example[name])
+        for kind, (n, ok) in other.by_kind.items():
+            acc = self.by_kind.setdefault(kind, [0, 0])
+            acc[0] += n
+            acc[1] += ok
+
+
+def fuzz_chunk(seed: int, start: int, count: int, bpm: float = 120.0, warmup: int = 0) -> FuzzStats:
+    """运行序号 [start, start + count) 的用例。"""
+    stats = FuzzStats()
+    for index in range(start, start + count):
+        kind, case = make_case(seed, index)
+        found = run_case(case, bpm=bpm, warmup=warmup)
+        stats.cases += 1
+        stats.events += (max(d.step for d in found.values()) + 1) if len(found) == len(DIMENSIONS) \
+            else len(case)
+        acc = stats.by_kind.setdefault(kind, [0, 0])
+        acc[0] += 1
+        acc[1] += not found
+        for name, div in found.items():
+            stats.diverged[name] = stats.diverged.get(name, 0) + 1
+            stats.first_step_sum[name] = stats.first_step_sum.get(name, 0) + div.step
+            stats.max_gap[name] = max(stats.max_gap.get(name, 0.0), div.gap)
+            stats.example.setdefault(name, index)
+    return stats
+
+
+def run_fuzz(cases: int, workers: int = 1, seed: int = 0, bpm: float = 120.0,
+             warmup: int = 0, chunk: int = 500) -> FuzzStats:
+    """并行运行 cases 个用例，分块交给 workers 个进程。"""
+    tasks = [(seed, start, min(chunk, cases - start), bpm, warmup)
+             for start in range(0, cases, chunk)]
+    stats = FuzzStats()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(fuzz_chunk, *zip(*tasks)):
+                stats.merge(part)
+    else:
+        for task in tasks:
+            stats.merge(fuzz_chunk(*task))
+    return stats
+
+
+def print_fuzz_report(stats: FuzzStats, seed: int, elapsed: float,
+                      bpm: float = 120.0, warmup: int = 0):
+    """打印各维度的分歧率，并收缩每个维度的首个分歧用例。"""
+    print(f"\n{'=' * 100}")
+    print(f"  听感疲劳差分测试：AestheticFatigueEngine vs fatigue_manager.gd（{bpm:g} BPM，种子 {seed}，预热 {warmup} 事件）")
+    print(f"{'=' * 100}")
+    print(f"  {stats.cases} 个用例，{stats.events} 个事件，耗时 {elapsed:.1f} 秒"
+          f"（{stats.events / max(elapsed, 1e-9):,.0f} 事件/秒）")
+    print(f"\n  {'维度':10s} | {'分歧用例':>8s} | {'分歧率':>7s} | {'平均首次步':>9s} | {'最大差值':>8s}")
+    print(f"  {'-' * 60}")
+    for name in DIMENSION_NAMES:
+        n = stats.diverged.get(name, 0)
+        mean_step = stats.first_step_sum[name] / n if n else 0.0
+        print(f"  {name:10s} | {n:10d} | {n / max(stats.cases, 1):8.1%} | "
+              f"{mean_step:12.1f} | {stats.max_gap.get(name, 0.0):10.4f}")
+
+    print(f"\n  {'生成器':10s} | {'用例':>7s} | {'全维度一致':>9s}")
+    print(f"  {'-' * 36}")
+    for kind, (n, ok) in sorted(stats.by_kind.items()):
+        print(f"  {kind:10s} | {n:9d} | {ok / n:12.1%}")
+
+    print("\n  最小复现（收缩后）：")
+    for name in DIMENSION_NAMES:
+        if name not in stats.example:
+            continue
+        index = stats.example[name]
+        _, case = make_case(seed, index)
+        minimal = shrink(case, name, bpm, warmup)
+        div = run_case(minimal, (name,), bpm, warmup)[name]
+        print(f"    {name:10s} 用例#{index}（{len(case)} → {len(minimal)} 事件）"
+              f" Python={div.python:.4f} Godot={div.godot:.4f}")
+        print(f"               {format_case(minimal)}")
+    print(f"{'=' * 100}\n")
+
+
+if __name__ == "__main__":
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    warmup = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+
+    start = time.perf_counter()
+    stats = run_fuzz(cases, workers=workers, seed=seed, warmup=warmup)
+    print_fuzz_report(stats, seed, time.perf_counter() - start, warmup=warmup)
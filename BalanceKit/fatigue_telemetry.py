@@ -0,0 +1,427 @@
+"""
+=============================================================================
+Project Harmony — 群体听感疲劳遥测聚合 (Population Fatigue Telemetry)
+=============================================================================
+
+线上调平衡需要实时看到所有玩家的 AFI 分布、各疲劳等级的停留时间与八个维度
+分量的均值。逐条保存 FatigueResult 不现实，本模块只保留有界大小的摘要：
+
+    1. TDigest：合并式 t-digest（k1 尺度函数，两端再按 logit 尺度细分），
+       质心数约为 δ/2 + δ/10·ln N，两端分位数精度最高；可任意合并，可序列化为 JSON
+    2. 分组：按难度预设（easy / normal / hard / maestro，由 create_*_config 生成）
+       聚合；自定义配置按参数指纹分组
+    3. 每组：AFI 的 t-digest、各等级的停留秒数与事件数、各分量的和、平方和与有效样本数（NaN 不计入）
+    4. 会话：每个玩家只记住 (分组, 上次时刻, 上次等级)，两次结果之间的时长
+       记入上次等级（超过 max_gap 截断，避免暂停被记成疲劳时间）；
+       活跃会话数超过 max_sessions 时淘汰最久未更新的会话
+    5. 合并：各进程各自聚合，PopulationTelemetry.merge 合并分组摘要；
+       snapshot() 输出 JSON，maybe_dump 按墙钟间隔原子写盘
+
+用法：
+    python3 BalanceKit/fatigue_telemetry.py                          # 400 名模拟玩家，单进程
+    python3 BalanceKit/fatigue_telemetry.py 20000 8 telemetry.json   # 玩家数 进程数 快照文件
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import math
+import time
+import hashlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import Hashable, Optional
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BASE_DIR), "Scripts"))
+
+from aesthetic_fatigue_system import (
+    AestheticFatigueEngine, FatigueComponents, FatigueConfig, FatigueLevel, FatigueResult,
+    create_easy_config, create_hard_config, create_maestro_config, create_normal_config,
+)
+
+# 难度预设：分组键 → 配置
+PRESETS: dict[str, FatigueConfig] = {
+    "easy": create_easy_config(),
+    "normal": create_normal_config(),
+    "hard": create_hard_config(),
+    "maestro": create_maestro_config(),
+}
+
+# 参与均值统计的分量（FatigueComponents 的全部数值字段；插件维度的 extra 与 skipped 名单不统计）
+COMPONENT_FIELDS = tuple(name for name in FatigueComponents.__dataclass_fields__
+                         if name not in ("extra", "skipped"))
+LEVELS = tuple(FatigueLevel)
+
+
+def config_key(config: Optional[FatigueConfig]) -> str:
+    """配置 → 分组键：与某个难度预设相同则为预设名，否则为参数指纹。"""
+    config = config or PRESETS["normal"]
+    for name, preset in PRESETS.items():
+        if config == preset:
+            return name
+    fingerprint = json.dumps(asdict(config), sort_keys=True, default=str)
+    return "custom-" + hashlib.blake2b(fingerprint.encode(), digest_size=4).hexdigest()
+
+
+# =============================================================================
+# 第一部分：t-digest 分位数摘要
+# =============================================================================
+
+class TDigest:
+    """
+    合并式 t-digest。
+
+    新值先进入缓冲区，缓冲区满后与已有质心一起排序，按 k1 尺度函数
+    k1(q) = δ/(2π)·asin(2q-1) 分组合并：同一组的 k1 跨度不超过 1，约 δ/2 个质心。
+
+    只用 k1 时最外侧质心约有 π²N/δ² 个值（δ=100、20 万个值时约 200 个），
+    长尾分布的 p99.9 会被明显高估。因此分组同时要求
+    k2(q) = δ/TAIL_SCALE·ln(q/(1-q)) 的跨度不超过 1，质心权重上限约为
+    TAIL_SCALE/δ·N·q(1-q)，最外侧接近单点；k2 不随 N 归一化，反复合并时分组边界稳定。
+    """
+
+    TAIL_SCALE = 20.0
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: list[float] = []
+        self._buffer_size = int(5 * compression)
+
+    def add(self, value: float):
+        self._buffer.append(value)
+        if len(self._buffer) >= self._buffer_size:
+            self._flush()
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values):
+            self._merge(values, np.ones(len(values)))
+
+    def merge(self, other: "TDigest"):
+        other._flush()
+        if other.count:
+            self._merge(other.means, other.weights, other.min, other.max)
+
+    def _flush(self):
+        if self._buffer:
+            values = np.array(self._buffer)
+            self._buffer.clear()
+            self._merge(values, np.ones(len(values)))
+
+    def _merge(self, means: np.ndarray, weights: np.ndarray,
+               lo: Optional[float] = None, hi: Optional[float] = None):
+        self.min = min(self.min, means.min() if lo is None else lo)
+        self.max = max(self.max, means.max() if hi is None else hi)
+        means = np.concatenate((self.means, means))
+        weights = np.concatenate((self.weights, weights))
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # 每个点中心处的分位数 → k1/k2 值；floor(k1) 与 floor(k2) 都相同的相邻点合并为一个质心
+        q = (np.cumsum(weights) - weights / 2) / total
+        k1 = np.floor(self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q - 1, -1.0, 1.0)))
+        k2 = np.floor(self.compression / self.TAIL_SCALE * np.log(q / (1 - q)))
+        starts = np.flatnonzero(np.r_[True, (k1[1:] != k1[:-1]) | (k2[1:] != k2[:-1])])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+        self.count = float(total)
+
+    def quantile(self, q: float) -> float:
+        """第 q 分位数（0 ≤ q ≤ 1），质心之间线性插值。"""
+        self._flush()
+        if not self.count:
+            return math.nan
+        if len(self.means) == 1:
+            return float(self.means[0])
+        target = q * self.count
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xs = np.r_[0.0, centers, self.count]
+        ys = np.r_[self.min, self.means, self.max]
+        return float(np.interp(target, xs, ys))
+
+    def mean(self) -> float:
+        self._flush()
+        return float((self.means * self.weights).sum() / self.count) if self.count else math.nan
+
+    def to_dict(self) -> dict:
+        self._flush()
+        return {"compression": self.compression, "count": self.count,
+                "min": self.min if self.count else None, "max": self.max if self.count else None,
+                "means": self.means.tolist(), "weights": self.weights.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TDigest":
+        digest = cls(data["compression"])
+        if data["count"]:
+            digest.means = np.array(data["means"])
+            digest.weights = np.array(data["weights"])
+            digest.count = float(data["count"])
+            digest.min, digest.max = data["min"], data["max"]
+        return digest
+
+
+# =============================================================================
+# 第二部分：分组聚合
+# =============================================================================
+
+@dataclass
+class GroupStats:
+    """一个分组（难度预设或自定义配置）的摘要，大小与玩家数、事件数无关。"""
+    afi: TDigest = field(default_factory=TDigest)
+    level_seconds: np.ndarray = field(default_factory=lambda: np.zeros(len(LEVELS)))
+    level_events: np.ndarray = field(default_factory=lambda: np.zeros(len(LEVELS), dtype=np.int64))
+    component_sum: np.ndarray = field(default_factory=lambda: np.zeros(len(COMPONENT_FIELDS)))
+    component_sumsq: np.ndarray = field(default_factory=lambda: np.zeros(len(COMPONENT_FIELDS)))
+    sessions: int = 0
+    # 各分量的有效样本数：skip_zero_weight_dimensions 跳过的维度为 NaN，不计入和与样本数
+    component_count: np.ndarray = field(
+        default_factory=lambda: np.zeros(len(COMPONENT_FIELDS), dtype=np.int64))
+
+    @property
+    def events(self) -> int:
+        return int(self.level_events.sum())
+
+    def add(self, result: FatigueResult):
+        self.afi.add(result.fatigue_index)
+        self.level_events[result.fatigue_level.value] += 1
+        c = result.components
+        values = np.array([getattr(c, name) for name in COMPONENT_FIELDS])
+        finite = np.isfinite(values)
+        values = np.where(finite, values, 0.0)
+        self.component_sum += values
+        self.component_sumsq += values * values
+        self.component_count += finite
+
+    def merge(self, other: "GroupStats"):
+        self.afi.merge(other.afi)
+        self.level_seconds += other.level_seconds
+        self.level_events += other.level_events
+        self.component_sum += other.component_sum
+        self.component_sumsq += other.component_sumsq
+        self.component_count += other.component_count
+        self.sessions += other.sessions
+
+    def component_means(self) -> dict[str, float]:
+        """各分量均值；从未计算过的分量（全部被跳过）为 NaN。"""
+        n = np.where(self.component_count > 0, self.component_count, np.nan)
+        return dict(zip(COMPONENT_FIELDS, (self.component_sum / n).tolist()))
+
+    def component_stds(self) -> dict[str, float]:
+        n = np.where(self.component_count > 0, self.component_count, np.nan)
+        mean = self.component_sum / n
+        var = np.maximum(self.component_sumsq / n - mean * mean, 0.0)
+        return dict(zip(COMPONENT_FIELDS, np.sqrt(var).tolist()))
+
+    def to_dict(self) -> dict:
+        return {"afi": self.afi.to_dict(),
+                "level_seconds": self.level_seconds.tolist(),
+                "level_events": self.level_events.tolist(),
+                "component_sum": self.component_sum.tolist(),
+                "component_sumsq": self.component_sumsq.tolist(),
+                "component_count": self.component_count.tolist(),
+                "sessions": self.sessions}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GroupStats":
+        return cls(TDigest.from_dict(data["afi"]),
+                   np.array(data["level_seconds"], dtype=float),
+                   np.array(data["level_events"], dtype=np.int64),
+                   np.array(data["component_sum"], dtype=float),
+                   np.array(data["component_sumsq"], dtype=float),
+                   data["sessions"],
+                   # 旧快照没有逐分量计数：当时每个事件都计入全部分量
+                   np.array(data.get("component_count",
+                                     [sum(data["level_events"])] * len(COMPONENT_FIELDS)),
+                            dtype=np.int64))
+
+
+class PopulationTelemetry:
+    """
+    多个 AestheticFatigueEngine 实例的结果聚合器。
+
+    record(player, result, timestamp, config) 每次施法调用一次；timestamp 为该玩家
+    的游戏内时间。摘要可跨进程 merge，snapshot / from_snapshot 与 JSON 互转。
+    """
+
+    def __init__(self, max_gap: float = 5.0, max_sessions: int = 100_000,
+                 snapshot_path: Optional[str] = None, snapshot_every: float = 60.0):
+        self.max_gap = max_gap
+        self.max_sessions = max_sessions
+        self.groups: dict[str, GroupStats] = {}
+        # 玩家 → [分组键, 上次时刻, 上次等级下标]（按最近更新排序，用于淘汰）
+        self._sessions: OrderedDict[Hashable, list] = OrderedDict()
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self._next_dump = time.monotonic() + snapshot_every
+
+    def group(self, key: str) -> GroupStats:
+        stats = self.groups.get(key)
+        if stats is None:
+            stats = self.groups[key] = GroupStats()
+        return stats
+
+    def record(self, player: Hashable, result: FatigueResult, timestamp: float,
+               config: Optional[FatigueConfig] = None):
+        """记录一个玩家的一次疲劳结果。"""
+        session = self._sessions.get(player)
+        if session is None:
+            key = config_key(config)
+            stats = self.group(key)
+            stats.sessions += 1
+            session = self._sessions[player] = [key, timestamp, result.fatigue_level.value]
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            stats = self.groups[session[0]]
+            dt = min(max(timestamp - session[1], 0.0), self.max_gap)
+            stats.level_seconds[session[2]] += dt
+            session[1] = timestamp
+            session[2] = result.fatigue_level.value
+            self._sessions.move_to_end(player)
+        stats.add(result)
+
+    def end_session(self, player: Hashable):
+        """玩家离开：丢弃会话状态（最后一个结果之后的时长不计入）。"""
+        self._sessions.pop(player, None)
+
+    @property
+    def active_sessions(self) -> int:
+        return len(self._sessions)
+
+    def merge(self, other: "PopulationTelemetry"):
+        """合并另一个聚合器的分组摘要（会话状态属于各自进程，不合并）。"""
+        for key, stats in other.groups.items():
+            self.group(key).merge(stats)
+
+    def snapshot(self) -> dict:
+        return {"time": time.time(),
+                "components": list(COMPONENT_FIELDS),
+                "levels": [level.name for level in LEVELS],
+                "groups": {key: stats.to_dict() for key, stats in self.groups.items()}}
+
+    @classmethod
+    def from_snapshot(cls, data: dict, **kwargs) -> "PopulationTelemetry":
+        telemetry = cls(**kwargs)
+        telemetry.groups = {key: GroupStats.from_dict(stats) for key, stats in data["groups"].items()}
+        return telemetry
+
+    def dump(self, path: Optional[str] = None):
+        """原子写出当前快照。"""
+        path = path or self.snapshot_path
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def maybe_dump(self) -> bool:
+        """距上次写出超过 snapshot_every 秒（墙钟）时写出快照。"""
+        if not self.snapshot_path or time.monotonic() < self._next_dump:
+            return False
+        self.dump()
+        self._next_dump = time.monotonic() + self.snapshot_every
+        return True
+
+
+def load_snapshot(path: str, **kwargs) -> PopulationTelemetry:
+    with open(path, encoding="utf-8") as f:
+        return PopulationTelemetry.from_snapshot(json.load(f), **kwargs)
+
+
+# =============================================================================
+# 第三部分：模拟玩家群体
+# =============================================================================
+
+def simulate_players(start: int, count: int, seed: int = 0, beats: int = 128) -> PopulationTelemetry:
+    """
+    模拟序号 [start, start + count) 的玩家：施法序列取自 markov_workload，
+    难度预设按序号轮换。随机数由 (种子, 玩家序号) 派生，结果与分块方式无关。
+    """
+    from markov_workload import HarmonyChain, WorkloadConfig, sample_workload
+    chain = HarmonyChain.from_music_data()
+    workload_config = WorkloadConfig(beats=beats)
+    presets = list(PRESETS.values())
+    telemetry = PopulationTelemetry()
+    for player in range(start, start + count):
+        workload = sample_workload(chain, 1, workload_config,
+                                   np.random.default_rng((seed, player)), first_seq=player)
+        config = presets[player % len(presets)]
+        engine = AestheticFatigueEngine(config)
+        for event in workload.spell_events(0):
+            telemetry.record(player, engine.record_spell(event), event.timestamp, config)
+        telemetry.end_session(player)
+    return telemetry
+
+
+def run_population(players: int, workers: int = 1, seed: int = 0, chunk: int = 100,
+                   snapshot_path: Optional[str] = None,
+                   snapshot_every: float = 5.0) -> PopulationTelemetry:
+    """并行模拟 players 名玩家，各进程的摘要在主进程合并，并按间隔写出快照。"""
+    tasks = [(start, min(chunk, players - start), seed) for start in range(0, players, chunk)]
+    telemetry = PopulationTelemetry(snapshot_path=snapshot_path, snapshot_every=snapshot_every)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(simulate_players, *zip(*tasks)):
+                telemetry.merge(part)
+                telemetry.maybe_dump()
+    else:
+        for task in tasks:
+            telemetry.merge(simulate_players(*task))
+            telemetry.maybe_dump()
+    if snapshot_path:
+        telemetry.dump()
+    return telemetry
+
+
+def print_telemetry_report(telemetry: PopulationTelemetry, elapsed: Optional[float] = None):
+    """打印各分组的 AFI 分位数、等级停留时间占比与分量均值。"""
+    groups = sorted(telemetry.groups.items(),
+                    key=lambda kv: (list(PRESETS).index(kv[0]) if kv[0] in PRESETS else len(PRESETS), kv[0]))
+    events = sum(stats.events for _, stats in groups)
+    print(f"\n{'=' * 100}")
+    print(f"  群体听感疲劳遥测：{sum(s.sessions for _, s in groups)} 名玩家，{events} 个事件"
+          + (f"，耗时 {elapsed:.1f} 秒（{events / max(elapsed, 1e-9):,.0f} 事件/秒）" if elapsed else ""))
+    print(f"{'=' * 100}")
+
+    print(f"\n  {'分组':10s} | {'均值':>6s} | {'P50':>6s} | {'P90':>6s} | {'P99':>6s} | {'最大':>6s} | {'质心':>4s}"
+          + "".join(f" | {level.name:>8s}" for level in LEVELS))
+    print(f"  {'-' * 110}")
+    for key, stats in groups:
+        afi = stats.afi
+        share = stats.level_seconds / max(stats.level_seconds.sum(), 1e-9)
+        print(f"  {key:10s} | {afi.mean():6.3f} | {afi.quantile(0.5):6.3f} | {afi.quantile(0.9):6.3f} | "
+              f"{afi.quantile(0.99):6.3f} | {afi.max:6.3f} | {len(afi.means):6d}"
+              + "".join(f" | {s:8.1%}" for s in share))
+
+    print(f"\n  {'分量均值':22s}" + "".join(f" | {key:>9s}" for key, _ in groups))
+    print(f"  {'-' * (24 + 12 * len(groups))}")
+    means = [stats.component_means() for _, stats in groups]
+    for name in COMPONENT_FIELDS:
+        print(f"  {name:22s}" + "".join(f" | {m[name]:9.3f}" for m in means))
+    print(f"{'=' * 100}\n")
+
+
+if __name__ == "__main__":
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    path = sys.argv[3] if len(sys.argv) > 3 else None
+
+    start = time.perf_counter()
+    telemetry = run_population(players, workers, snapshot_path=path)
+    elapsed = time.perf_counter() - start
+    if path:
+        telemetry = load_snapshot(path)
+        print(f"  快照已写入 {path}（{os.path.getsize(path) / 1024:.1f} KB）")
+    print_telemetry_report(telemetry, elapsed)
@@ -0,0 +1,156 @@
+"""
+=============================================================================
+Project Harmony — 逐拍疲劳轨迹矩阵 (Fatigue Trace Matrix)
+=============================================================================
+
+StrategySimulator(record_trace=True) 在每个 SimulationResult 上记录一条
+float32 疲劳轨迹（每拍 单调值/密度值/不和谐值）。本模块把一批结果的轨迹
+堆叠成 策略 × 拍 × 3 的 float32 矩阵，供疲劳热力图使用，不再需要逐拍
+dict 日志 (beat_log)。
+
+策略数量很大（上千个）时，提供两种压缩手段让图表保持可读、渲染够快：
+    1. 拍轴降采样：相邻若干拍合并为一格，取最大值（疲劳峰值不会被抹平）
+    2. 策略聚合：按整体疲劳峰值排序后分组，每组合并为一行（最大值或均值）
+
+用法：
+    python3 BalanceKit/fatigue_trace.py            # 三阶段 × 策略库的峰值与轨迹概览
+    python3 BalanceKit/fatigue_trace.py 8 16       # 聚合到至多 8 行、16 列
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from balance_scorer import SimulationResult, StrategySimulator
+
+TRACE_FIELDS = StrategySimulator.TRACE_FIELDS
+TRACE_LABELS = ("单调值", "密度值", "不和谐值")
+
+
+# =============================================================================
+# 第一部分：轨迹矩阵
+# =============================================================================
+
+@dataclass
+class FatigueTraces:
+    """
+    一批结果的疲劳轨迹。
+
+    Attributes:
+        labels:        每行的显示名（策略名或聚合组名）。
+        data:          float32 矩阵 (行, 拍, 3)；拍数不足的行以 NaN 补齐。
+        beats_per_bin: 每列对应的原始拍数（降采样后大于 1）。
+    """
+    labels: list[str]
+    data: np.ndarray
+    beats_per_bin: int = 1
+
+    @classmethod
+    def from_results(cls, results: list[SimulationResult],
+                     labels: Optional[list[str]] = None) -> "FatigueTraces":
+        """堆叠结果的 fatigue_trace（结果须由 record_trace=True 的模拟器产生）。"""
+        missing = [r.strategy_name for r in results if r.fatigue_trace is None]
+        if missing:
+            raise ValueError(f"结果缺少疲劳轨迹（需 record_trace=True）: {missing[:3]}")
+        if labels is None:
+            labels = [r.strategy_name for r in results]
+        beats = max((len(r.fatigue_trace) // 3 for r in results), default=0)
+        data = np.full((len(results), beats, 3), np.nan, dtype=np.float32)
+        for i, r in enumerate(results):
+            trace = np.frombuffer(r.fatigue_trace, dtype=np.float32).reshape(-1, 3)
+            data[i, :len(trace)] = trace
+        return cls(list(labels), data)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """(行数, 列数)。"""
+        return self.data.shape[0], self.data.shape[1]
+
+    def peaks(self) -> np.ndarray:
+        """每行每个维度的峰值，形状 (行, 3)；与 SimulationResult.peak_* 一致。"""
+        if self.data.shape[1] == 0:
+            return np.zeros((self.data.shape[0], 3), dtype=np.float32)
+        return np.nanmax(self.data, axis=1)
+
+    def downsample_beats(self, max_beats: int) -> "FatigueTraces":
+        """拍轴降采样到至多 max_beats 列，每列取所合并各拍的最大值。"""
+        rows, beats = self.shape
+        if beats <= max_beats:
+            return self
+        factor = -(-beats // max_beats)
+        padded = np.full((rows, factor * (-(-beats // factor)), 3), np.nan, dtype=np.float32)
+        padded[:, :beats] = self.data
+        binned = _nanreduce(padded.reshape(rows, -1, factor, 3), axis=2, how="max")
+        return FatigueTraces(self.labels, binned, self.beats_per_bin * factor)
+
+    def aggregate_strategies(self, max_rows: int, how: str = "max") -> "FatigueTraces":
+        """
+        策略数超过 max_rows 时，按整体疲劳峰值降序排序后均分为 max_rows 组，
+        每组合并为一行（how="max" 取组内最大值，"mean" 取均值），
+        行名为 "第a–b名 (n个)"。
+        """
+        rows = self.shape[0]
+        if rows <= max_rows:
+            return self
+        order = np.argsort(-self.peaks().max(axis=1), kind="stable")
+        groups = np.array_split(order, max_rows)
+        data = np.stack([_nanreduce(self.data[g], axis=0, how=how) for g in groups])
+        labels, start = [], 1
+        for g in groups:
+            labels.append(f"第{start}–{start + len(g) - 1}名 ({len(g)}个)")
+            start += len(g)
+        return FatigueTraces(labels, data, self.beats_per_bin)
+
+    def for_display(self, max_rows: int = 40, max_beats: int = 128,
+                    how: str = "max") -> "FatigueTraces":
+        """压缩到适合绘图的尺寸（先聚合策略，再降采样拍轴）。"""
+        return self.aggregate_strategies(max_rows, how).downsample_beats(max_beats)
+
+
+def _nanreduce(data: np.ndarray, axis: int, how: str) -> np.ndarray:
+    """忽略 NaN 的最大值 / 均值；全为 NaN 的位置保持 NaN（不告警）。"""
+    valid = ~np.isnan(data)
+    if how == "max":
+        reduced = np.where(valid, data, -np.inf).max(axis=axis)
+        reduced[np.isneginf(reduced)] = np.nan
+    elif how == "mean":
+        count = valid.sum(axis=axis)
+        total = np.where(valid, data, 0).sum(axis=axis)
+        reduced = np.divide(total, count, out=np.full(total.shape, np.nan, dtype=np.float32),
+                            where=count > 0)
+    else:
+        raise ValueError(f"未知的聚合方式: {how}")
+    return reduced.astype(np.float32)
+
+
+def has_traces(results: list[SimulationResult]) -> bool:
+    """结果是否都带有疲劳轨迹（例如从结果存储读取的结果没有）。"""
+    return bool(results) and all(r.fatigue_trace is not None for r in results)
+
+
+if __name__ == "__main__":
+    from balance_scorer import create_chord_registry, create_strategy_library, run_full_benchmark
+    from generate_report import build_scenarios
+
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    max_beats = int(sys.argv[2]) if len(sys.argv) > 2 else 128
+
+    chords = create_chord_registry()
+    strategies = create_strategy_library()
+    for phase, build in build_scenarios().items():
+        results = run_full_benchmark(build, strategies, chords, log_beats=False, record_trace=True)
+        traces = FatigueTraces.from_results(results)
+        shown = traces.for_display(max_rows, max_beats)
+        print(f"\n[{phase}] 轨迹矩阵 {traces.data.shape} ({traces.data.nbytes / 1024:.1f} KiB)"
+              f" → 显示 {shown.shape[0]} 行 × {shown.shape[1]} 列（每列 {shown.beats_per_bin} 拍）")
+        print(f"  {'策略':24s} | " + " | ".join(f"{label:>6s}" for label in TRACE_LABELS))
+        for label, peak in zip(shown.labels, shown.peaks()):
+            print(f"  {label:24s} | " + " | ".join(f"{v:8.1f}" for v in peak))
@@ -0,0 +1,220 @@
+"""
+=============================================================================
+Project Harmony — 游戏数值单一数据源 (Game Data Loader)
+=============================================================================
+
+balance_scorer 的白键参数与和弦表过去是从 music_data.gd 手工抄过来的，
+游戏侧调整数值（如 v3.0 的音符极化、三和弦倍率下调）后跑分仍在用旧表。
+本模块直接从 godot_project/scripts/data/music_data.gd 提取这些常量：
+
+    WHITE_KEY_STATS         → 白键四维参数 (DMG, SPD, DUR, SIZE)
+    PARAM_CONVERSION        → 参数 → 实际值的转换比率
+    CHORD_SPELL_MAP         → 和弦的法术形态与伤害倍率
+    CHORD_DISSONANCE        → 和弦不和谐度
+    CHORD_INTERVALS         → 和弦音数
+    EXTENDED_CHORD_FATIGUE  → 扩展和弦疲劳代价
+    BLACK_KEY_MODIFIERS     → 黑键修饰符效果
+
+枚举下标一律换成名称（WhiteKey.C → "C"，ChordType.MAJOR → "MAJOR"，
+BlackKey.CS → "C#"），得到只含 Python 基础类型的 GameData，
+由 balance_scorer 组装成 NoteStats / ChordType 注册表。
+
+缓存（.sim_cache/game_data.pkl）记录源文件的 (mtime_ns, 大小, 内容哈希)：
+    1. mtime 与大小都没变 → 直接读 pickle，不读也不解析 .gd 文件
+    2. 变了 → 比较内容哈希，内容相同（touch、git checkout）只刷新时间戳
+    3. 哈希也变了 → 经 gd_constants 重新解析并提取
+
+用法：
+    python3 BalanceKit/game_data.py            # 打印游戏数值表与加载耗时
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import pickle
+import hashlib
+from typing import NamedTuple, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gd_constants import BASE_DIR, PARSER_VERSION, GDScriptParseError, godot_path, load_constants
+
+MUSIC_DATA = "scripts/data/music_data.gd"
+CACHE_FILE = os.path.join(BASE_DIR, ".sim_cache", "game_data.pkl")
+
+# 提取结果格式版本：GameData 结构或提取逻辑变化时递增，使旧缓存失效
+FORMAT_VERSION = 1
+
+# 缓存版本：提取格式 + gd_constants 解析器版本（解析器修复后旧缓存同样失效）
+CACHE_VERSION = (FORMAT_VERSION, PARSER_VERSION)
+
+
+class GameChord(NamedTuple):
+    """music_data.gd 中一种和弦的全部数值。"""
+    form: str                           # SpellForm 枚举名，如 "FIELD"
+    spell_name: str                     # 法术形态中文名，如 "法阵/区域"
+    multiplier: float                   # 伤害倍率
+    dissonance: float                   # 不和谐度
+    note_count: int                     # 构成音数
+    extended_fatigue: Optional[float]   # 扩展和弦疲劳代价（非扩展和弦为 None）
+
+
+class GameModifier(NamedTuple):
+    """黑键修饰符：ModifierEffect 枚举名与中文名。"""
+    effect: str
+    name: str
+
+
+class GameData(NamedTuple):
+    notes: dict[str, tuple[float, float, float, float]]   # 白键 → (dmg, spd, dur, size)
+    param_conversion: dict[str, float]                    # "dmg_per_point" 等 → 比率
+    chords: dict[str, GameChord]                          # ChordType 枚举名 → 和弦数值
+    modifiers: dict[str, GameModifier]                    # "C#" 等 → 修饰符
+
+
+# =============================================================================
+# 第一部分：从 GDScript 常量提取
+# =============================================================================
+
+def _enum_names(constants: dict, enum: str) -> dict[int, str]:
+    """枚举 {成员: 值} → {值: 成员}。"""
+    return {value: name for name, value in _require(constants, enum).items()}
+
+
+def _require(constants: dict, name: str):
+    if name not in constants:
+        raise GDScriptParseError(f"{MUSIC_DATA} 缺少常量 {name}")
+    return constants[name]
+
+
+def extract(constants: dict) -> GameData:
+    """music_data.gd 的解析结果 → GameData。"""
+    white_keys = _enum_names(constants, "WhiteKey")
+    black_keys = _enum_names(constants, "BlackKey")
+    chord_types = _enum_names(constants, "ChordType")
+    spell_forms = _enum_names(constants, "SpellForm")
+    effects = _enum_names(constants, "ModifierEffect")
+
+    notes = {}
+    for key, stats in _require(constants, "WHITE_KEY_STATS").items():
+        notes[white_keys[key]] = tuple(float(stats[k]) for k in ("dmg", "spd", "dur", "size"))
+
+    conversion = {name: float(value)
+                  for name, value in _require(constants, "PARAM_CONVERSION").items()}
+
+    dissonance = _require(constants, "CHORD_DISSONANCE")
+    intervals = _require(constants, "CHORD_INTERVALS")
+    fatigue = _require(constants, "EXTENDED_CHORD_FATIGUE")
+    chords = {}
+    for key, spell in _require(constants, "CHORD_SPELL_MAP").items():
+        extended = fatigue.get(key)
+        chords[chord_types[key]] = GameChord(
+            form=spell_forms[spell["form"]],
+            spell_name=spell["name"],
+            multiplier=float(spell["multiplier"]),
+            dissonance=float(dissonance[key]),
+            note_count=len(intervals[key]),
+            extended_fatigue=float(extended) if extended is not None else None,
+        )
+
+    modifiers = {}
+    for key, modifier in _require(constants, "BLACK_KEY_MODIFIERS").items():
+        name = black_keys[key]                       # "CS" → "C#"
+        modifiers[name[0] + "#"] = GameModifier(effects[modifier["effect"]], modifier["name"])
+
+    return GameData(notes, conversion, chords, modifiers)
+
+
+# =============================================================================
+# 第二部分：按 mtime / 内容哈希缓存
+# =============================================================================
+
+_memo: dict[str, tuple[tuple[int, int], GameData]] = {}
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.blake2b(raw + bytes(CACHE_VERSION), digest_size=16).hexdigest()
+
+
+def _read_cache(cache_file: Optional[str]) -> Optional[dict]:
+    if not cache_file or not os.path.exists(cache_file):
+        return None
+    try:
+        with open(cache_file, "rb") as f:
+            entry = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        return None
+    return entry if isinstance(entry, dict) and entry.get("version") == CACHE_VERSION else None
+
+
+def _write_cache(cache_file: str, entry: dict):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cache_file)
+
+
+def load_game_data(path: str = MUSIC_DATA, cache_file: Optional[str] = CACHE_FILE) -> GameData:
+    """
+    读取 music_data.gd 的数值表（path 可为 res:// 路径）。
+
+    返回值在进程内共享，调用方不应原地修改。cache_file=None 时不读写磁盘缓存。
+    """
+    path = godot_path(path)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    memo = _memo.get(path)
+    if memo is not None and memo[0] == stamp:
+        return memo[1]
+
+    entry = _read_cache(cache_file)
+    if entry is not None and entry["path"] == path and entry["stamp"] == stamp:
+        data = entry["data"]
+    else:
+        with open(path, "rb") as f:
+            digest = _digest(f.read())
+        if entry is not None and entry["path"] == path and entry["digest"] == digest:
+            data = entry["data"]
+        else:
+            data = extract(load_constants(path))
+        if cache_file:
+            _write_cache(cache_file, {"version": CACHE_VERSION, "path": path,
+                                      "stamp": stamp, "digest": digest, "data": data})
+    _memo[path] = (stamp, data)
+    return data
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    data = extract(load_constants(MUSIC_DATA, cache_dir=None))
+    cold = time.perf_counter() - start
+    load_game_data()
+    _memo.clear()
+    start = time.perf_counter()
+    data = load_game_data()
+    warm = time.perf_counter() - start
+
+    conv = data.param_conversion
+    print(f"\n  {MUSIC_DATA}：解析 {cold * 1000:.1f} 毫秒，缓存加载 {warm * 1000:.2f} 毫秒")
+    print("  参数转换：" + "，".join(f"{k} = {v:g}" for k, v in conv.items()))
+
+    print(f"\n  {'音符':4s} | {'DMG':>4s} | {'SPD':>4s} | {'DUR':>4s} | {'SIZE':>4s} | {'射程(px)':>8s}")
+    print(f"  {'-' * 44}")
+    for name, (dmg, spd, dur, size) in data.notes.items():
+        reach = spd * conv["spd_per_point"] * dur * conv["dur_per_point"]
+        print(f"  {name:4s} | {dmg:4g} | {spd:4g} | {dur:4g} | {size:4g} | {reach:8.0f}")
+
+    print(f"\n  {'和弦':18s} | {'形态':10s} | {'倍率':>4s} | {'不和谐':>5s} | {'音数':>4s} | {'扩展疲劳':>6s}")
+    print(f"  {'-' * 68}")
+    for name, c in data.chords.items():
+        fatigue = f"{c.extended_fatigue:.2f}" if c.extended_fatigue is not None else "—"
+        print(f"  {name:18s} | {c.spell_name:10s} | {c.multiplier:4.1f} | {c.dissonance:6.1f} | "
+              f"{c.note_count:6d} | {fatigue:>10s}")
+
+    print("\n  黑键修饰符：" + "，".join(f"{k} {m.name}({m.effect})" for k, m in data.modifiers.items()))
+    print()
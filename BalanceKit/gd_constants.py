@@ -0,0 +1,465 @@
+"""
+=============================================================================
+Project Harmony — GDScript 常量提取器 (GDScript Constant Extractor)
+=============================================================================
+
+godot_project 里的数值表（章节、波次、敌人数值等）都写成 GDScript 的
+const 字典/数组。本模块把一个 .gd 文件里的顶层 enum 与 const 解析为
+Python 数据，供 BalanceKit 的跑分直接使用，数值不必手工同步。
+Autoload 的可调参数（fatigue_manager.gd 的权重、阈值等）写成顶层 var，
+其字面初始值也一并提取。
+
+    1. 分词：一条合并的正则一次扫描全文（注释、字符串、数字、标识符、符号）
+    2. 解析：只对顶层 enum / const / var 做递归下降解析，函数体整体跳过；
+       var 的初始值无法完整求值（$Node、条件表达式等）或没有初始值时不记录
+    3. 取值：字典 → dict，数组 → list，字符串/数字/布尔/null → 对应 Python 值；
+       本文件 enum 的成员（Chapter.CH1_PYTHAGORAS）解析为整数；
+       其他引用（MusicData.ChapterTimbre.LYRE）保留为 GDRef，
+       构造调用（Color(0.3, 0.5, 0.8)）保留为 GDCall；常量算术表达式直接求值
+    4. 缓存：按文件内容的哈希把解析结果存到 .sim_cache/gdscript/，
+       文件未改动时直接读取
+
+用法：
+    python3 BalanceKit/gd_constants.py                                   # 章节数据概览
+    python3 BalanceKit/gd_constants.py scripts/data/chapter_data.gd CHAPTER_ENEMY_STATS
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import math
+import pickle
+import hashlib
+from typing import Any, NamedTuple, Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GODOT_DIR = os.path.join(os.path.dirname(BASE_DIR), "godot_project")
+CACHE_DIR = os.path.join(BASE_DIR, ".sim_cache", "gdscript")
+
+# 解析结果格式版本：解析逻辑变化时递增，使旧缓存全部失效
+PARSER_VERSION = 2
+
+
+class GDRef(NamedTuple):
+    """无法在本文件内解析的标识符引用（其他脚本的常量/枚举）。"""
+    name: str
+
+
+class GDCall(NamedTuple):
+    """构造调用，如 Color(0.3, 0.5, 0.8)、Vector2(1, 0)。"""
+    name: str
+    args: tuple
+
+
+class GDScriptParseError(ValueError):
+    pass
+
+
+# =============================================================================
+# 第一部分：分词
+# =============================================================================
+
+_TOKEN_RE = re.compile(r'''
+    (?P<skip>[ \t\r\n]+|\#[^\n]*|\\\n)
+  | (?P<string>[&^]?(?:"""(?:\\.|[^\\])*?"""|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'))
+  | (?P<number>0x[0-9A-Fa-f_]+|0b[01_]+|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op>:=|->|==|!=|<=|>=|\*\*|[-+*/%(){}\[\],:.=<>!&|^~@$])
+  | (?P<other>.)
+''', re.VERBOSE | re.DOTALL)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "'": "'", "\\": "\\", "0": "\0"}
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    pos: int
+
+
+def tokenize(source: str) -> list[Token]:
+    """全文分词（丢弃空白与注释）。"""
+    return [Token(m.lastgroup, m.group(), m.start())
+            for m in _TOKEN_RE.finditer(source) if m.lastgroup != "skip"]
+
+
+def _string_value(text: str) -> str:
+    text = text.lstrip("&^")
+    body = text[3:-3] if text.startswith('"""') else text[1:-1]
+    if "\\" not in body:
+        return body
+    return re.sub(r"\\(u[0-9A-Fa-f]{4}|.)",
+                  lambda m: chr(int(m.group(1)[1:], 16)) if m.group(1)[0] == "u" and len(m.group(1)) == 5
+                  else _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def _number_value(text: str):
+    text = text.replace("_", "")
+    if text.startswith(("0x", "0b")):
+        return int(text, 0)
+    if any(c in text for c in ".eE"):
+        return float(text)
+    return int(text)
+
+
+# =============================================================================
+# 第二部分：递归下降解析
+# =============================================================================
+
+_BINARY_PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "%": 2}
+_LITERALS = {"true": True, "false": False, "null": None, "INF": float("inf"), "NAN": float("nan"),
+             "PI": math.pi, "TAU": math.tau}
+
+
+class _Parser:
+    def __init__(self, tokens: list[Token], source: str):
+        self.tokens = tokens
+        self.source = source
+        self.i = 0
+        self.enums: dict[str, dict[str, int]] = {}
+        self.constants: dict[str, Any] = {}
+
+    # ---- 基础 ----
+
+    def _error(self, message: str) -> GDScriptParseError:
+        pos = self.tokens[self.i].pos if self.i < len(self.tokens) else len(self.source)
+        line = self.source.count("\n", 0, pos) + 1
+        return GDScriptParseError(f"第 {line} 行: {message}")
+
+    def peek(self, offset: int = 0) -> Optional[Token]:
+        j = self.i + offset
+        return self.tokens[j] if j < len(self.tokens) else None
+
+    def take(self) -> Token:
+        tok = self.peek()
+        if tok is None:
+            raise self._error("意外的文件结尾")
+        self.i += 1
+        return tok
+
+    def accept(self, text: str) -> bool:
+        tok = self.peek()
+        if tok is not None and tok.text == text and tok.kind in ("op", "name"):
+            self.i += 1
+            return True
+        return False
+
+    def expect(self, text: str):
+        if not self.accept(text):
+            tok = self.peek()
+            raise self._error(f"期望 {text!r}，得到 {tok.text if tok else '文件结尾'!r}")
+
+    # ---- 顶层 ----
+
+    def parse_file(self):
+        depth = 0
+        while self.i < len(self.tokens):
+            tok = self.tokens[self.i]
+            if depth == 0 and tok.kind == "name" and self._at_line_start():
+                if tok.text == "enum":
+                    self.i += 1
+                    self._enum()
+                    continue
+                if tok.text == "const":
+                    self.i += 1
+                    self._const()
+                    continue
+                if tok.text == "var":
+                    self.i += 1
+                    self._var()
+                    continue
+            if depth == 0 and tok.text == "@" and self._at_line_start():
+                self._annotations()
+                continue
+            if tok.kind == "op" and tok.text in "([{":
+                depth += 1
+            elif tok.kind == "op" and tok.text in ")]}":
+                depth = max(0, depth - 1)
+            self.i += 1
+
+    def _at_line_start(self) -> bool:
+        """顶层声明：位于行首且无缩进（函数体内的局部 const 不提取）。"""
+        pos = self.tokens[self.i].pos
+        return pos == 0 or self.source[pos - 1] == "\n"
+
+    def _enum(self):
+        name = self.take().text if self.peek().kind == "name" else None
+        self.expect("{")
+        members, value = {}, 0
+        while not self.accept("}"):
+            member = self.take().text
+            if self.accept("="):
+                value = self._expression()
+            members[member] = value
+            value += 1
+            self.accept(",")
+        if name is None:
+            self.constants.update(members)
+        else:
+            self.enums[name] = members
+            self.constants[name] = dict(members)
+
+    def _const(self):
+        name = self.take().text
+        if self.accept(":="):
+            pass
+        else:
+            if self.accept(":"):
+                self._skip_type()
+            self.expect("=")
+        self.constants[name] = self._expression()
+
+    def _annotations(self):
+        """跳过行首注解（@export、@export_range(0, 1) 等），其后同一行的 var 照常提取。"""
+        while self.accept("@"):
+            self.take()
+            if self.accept("("):
+                depth = 1
+                while depth:
+                    text = self.take().text
+                    depth += (text == "(") - (text == ")")
+        if self.peek() is not None and self.peek().text == "var":
+            self.i += 1
+            self._var()
+
+    def _var(self):
+        """顶层 var 的初始值；只记录能完整求值的初始化表达式，其余情况原样跳过。"""
+        start = self.i
+        name = self.take().text
+        line_end = self.source.find("\n", self.tokens[start].pos)
+        line_end = len(self.source) if line_end < 0 else line_end
+        if not self.accept(":="):
+            if self.accept(":"):
+                while self.peek() is not None and self.peek().pos < line_end and \
+                        self.peek().text not in ("=", "["):
+                    self.i += 1
+                if self.peek() is not None and self.peek().text == "[":
+                    self._skip_type()
+            if not self.accept("=") or self.tokens[self.i - 1].pos > line_end:
+                self.i = start
+                return
+        try:
+            value = self._expression()
+        except (GDScriptParseError, LookupError, TypeError, AttributeError, ArithmeticError):
+            self.i = start
+            return
+        # 表达式之后须换行（或是 setter/getter 的冒号），否则说明只解析了一部分
+        nxt = self.peek()
+        if nxt is not None and nxt.text != ":" and \
+                "\n" not in self.source[self.tokens[self.i - 1].pos:nxt.pos]:
+            self.i = start
+            return
+        self.constants[name] = value
+
+    def _skip_type(self):
+        """跳过类型注解（如 Dictionary、Array[String]），直到 '='。"""
+        depth = 0
+        while True:
+            tok = self.peek()
+            if tok is None or (depth == 0 and tok.text == "="):
+                return
+            if tok.text == "[":
+                depth += 1
+            elif tok.text == "]":
+                depth -= 1
+            self.i += 1
+
+    # ---- 表达式 ----
+
+    def _expression(self, min_prec: int = 1):
+        left = self._unary()
+        while True:
+            tok = self.peek()
+            prec = _BINARY_PRECEDENCE.get(tok.text) if tok is not None and tok.kind == "op" else None
+            if prec is None or prec < min_prec:
+                return left
+            self.i += 1
+            right = self._expression(prec + 1)
+            left = self._binary(tok.text, left, right)
+
+    def _binary(self, op: str, left, right):
+        if not (isinstance(left, (int, float)) and isinstance(right, (int, float))):
+            if op == "+" and isinstance(left, str) and isinstance(right, str):
+                return left + right
+            # 涉及外部引用或构造调用的表达式无法在这里求值，保留为符号引用
+            return GDRef(f"({_symbol(left)} {op} {_symbol(right)})")
+        if op == "+":
+            return left + right
+        if op == "-":
+            return left - right
+        if op == "*":
+            return left * right
+        if op == "/":
+            # GDScript 整数相除取整（向零截断）
+            if isinstance(left, int) and isinstance(right, int):
+                return int(left / right)
+            return left / right
+        return math.fmod(left, right) if isinstance(left, float) or isinstance(right, float) \
+            else int(math.fmod(left, right))
+
+    def _unary(self):
+        if self.accept("-"):
+            return -self._unary()
+        if self.accept("+"):
+            return self._unary()
+        return self._postfix(self._primary())
+
+    def _postfix(self, value):
+        # 下标：字面量容器直接取值，外部引用记为 GDRef("X[key]")
+        while self.peek() is not None and self.peek().text == "[" and \
+                isinstance(value, (list, dict, GDRef)):
+            self.i += 1
+            key = self._expression()
+            self.expect("]")
+            value = GDRef(f"{value.name}[{key!r}]") if isinstance(value, GDRef) else value[key]
+        return value
+
+    def _primary(self):
+        tok = self.take()
+        if tok.kind == "number":
+            return _number_value(tok.text)
+        if tok.kind == "string":
+            return _string_value(tok.text)
+        if tok.kind == "op":
+            if tok.text == "{":
+                return self._dict()
+            if tok.text == "[":
+                return self._list()
+            if tok.text == "(":
+                value = self._expression()
+                self.expect(")")
+                return value
+            raise self._error(f"意外的符号 {tok.text!r}")
+        if tok.kind == "name":
+            if tok.text in _LITERALS:
+                return _LITERALS[tok.text]
+            name = tok.text
+            while self.peek() is not None and self.peek().text == "." and \
+                    self.peek(1) is not None and self.peek(1).kind == "name":
+                self.i += 1
+                name += "." + self.take().text
+            if self.accept("("):
+                args = []
+                while not self.accept(")"):
+                    args.append(self._expression())
+                    self.accept(",")
+                return GDCall(name, tuple(args))
+            return self._resolve(name)
+        raise self._error(f"无法解析的记号 {tok.text!r}")
+
+    def _resolve(self, name: str):
+        head, _, member = name.partition(".")
+        if member and head in self.enums and member in self.enums[head]:
+            return self.enums[head][member]
+        if not member and name in self.constants:
+            return self.constants[name]
+        return GDRef(name)
+
+    def _dict(self) -> dict:
+        result = {}
+        while not self.accept("}"):
+            # Lua 风格 {key = value} 的键是裸标识符
+            tok, nxt = self.peek(), self.peek(1)
+            if tok.kind == "name" and nxt is not None and nxt.text == "=":
+                self.i += 2
+                key = tok.text
+            else:
+                key = self._expression()
+                self.expect(":")
+            result[key] = self._expression()
+            self.accept(",")
+        return result
+
+    def _list(self) -> list:
+        result = []
+        while not self.accept("]"):
+            result.append(self._expression())
+            self.accept(",")
+        return result
+
+
+def _symbol(value) -> str:
+    if isinstance(value, GDRef):
+        return value.name
+    if isinstance(value, GDCall):
+        return f"{value.name}({', '.join(_symbol(a) for a in value.args)})"
+    return repr(value)
+
+
+def parse_constants(source: str) -> dict[str, Any]:
+    """解析 GDScript 源码中的全部顶层 enum（名称 → {成员: 值}）、const 与 var 的初始值。"""
+    parser = _Parser(tokenize(source), source)
+    parser.parse_file()
+    return parser.constants
+
+
+# =============================================================================
+# 第三部分：按文件哈希缓存
+# =============================================================================
+
+def godot_path(path: str) -> str:
+    """res:// 路径或相对 godot_project 的路径 → 本地绝对路径。"""
+    if path.startswith("res://"):
+        path = path[len("res://"):]
+    return path if os.path.isabs(path) else os.path.join(GODOT_DIR, path)
+
+
+_memo: dict[str, tuple[str, dict]] = {}
+
+
+def load_constants(path: str, cache_dir: Optional[str] = CACHE_DIR) -> dict[str, Any]:
+    """
+    读取并解析 .gd 文件的常量（path 可为 res:// 路径）。
+
+    解析结果按 (解析器版本, 文件内容哈希) 缓存：进程内存一份，cache_dir 下存一份
+    pickle；文件内容变化后自动重新解析。返回值与缓存共享，调用方不应原地修改。
+    """
+    path = godot_path(path)
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.blake2b(raw + bytes([PARSER_VERSION]), digest_size=16).hexdigest()
+    memo = _memo.get(path)
+    if memo is not None and memo[0] == digest:
+        return memo[1]
+
+    constants = None
+    cache_file = None
+    if cache_dir:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        cache_file = os.path.join(cache_dir, f"{stem}-{digest}.pkl")
+        if os.path.exists(cache_file):
+            with open(cache_file, "rb") as f:
+                constants = pickle.load(f)
+    if constants is None:
+        constants = parse_constants(raw.decode("utf-8"))
+        if cache_file:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = cache_file + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(constants, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_file)
+    _memo[path] = (digest, constants)
+    return constants
+
+
+if __name__ == "__main__":
+    import time
+    import pprint
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "scripts/data/chapter_data.gd"
+    start = time.perf_counter()
+    with open(godot_path(target), encoding="utf-8") as f:
+        source = f.read()
+    constants = parse_constants(source)
+    elapsed = time.perf_counter() - start
+
+    if len(sys.argv) > 2:
+        pprint.pprint(constants[sys.argv[2]], width=110, sort_dicts=False)
+    else:
+        print(f"{target}: {len(source.splitlines())} 行，解析 {elapsed * 1000:.1f} 毫秒")
+        for name, value in constants.items():
+            size = f"{len(value)} 项" if isinstance(value, (dict, list)) else repr(value)[:40]
+            print(f"  {name:28s} {type(value).__name__:10s} {size}")
@@ -8,6 +8,16 @@ Project Harmony — 跑分可视化报告生成器
 
 用法：
     python3 BalanceKit/generate_report.py
+    python3 BalanceKit/generate_report.py --store PATH.hcol
+        # 存储已存在：直接从列式结果存储查询出图，不再跑分；
+        # 不存在：跑分后把结果写入该存储（见 results_store.py）
+    python3 BalanceKit/generate_report.py --report benchmark_results.jsonl.gz
+        # 结构化报告改为 gzip 压缩的 JSON Lines（默认 benchmark_results.json）
+    python3 BalanceKit/generate_report.py --json-only     # 只生成JSON报告，不加载 matplotlib
+    python3 BalanceKit/generate_report.py --jobs 4        # 图表渲染进程数（默认 CPU 核数）
+    python3 BalanceKit/generate_report.py --force         # 忽略指纹，重绘全部图表
+
+    图表按输入指纹（数据 + 绘图代码 + 数值模型）跳过：输入未变的图表不重绘。
 
 输出：
     BalanceKit/Reports/ 目录下的图表和JSON报告
@@ -15,32 +25,58 @@ Project Harmony — 跑分可视化报告生成器
 
 import sys
 import os
-import json
 
 # 确保可以导入同目录模块
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import matplotlib.style as mplstyle
-mplstyle.use('seaborn-v0_8-whitegrid')
-plt.rcParams['font.family'] = 'Noto Sans CJK SC'
-plt.rcParams['axes.unicode_minus'] = False
-plt.rcParams['figure.dpi'] = 150
+import hashlib
+import inspect
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
 
 import numpy as np
 
 from balance_scorer import (
-    PlayerBuild, create_chord_registry, create_strategy_library,
+    PlayerBuild, BuildVariant, create_chord_registry, create_strategy_library,
     create_upgrade_pool, run_full_benchmark, SimulationResult,
-    create_base_notes, DMG_PER_POINT, NoteStats
 )
+from sim_cache import SimulationCache
+from pareto import write_pareto_report
+from results_store import ResultStore, write_results
+from report_stream import write_report
+from fatigue_trace import FatigueTraces, TRACE_LABELS, has_traces
 
 # 输出目录
 REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Reports")
 os.makedirs(REPORT_DIR, exist_ok=True)
 
+# 模拟结果磁盘缓存目录（数值未变的 Build × 策略 组合跨次运行复用）
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sim_cache")
+
+# 各图表上次渲染时的输入指纹
+FIGURE_STATE_PATH = os.path.join(CACHE_DIR, "figures.json")
+
+# matplotlib 延迟导入：--json-only 时不加载绘图库与 CJK 字体
+plt = None
+
+
+def _init_plotting():
+    """首次绘图时导入 matplotlib 并设置样式（可重复调用）。"""
+    global plt
+    if plt is not None:
+        return plt
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as pyplot
+    import matplotlib.style as mplstyle
+    mplstyle.use('seaborn-v0_8-whitegrid')
+    pyplot.rcParams['font.family'] = 'Noto Sans CJK SC'
+    pyplot.rcParams['axes.unicode_minus'] = False
+    pyplot.rcParams['figure.dpi'] = 150
+    plt = pyplot
+    return plt
+
 
 def build_scenarios():
     """构建三个阶段的Build。"""
@@ -90,6 +126,7 @@ def build_scenarios():
 
 def plot_strategy_comparison(all_results: dict[str, list[SimulationResult]]):
     """图1: 策略综合得分对比（三阶段）。"""
+    _init_plotting()
     fig, axes = plt.subplots(1, 3, figsize=(20, 7), sharey=True)
 
     for idx, (phase, results) in enumerate(all_results.items()):
@@ -118,6 +155,7 @@ def plot_strategy_comparison(all_results: dict[str, list[SimulationResult]]):
 
 def plot_dps_vs_risk(all_results: dict[str, list[SimulationResult]]):
     """图2: DPS vs 风险散点图。"""
+    _init_plotting()
     fig, axes = plt.subplots(1, 3, figsize=(18, 6))
 
     for idx, (phase, results) in enumerate(all_results.items()):
@@ -141,24 +179,34 @@ def plot_dps_vs_risk(all_results: dict[str, list[SimulationResult]]):
     print("  [OK] dps_vs_risk.png")
 
 
-def plot_fatigue_peaks(all_results: dict[str, list[SimulationResult]]):
+def _fatigue_matrix(results: list[SimulationResult], max_rows: int) -> tuple[list[str], np.ndarray]:
+    """各策略的疲劳峰值 (3 × 列)：优先取逐拍疲劳轨迹，策略过多时聚合为 max_rows 列。"""
+    if has_traces(results):
+        traces = FatigueTraces.from_results(results).aggregate_strategies(max_rows)
+        return traces.labels, traces.peaks().T
+    # 从结果存储读取的结果没有轨迹：直接用峰值字段
+    names = [r.strategy_name for r in results]
+    return names, np.array([
+        [r.peak_monotony for r in results],
+        [r.peak_density for r in results],
+        [r.peak_dissonance for r in results],
+    ])
+
+
+def plot_fatigue_peaks(all_results: dict[str, list[SimulationResult]], max_strategies: int = 40):
     """图3: 各策略的疲劳峰值热力图。"""
+    _init_plotting()
     fig, axes = plt.subplots(1, 3, figsize=(20, 7))
 
     for idx, (phase, results) in enumerate(all_results.items()):
         ax = axes[idx]
-        names = [r.strategy_name for r in results]
-        data = np.array([
-            [r.peak_monotony for r in results],
-            [r.peak_density for r in results],
-            [r.peak_dissonance for r in results],
-        ])
+        names, data = _fatigue_matrix(results, max_strategies)
 
         im = ax.imshow(data, cmap='RdYlGn_r', aspect='auto', vmin=0, vmax=100)
         ax.set_xticks(range(len(names)))
         ax.set_xticklabels(names, rotation=45, ha='right', fontsize=7)
         ax.set_yticks([0, 1, 2])
-        ax.set_yticklabels(['单调值', '密度值', '不和谐值'], fontsize=9)
+        ax.set_yticklabels(list(TRACE_LABELS), fontsize=9)
         ax.set_title(f'{phase}阶段', fontsize=12, fontweight='bold')
 
         for i in range(3):
@@ -174,6 +222,45 @@ def plot_fatigue_peaks(all_results: dict[str, list[SimulationResult]]):
     print("  [OK] fatigue_heatmap.png")
 
 
+def plot_fatigue_timeline(all_results: dict[str, list[SimulationResult]],
+                          max_strategies: int = 40, max_beats: int = 128):
+    """图8: 逐拍疲劳轨迹热力图（行: 疲劳维度，列: 阶段；每格为 策略 × 拍）。"""
+    if not all(has_traces(results) for results in all_results.values()):
+        print("  [跳过] fatigue_timeline.png（结果不含逐拍疲劳轨迹）")
+        return
+    _init_plotting()
+    phases = list(all_results)
+    fig, axes = plt.subplots(3, len(phases), figsize=(7 * len(phases), 14), squeeze=False)
+
+    for col, phase in enumerate(phases):
+        traces = FatigueTraces.from_results(all_results[phase]).for_display(max_strategies, max_beats)
+        n_rows, n_cols = traces.shape
+        for dim, label in enumerate(TRACE_LABELS):
+            ax = axes[dim, col]
+            im = ax.imshow(traces.data[:, :, dim], cmap='RdYlGn_r', aspect='auto',
+                           vmin=0, vmax=100, interpolation='nearest')
+            ax.grid(False)
+            ax.set_yticks(range(n_rows))
+            if col == 0:
+                ax.set_yticklabels(traces.labels, fontsize=max(4, min(7, 280 // max(1, n_rows))))
+            else:
+                ax.set_yticklabels([])
+            ax.set_xlabel(f'拍（每格 {traces.beats_per_bin} 拍）', fontsize=9)
+            ax.set_title(f'{phase}阶段 — {label}', fontsize=11, fontweight='bold')
+            # 每小节（4 拍）一条分隔线，格子过密时省略
+            measure = 4 / traces.beats_per_bin
+            if measure >= 2:
+                for x in np.arange(measure, n_cols, measure):
+                    ax.axvline(x - 0.5, color='white', linewidth=0.4, alpha=0.6)
+
+    fig.suptitle('Project Harmony — 逐拍疲劳轨迹', fontsize=14, fontweight='bold')
+    fig.subplots_adjust(hspace=0.3, wspace=0.05)
+    plt.colorbar(im, ax=axes, shrink=0.5, label='疲劳值 (0-100)')
+    plt.savefig(os.path.join(REPORT_DIR, 'fatigue_timeline.png'), bbox_inches='tight')
+    plt.close()
+    print("  [OK] fatigue_timeline.png")
+
+
 def plot_growth_curve():
     """图4: 数值成长曲线（音符DPS随升级的变化）。"""
     upgrades = create_upgrade_pool()
@@ -182,19 +269,15 @@ def plot_growth_curve():
     levels = range(0, 7)  # 0-6级DMG升级
     notes_to_track = ["C", "G", "B", "E"]
 
+    _init_plotting()
     fig, ax = plt.subplots(figsize=(10, 6))
 
+    base = BuildVariant(PlayerBuild())
     for note_name in notes_to_track:
         dps_values = []
         for lv in levels:
-            build = PlayerBuild()
-            if lv > 0:
-                build.apply_upgrade(upgrade_map["note_dmg"], lv, note_name)
-            note = build.notes[note_name]
-            dmg = (note.total_dmg + build.global_dmg_bonus) * DMG_PER_POINT
-            hit = note.hit_factor
-            dps = dmg * hit / build.beat_interval
-            dps_values.append(dps)
+            variant = base.with_upgrade(upgrade_map["note_dmg"], lv, note_name) if lv > 0 else base
+            dps_values.append(variant.materialize().view().note(note_name).dps)
 
         ax.plot(list(levels), dps_values, marker='o', linewidth=2, label=f'{note_name}音符')
 
@@ -214,6 +297,7 @@ def plot_chord_dissonance_curve():
     """图5: 和弦不和谐度-威力-风险关系图。"""
     chords = create_chord_registry()
 
+    _init_plotting()
     fig, ax = plt.subplots(figsize=(12, 7))
 
     for name, c in chords.items():
@@ -261,6 +345,7 @@ def plot_extended_chord_penalty():
     for name, c in chords.items():
         by_count[c.note_count].append(c)
 
+    _init_plotting()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
 
     counts = sorted(by_count.keys())
@@ -295,21 +380,17 @@ def plot_delay_range_analysis(chord_registry):
     """图7: 延迟与距离风险分析图 (v2.1新增)。"""
     from balance_scorer import StrategySimulator, SPD_PER_POINT, DUR_PER_POINT
 
+    _init_plotting()
     fig, axes = plt.subplots(1, 3, figsize=(20, 6))
 
     # --- 子图1: 音符射程与距离因子 ---
     ax1 = axes[0]
-    notes = create_base_notes()
-    note_names = list(notes.keys())
-    ranges = [n.effective_range for n in notes.values()]
-    # 计算调整后的range_hit
     sim = StrategySimulator(PlayerBuild(), chord_registry)
-    range_hits = []
-    for n in notes.values():
-        rh = min(1.0, n.effective_range / sim.REFERENCE_RANGE)
-        sc = min(sim.SIZE_COMP_CAP, max(0, n.total_size - sim.SIZE_BASELINE) * sim.SIZE_COMP_FACTOR)
-        rh = rh + sc * (1.0 - rh)
-        range_hits.append(rh)
+    view = sim.build.view()
+    note_names = list(sim.build.notes.keys())
+    ranges = [view.note(n).effective_range for n in note_names]
+    # 计算调整后的range_hit
+    range_hits = [sim.note_range_hit(view.note(n)) for n in note_names]
 
     x = np.arange(len(note_names))
     bars = ax1.bar(x, ranges, color=['#2ecc71' if rh >= 0.9 else '#f39c12' if rh >= 0.7 else '#e74c3c' for rh in range_hits],
@@ -401,40 +482,127 @@ def plot_delay_range_analysis(chord_registry):
     print("  [OK] delay_range_analysis.png")
 
 
-def generate_json_report(all_results: dict[str, list[SimulationResult]]):
-    """生成JSON格式的结构化跑分报告。"""
-    report = {}
-    for phase, results in all_results.items():
-        phase_data = []
-        for r in results:
-            phase_data.append({
-                "strategy": r.strategy_name,
-                "effective_dps": round(r.effective_dps, 1),
-                "raw_dps": round(r.raw_dps, 1),
-                "burst_dps": round(r.burst_dps, 1),
-                "survival_score": round(r.survival_score, 1),
-                "risk_score": round(r.risk_score, 1),
-                "composite_score": round(r.composite_score, 1),
-                "peak_monotony": round(r.peak_monotony, 1),
-                "peak_density": round(r.peak_density, 1),
-                "peak_dissonance": round(r.peak_dissonance, 1),
-                "dissonance_damage": round(r.dissonance_damage, 1),
-                "lockout_beats": r.lockout_beats,
-                "total_healing": round(r.total_healing, 1),
-                "total_shielding": round(r.total_shielding, 1),
-                # v2.1 新增
-                "total_delay_discount": round(r.total_delay_discount, 3),
-                "total_range_discount": round(r.total_range_discount, 3),
-                "delay_exposure_time": round(r.delay_exposure_time, 1),
-                "avg_range_factor": round(r.avg_range_factor, 3),
-                "proximity_risk": round(r.proximity_risk, 2),
-            })
-        report[phase] = phase_data
-
-    path = os.path.join(REPORT_DIR, 'benchmark_results.json')
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(report, f, ensure_ascii=False, indent=2)
-    print(f"  [OK] benchmark_results.json")
+# =============================================================================
+# 图表流水线：指纹跳过 + 进程池并行渲染
+# =============================================================================
+
+# 图表文件名 → (绘图函数, 输入数据)
+#   "results": 三阶段跑分结果；"chords": 和弦注册表；None: 无参数（只依赖数值常量）
+FIGURES = {
+    'strategy_comparison.png': (plot_strategy_comparison, "results"),
+    'dps_vs_risk.png': (plot_dps_vs_risk, "results"),
+    'fatigue_heatmap.png': (plot_fatigue_peaks, "results"),
+    'growth_curve.png': (plot_growth_curve, None),
+    'chord_dissonance_power.png': (plot_chord_dissonance_curve, None),
+    'extended_chord_penalty.png': (plot_extended_chord_penalty, None),
+    'delay_range_analysis.png': (plot_delay_range_analysis, "chords"),
+    'fatigue_timeline.png': (plot_fatigue_timeline, "results"),
+}
+
+# 参与指纹的结果字段（逐拍日志不影响任何图表；疲劳轨迹影响）
+_RESULT_FIELDS = [f.name for f in fields(SimulationResult) if f.name != "beat_log"]
+
+
+def _figure_inputs(kind, all_results, chord_registry):
+    if kind == "results":
+        return (all_results,)
+    if kind == "chords":
+        return (chord_registry,)
+    return ()
+
+
+def _code_digest() -> bytes:
+    """
+    数值模型与绘图样式的摘要：balance_scorer.py 源码 + music_data.gd 内容
+    （音符、和弦、单位换算表由此加载）及其提取缓存版本 + matplotlib 版本。
+    """
+    from importlib.metadata import version
+    import balance_scorer
+    import game_data
+    h = hashlib.sha256()
+    for path in (balance_scorer.__file__, game_data.godot_path(game_data.MUSIC_DATA)):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    h.update(repr(game_data.CACHE_VERSION).encode())
+    h.update(version('matplotlib').encode())
+    return h.digest()
+
+
+def figure_fingerprint(name: str, inputs: tuple, code_digest: bytes) -> str:
+    """图表的输入指纹：绘图函数源码 + 样式设置 + 数值模型 + 输入数据。"""
+    func = FIGURES[name][0]
+    h = hashlib.sha256(code_digest)
+    h.update(inspect.getsource(func).encode())
+    h.update(inspect.getsource(_init_plotting).encode())
+    for data in inputs:
+        if isinstance(data, dict) and all(isinstance(v, list) for v in data.values()):
+            data = [(phase, [tuple(getattr(r, f) for f in _RESULT_FIELDS) for r in results])
+                    for phase, results in data.items()]
+        h.update(repr(data).encode())
+    return h.hexdigest()
+
+
+def _render_figure(name: str, inputs: tuple) -> str:
+    """进程池任务：渲染单张图表。"""
+    FIGURES[name][0](*inputs)
+    return name
+
+
+def render_figures(all_results: dict[str, list[SimulationResult]], chord_registry,
+                   jobs: int = None, force: bool = False) -> list[str]:
+    """
+    渲染全部图表，返回实际重绘的文件名。
+
+    输入指纹与上次渲染相同且图片仍在的图表直接跳过（force=True 时全部重绘）；
+    其余图表在 jobs 个进程中并行渲染（jobs ≤ 1 时在本进程串行渲染）。
+    """
+    try:
+        with open(FIGURE_STATE_PATH, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+
+    code_digest = _code_digest()
+    pending = {}
+    for name, (_, kind) in FIGURES.items():
+        inputs = _figure_inputs(kind, all_results, chord_registry)
+        fingerprint = figure_fingerprint(name, inputs, code_digest)
+        if not force and state.get(name) == fingerprint \
+                and os.path.exists(os.path.join(REPORT_DIR, name)):
+            print(f"  [跳过] {name}（输入未变）")
+            continue
+        pending[name] = (inputs, fingerprint)
+
+    jobs = min(jobs or os.cpu_count() or 1, len(pending))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_render_figure, name, inputs)
+                       for name, (inputs, _) in pending.items()]
+            done = [future.result() for future in futures]
+    else:
+        done = [_render_figure(name, inputs) for name, (inputs, _) in pending.items()]
+
+    for name in done:
+        state[name] = pending[name][1]
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = FIGURE_STATE_PATH + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, FIGURE_STATE_PATH)
+    return done
+
+
+def generate_json_report(all_results: dict[str, list[SimulationResult]],
+                         filename: str = 'benchmark_results.json'):
+    """
+    生成结构化跑分报告（流式逐行写出，见 report_stream.py）。
+
+    filename 为 .json[.gz] 时输出与旧版兼容的 {阶段: [行...]} 结构，
+    为 .jsonl[.gz] 时输出 JSON Lines。
+    """
+    path = os.path.join(REPORT_DIR, filename)
+    write_report(path, all_results)
+    print(f"  [OK] {filename}")
 
 
 def main():
@@ -444,31 +612,55 @@ def main():
     print("╚══════════════════════════════════════════════════════════════════════════╝")
     print()
 
+    args = sys.argv[1:]
+    flags = {a for a in args if a in ("--json-only", "--force")}
+    rest = [a for a in args if a not in flags]
+    options = dict(zip(rest[0::2], rest[1::2]))
+    store_path = options.get("--store")
+    report_name = options.get("--report", 'benchmark_results.json')
+    jobs = int(options["--jobs"]) if "--jobs" in options else None
+    json_only = "--json-only" in flags
+    force = "--force" in flags
+
     chord_registry = create_chord_registry()
-    strategies = create_strategy_library()
-    scenarios = build_scenarios()
 
-    # 运行所有场景的跑分
-    print("正在运行跑分...")
-    all_results = {}
-    for phase, build in scenarios.items():
-        results = run_full_benchmark(build, strategies, chord_registry)
-        all_results[phase] = results
-        print(f"  [OK] {phase}阶段完成")
+    if store_path and os.path.exists(store_path):
+        # 从列式存储查询每个 (阶段, 策略) 的最佳结果，逐块扫描，不整体载入
+        print(f"正在读取结果存储: {store_path}")
+        all_results = ResultStore(store_path).phase_results()
+        for phase, results in all_results.items():
+            print(f"  [OK] {phase}阶段 {len(results)} 个策略")
+    else:
+        strategies = create_strategy_library()
+        scenarios = build_scenarios()
+
+        # 运行所有场景的跑分
+        print("正在运行跑分...")
+        cache = SimulationCache(disk_dir=CACHE_DIR)
+        all_results = {}
+        for phase, build in scenarios.items():
+            # 报告只需要紧凑的疲劳轨迹，不保留逐拍日志
+            results = run_full_benchmark(build, strategies, chord_registry, cache=cache,
+                                         log_beats=False, record_trace=True)
+            all_results[phase] = results
+            print(f"  [OK] {phase}阶段完成")
+        print(f"  模拟缓存: {cache.stats}")
+        if store_path:
+            write_results(store_path, all_results)
+            print(f"  [OK] 结果已写入存储: {store_path}")
 
     # 生成图表
-    print("\n正在生成可视化图表...")
-    plot_strategy_comparison(all_results)
-    plot_dps_vs_risk(all_results)
-    plot_fatigue_peaks(all_results)
-    plot_growth_curve()
-    plot_chord_dissonance_curve()
-    plot_extended_chord_penalty()
-    plot_delay_range_analysis(chord_registry)
+    if json_only:
+        print("\n已跳过可视化图表（--json-only）")
+    else:
+        print("\n正在生成可视化图表...")
+        render_figures(all_results, chord_registry, jobs=jobs, force=force)
 
     # 生成JSON报告
     print("\n正在生成结构化报告...")
-    generate_json_report(all_results)
+    generate_json_report(all_results, report_name)
+    write_pareto_report(all_results)
+    print(f"  [OK] pareto_front.json")
 
     print(f"\n所有报告已生成至: {REPORT_DIR}/")
     print("完成！")
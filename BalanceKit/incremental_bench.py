@@ -0,0 +1,405 @@
+"""
+=============================================================================
+Project Harmony — 增量重跑分 (Incremental Re-benchmark)
+=============================================================================
+
+设计师微调一个 NoteStats、一个 ChordType 字段或一个模拟器常量后，
+通常会重新运行整个 generate_report.py。但绝大多数 (阶段, 策略) 组合
+根本没有读取被改动的数值，结果不会变化。
+
+本模块记录每次模拟实际读取了哪些输入（依赖追踪），下次运行时：
+    1. 对比当前与上次的输入：音符基础值、和弦字段、模拟器常量、
+       各阶段Build的升级状态、策略动作序列
+    2. 只重新模拟依赖集合与改动集合有交集的组合
+    3. 其余组合直接复用上次保存的结果
+    4. 输出得分变化的差异报告（控制台 + Reports/rebench_diff.json）
+
+依赖追踪：
+    模拟时用记录型字典包装 build.notes 与和弦注册表，并拦截模拟器上
+    所有大写常量的读取。一次模拟中从未被读取的输入，无论取何值都不会
+    改变这次模拟的执行路径，因此据此跳过是精确的。
+
+用法：
+    python3 BalanceKit/incremental_bench.py          # 增量模式（首次运行为全量）
+    python3 BalanceKit/incremental_bench.py --full   # 强制全量重跑
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import copy
+import time
+import pickle
+import hashlib
+import dataclasses
+from dataclasses import dataclass, field
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import balance_scorer
+from balance_scorer import (
+    PlayerBuild, StrategySimulator, StrategyDefinition, SimulationResult, ChordType,
+    create_chord_registry, create_strategy_library, create_base_notes,
+)
+from sim_cache import UNIT_CONSTANTS, strategy_fingerprint
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.path.join(BASE_DIR, ".sim_cache", "rebench_state.pkl")
+DIFF_PATH = os.path.join(BASE_DIR, "Reports", "rebench_diff.json")
+
+# 状态文件格式版本：依赖追踪或存储结构变化时递增，旧状态自动作废
+STATE_VERSION = 1
+
+
+# =============================================================================
+# 第一部分：依赖追踪
+# =============================================================================
+
+class _RecordingDict(dict):
+    """记录被查询过的键的字典（用于 build.notes 与和弦注册表）。"""
+
+    def __init__(self, data: dict, sink: set):
+        super().__init__(data)
+        self._sink = sink
+
+    def __getitem__(self, key):
+        self._sink.add(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self._sink.add(key)
+        return super().__contains__(key)
+
+    def get(self, key, default=None):
+        self._sink.add(key)
+        return super().get(key, default)
+
+
+class _TracingSimulator(StrategySimulator):
+    """记录被读取的大写常量的模拟器。"""
+
+    def __init__(self, build: PlayerBuild, chord_registry: dict[str, ChordType],
+                 constant_sink: set):
+        self._constant_sink = constant_sink
+        super().__init__(build, chord_registry)
+
+    def __getattribute__(self, name):
+        if name.isupper():
+            object.__getattribute__(self, "_constant_sink").add(name)
+        return object.__getattribute__(self, name)
+
+
+@dataclass
+class Dependencies:
+    """一次模拟读取过的输入集合。"""
+    notes: set[str] = field(default_factory=set)
+    chords: set[str] = field(default_factory=set)
+    constants: set[str] = field(default_factory=set)
+
+
+def traced_simulate(build: PlayerBuild, chords: dict[str, ChordType],
+                    strategy: StrategyDefinition) -> tuple[SimulationResult, Dependencies]:
+    """执行一次模拟，同时返回其依赖集合。结果与普通模拟完全一致。"""
+    deps = Dependencies()
+    traced_build = copy.copy(build)
+    traced_build.notes = _RecordingDict(build.notes, deps.notes)
+    traced_chords = _RecordingDict(chords, deps.chords)
+    simulator = _TracingSimulator(traced_build, traced_chords, deps.constants)
+    result = simulator.simulate(strategy)
+    return result, deps
+
+
+# =============================================================================
+# 第二部分：输入快照与改动检测
+# =============================================================================
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted(value.items()))
+    return value
+
+
+def _build_state(build: PlayerBuild) -> str:
+    """Build 的升级状态指纹（不含音符基础值，基础值改动按音符单独追踪）。"""
+    bonuses = tuple(
+        (name, n.bonus_dmg, n.bonus_spd, n.bonus_dur, n.bonus_size)
+        for name, n in sorted(build.notes.items())
+    )
+    scalars = tuple(
+        (f.name, tuple(sorted(v)) if isinstance(v, (set, frozenset)) else v)
+        for f in dataclasses.fields(build) if f.name != "notes"
+        for v in [getattr(build, f.name)]
+    )
+    return hashlib.blake2b(repr((bonuses, scalars)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class InputSnapshot:
+    """一次跑分的全部输入。"""
+    notes: dict[str, tuple]
+    chords: dict[str, tuple]
+    constants: dict[str, object]
+    globals_: tuple
+    builds: dict[str, str]
+    strategies: dict[str, str]
+
+    @classmethod
+    def capture(cls, scenarios: dict[str, PlayerBuild], strategies: list[StrategyDefinition],
+                chords: dict[str, ChordType],
+                simulator_cls: type = StrategySimulator) -> "InputSnapshot":
+        notes = {
+            name: (n.base_dmg, n.base_spd, n.base_dur, n.base_size)
+            for name, n in create_base_notes().items()
+        }
+        constants = {
+            name: _freeze(getattr(simulator_cls, name))
+            for name in dir(simulator_cls) if name.isupper()
+        }
+        probe = simulator_cls(PlayerBuild(), chords)
+        globals_ = (
+            tuple(getattr(balance_scorer, name) for name in UNIT_CONSTANTS),
+            (probe.w_dps, probe.w_survival, probe.w_risk),
+        )
+        return cls(
+            notes=notes,
+            chords={name: dataclasses.astuple(c) for name, c in chords.items()},
+            constants=constants,
+            globals_=globals_,
+            builds={phase: _build_state(b) for phase, b in scenarios.items()},
+            strategies={s.name: strategy_fingerprint(s) for s in strategies},
+        )
+
+
+def _changed_keys(old: dict, new: dict) -> set:
+    return {k for k in old.keys() | new.keys() if old.get(k) != new.get(k)}
+
+
+@dataclass
+class ChangeSet:
+    """两次快照之间的改动。"""
+    notes: set[str]
+    chords: set[str]
+    constants: set[str]
+    globals_changed: bool
+    builds: set[str]
+    strategies: set[str]
+
+    @classmethod
+    def between(cls, old: InputSnapshot, new: InputSnapshot) -> "ChangeSet":
+        return cls(
+            notes=_changed_keys(old.notes, new.notes),
+            chords=_changed_keys(old.chords, new.chords),
+            constants=_changed_keys(old.constants, new.constants),
+            globals_changed=old.globals_ != new.globals_,
+            builds=_changed_keys(old.builds, new.builds),
+            strategies=_changed_keys(old.strategies, new.strategies),
+        )
+
+    def affects(self, phase: str, strategy: str, deps: Dependencies) -> bool:
+        """判断某个 (阶段, 策略) 组合是否需要重新模拟。"""
+        return (
+            self.globals_changed
+            or phase in self.builds
+            or strategy in self.strategies
+            or bool(deps.notes & self.notes)
+            or bool(deps.chords & self.chords)
+            or bool(deps.constants & self.constants)
+        )
+
+    def describe(self) -> str:
+        parts = []
+        if self.notes:
+            parts.append(f"音符 {sorted(self.notes)}")
+        if self.chords:
+            parts.append(f"和弦 {sorted(self.chords)}")
+        if self.constants:
+            parts.append(f"常量 {sorted(self.constants)}")
+        if self.globals_changed:
+            parts.append("全局转换比率/得分权重")
+        if self.builds:
+            parts.append(f"阶段Build {sorted(self.builds)}")
+        if self.strategies:
+            parts.append(f"策略 {sorted(self.strategies)}")
+        return "；".join(parts) if parts else "无改动"
+
+
+# =============================================================================
+# 第三部分：增量跑分
+# =============================================================================
+
+@dataclass
+class RebenchState:
+    """持久化的上次跑分状态。"""
+    version: int
+    inputs: InputSnapshot
+    results: dict[tuple[str, str], SimulationResult]
+    deps: dict[tuple[str, str], Dependencies]
+
+
+@dataclass
+class ScoreDiff:
+    """单个组合的得分变化。"""
+    phase: str
+    strategy: str
+    old_score: Optional[float]
+    new_score: float
+    old_rank: Optional[int]
+    new_rank: int
+
+    @property
+    def delta(self) -> float:
+        return self.new_score - (self.old_score or 0.0)
+
+
+def load_state(path: str = STATE_PATH) -> Optional[RebenchState]:
+    """读取上次的跑分状态；不存在、损坏或版本不符时返回 None。"""
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+        return None
+    return RebenchState(
+        version=data["version"],
+        inputs=InputSnapshot(**data["inputs"]),
+        results=data["results"],
+        deps={key: Dependencies(*sets) for key, sets in data["deps"].items()},
+    )
+
+
+def save_state(state: RebenchState, path: str = STATE_PATH):
+    """
+    保存跑分状态。
+
+    只存内置类型与 SimulationResult，本模块作为脚本运行时
+    (__main__) 定义的类不会进入 pickle，便于被其他模块读取。
+    """
+    data = {
+        "version": state.version,
+        "inputs": dataclasses.asdict(state.inputs),
+        "results": state.results,
+        "deps": {key: (d.notes, d.chords, d.constants) for key, d in state.deps.items()},
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _ranks(results: dict[tuple[str, str], SimulationResult], phase: str) -> dict[str, int]:
+    ordered = sorted((r for (p, _), r in results.items() if p == phase),
+                     key=lambda r: r.composite_score, reverse=True)
+    return {r.strategy_name: i for i, r in enumerate(ordered, 1)}
+
+
+def incremental_benchmark(scenarios: dict[str, PlayerBuild],
+                          strategies: list[StrategyDefinition],
+                          chords: dict[str, ChordType],
+                          previous: Optional[RebenchState] = None
+                          ) -> tuple[RebenchState, ChangeSet, list[ScoreDiff], int]:
+    """
+    依赖感知的增量跑分。
+
+    Returns:
+        (新状态, 改动集合, 得分差异列表, 重新模拟的组合数)
+    """
+    inputs = InputSnapshot.capture(scenarios, strategies, chords)
+    if previous is None:
+        changes = ChangeSet(set(), set(), set(), True, set(scenarios), set())
+    else:
+        changes = ChangeSet.between(previous.inputs, inputs)
+
+    results: dict[tuple[str, str], SimulationResult] = {}
+    deps: dict[tuple[str, str], Dependencies] = {}
+    resimulated = 0
+    for phase, build in scenarios.items():
+        for strategy in strategies:
+            key = (phase, strategy.name)
+            old_deps = previous.deps.get(key) if previous else None
+            if old_deps is not None and not changes.affects(phase, strategy.name, old_deps):
+                results[key] = previous.results[key]
+                deps[key] = old_deps
+                continue
+            result, deps[key] = traced_simulate(build, chords, strategy)
+            result.beat_log = []
+            results[key] = result
+            resimulated += 1
+
+    diffs = []
+    for phase in scenarios:
+        new_ranks = _ranks(results, phase)
+        old_ranks = _ranks(previous.results, phase) if previous else {}
+        for strategy in strategies:
+            key = (phase, strategy.name)
+            new = results[key].composite_score
+            old_result = previous.results.get(key) if previous else None
+            old = old_result.composite_score if old_result is not None else None
+            if old is None or abs(new - old) > 1e-9 or \
+                    old_ranks.get(strategy.name) != new_ranks[strategy.name]:
+                diffs.append(ScoreDiff(phase, strategy.name, old, new,
+                                       old_ranks.get(strategy.name), new_ranks[strategy.name]))
+
+    state = RebenchState(STATE_VERSION, inputs, results, deps)
+    return state, changes, diffs, resimulated
+
+
+def write_diff_report(changes: ChangeSet, diffs: list[ScoreDiff], path: str = DIFF_PATH):
+    """将得分差异写入 JSON 报告。"""
+    report = {
+        "changes": changes.describe(),
+        "diffs": [
+            {
+                "phase": d.phase,
+                "strategy": d.strategy,
+                "old_score": None if d.old_score is None else round(d.old_score, 2),
+                "new_score": round(d.new_score, 2),
+                "delta": round(d.delta, 2),
+                "old_rank": d.old_rank,
+                "new_rank": d.new_rank,
+            }
+            for d in diffs
+        ],
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def print_diff_report(changes: ChangeSet, diffs: list[ScoreDiff], resimulated: int,
+                      total: int, elapsed: float):
+    """打印得分差异报告。"""
+    print(f"\n{'=' * 90}")
+    print(f"  增量跑分：{changes.describe()}")
+    print(f"  重新模拟 {resimulated}/{total} 个组合，耗时 {elapsed * 1000:.0f}ms")
+    print(f"{'=' * 90}")
+    if not diffs:
+        print("  所有得分与排名均无变化。")
+    for d in sorted(diffs, key=lambda d: (d.phase, -abs(d.delta))):
+        old = "   新增" if d.old_score is None else f"{d.old_score:7.2f}"
+        rank = f"#{d.old_rank}→#{d.new_rank}" if d.old_rank else f"#{d.new_rank}"
+        print(f"  {d.phase:4s} | {d.strategy:20s} | {old} → {d.new_score:7.2f} "
+              f"({d.delta:+7.2f}) | 排名 {rank}")
+    print(f"{'=' * 90}\n")
+
+
+if __name__ == "__main__":
+    from generate_report import build_scenarios
+
+    start = time.perf_counter()
+    scenarios = build_scenarios()
+    strategies = create_strategy_library()
+    chords = create_chord_registry()
+    previous = None if "--full" in sys.argv else load_state()
+
+    state, changes, diffs, resimulated = incremental_benchmark(
+        scenarios, strategies, chords, previous)
+    save_state(state)
+    write_diff_report(changes, diffs)
+    print_diff_report(changes, diffs, resimulated, len(scenarios) * len(strategies),
+                      time.perf_counter() - start)
@@ -0,0 +1,361 @@
+"""
+=============================================================================
+Project Harmony — 马尔可夫链玩家负载生成器 (Markov Workload Generator)
+=============================================================================
+
+create_strategy_library 与疲劳演示里的策略都是手写的循环模式：完全周期、
+只覆盖少数几条代码路径，不像真实玩家。本模块从 music_data.gd 的和声指挥官
+数据（MARKOV_MATRIX_A_MINOR / AEOLIAN_DIATONIC_CHORDS，或各章节的
+CHAPTER_MARKOV_MATRICES）采样"听起来合理"的施法序列：
+
+    1. 和声：每 harmony_beats 拍按马尔可夫矩阵转移一次和弦根音（起点为主和弦）
+    2. 每拍动作：休止 / 和弦（当前和声的根音 + 和弦类型）/ 单音
+       （当前和弦的构成音，按根音/三音/五音权重选取，少量经过音取调内任意音）
+    3. 黑键音高（布鲁斯、半音阶章节）表示为下方白键 + 黑键修饰符
+    4. 时间：每条序列的 BPM 按 tempo_jitter 抖动，每拍再按 timing_jitter 偏移
+
+采样全部向量化：n 条序列同时转移，只在小节维度上循环。结果可以：
+    - 转换为 StrategyDefinition 交给 StrategySimulator 跑分
+    - 转换为 SpellEvent 序列交给 AestheticFatigueEngine
+    - 以每拍一行的列式存储流式写盘（results_store.ResultStoreWriter），再按序列号读回
+
+用法：
+    python3 BalanceKit/markov_workload.py                        # 2000 条序列的采样与跑分概览
+    python3 BalanceKit/markov_workload.py 1000000 0.05 out.hcol  # 序列数 节拍抖动 输出存储
+    python3 BalanceKit/markov_workload.py 5000 0.05 - ch6_blues  # 指定章节的和声矩阵
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BASE_DIR), "Scripts"))
+
+from balance_scorer import (
+    CHORD_NAMES, PlayerBuild, StrategyAction, StrategyDefinition, StrategySimulator,
+    DEFAULT_BPM, create_chord_registry, create_strategy_library,
+)
+from gd_constants import load_constants
+from game_data import MUSIC_DATA
+from results_store import ResultStore, ResultStoreWriter
+
+# 每拍动作类型
+NOTE, CHORD, REST = 0, 1, 2
+
+# 音高类 → (WhiteKey 下标, 黑键修饰符下标或 -1)：黑键记为下方白键 + 修饰符
+WHITE_KEY_NAMES = ("C", "D", "E", "F", "G", "A", "B")
+MODIFIER_NAMES = ("C#", "D#", "F#", "G#", "A#")
+PITCH_TO_KEY = {
+    0: (0, -1), 1: (0, 0), 2: (1, -1), 3: (1, 1), 4: (2, -1), 5: (3, -1),
+    6: (3, 2), 7: (4, -1), 8: (4, 3), 9: (5, -1), 10: (5, 4), 11: (6, -1),
+}
+
+
+# =============================================================================
+# 第一部分：和声马尔可夫链
+# =============================================================================
+
+@dataclass(frozen=True)
+class HarmonyChain:
+    """
+    和弦根音上的马尔可夫链。
+
+    Attributes:
+        roots:      状态 → 根音音高类（0-11），下标 0 为起始主和弦
+        cumulative: 转移矩阵的逐行累积概率 (状态 × 状态)
+        chord_type: 状态 → ChordType 下标
+        tones:      状态 → 构成音音高类（根音、三音、五音……）
+        scale:      调内音高类（经过音从中选取）
+    """
+    name: str
+    roots: tuple[int, ...]
+    cumulative: np.ndarray
+    chord_type: tuple[int, ...]
+    tones: tuple[tuple[int, ...], ...]
+    scale: tuple[int, ...]
+
+    @classmethod
+    def from_music_data(cls, matrix: Optional[str] = None) -> "HarmonyChain":
+        """
+        matrix 为 None 时使用 MARKOV_MATRIX_A_MINOR（和弦类型取 AEOLIAN_DIATONIC_CHORDS），
+        否则使用 CHAPTER_MARKOV_MATRICES[matrix]（和弦类型取转移目标上标注的 type）。
+        """
+        constants = load_constants(MUSIC_DATA)
+        if matrix is None:
+            table = constants["MARKOV_MATRIX_A_MINOR"]
+            types = dict(constants["AEOLIAN_DIATONIC_CHORDS"])
+        else:
+            table = constants["CHAPTER_MARKOV_MATRICES"][matrix]
+            types = {root: entry["type"] for row in table.values() for root, entry in row.items()}
+        roots = tuple(table)
+        index = {root: i for i, root in enumerate(roots)}
+        probs = np.zeros((len(roots), len(roots)))
+        for root, row in table.items():
+            for target, entry in row.items():
+                probs[index[root], index[target]] = entry["probability"]
+        probs /= probs.sum(axis=1, keepdims=True)
+        cumulative = np.cumsum(probs, axis=1)
+        cumulative[:, -1] = 1.0
+
+        intervals = constants["CHORD_INTERVALS"]
+        chord_type = tuple(types[root] for root in roots)
+        tones = tuple(tuple((root + i) % 12 for i in intervals[t]) for root, t in zip(roots, chord_type))
+        return cls(matrix or "MARKOV_MATRIX_A_MINOR", roots, cumulative, chord_type,
+                   tones, tuple(sorted(set(roots))))
+
+    def walk(self, rng: np.random.Generator, n: int, steps: int) -> np.ndarray:
+        """n 条链同时走 steps 步，返回状态下标 (n × steps)。"""
+        states = np.zeros((n, steps), dtype=np.int8)
+        for s in range(1, steps):
+            u = rng.random(n)
+            states[:, s] = (u[:, None] > self.cumulative[states[:, s - 1]]).sum(axis=1)
+        return states
+
+
+# =============================================================================
+# 第二部分：向量化采样
+# =============================================================================
+
+@dataclass(frozen=True)
+class WorkloadConfig:
+    """负载参数。概率均为每拍概率；抖动为相对值（标准差）。"""
+    beats: int = 32                     # 每条序列的拍数（与策略库的8小节一致）
+    harmony_beats: int = 4              # 每个和声持续的拍数
+    rest_prob: float = 0.15
+    chord_prob: float = 0.08            # 非强拍的和弦概率
+    downbeat_chord_prob: float = 0.35   # 和声切换拍的和弦概率
+    tone_weights: tuple = (0.5, 0.25, 0.25)   # 根音 / 三音 / 五音
+    passing_prob: float = 0.15          # 经过音（调内任意音）概率
+    bpm: float = DEFAULT_BPM
+    tempo_jitter: float = 0.05          # 每条序列 BPM 的相对抖动
+    timing_jitter: float = 0.05         # 每拍时刻的抖动（拍的比例，截断在 ±0.45 拍）
+
+
+@dataclass
+class Workload:
+    """
+    n 条序列（每条 beats 拍）。note / modifier 为 WhiteKey / 黑键修饰符下标，
+    chord 为 ChordType 下标，休止拍三者均为 -1；pitch 为音高类（休止为 -1）。
+    """
+    kind: np.ndarray        # int8 (n × beats)
+    note: np.ndarray        # int8
+    modifier: np.ndarray    # int8
+    chord: np.ndarray       # int8
+    pitch: np.ndarray       # int8
+    time: np.ndarray        # float64，秒
+    first_seq: int = 0      # 第一条序列的全局序号
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def strategy(self, i: int, chord_names: Optional[dict[int, str]] = None) -> StrategyDefinition:
+        """第 i 条序列 → StrategyDefinition（和弦名为中文注册表名）。"""
+        chord_names = chord_names or _chord_names()
+        actions = []
+        for beat, (k, note, mod, chord) in enumerate(zip(self.kind[i], self.note[i],
+                                                         self.modifier[i], self.chord[i])):
+            if k == REST:
+                actions.append(StrategyAction(beat, "", False, "", True))
+            else:
+                actions.append(StrategyAction(
+                    beat, WHITE_KEY_NAMES[note], k == CHORD,
+                    chord_names[chord] if k == CHORD else "",
+                    modifier=MODIFIER_NAMES[mod] if mod >= 0 else ""))
+        return StrategyDefinition(f"马尔可夫#{self.first_seq + i}", "马尔可夫链采样的施法序列", actions)
+
+    def spell_events(self, i: int) -> list:
+        """第 i 条序列 → AestheticFatigueEngine 的 SpellEvent 列表（休止拍不产生事件）。"""
+        from aesthetic_fatigue_system import Note, SpellEvent
+        chord_names = _chord_names()
+        events = []
+        for k, pitch, chord, t in zip(self.kind[i], self.pitch[i], self.chord[i], self.time[i]):
+            if k != REST:
+                events.append(SpellEvent(float(t), Note(int(pitch)), k == CHORD,
+                                         chord_names[chord] if k == CHORD else None))
+        return events
+
+
+_CHORD_NAMES: dict[int, str] = {}
+
+
+def _chord_names() -> dict[int, str]:
+    """ChordType 下标 → 中文和弦名。"""
+    if not _CHORD_NAMES:
+        for name, value in load_constants(MUSIC_DATA)["ChordType"].items():
+            _CHORD_NAMES[value] = CHORD_NAMES.get(name, name)
+    return _CHORD_NAMES
+
+
+def sample_workload(chain: HarmonyChain, n: int, config: Optional[WorkloadConfig] = None,
+                    rng: Optional[np.random.Generator] = None, first_seq: int = 0) -> Workload:
+    """向量化采样 n 条序列。"""
+    config = config if config is not None else WorkloadConfig()
+    rng = rng if rng is not None else np.random.default_rng()
+    beats, hb = config.beats, config.harmony_beats
+    states = chain.walk(rng, n, -(-beats // hb))
+    harmony = np.repeat(states, hb, axis=1)[:, :beats]
+
+    # 构成音表：状态 × 3（不足三音的和弦用根音补齐）
+    tone_table = np.array([(t + (t[0],) * 3)[:3] for t in chain.tones], dtype=np.int8)
+    weights = np.asarray(config.tone_weights, dtype=float)
+    slot = rng.choice(3, size=(n, beats), p=weights / weights.sum())
+    pitch = tone_table[harmony, slot]
+    passing = rng.random((n, beats)) < config.passing_prob
+    scale = np.array(chain.scale, dtype=np.int8)
+    pitch = np.where(passing, scale[rng.integers(len(scale), size=(n, beats))], pitch)
+
+    downbeat = (np.arange(beats) % hb == 0)[None, :]
+    chord_p = np.where(downbeat, config.downbeat_chord_prob, config.chord_prob)
+    u = rng.random((n, beats))
+    kind = np.full((n, beats), NOTE, dtype=np.int8)
+    kind[u < chord_p + config.rest_prob] = REST
+    kind[u < chord_p] = CHORD
+
+    roots = np.array(chain.roots, dtype=np.int8)
+    chord_types = np.array(chain.chord_type, dtype=np.int8)
+    is_chord = kind == CHORD
+    pitch = np.where(is_chord, roots[harmony], pitch).astype(np.int8)
+    chord = np.where(is_chord, chord_types[harmony], -1).astype(np.int8)
+
+    key_table = np.array([PITCH_TO_KEY[p] for p in range(12)], dtype=np.int8)
+    note, modifier = key_table[pitch, 0], key_table[pitch, 1]
+    rest = kind == REST
+    pitch[rest] = note[rest] = modifier[rest] = -1
+
+    bpm = config.bpm * np.maximum(0.5, 1.0 + config.tempo_jitter * rng.standard_normal(n))
+    offset = np.clip(config.timing_jitter * rng.standard_normal((n, beats)), -0.45, 0.45)
+    times = (np.arange(beats)[None, :] + offset) * (60.0 / bpm)[:, None]
+    return Workload(kind, note, modifier, chord, pitch, times, first_seq)
+
+
+def iter_workloads(chain: HarmonyChain, total: int, config: Optional[WorkloadConfig] = None,
+                   seed: int = 0, batch: int = 65536) -> Iterator[Workload]:
+    """分批采样 total 条序列；第 b 批的随机数由 (种子, b) 派生，结果与批次消费方式无关。"""
+    config = config if config is not None else WorkloadConfig()
+    for b, start in enumerate(range(0, total, batch)):
+        rng = np.random.default_rng((seed, b))
+        yield sample_workload(chain, min(batch, total - start), config, rng, first_seq=start)
+
+
+# =============================================================================
+# 第三部分：流式落盘
+# =============================================================================
+
+WORKLOAD_COLUMNS = ("seq", "beat", "time", "kind", "note", "modifier", "chord", "pitch")
+
+
+def write_workload(path: str, batches: Iterator[Workload], chunk_rows: int = 1 << 20) -> int:
+    """把各批序列以每拍一行写入列式存储（逐批追加，内存只保留一批），返回序列数。"""
+    written = 0
+    with ResultStoreWriter(path, chunk_rows=chunk_rows) as writer:
+        for wl in batches:
+            n, beats = wl.kind.shape
+            writer.append_columns(
+                seq=np.repeat(np.arange(wl.first_seq, wl.first_seq + n, dtype=np.int64), beats),
+                beat=np.tile(np.arange(beats, dtype=np.int64), n),
+                time=wl.time.reshape(-1),
+                **{name: getattr(wl, name).reshape(-1).astype(np.int64)
+                   for name in WORKLOAD_COLUMNS[3:]})
+            written += n
+    return written
+
+
+def read_workload(path: str, first: int = 0, count: Optional[int] = None) -> Workload:
+    """读回序号 [first, first + count) 的序列（按块统计裁剪，不必解压整个存储）。"""
+    store = ResultStore(path)
+    hi = None if count is None else first + count - 1
+    rows = store.read(list(WORKLOAD_COLUMNS), where={"seq": (first, hi)})
+    order = np.lexsort((rows["beat"], rows["seq"]))
+    beats = int(rows["beat"].max()) + 1 if len(order) else 0
+    shape = (-1, beats)
+    return Workload(
+        *(rows[name][order].astype(np.int8).reshape(shape)
+          for name in ("kind", "note", "modifier", "chord", "pitch")),
+        time=rows["time"][order].reshape(shape), first_seq=first)
+
+
+# =============================================================================
+# 第四部分：跑分
+# =============================================================================
+
+def bench_simulator(workload: Workload, build: Optional[PlayerBuild] = None,
+                    chords: Optional[dict] = None) -> np.ndarray:
+    """StrategySimulator 逐条模拟，返回综合得分数组。"""
+    simulator = StrategySimulator(build or PlayerBuild(), chords or create_chord_registry(),
+                                  log_beats=False)
+    return np.array([simulator.simulate(workload.strategy(i)).composite_score
+                     for i in range(len(workload))])
+
+
+def bench_fatigue(workload: Workload, config=None) -> np.ndarray:
+    """每条序列喂给一个新的 AestheticFatigueEngine，返回最后一个事件后的 AFI 数组。"""
+    from aesthetic_fatigue_system import AestheticFatigueEngine
+    afi = np.zeros(len(workload))
+    for i in range(len(workload)):
+        engine = AestheticFatigueEngine(config)
+        for event in workload.spell_events(i):
+            afi[i] = engine.record_spell(event).fatigue_index
+    return afi
+
+
+def print_workload_report(workload: Workload, chain: HarmonyChain, sample_rate: float,
+                          scores: np.ndarray, afi: np.ndarray, library: np.ndarray):
+    """打印负载构成与两个基准的分布。"""
+    kind = workload.kind
+    n, beats = kind.shape
+    played = workload.note[kind != REST]
+    print(f"\n{'=' * 90}")
+    print(f"  马尔可夫负载：{chain.name}，{n} 条 × {beats} 拍（采样 {sample_rate:,.0f} 拍/秒）")
+    print(f"{'=' * 90}")
+    print(f"  单音 {np.mean(kind == NOTE):.1%}  和弦 {np.mean(kind == CHORD):.1%}  "
+          f"休止 {np.mean(kind == REST):.1%}  黑键修饰 {np.mean(workload.modifier >= 0):.1%}  "
+          f"不同序列 {len(np.unique(kind * 16 + workload.note, axis=0))}")
+    counts = np.bincount(played, minlength=7) / max(len(played), 1)
+    print("  音符分布：" + "  ".join(f"{WHITE_KEY_NAMES[k]} {c:.1%}" for k, c in enumerate(counts)))
+
+    def row(label: str, values: np.ndarray):
+        q = np.percentile(values, [5, 25, 50, 75, 95])
+        print(f"  {label:24s} | {values.mean():7.2f} | " + " | ".join(f"{v:7.2f}" for v in q))
+
+    print(f"\n  {'分布':24s} | {'均值':>7s} | {'P5':>7s} | {'P25':>7s} | {'P50':>7s} | {'P75':>7s} | {'P95':>7s}")
+    print(f"  {'-' * 84}")
+    row("综合得分（马尔可夫）", scores)
+    row("综合得分（手写策略库）", library)
+    row("AFI（马尔可夫）", afi)
+    print(f"{'=' * 90}\n")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    jitter = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    out = sys.argv[3] if len(sys.argv) > 3 and sys.argv[3] != "-" else None
+    matrix = sys.argv[4] if len(sys.argv) > 4 else None
+
+    chain = HarmonyChain.from_music_data(matrix)
+    config = WorkloadConfig(timing_jitter=jitter)
+    if out:
+        start = time.perf_counter()
+        written = write_workload(out, iter_workloads(chain, count, config))
+        elapsed = time.perf_counter() - start
+        print(f"  已写入 {written} 条序列 → {out}（{written * config.beats / elapsed:,.0f} 拍/秒）")
+        workload = read_workload(out, 0, min(count, 2000))
+    else:
+        start = time.perf_counter()
+        workload = sample_workload(chain, count, config, np.random.default_rng(0))
+        elapsed = time.perf_counter() - start
+        written = count
+
+    scores = bench_simulator(workload)
+    afi = bench_fatigue(workload)
+    simulator = StrategySimulator(PlayerBuild(), create_chord_registry(), log_beats=False)
+    library = np.array([simulator.simulate(s).composite_score for s in create_strategy_library()])
+    print_workload_report(workload, chain, written * config.beats / elapsed, scores, afi, library)
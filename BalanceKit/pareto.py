@@ -0,0 +1,257 @@
+"""
+=============================================================================
+Project Harmony — 多目标帕累托前沿分析 (Pareto Front Explorer)
+=============================================================================
+
+composite_score 用固定权重 (w_dps / w_survival / w_risk) 把三个维度压成
+一个数，设计师经常要问："换一组权重，谁会赢？"
+
+本模块把大批 SimulationResult 看作三目标点：
+    - effective_dps   越高越好
+    - survival_score  越高越好
+    - risk_score      越低越好
+
+并提供：
+    1. 非支配前沿（天际线算法）：按 DPS 降序扫描，用 (生存, 风险) 二维
+       阶梯维护已扫描点的非支配集，每点一次二分查询，O(n log n)
+    2. 任意权重向量下的即时重排（向量化，无需重新模拟）
+    3. 权重单纯形扫描：每个结果在多大比例的权重组合下排名第一
+    4. 导出跨阶段与各阶段的前沿到 JSON 报告 (Reports/pareto_front.json)
+
+用法：
+    python3 BalanceKit/pareto.py                  # 三阶段 × 策略库
+    python3 BalanceKit/pareto.py 0.2 0.4 0.4      # 额外按指定权重重排
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from balance_scorer import SimulationResult
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_PATH = os.path.join(BASE_DIR, "Reports", "pareto_front.json")
+
+# StrategySimulator 的默认权重（w_dps, w_survival, w_risk）
+DEFAULT_WEIGHTS = (0.50, 0.25, 0.25)
+
+
+# =============================================================================
+# 第一部分：天际线算法
+# =============================================================================
+
+def pareto_front(dps: np.ndarray, survival: np.ndarray, risk: np.ndarray) -> np.ndarray:
+    """
+    返回非支配点的下标（升序）。
+
+    a 支配 b：dps_a ≥ dps_b、survival_a ≥ survival_b、risk_a ≤ risk_b，
+    且至少一项严格更优。三项完全相同的点互不支配，会一起留在前沿上。
+
+    算法：按 (dps 降序, survival 降序, risk 升序) 扫描。扫描到某点时，
+    能支配它的点一定已经扫描过；已扫描的非支配点在 (survival, risk)
+    平面上构成阶梯 —— survival 升序时 risk 也升序 —— 因此"是否存在
+    survival ≥ s 且 risk ≤ r 的点"只需二分找到第一个 survival ≥ s 的
+    阶梯点并比较其 risk。
+    """
+    n = len(dps)
+    if n == 0:
+        return np.zeros(0, dtype=int)
+    order = np.lexsort((risk, -survival, -dps))
+
+    stair_surv: list[float] = []   # 升序
+    stair_risk: list[float] = []   # 随 stair_surv 升序
+    front = []
+    prev_key = None
+    prev_kept = False
+    for idx in order:
+        key = (dps[idx], survival[idx], risk[idx])
+        if key == prev_key:
+            # 与上一个点完全相同：互不支配，跟随上一个点的结论
+            if prev_kept:
+                front.append(idx)
+            continue
+        prev_key = key
+        s, r = survival[idx], risk[idx]
+
+        pos = bisect_left(stair_surv, s)
+        prev_kept = not (pos < len(stair_surv) and stair_risk[pos] <= r)
+        if not prev_kept:
+            continue
+        front.append(idx)
+
+        # 插入阶梯并移除被新点支配的阶梯点（survival ≤ s 且 risk ≥ r，位于插入点左侧）
+        left = pos
+        while left > 0 and stair_risk[left - 1] >= r:
+            left -= 1
+        stair_surv[left:pos] = [s]
+        stair_risk[left:pos] = [r]
+    return np.sort(np.array(front, dtype=int))
+
+
+# =============================================================================
+# 第二部分：前沿浏览器
+# =============================================================================
+
+def dps_score(effective_dps: np.ndarray) -> np.ndarray:
+    """与 StrategySimulator 相同的 DPS 归一化：min(100, dps / 100 × 50)。"""
+    return np.minimum(100.0, (effective_dps / 100.0) * 50)
+
+
+@dataclass
+class RankedEntry:
+    """重排后的一条结果。"""
+    label: str
+    result: SimulationResult
+    score: float
+    on_front: bool
+
+
+class ParetoExplorer:
+    """
+    一批 SimulationResult 的多目标视图。
+
+    Args:
+        results: 模拟结果列表。
+        labels:  每个结果的显示名（如 "后期/和弦轮换"）；缺省为策略名。
+    """
+
+    def __init__(self, results: list[SimulationResult], labels: Optional[list[str]] = None):
+        self.results = list(results)
+        self.labels = list(labels) if labels is not None else [r.strategy_name for r in self.results]
+        self.dps = np.array([r.effective_dps for r in self.results], dtype=float)
+        self.survival = np.array([r.survival_score for r in self.results], dtype=float)
+        self.risk = np.array([r.risk_score for r in self.results], dtype=float)
+        # 重排用的目标矩阵：(dps_score, survival, -risk)
+        self._objectives = np.column_stack([dps_score(self.dps), self.survival, -self.risk]) \
+            if self.results else np.zeros((0, 3))
+        self.front = pareto_front(self.dps, self.survival, self.risk)
+        self._on_front = np.zeros(len(self.results), dtype=bool)
+        self._on_front[self.front] = True
+
+    @classmethod
+    def from_phases(cls, all_results: dict[str, list[SimulationResult]]) -> "ParetoExplorer":
+        """由 {阶段: 结果列表}（generate_report 的 all_results）构造。"""
+        results, labels = [], []
+        for phase, phase_results in all_results.items():
+            for r in phase_results:
+                results.append(r)
+                labels.append(f"{phase}/{r.strategy_name}")
+        return cls(results, labels)
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def scores(self, w_dps: float, w_survival: float, w_risk: float) -> np.ndarray:
+        """全部结果在给定权重下的综合得分（公式同 StrategySimulator）。"""
+        return self._objectives @ np.array([w_dps, w_survival, w_risk], dtype=float)
+
+    def rank(self, w_dps: float = DEFAULT_WEIGHTS[0], w_survival: float = DEFAULT_WEIGHTS[1],
+             w_risk: float = DEFAULT_WEIGHTS[2], front_only: bool = False,
+             top: Optional[int] = None) -> list[RankedEntry]:
+        """按给定权重重排（非负权重下，排名第一者必在前沿上）。"""
+        scores = self.scores(w_dps, w_survival, w_risk)
+        candidates = self.front if front_only else np.arange(len(self.results))
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        if top is not None:
+            order = order[:top]
+        return [RankedEntry(self.labels[i], self.results[i], float(scores[i]), bool(self._on_front[i]))
+                for i in order]
+
+    def weight_sweep(self, step: float = 0.05) -> dict[str, float]:
+        """
+        在权重单纯形 (w_dps + w_survival + w_risk = 1) 的网格上统计
+        每个结果排名第一的比例，只列出至少赢过一次的结果。
+        """
+        k = int(round(1 / step))
+        grid = np.array([(i, j, k - i - j) for i in range(k + 1) for j in range(k + 1 - i)],
+                        dtype=float) / k
+        winners = np.argmax(self._objectives[self.front] @ grid.T, axis=0)
+        counts = np.bincount(winners, minlength=len(self.front))
+        return {self.labels[self.front[i]]: float(c) / len(grid)
+                for i, c in sorted(enumerate(counts), key=lambda x: -x[1]) if c > 0}
+
+    def to_dict(self, weight_step: float = 0.05) -> dict:
+        """前沿导出（JSON 报告格式）。"""
+        front = sorted(self.front, key=lambda i: -self.dps[i])
+        return {
+            "objectives": {"effective_dps": "max", "survival_score": "max", "risk_score": "min"},
+            "total_results": len(self.results),
+            "front": [
+                {
+                    "label": self.labels[i],
+                    "effective_dps": round(float(self.dps[i]), 1),
+                    "survival_score": round(float(self.survival[i]), 1),
+                    "risk_score": round(float(self.risk[i]), 1),
+                    "composite_score": round(self.results[i].composite_score, 1),
+                }
+                for i in front
+            ],
+            "weight_sweep_step": weight_step,
+            "weight_sweep_win_share": {k: round(v, 4) for k, v in self.weight_sweep(weight_step).items()},
+        }
+
+
+def write_pareto_report(all_results: dict[str, list[SimulationResult]],
+                        path: str = REPORT_PATH):
+    """
+    把前沿写入 JSON 报告：跨阶段的总前沿（"全部"）+ 每个阶段各自的前沿。
+    """
+    report = {"全部": ParetoExplorer.from_phases(all_results).to_dict()}
+    for phase, results in all_results.items():
+        report[phase] = ParetoExplorer(results).to_dict()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def print_front(explorer: ParetoExplorer):
+    """打印前沿与权重扫描结果。"""
+    print(f"\n{'=' * 90}")
+    print(f"  帕累托前沿：{len(explorer.front)}/{len(explorer)} 个结果非支配")
+    print(f"{'=' * 90}")
+    print(f"  {'结果':30s} | {'有效DPS':>8s} | {'生存':>6s} | {'风险':>6s} | {'综合':>6s}")
+    print(f"  {'-' * 70}")
+    for i in sorted(explorer.front, key=lambda i: -explorer.dps[i]):
+        r = explorer.results[i]
+        print(f"  {explorer.labels[i]:30s} | {r.effective_dps:8.1f} | {r.survival_score:6.1f} | "
+              f"{r.risk_score:6.1f} | {r.composite_score:6.1f}")
+    print(f"\n  权重单纯形上排名第一的比例：")
+    for label, share in explorer.weight_sweep().items():
+        print(f"    {label:30s} {share:6.1%}")
+    print(f"{'=' * 90}\n")
+
+
+if __name__ == "__main__":
+    from balance_scorer import create_chord_registry, create_strategy_library, run_full_benchmark
+    from generate_report import build_scenarios
+
+    chords = create_chord_registry()
+    strategies = create_strategy_library()
+    all_results = {phase: run_full_benchmark(build, strategies, chords)
+                   for phase, build in build_scenarios().items()}
+    explorer = ParetoExplorer.from_phases(all_results)
+    print_front(explorer)
+    for phase, results in all_results.items():
+        print(f"  [{phase}]", end="")
+        print_front(ParetoExplorer(results))
+
+    if len(sys.argv) == 4:
+        weights = tuple(float(w) for w in sys.argv[1:4])
+        print(f"  权重 (dps, 生存, 风险) = {weights} 下的前10名：")
+        for rank, entry in enumerate(explorer.rank(*weights, top=10), 1):
+            mark = "*" if entry.on_front else " "
+            print(f"    {rank:2d}. {mark} {entry.label:30s} {entry.score:7.2f}")
+        print()
+
+    write_pareto_report(all_results)
+    print(f"  前沿已保存: {REPORT_PATH}")
@@ -0,0 +1,554 @@
+"""
+=============================================================================
+Project Harmony — 模拟器性能基准与回归追踪 (Performance Benchmark)
+=============================================================================
+
+print_benchmark_report 衡量的是"游戏数值"，本脚本衡量的是"代码速度"：
+对模拟器与报告流水线计时，把结果追加到历史文件，并与上一次运行对比，
+慢于阈值的用例标记为回归（退出码 1），防止重构悄悄拖慢吞吐量。
+
+计时用例（按组）：
+    simulate   StrategySimulator.simulate，策略长度 32 ~ 10240 拍 × Build 复杂度
+    compiled   simulate_compiled（只计逐拍循环，不含编译）
+    encounter  simulate_encounter，循环演奏 10 / 60 分钟（含周期外推）；
+               计时前先检查外推结果与逐拍模拟在多个 BPM × 拍数下一致（不一致时退出码 1）
+    benchmark  run_full_benchmark，策略数 12 ~ 1200
+    report     JSON 报告 + 帕累托前沿 + 一张图表（写入临时目录）
+    fatigue    AestheticFatigueEngine.record_spell：全部维度 / 全部关闭 / 只开一个维度，
+               后者减去"全部关闭"即为该维度的单独开销（微秒/事件）
+
+每个用例自动确定单次计时的调用次数（至少约 0.2 秒），重复若干轮取最小值
+作为结果（最小值受系统噪声影响最小），同时记录中位数与吞吐量。
+
+用法：
+    python3 BalanceKit/perf_bench.py                  # 全部用例，阈值 10%
+    python3 BalanceKit/perf_bench.py quick            # 只跑小规模用例
+    python3 BalanceKit/perf_bench.py simulate 0.05    # 指定组与回归阈值
+    python3 BalanceKit/perf_bench.py all 0.1 nosave   # 只对比，不写历史
+
+输出：
+    BalanceKit/Reports/perf_history.json（本机历史，不入库）
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import functools
+import subprocess
+import tempfile
+import contextlib
+from dataclasses import dataclass, replace
+from datetime import datetime
+from statistics import median
+from typing import Callable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Scripts"))
+
+from balance_scorer import (
+    PlayerBuild, StrategyDefinition, StrategySimulator,
+    create_chord_registry, create_strategy_library, run_full_benchmark,
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(BASE_DIR, "Reports", "perf_history.json")
+
+# 历史文件格式版本
+HISTORY_VERSION = 1
+
+# 默认回归阈值：比上次慢 10% 以上记为回归
+DEFAULT_THRESHOLD = 0.10
+
+STRATEGY_LENGTHS = (32, 256, 2048, 10240)
+STRATEGY_COUNTS = (12, 120, 1200)
+ENCOUNTER_SECONDS = (600, 3600)
+# 周期外推一致性检查：DENSITY_WINDOW / 拍间隔为整数的 BPM（105/135/150/165）与常规 BPM 混合
+PARITY_BPMS = (100, 105, 120, 135, 150, 165, 180, 200)
+PARITY_BEATS = (37, 200, 1200, 5000)
+FATIGUE_EVENTS = 512
+
+
+# =============================================================================
+# 第一部分：测试输入
+# =============================================================================
+
+def build_tiers() -> dict[str, PlayerBuild]:
+    """Build 复杂度档位：无升级 / 中期 / 后期（沿用报告的三阶段 Build）。"""
+    from generate_report import build_scenarios
+    scenarios = build_scenarios()
+    return {"base": PlayerBuild(), "mid": scenarios["中期"], "late": scenarios["后期"]}
+
+
+def stretch_strategy(strategy: StrategyDefinition, beats: int) -> StrategyDefinition:
+    """把策略的动作序列循环展开到指定拍数。"""
+    actions = [replace(strategy.actions[i % len(strategy.actions)], beat=i) for i in range(beats)]
+    return StrategyDefinition(name=f"{strategy.name}×{beats}", description=strategy.description,
+                              actions=actions)
+
+
+def strategy_pool(count: int) -> list[StrategyDefinition]:
+    """
+    生成 count 个策略：策略库按顺序轮换，每轮把动作序列整体错位一拍，
+    保证各策略的动作序列互不相同（不会被编译缓存等机制"作弊"）。
+    """
+    library = create_strategy_library()
+    pool = []
+    for i in range(count):
+        base = library[i % len(library)]
+        shift = i // len(library)
+        actions = base.actions[shift % len(base.actions):] + base.actions[:shift % len(base.actions)]
+        pool.append(StrategyDefinition(
+            name=f"{base.name}#{i}", description=base.description,
+            actions=[replace(a, beat=b) for b, a in enumerate(actions)],
+        ))
+    return pool
+
+
+def fatigue_events(beats: int = FATIGUE_EVENTS) -> list:
+    """疲劳引擎的输入：一条固定种子的马尔可夫负载（单音、和弦、休止混合）。"""
+    import numpy as np
+    from markov_workload import HarmonyChain, WorkloadConfig, sample_workload
+    workload = sample_workload(HarmonyChain.from_music_data(), 1, WorkloadConfig(beats=beats),
+                               np.random.default_rng(0))
+    return workload.spell_events(0)
+
+
+def fatigue_configs() -> dict:
+    """
+    疲劳引擎的配置档位："all" 为默认配置，"none" 关闭全部维度（只剩窗口维护与结果构造），
+    "only/<维度>" 只启用一个维度（权重 1，维度名去掉 _fatigue 后缀）。后两者开启
+    skip_zero_weight_dimensions，权重为 0 的维度不会被引擎实例化。
+    """
+    from aesthetic_fatigue_system import DIMENSION_REGISTRY, FatigueConfig
+    builtin = {cls.weight_field: 0.0 for cls in DIMENSION_REGISTRY.values() if cls.weight_field}
+    builtin["skip_zero_weight_dimensions"] = True
+    configs = {"all": FatigueConfig(), "none": FatigueConfig(**builtin)}
+    for name, cls in DIMENSION_REGISTRY.items():
+        label = f"only/{name.removesuffix('_fatigue')}"
+        if cls.weight_field:
+            configs[label] = FatigueConfig(**{**builtin, cls.weight_field: 1.0})
+        else:
+            configs[label] = FatigueConfig(**builtin, weight_extra={name: 1.0})
+    return configs
+
+
+# =============================================================================
+# 第二部分：用例与计时
+# =============================================================================
+
+@dataclass
+class BenchCase:
+    """
+    一个计时用例。
+
+    setup() 返回被计时的无参函数；units 为每次调用处理的工作量
+    （拍数或模拟次数），unit_name 为其单位，用于计算吞吐量。
+    scratch 为 True 时 setup 接收一个临时目录（计时结束后删除）作为输出位置。
+    """
+    name: str
+    group: str
+    setup: Callable[..., Callable[[], object]]
+    units: int
+    unit_name: str
+    quick: bool = False
+    scratch: bool = False
+
+
+@dataclass
+class BenchResult:
+    """单个用例的计时结果（毫秒 / 每次调用）。"""
+    name: str
+    min_ms: float
+    median_ms: float
+    throughput: float
+    unit_name: str
+    calls: int
+
+
+def time_case(case: BenchCase, repeats: int = 5, min_time: float = 0.2) -> BenchResult:
+    """自动确定每轮调用次数，重复 repeats 轮，取每次调用的最小与中位耗时。"""
+    with contextlib.ExitStack() as stack:
+        if case.scratch:
+            fn = case.setup(stack.enter_context(tempfile.TemporaryDirectory(prefix="perf_bench_")))
+        else:
+            fn = case.setup()
+        return _time_calls(case, fn, repeats, min_time)
+
+
+def _time_calls(case: BenchCase, fn: Callable[[], object], repeats: int,
+                min_time: float) -> BenchResult:
+    fn()  # 预热（导入、缓存、首次分配）
+
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        calls = max(calls * 2, int(calls * min_time / max(elapsed, 1e-9) * 1.2))
+
+    samples = [elapsed / calls]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        samples.append((time.perf_counter() - start) / calls)
+
+    best = min(samples)
+    return BenchResult(
+        name=case.name,
+        min_ms=best * 1000,
+        median_ms=median(samples) * 1000,
+        throughput=case.units / best,
+        unit_name=case.unit_name,
+        calls=calls,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _chords():
+    return create_chord_registry()
+
+
+@functools.lru_cache(maxsize=None)
+def _mixed() -> StrategyDefinition:
+    # 混合最优策略同时包含单音、和弦、修饰符与休止，覆盖全部逐拍分支
+    return next(s for s in create_strategy_library() if s.name == "混合最优策略")
+
+
+@functools.lru_cache(maxsize=None)
+def _fatigue_events() -> list:
+    return fatigue_events()
+
+
+def default_cases() -> list[BenchCase]:
+    """
+    全部计时用例。
+
+    列出用例时只确定名称与工作量；策略、策略池、疲劳负载等输入在 setup 中
+    按需构造（同组用例共享的输入只构造一次），只跑一个组时不会为其他组付出准备开销。
+    """
+    tiers = build_tiers()
+    cases = []
+
+    for tier, build in tiers.items():
+        for beats in STRATEGY_LENGTHS:
+            quick = tier == "late" and beats <= 2048
+
+            def setup_simulate(build=build, beats=beats):
+                strategy = stretch_strategy(_mixed(), beats)
+                sim = StrategySimulator(build, _chords(), log_beats=False)
+                return lambda: sim.simulate(strategy)
+
+            def setup_compiled(build=build, beats=beats):
+                strategy = stretch_strategy(_mixed(), beats)
+                sim = StrategySimulator(build, _chords(), log_beats=False)
+                table = sim.compile(strategy)
+                return lambda: sim.simulate_compiled(table, strategy.name)
+
+            cases.append(BenchCase(f"simulate/{tier}/{beats}", "simulate", setup_simulate,
+                                   beats, "拍/秒", quick))
+            cases.append(BenchCase(f"compiled/{tier}/{beats}", "compiled", setup_compiled,
+                                   beats, "拍/秒", quick))
+
+    late = tiers["late"]
+    for duration in ENCOUNTER_SECONDS:
+        def setup_encounter(duration=duration):
+            sim = StrategySimulator(late, _chords(), log_beats=False)
+            mixed = _mixed()
+            return lambda: sim.simulate_encounter(mixed, duration)
+        cases.append(BenchCase(f"encounter/late/{duration}s", "encounter", setup_encounter,
+                               round(duration / late.beat_interval), "拍/秒", duration <= 600))
+
+    for count in STRATEGY_COUNTS:
+        def setup_benchmark(count=count):
+            strategies, chords = strategy_pool(count), _chords()
+            return lambda: run_full_benchmark(late, strategies, chords)
+        cases.append(BenchCase(f"benchmark/{count}", "benchmark", setup_benchmark,
+                               count, "次模拟/秒", count <= 120))
+
+    cases.append(BenchCase("report/json+pareto", "report", _setup_report_json,
+                           36, "条结果/秒", True, scratch=True))
+    cases.append(BenchCase("report/figure", "report", _setup_report_figure, 1, "张/秒",
+                           scratch=True))
+
+    for label, config in fatigue_configs().items():
+        def setup_fatigue(config=config):
+            from aesthetic_fatigue_system import AestheticFatigueEngine
+            events = _fatigue_events()
+
+            def run():
+                engine = AestheticFatigueEngine(config)
+                for event in events:
+                    engine.record_spell(event)
+            return run
+        cases.append(BenchCase(f"fatigue/{label}", "fatigue", setup_fatigue,
+                               FATIGUE_EVENTS, "事件/秒", label in ("all", "none")))
+    return cases
+
+
+def check_extrapolation(bpms: tuple[int, ...] = PARITY_BPMS,
+                        lengths: tuple[int, ...] = PARITY_BEATS,
+                        tolerance: float = 1e-9) -> list[str]:
+    """
+    周期外推与逐拍模拟（detect_cycles=False）的一致性检查：策略库 × BPM × 拍数，
+    比较 SimulationResult 的全部数值字段。返回不一致项的描述（空列表表示一致）。
+    """
+    import dataclasses
+    from balance_scorer import SimulationResult
+    chords = create_chord_registry()
+    fields = [f.name for f in dataclasses.fields(SimulationResult)
+              if f.name not in ("strategy_name", "beat_log", "fatigue_trace", "damage_trace")]
+    mismatches = []
+    for bpm in bpms:
+        build = PlayerBuild(bpm=bpm)
+        sim = StrategySimulator(build, chords, log_beats=False)
+        for strategy in create_strategy_library():
+            table = sim.compile(strategy)
+            for beats in lengths:
+                fast = sim.simulate_compiled(table, strategy.name, beats)
+                full = sim.simulate_compiled(table, strategy.name, beats, detect_cycles=False)
+                for name in fields:
+                    x, y = getattr(fast, name), getattr(full, name)
+                    if abs(x - y) > tolerance * max(1.0, abs(y)):
+                        mismatches.append(f"{bpm} BPM / {beats} 拍 / {strategy.name}: "
+                                          f"{name} {x} ≠ {y}")
+    return mismatches
+
+
+def _report_inputs():
+    from generate_report import build_scenarios
+    chords = create_chord_registry()
+    strategies = create_strategy_library()
+    return {phase: run_full_benchmark(build, strategies, chords, log_beats=False, record_trace=True)
+            for phase, build in build_scenarios().items()}
+
+
+def _setup_report_json(scratch: str):
+    from report_stream import write_report
+    from pareto import ParetoExplorer
+    all_results = _report_inputs()
+    path = os.path.join(scratch, "benchmark_results.json")
+
+    def run():
+        write_report(path, all_results)
+        ParetoExplorer.from_phases(all_results).to_dict()
+    return run
+
+
+def _setup_report_figure(scratch: str):
+    import generate_report
+    all_results = _report_inputs()
+
+    def run():
+        # 图表写入临时目录；每次调用后恢复 REPORT_DIR，不影响同一进程里后续的报告
+        report_dir, generate_report.REPORT_DIR = generate_report.REPORT_DIR, scratch
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_report.plot_fatigue_peaks(all_results)
+        finally:
+            generate_report.REPORT_DIR = report_dir
+    return run
+
+
+def select_cases(cases: list[BenchCase], group: str) -> list[BenchCase]:
+    """按组筛选："all" 全部，"quick" 小规模用例，其余为组名。"""
+    if group == "all":
+        return cases
+    if group == "quick":
+        return [c for c in cases if c.quick]
+    selected = [c for c in cases if c.group == group]
+    if not selected:
+        raise ValueError(f"未知的用例组: {group}")
+    return selected
+
+
+# =============================================================================
+# 第三部分：历史记录与回归判定
+# =============================================================================
+
+def load_history(path: str = HISTORY_PATH) -> list[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return data.get("runs", []) if data.get("version") == HISTORY_VERSION else []
+
+
+def save_history(runs: list[dict], path: str = HISTORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": HISTORY_VERSION, "runs": runs}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def make_run(results: list[BenchResult]) -> dict:
+    """一次运行的历史记录。"""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} / {os.cpu_count()} CPU",
+        "results": {
+            r.name: {"min_ms": round(r.min_ms, 4), "median_ms": round(r.median_ms, 4),
+                     "throughput": round(r.throughput, 1), "calls": r.calls}
+            for r in results
+        },
+    }
+
+
+@dataclass
+class Comparison:
+    """与上次运行对比的单个用例。ratio = 本次 / 上次（>1 表示变慢）。"""
+    name: str
+    previous_ms: float
+    current_ms: float
+    ratio: float
+    regressed: bool
+
+
+def compare_runs(previous: dict, current: dict,
+                 threshold: float = DEFAULT_THRESHOLD) -> list[Comparison]:
+    """逐用例对比最小耗时；只对比两次都出现的用例。"""
+    comparisons = []
+    for name, now in current["results"].items():
+        before = previous["results"].get(name)
+        if before is None:
+            continue
+        ratio = now["min_ms"] / before["min_ms"] if before["min_ms"] > 0 else 1.0
+        comparisons.append(Comparison(name, before["min_ms"], now["min_ms"], ratio,
+                                      ratio > 1.0 + threshold))
+    return comparisons
+
+
+def confirm_regressions(cases: list[BenchCase], results: list[BenchResult],
+                        previous: dict, threshold: float) -> list[BenchResult]:
+    """
+    对初判回归的用例重新计时一次并取两次中的较快者，过滤偶发的系统噪声
+    （后台进程、CPU 降频）造成的误报。
+    """
+    by_name = {c.name: c for c in cases}
+    current = make_run(results)
+    suspects = {c.name for c in compare_runs(previous, current, threshold) if c.regressed}
+    confirmed = []
+    for r in results:
+        if r.name in suspects:
+            print(f"  [复测] {r.name} ...", end="", flush=True)
+            retry = time_case(by_name[r.name])
+            print(f" {retry.min_ms:.3f} ms")
+            r = min(r, retry, key=lambda x: x.min_ms)
+        confirmed.append(r)
+    return confirmed
+
+
+def previous_comparable(runs: list[dict], current: dict) -> Optional[dict]:
+    """最近一次与本次在同一台机器上、且有共同用例的历史记录。"""
+    for run in reversed(runs):
+        if run.get("machine") == current["machine"] and \
+                set(run["results"]) & set(current["results"]):
+            return run
+    return None
+
+
+def print_perf_report(results: list[BenchResult], comparisons: list[Comparison],
+                      previous: Optional[dict], threshold: float):
+    """打印计时结果与回归对比。"""
+    by_name = {c.name: c for c in comparisons}
+    print(f"\n{'=' * 96}")
+    print("  模拟器性能基准")
+    if previous:
+        print(f"  对比基准: {previous['timestamp']} ({previous.get('revision') or '未知版本'})"
+              f"，回归阈值 +{threshold:.0%}")
+    print(f"{'=' * 96}")
+    print(f"  {'用例':28s} | {'最小(ms)':>10s} | {'中位(ms)':>10s} | {'吞吐量':>18s} | {'对比上次':>10s}")
+    print(f"  {'-' * 90}")
+    for r in results:
+        c = by_name.get(r.name)
+        change = ""
+        if c is not None:
+            change = f"{c.ratio - 1:+.1%}" + (" ⚠" if c.regressed else "")
+        print(f"  {r.name:28s} | {r.min_ms:10.3f} | {r.median_ms:10.3f} | "
+              f"{r.throughput:>12,.0f} {r.unit_name:5s} | {change:>10s}")
+
+    regressions = [c for c in comparisons if c.regressed]
+    print(f"{'=' * 96}")
+    if regressions:
+        print(f"  [回归] {len(regressions)} 个用例变慢超过 {threshold:.0%}：")
+        for c in regressions:
+            print(f"    {c.name:28s} {c.previous_ms:.3f} → {c.current_ms:.3f} ms ({c.ratio - 1:+.1%})")
+    elif previous:
+        print("  [OK] 无性能回归")
+    else:
+        print("  首次运行（或本机无历史记录），已记录为对比基准")
+    print_dimension_costs(results)
+    print()
+
+
+def print_dimension_costs(results: list[BenchResult]):
+    """疲劳维度的单独开销：only/<维度> 与 none 的每事件耗时之差。"""
+    by_name = {r.name: r for r in results}
+    none = by_name.get("fatigue/none")
+    only = [r for r in results if r.name.startswith("fatigue/only/")]
+    if none is None or not only:
+        return
+    base_us = 1e6 / none.throughput
+    print(f"\n  疲劳维度开销（微秒/事件，已减去全部关闭时的 {base_us:.1f} 微秒）")
+    for r in sorted(only, key=lambda r: r.throughput):
+        print(f"    {r.name[len('fatigue/only/'):]:24s} {1e6 / r.throughput - base_us:8.1f}")
+    if "fatigue/all" in by_name:
+        print(f"    {'全部维度':20s} {1e6 / by_name['fatigue/all'].throughput - base_us:8.1f}")
+
+
+if __name__ == "__main__":
+    group = sys.argv[1] if len(sys.argv) > 1 else "all"
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_THRESHOLD
+    save = not (len(sys.argv) > 3 and sys.argv[3] == "nosave")
+
+    cases = select_cases(default_cases(), group)
+    results = []
+    for i, case in enumerate(cases, 1):
+        print(f"  [{i}/{len(cases)}] {case.name} ...", end="", flush=True)
+        results.append(time_case(case))
+        print(f" {results[-1].min_ms:.3f} ms")
+
+    mismatches = []
+    if any(c.group == "encounter" for c in cases):
+        print("  [检查] 周期外推 vs 逐拍模拟 ...", end="", flush=True)
+        mismatches = check_extrapolation()
+        print(f" {len(mismatches)} 处不一致")
+        for line in mismatches[:10]:
+            print(f"    {line}")
+
+    runs = load_history()
+    previous = previous_comparable(runs, make_run(results))
+    if previous:
+        results = confirm_regressions(cases, results, previous, threshold)
+    current = make_run(results)
+    comparisons = compare_runs(previous, current, threshold) if previous else []
+    print_perf_report(results, comparisons, previous, threshold)
+
+    if save:
+        runs.append(current)
+        save_history(runs)
+        print(f"  历史已保存: {HISTORY_PATH}")
+
+    sys.exit(1 if mismatches or any(c.regressed for c in comparisons) else 0)
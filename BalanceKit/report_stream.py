@@ -0,0 +1,305 @@
+"""
+=============================================================================
+Project Harmony — 流式跑分报告读写 (Streaming Report Writer)
+=============================================================================
+
+generate_json_report 原先先把整份嵌套 dict 建在内存里，再一次性
+json.dump(indent=2)。结果一多（大规模扫描、附带逐拍日志），峰值内存
+翻倍且很慢。本模块逐行写出，内存只与单行大小有关：
+
+    1. JSON Lines（.jsonl / .jsonl.gz）：每行一个 {"phase": ..., 字段...}
+    2. 兼容模式（.json / .json.gz）：与旧版 benchmark_results.json 逐字节
+       一致的 {阶段: [行, ...]} 结构，但按行增量写出
+    3. iter_rows：两种格式都可惰性逐行读取，文件不整体载入
+
+文件名以 .gz 结尾时自动 gzip 压缩 / 解压。
+
+用法：
+    python3 BalanceKit/report_stream.py Reports/benchmark_results.json     # 逐行打印
+    python3 BalanceKit/report_stream.py in.json out.jsonl.gz               # 格式转换
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import gzip
+import json
+from typing import Iterable, Iterator, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from balance_scorer import SimulationResult
+
+# 报告行字段 → 保留的小数位（None 表示原样输出）
+ROW_FIELDS = {
+    "effective_dps": 1,
+    "raw_dps": 1,
+    "burst_dps": 1,
+    "survival_score": 1,
+    "risk_score": 1,
+    "composite_score": 1,
+    "peak_monotony": 1,
+    "peak_density": 1,
+    "peak_dissonance": 1,
+    "dissonance_damage": 1,
+    "lockout_beats": None,
+    "total_healing": 1,
+    "total_shielding": 1,
+    # v2.1 新增
+    "total_delay_discount": 3,
+    "total_range_discount": 3,
+    "delay_exposure_time": 1,
+    "avg_range_factor": 3,
+    "proximity_risk": 2,
+}
+
+_READ_BLOCK = 1 << 16
+
+
+def result_row(r: SimulationResult) -> dict:
+    """单个结果的报告行（benchmark_results.json 的行格式）。"""
+    row = {"strategy": r.strategy_name}
+    for name, digits in ROW_FIELDS.items():
+        value = getattr(r, name)
+        row[name] = value if digits is None else round(value, digits)
+    return row
+
+
+def _open(path: str, mode: str, compressed: Optional[bool] = None):
+    """按扩展名（或 compressed 参数）选择普通文件或 gzip 文件（文本模式）。"""
+    if compressed is None:
+        compressed = path.endswith(".gz")
+    if compressed:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def is_jsonl(path: str) -> bool:
+    return path.removesuffix(".gz").endswith(".jsonl")
+
+
+# =============================================================================
+# 第一部分：写入
+# =============================================================================
+
+class ReportWriter:
+    """
+    流式报告写入器。
+
+    按 begin_phase → write_row × N → … → close 的顺序调用；
+    write_phase 是"开始一个阶段并写完整个结果序列"的简写。
+    同一阶段的行必须连续写出（兼容模式的结构要求）。
+
+    Args:
+        path: 输出路径。.jsonl[.gz] 为 JSON Lines，其余为兼容的嵌套 JSON。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.jsonl = is_jsonl(path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._tmp = path + ".tmp"
+        self._f = _open(self._tmp, "w", compressed=path.endswith(".gz"))
+        self._phase: Optional[str] = None
+        self._phases_written = 0
+        self._rows_in_phase = 0
+        self.rows_written = 0
+        if not self.jsonl:
+            self._f.write("{")
+
+    def begin_phase(self, phase: str):
+        self._end_phase()
+        self._phase = phase
+        self._rows_in_phase = 0
+        if not self.jsonl:
+            sep = "," if self._phases_written else ""
+            self._f.write(f'{sep}\n  {json.dumps(phase, ensure_ascii=False)}: [')
+        self._phases_written += 1
+
+    def write_row(self, row: dict):
+        if self._phase is None:
+            raise RuntimeError("write_row 之前需要先调用 begin_phase")
+        if self.jsonl:
+            self._f.write(json.dumps({"phase": self._phase, **row}, ensure_ascii=False))
+            self._f.write("\n")
+        else:
+            # 与 json.dump(indent=2) 的嵌套缩进保持一致（行对象位于第 2 层）
+            text = json.dumps(row, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+            sep = "," if self._rows_in_phase else ""
+            self._f.write(f"{sep}\n    {text}")
+        self._rows_in_phase += 1
+        self.rows_written += 1
+
+    def write_result(self, r: SimulationResult):
+        self.write_row(result_row(r))
+
+    def write_phase(self, phase: str, results: Iterable[SimulationResult]):
+        self.begin_phase(phase)
+        for r in results:
+            self.write_result(r)
+
+    def _end_phase(self):
+        if self._phase is not None and not self.jsonl:
+            self._f.write("\n  ]" if self._rows_in_phase else "]")
+        self._phase = None
+
+    def close(self):
+        """结束写入并原子替换目标文件。"""
+        if self._f is None:
+            return
+        self._end_phase()
+        if not self.jsonl:
+            self._f.write("\n}" if self._phases_written else "}")
+        self._f.close()
+        self._f = None
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        """放弃写入，删除临时文件，保留原有报告。"""
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            os.remove(self._tmp)
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_report(path: str, all_results: dict[str, Iterable[SimulationResult]]) -> int:
+    """把 {阶段: 结果序列} 流式写入报告，返回写出的行数。结果序列可以是生成器。"""
+    with ReportWriter(path) as writer:
+        for phase, results in all_results.items():
+            writer.write_phase(phase, results)
+    return writer.rows_written
+
+
+# =============================================================================
+# 第二部分：惰性读取
+# =============================================================================
+
+class _JsonScanner:
+    """
+    在分块读入的缓冲区上增量解析兼容格式：{"阶段": [{...}, ...], ...}。
+    每次只对单个字符串或行对象调用 raw_decode，缓冲区不超过一块加一行。
+    """
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(_READ_BLOCK)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """跳过空白，返回下一个非空白字符（文件结束返回空串）。"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"报告格式错误：期望 {char!r}，得到 {found!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # 值被块边界截断：继续读入后重试
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self.buf) and self._fill():
+                # 数字可能在块边界被截断，读入更多内容后重新解析
+                continue
+            self.pos = end
+            return obj
+
+
+def _iter_nested(f) -> Iterator[dict]:
+    scan = _JsonScanner(f)
+    scan.expect("{")
+    if scan.peek() == "}":
+        return
+    while True:
+        phase = scan.value()
+        scan.expect(":")
+        scan.expect("[")
+        if scan.peek() != "]":
+            while True:
+                yield {"phase": phase, **scan.value()}
+                if scan.peek() != ",":
+                    break
+                scan.expect(",")
+        scan.expect("]")
+        if scan.peek() != ",":
+            break
+        scan.expect(",")
+    scan.expect("}")
+
+
+def iter_rows(path: str) -> Iterator[dict]:
+    """
+    惰性逐行读取报告（JSON Lines 或兼容格式，可 gzip）。
+    每行都带 "phase" 字段。
+    """
+    with _open(path, "r") as f:
+        if is_jsonl(path):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_nested(f)
+
+
+def iter_results(path: str) -> Iterator[tuple[str, SimulationResult]]:
+    """惰性读取为 (阶段, SimulationResult)；报告里没有的字段取默认值。"""
+    for row in iter_rows(path):
+        phase = row.pop("phase")
+        yield phase, SimulationResult(strategy_name=row.pop("strategy"), **row)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    src = sys.argv[1]
+    if len(sys.argv) > 2:
+        dst = sys.argv[2]
+        with ReportWriter(dst) as writer:
+            current = None
+            for row in iter_rows(src):
+                phase = row.pop("phase")
+                if phase != current:
+                    writer.begin_phase(phase)
+                    current = phase
+                writer.write_row(row)
+        print(f"已转换 {writer.rows_written} 行: {src} → {dst}")
+    else:
+        for row in iter_rows(src):
+            print(f"  {row['phase']:4s} | {row['strategy']:20s} | "
+                  f"有效DPS {row['effective_dps']:7.1f} | 综合 {row['composite_score']:6.1f}")
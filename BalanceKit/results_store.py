@@ -0,0 +1,455 @@
+"""
+=============================================================================
+Project Harmony — 列式跑分结果存储 (Columnar Results Store)
+=============================================================================
+
+benchmark_results.json（indent=2，逐条对象）适合三阶段 × 十几个策略的
+报告，但参数扫描、蒙特卡洛对局动辄产生数百万条 SimulationResult。
+
+本模块提供一种列式存储（目录格式，后缀 .hcol）：
+
+    results.hcol/
+        meta.json              元数据：列名与类型、字符串字典、分块列表与统计
+        chunk_00000/
+            effective_dps.npy  每列一个类型化数组（raw）
+            strategy.bin.z     或字节重排 + zlib 压缩（zlib，默认）
+        chunk_00001/
+        ...
+
+特性：
+    - 追加写入：按块缓冲，满 chunk_rows 行落盘；每块写完后原子更新
+      meta.json，长时间扫描中断后已落盘的块仍可读取，再次打开会继续追加
+    - 列投影：只读取（解压）查询涉及的列
+    - 内存映射：raw 编码的列以 np.load(mmap_mode="r") 读取
+    - 分块裁剪：每块记录各列的 min/max，等值/区间过滤可跳过整块
+    - 字符串列（策略名、阶段等）按字典编码为 int32
+
+SimulationResult 的 beat_log / fatigue_trace / damage_trace 不入库（逐拍明细请用单次模拟查看）。
+
+用法：
+    python3 BalanceKit/results_store.py <store.hcol>     # 打印概要
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import zlib
+import dataclasses
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from balance_scorer import SimulationResult
+
+FORMAT_NAME = "harmony-columnar"
+FORMAT_VERSION = 1
+CODECS = ("zlib", "raw")
+
+# 字典编码的字符串列类型名
+DICT_TYPE = "dict"
+
+# SimulationResult 中入库的标量字段（逐拍日志与疲劳轨迹除外）及其类型
+RESULT_COLUMNS = {
+    f.name: ("int32" if f.type in ("int", int) else "float64")
+    for f in dataclasses.fields(SimulationResult)
+    if f.name not in ("strategy_name", "beat_log", "fatigue_trace", "damage_trace")
+}
+
+
+def _column_type(value) -> str:
+    if isinstance(value, str):
+        return DICT_TYPE
+    if isinstance(value, (bool, np.bool_)):
+        return "bool"
+    if isinstance(value, (int, np.integer)):
+        return "int64"
+    return "float64"
+
+
+# zlib 压缩级别：扫描数据量大，取速度优先
+ZLIB_LEVEL = 1
+
+
+def _storage_dtype(column_type: str) -> np.dtype:
+    return np.dtype(np.int32 if column_type == DICT_TYPE else column_type)
+
+
+def _shuffle(array: np.ndarray) -> bytes:
+    """
+    字节重排：把每个元素的第 k 个字节集中存放（同 Parquet BYTE_STREAM_SPLIT）。
+
+    浮点数的符号/指数字节高度相似，重排后 zlib 压缩率显著提高。
+    """
+    array = np.ascontiguousarray(array)
+    return array.view(np.uint8).reshape(len(array), array.itemsize).T.tobytes()
+
+
+def _unshuffle(data: bytes, dtype: np.dtype) -> np.ndarray:
+    raw = np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, -1)
+    return np.ascontiguousarray(raw.T).view(dtype).reshape(-1)
+
+
+# =============================================================================
+# 第一部分：写入
+# =============================================================================
+
+class ResultStoreWriter:
+    """
+    列式存储的追加写入器（也可作为上下文管理器使用）。
+
+    Args:
+        path:       存储目录；已存在时继续追加（列结构须一致）。
+        chunk_rows: 每块行数。
+        codec:      "zlib"（压缩）或 "raw"（可内存映射）；None 时新建存储用
+                    "zlib"，已有存储沿用其编码。显式指定且与已有存储不一致时报错。
+    """
+
+    def __init__(self, path: str, chunk_rows: int = 65536, codec: Optional[str] = None):
+        if codec is not None and codec not in CODECS:
+            raise ValueError(f"未知编码: {codec}（可选: {', '.join(CODECS)}）")
+        self.path = path
+        self.chunk_rows = chunk_rows
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                self.meta = json.load(f)
+            if codec is not None and codec != self.meta["codec"]:
+                raise ValueError(f"编码不一致: 已有存储为 {self.meta['codec']}，指定了 {codec}")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.meta = {
+                "format": FORMAT_NAME, "version": FORMAT_VERSION, "codec": codec or "zlib",
+                "columns": {}, "dictionaries": {}, "chunks": [],
+            }
+        self._lookup = {col: {v: i for i, v in enumerate(values)}
+                        for col, values in self.meta["dictionaries"].items()}
+        self._rows: dict[str, list] = {}          # append_row 逐行缓冲
+        self._segments: list[dict[str, np.ndarray]] = []   # 已编码的列段
+        self._buffered = 0
+
+    def __enter__(self) -> "ResultStoreWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- 追加 ----
+
+    def append(self, result: SimulationResult, **labels):
+        """追加一条结果；labels 为附加列（如 phase="后期", sample=42）。"""
+        row = {"strategy": result.strategy_name}
+        row.update({name: getattr(result, name) for name in RESULT_COLUMNS})
+        row.update(labels)
+        self.append_row(row)
+
+    def extend(self, results, **labels):
+        for result in results:
+            self.append(result, **labels)
+
+    def append_row(self, row: dict):
+        """追加一行任意列（首行确定列结构，之后各行的列必须相同）。"""
+        columns = self.meta["columns"]
+        if not columns:
+            for name, value in row.items():
+                columns[name] = RESULT_COLUMNS.get(name) or _column_type(value)
+        elif row.keys() != columns.keys():
+            missing = columns.keys() ^ row.keys()
+            raise ValueError(f"列结构不一致: {sorted(missing)}")
+        for name, value in row.items():
+            self._rows.setdefault(name, []).append(value)
+        self._buffered += 1
+        if self._buffered >= self.chunk_rows:
+            self.flush()
+
+    def append_columns(self, **arrays):
+        """按列批量追加（数组长度须相同），适合扫描程序直接写入 numpy 结果。"""
+        lengths = {len(a) for a in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError("各列长度不一致")
+        n = lengths.pop()
+        columns = self.meta["columns"]
+        if not columns:
+            for name, values in arrays.items():
+                columns[name] = RESULT_COLUMNS.get(name) or _column_type(values[0])
+        elif arrays.keys() != columns.keys():
+            raise ValueError(f"列结构不一致: {sorted(columns.keys() ^ arrays.keys())}")
+        self._seal_rows()
+        encoded = {name: self._encode(name, values) for name, values in arrays.items()}
+        start = 0
+        while start < n:
+            take = min(n - start, self.chunk_rows - self._buffered)
+            self._segments.append({name: a[start:start + take] for name, a in encoded.items()})
+            self._buffered += take
+            start += take
+            if self._buffered >= self.chunk_rows:
+                self.flush()
+
+    # ---- 落盘 ----
+
+    def _encode(self, name: str, values) -> np.ndarray:
+        dtype = self.meta["columns"][name]
+        if dtype != DICT_TYPE:
+            return np.asarray(values, dtype=dtype)
+        lookup = self._lookup.setdefault(name, {})
+        dictionary = self.meta["dictionaries"].setdefault(name, [])
+        uniques, first, inverse = np.unique(np.asarray(values, dtype=object).astype(str),
+                                            return_index=True, return_inverse=True)
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for u in np.argsort(first, kind="stable"):   # 新值按首次出现顺序入字典
+            value = str(uniques[u])
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(dictionary)
+                dictionary.append(value)
+            mapping[u] = code
+        return mapping[inverse.reshape(-1)]
+
+    def _seal_rows(self):
+        """把逐行缓冲编码为一个列段。"""
+        if self._rows:
+            self._segments.append({name: self._encode(name, values)
+                                   for name, values in self._rows.items()})
+            self._rows = {}
+
+    def flush(self):
+        """把缓冲区写成一个新块并更新元数据。"""
+        self._seal_rows()
+        if not self._buffered:
+            return
+        chunk_id = len(self.meta["chunks"])
+        chunk_dir = os.path.join(self.path, f"chunk_{chunk_id:05d}")
+        os.makedirs(chunk_dir, exist_ok=True)
+        stats = {}
+        for name in self.meta["columns"]:
+            array = np.concatenate([seg[name] for seg in self._segments])
+            stats[name] = [array.min().item(), array.max().item()]
+            if self.meta["codec"] == "raw":
+                np.save(os.path.join(chunk_dir, f"{name}.npy"), array)
+            else:
+                with open(os.path.join(chunk_dir, f"{name}.bin.z"), "wb") as f:
+                    f.write(zlib.compress(_shuffle(array), ZLIB_LEVEL))
+        self.meta["chunks"].append({"id": chunk_id, "rows": self._buffered, "stats": stats})
+        self._write_meta()
+        self._segments = []
+        self._buffered = 0
+
+    def _write_meta(self):
+        path = os.path.join(self.path, "meta.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def close(self):
+        """写出剩余缓冲并更新元数据（没有任何行时也写出 meta.json，保证存储可打开）。"""
+        self.flush()
+        self._write_meta()
+
+
+def write_results(path: str, all_results: dict[str, list[SimulationResult]],
+                  codec: Optional[str] = None) -> "ResultStore":
+    """把 {阶段: 结果列表} 追加到存储（phase 作为附加列）。"""
+    with ResultStoreWriter(path, codec=codec) as writer:
+        for phase, results in all_results.items():
+            writer.extend(results, phase=phase)
+    return ResultStore(path)
+
+
+# =============================================================================
+# 第二部分：读取与查询
+# =============================================================================
+
+Condition = Union[str, int, float, tuple]
+
+
+class ResultStore:
+    """
+    列式存储的只读视图。
+
+    where 条件：{列名: 值}（等值）或 {列名: (下限, 上限)}（闭区间，
+    任一端可为 None）。字符串列按原值给出。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT_NAME:
+            raise ValueError(f"不是列式跑分存储: {path}")
+        self.columns: dict[str, str] = self.meta["columns"]
+        self.dictionaries: dict[str, list] = self.meta["dictionaries"]
+        self._dict_arrays = {k: np.array(v, dtype=object) for k, v in self.dictionaries.items()}
+
+    def __len__(self) -> int:
+        return sum(c["rows"] for c in self.meta["chunks"])
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self.meta["chunks"])
+
+    # ---- 底层读取 ----
+
+    def _load(self, chunk_id: int, name: str) -> np.ndarray:
+        chunk_dir = os.path.join(self.path, f"chunk_{chunk_id:05d}")
+        if self.meta["codec"] == "raw":
+            return np.load(os.path.join(chunk_dir, f"{name}.npy"), mmap_mode="r")
+        with open(os.path.join(chunk_dir, f"{name}.bin.z"), "rb") as f:
+            return _unshuffle(zlib.decompress(f.read()), _storage_dtype(self.columns[name]))
+
+    def _normalize(self, where: Optional[dict[str, Condition]]) -> dict[str, tuple]:
+        """把条件转换为编码后的闭区间 (lo, hi)；字典中不存在的字符串值返回 None。"""
+        bounds = {}
+        for name, cond in (where or {}).items():
+            if name not in self.columns:
+                raise KeyError(f"未知列: {name}")
+            if isinstance(cond, tuple):
+                lo, hi = cond
+            else:
+                lo = hi = cond
+            if self.columns[name] == DICT_TYPE:
+                if lo != hi:
+                    raise ValueError(f"字符串列 {name} 只支持等值条件")
+                try:
+                    lo = hi = self.dictionaries.get(name, []).index(lo)
+                except ValueError:
+                    return None
+            bounds[name] = (lo, hi)
+        return bounds
+
+    def scan(self, columns: Optional[list[str]] = None,
+             where: Optional[dict[str, Condition]] = None,
+             decode: bool = False) -> Iterator[dict[str, np.ndarray]]:
+        """
+        逐块返回投影后的列（只加载 columns 与 where 涉及的列）。
+
+        统计信息表明不可能满足条件的块直接跳过。decode=True 时字符串列
+        返回原值（object 数组），否则返回字典编码。
+        """
+        columns = list(columns) if columns is not None else list(self.columns)
+        bounds = self._normalize(where)
+        if bounds is None:
+            return
+        for chunk in self.meta["chunks"]:
+            stats = chunk["stats"]
+            if any((lo is not None and stats[n][1] < lo) or (hi is not None and stats[n][0] > hi)
+                   for n, (lo, hi) in bounds.items()):
+                continue
+            mask = None
+            for name, (lo, hi) in bounds.items():
+                values = self._load(chunk["id"], name)
+                cond = np.ones(len(values), dtype=bool)
+                if lo is not None:
+                    cond &= values >= lo
+                if hi is not None:
+                    cond &= values <= hi
+                mask = cond if mask is None else mask & cond
+            if mask is not None and not mask.any():
+                continue
+            out = {}
+            for name in columns:
+                values = self._load(chunk["id"], name)
+                if mask is not None:
+                    values = values[mask]
+                if decode and self.columns[name] == DICT_TYPE:
+                    values = self._dict_arrays[name][values]
+                out[name] = values
+            yield out
+
+    def read(self, columns: Optional[list[str]] = None,
+             where: Optional[dict[str, Condition]] = None,
+             decode: bool = True) -> dict[str, np.ndarray]:
+        """读取满足条件的全部行（投影列拼接为连续数组）。"""
+        columns = list(columns) if columns is not None else list(self.columns)
+        parts = list(self.scan(columns, where, decode))
+        if not parts:
+            return {name: np.zeros(0, dtype=self._result_dtype(name, decode)) for name in columns}
+        return {name: np.concatenate([p[name] for p in parts]) for name in columns}
+
+    def _result_dtype(self, name: str, decode: bool) -> np.dtype:
+        """read() 返回数组的类型（与非空结果一致）。"""
+        if name not in self.columns:
+            raise KeyError(f"未知列: {name}")
+        if decode and self.columns[name] == DICT_TYPE:
+            return np.dtype(object)
+        return _storage_dtype(self.columns[name])
+
+    def distinct(self, column: str) -> list:
+        """字符串列的全部取值（按首次写入的顺序）。"""
+        return list(self.dictionaries.get(column, []))
+
+    def best_by(self, keys: tuple[str, ...], score: str = "composite_score",
+                columns: Optional[list[str]] = None,
+                where: Optional[dict[str, Condition]] = None) -> dict[tuple, dict]:
+        """
+        逐块流式计算每个分组 (keys) 中 score 最高的一行，内存只与分组数有关。
+
+        返回 {分组键(原值): {列名: 值}}。
+        """
+        columns = list(dict.fromkeys(list(columns or RESULT_COLUMNS) + list(keys) + [score]))
+        best: dict[tuple, dict] = {}
+        for part in self.scan(columns, where):
+            inverses, dims = [], []
+            for k in keys:
+                uniques, inverse = np.unique(part[k], return_inverse=True)
+                inverses.append(inverse.reshape(-1))
+                dims.append(len(uniques))
+            group = np.ravel_multi_index(inverses, dims) if keys else np.zeros(len(part[score]), int)
+            order = np.lexsort((-part[score], group))
+            grouped = group[order]
+            winners = order[np.r_[True, grouped[1:] != grouped[:-1]]] if len(order) else order
+            for row in winners:
+                key = tuple(self._decode(k, part[k][row]) for k in keys)
+                if key not in best or part[score][row] > best[key][score]:
+                    best[key] = {name: self._decode(name, part[name][row]) for name in columns}
+        return best
+
+    def _decode(self, name: str, value):
+        if self.columns[name] == DICT_TYPE:
+            return self.dictionaries[name][int(value)]
+        return value.item() if hasattr(value, "item") else value
+
+    def to_results(self, rows: dict[str, np.ndarray]) -> list[SimulationResult]:
+        """把 read() 的结果还原为 SimulationResult（未读取的字段取默认值）。"""
+        n = len(next(iter(rows.values()))) if rows else 0
+        results = []
+        for i in range(n):
+            kwargs = {name: rows[name][i].item() if hasattr(rows[name][i], "item") else rows[name][i]
+                      for name in RESULT_COLUMNS if name in rows}
+            results.append(SimulationResult(strategy_name=str(rows["strategy"][i]), **kwargs))
+        return results
+
+    def phase_results(self, columns: Optional[list[str]] = None) -> dict[str, list[SimulationResult]]:
+        """
+        按 (phase, strategy) 取综合得分最高的一行，还原为
+        generate_report 使用的 {阶段: 结果列表}（按综合得分降序）。
+        """
+        best = self.best_by(("phase", "strategy"), "composite_score", columns)
+        all_results: dict[str, list[SimulationResult]] = {p: [] for p in self.distinct("phase")}
+        for (phase, _), row in best.items():
+            rows = {name: np.array([value], dtype=object) for name, value in row.items()}
+            all_results[phase].extend(self.to_results(rows))
+        for results in all_results.values():
+            results.sort(key=lambda r: r.composite_score, reverse=True)
+        return all_results
+
+    def summary(self) -> str:
+        size = sum(os.path.getsize(os.path.join(root, f))
+                   for root, _, files in os.walk(self.path) for f in files)
+        lines = [f"{self.path}: {len(self)} 行 / {self.num_chunks} 块 / "
+                 f"{size / 1024:.1f} KiB ({self.meta['codec']})"]
+        for name, dtype in self.columns.items():
+            extra = f" ({len(self.dictionaries.get(name, []))} 个取值)" if dtype == DICT_TYPE else ""
+            lines.append(f"  {name:24s} {dtype}{extra}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    print(ResultStore(sys.argv[1]).summary())
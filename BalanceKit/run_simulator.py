@@ -0,0 +1,341 @@
+"""
+=============================================================================
+Project Harmony — 肉鸽对局蒙特卡洛模拟 (Monte Carlo Run Simulator)
+=============================================================================
+
+generate_report.py 只评估三个手工搭配的阶段Build，而真实对局中
+Build 是在每层随机出现的升级选项里一步步选出来的。本模块模拟整局流程：
+
+    1. 每层按稀有度权重抽取若干升级选项（已满级的升级不再出现）
+    2. 由选择策略挑选其中一个（需要目标音符的升级同时选定音符），
+       通过 PlayerBuild.apply_in_game_upgrade 应用
+    3. 每层用 StrategySimulator 对策略库跑分，记录当层最强策略的
+       综合得分与有效DPS
+
+大量重复后得到战力曲线的分布（各层分位数）与升级选取频率。
+
+选择策略（可扩展，实现 choose() 即可）：
+    - greedy：  试加每个选项，取当前最强策略有效DPS最高者
+    - fatigue： 优先疲劳耐受，其次生存，其余随机
+    - random：  均匀随机
+
+可复现性：第 i 局的随机数流由 SeedSequence(seed, spawn_key=(i,)) 派生，
+与进程数、分块方式无关。
+
+用法：
+    python3 BalanceKit/run_simulator.py [局数] [策略] [进程数] [种子]
+    python3 BalanceKit/run_simulator.py 100000 greedy 8 0
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from balance_scorer import (
+    PlayerBuild, BuildVariant, StrategySimulator, StrategyDefinition, ChordType, Upgrade,
+    UpgradeCategory, MetaProgressionManager,
+    create_chord_registry, create_strategy_library, create_upgrade_pool,
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_PATH = os.path.join(BASE_DIR, "Reports", "run_distribution.json")
+
+# 需要指定目标音符的升级效果键
+NOTE_TARGET_KEYS = {"dmg", "spd", "dur", "size"}
+
+# 稀有度 → 出现权重（1=普通, 2=稀有, 3=史诗, 4=传说）
+DEFAULT_RARITY_WEIGHTS = {1: 60.0, 2: 28.0, 3: 10.0, 4: 2.0}
+
+NOTES = ("C", "D", "E", "F", "G", "A", "B")
+
+
+# =============================================================================
+# 第一部分：对局配置与状态
+# =============================================================================
+
+@dataclass
+class RunConfig:
+    """一局的规则参数。"""
+    floors: int = 12
+    offers_per_floor: int = 3
+    rarity_weights: dict[int, float] = field(default_factory=lambda: dict(DEFAULT_RARITY_WEIGHTS))
+    use_meta: bool = False
+
+
+@dataclass
+class RunState:
+    """对局进行中的状态，传给选择策略。"""
+    build: PlayerBuild
+    levels: dict[str, int]
+    best_strategy: StrategyDefinition
+    floor: int
+
+
+def needs_target_note(upgrade: Upgrade) -> bool:
+    return bool(NOTE_TARGET_KEYS & upgrade.effect_per_level.keys())
+
+
+def strategy_notes(strategy: StrategyDefinition) -> list[str]:
+    """策略中出现过的音符，按使用次数降序。"""
+    counts = Counter(a.note for a in strategy.actions if not a.is_rest)
+    return [n for n, _ in counts.most_common()]
+
+
+def draw_offers(pool: list[Upgrade], levels: dict[str, int], config: RunConfig,
+                rng: np.random.Generator) -> list[Upgrade]:
+    """按稀有度权重无放回抽取本层的升级选项。"""
+    available = [u for u in pool if levels.get(u.id, 0) < u.max_level]
+    if not available:
+        return []
+    weights = np.array([config.rarity_weights.get(u.rarity, 0.0) for u in available])
+    if weights.sum() <= 0:
+        return []
+    k = min(config.offers_per_floor, int(np.count_nonzero(weights)))
+    idx = rng.choice(len(available), size=k, replace=False, p=weights / weights.sum())
+    return [available[i] for i in idx]
+
+
+# =============================================================================
+# 第二部分：选择策略
+# =============================================================================
+
+class PickPolicy:
+    """升级选择策略基类：从选项中返回 (升级, 目标音符或 None)。"""
+    name = "base"
+
+    def choose(self, offers: list[Upgrade], state: RunState, rng: np.random.Generator,
+               chords: dict[str, ChordType]) -> tuple[Upgrade, Optional[str]]:
+        raise NotImplementedError
+
+
+class RandomPolicy(PickPolicy):
+    """均匀随机选择升级与目标音符。"""
+    name = "random"
+
+    def choose(self, offers, state, rng, chords):
+        upgrade = offers[int(rng.integers(len(offers)))]
+        note = NOTES[int(rng.integers(len(NOTES)))] if needs_target_note(upgrade) else None
+        return upgrade, note
+
+
+class GreedyDpsPolicy(PickPolicy):
+    """
+    贪心DPS：把每个选项（及每个候选目标音符）试加到 Build 上，
+    用当前最强策略模拟，选有效DPS最高者。
+
+    候选目标音符限定为当前最强策略实际使用的音符。
+    """
+    name = "greedy"
+
+    def choose(self, offers, state, rng, chords):
+        strategy = state.best_strategy
+        targets = strategy_notes(strategy) or list(NOTES)
+        best, best_dps = None, -1.0
+        for upgrade in offers:
+            for note in (targets if needs_target_note(upgrade) else [None]):
+                trial = BuildVariant(state.build).with_upgrade(upgrade, 1, note).materialize()
+                dps = StrategySimulator(trial, chords, log_beats=False).simulate(strategy).effective_dps
+                if dps > best_dps:
+                    best, best_dps = (upgrade, note), dps
+        return best
+
+
+class FatigueFocusedPolicy(PickPolicy):
+    """疲劳优先：疲劳耐受 > 生存 > 其他；同类随机，音符选当前最强策略的主力音符。"""
+    name = "fatigue"
+
+    PRIORITY = {UpgradeCategory.FATIGUE_TOLERANCE: 0, UpgradeCategory.SURVIVAL: 1}
+
+    def choose(self, offers, state, rng, chords):
+        rank = min(self.PRIORITY.get(u.category, 2) for u in offers)
+        candidates = [u for u in offers if self.PRIORITY.get(u.category, 2) == rank]
+        upgrade = candidates[int(rng.integers(len(candidates)))]
+        note = None
+        if needs_target_note(upgrade):
+            note = (strategy_notes(state.best_strategy) or list(NOTES))[0]
+        return upgrade, note
+
+
+POLICIES = {p.name: p for p in (GreedyDpsPolicy, FatigueFocusedPolicy, RandomPolicy)}
+
+
+# =============================================================================
+# 第三部分：单局模拟
+# =============================================================================
+
+@dataclass
+class RunRecord:
+    """一局的战力曲线（下标 0 为开局，1..floors 为每层选完升级后）。"""
+    scores: np.ndarray
+    dps: np.ndarray
+    picks: list[str]
+
+
+def benchmark(build: PlayerBuild, chords: dict[str, ChordType],
+              strategies: list[StrategyDefinition]) -> tuple[float, float, StrategyDefinition]:
+    """对策略库跑分，返回 (最高综合得分, 该策略有效DPS, 该策略)。"""
+    simulator = StrategySimulator(build, chords, log_beats=False)
+    best = None
+    for strategy in strategies:
+        result = simulator.simulate(strategy)
+        if best is None or result.composite_score > best[0]:
+            best = (result.composite_score, result.effective_dps, strategy)
+    return best
+
+
+def simulate_run(rng: np.random.Generator, policy: PickPolicy, config: RunConfig,
+                 pool: list[Upgrade], chords: dict[str, ChordType],
+                 strategies: list[StrategyDefinition],
+                 meta_manager: Optional[MetaProgressionManager] = None) -> RunRecord:
+    """模拟一整局。"""
+    build = PlayerBuild()
+    if meta_manager is not None:
+        build.apply_meta_upgrades(meta_manager)
+    levels: dict[str, int] = {}
+    scores = np.zeros(config.floors + 1)
+    dps = np.zeros(config.floors + 1)
+    picks = []
+
+    scores[0], dps[0], best = benchmark(build, chords, strategies)
+    for floor in range(1, config.floors + 1):
+        offers = draw_offers(pool, levels, config, rng)
+        if offers:
+            state = RunState(build, levels, best, floor)
+            upgrade, note = policy.choose(offers, state, rng, chords)
+            build.apply_in_game_upgrade(upgrade, 1, note)
+            levels[upgrade.id] = levels.get(upgrade.id, 0) + 1
+            picks.append(upgrade.id)
+        scores[floor], dps[floor], best = benchmark(build, chords, strategies)
+    return RunRecord(scores, dps, picks)
+
+
+def run_rng(seed: int, index: int) -> np.random.Generator:
+    """第 index 局的独立随机数流（与并行方式无关）。"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+# =============================================================================
+# 第四部分：批量并行与统计
+# =============================================================================
+
+def _simulate_batch(start: int, stop: int, seed: int, policy_name: str,
+                    config: RunConfig) -> tuple[np.ndarray, np.ndarray, Counter]:
+    """模拟 [start, stop) 号对局（进程池任务）。"""
+    policy = POLICIES[policy_name]()
+    pool = create_upgrade_pool()
+    chords = create_chord_registry()
+    strategies = create_strategy_library()
+    meta = MetaProgressionManager() if config.use_meta else None
+    scores = np.zeros((stop - start, config.floors + 1), dtype=np.float32)
+    dps = np.zeros_like(scores)
+    picks = Counter()
+    for row, index in enumerate(range(start, stop)):
+        record = simulate_run(run_rng(seed, index), policy, config, pool,
+                              chords, strategies, meta)
+        scores[row], dps[row] = record.scores, record.dps
+        picks.update(record.picks)
+    return scores, dps, picks
+
+
+@dataclass
+class PowerCurveDistribution:
+    """多局模拟的战力曲线分布。"""
+    policy: str
+    runs: int
+    scores: np.ndarray   # (局数 × 层数+1)
+    dps: np.ndarray
+    pick_counts: Counter
+
+    PERCENTILES = (5, 25, 50, 75, 95)
+
+    def percentiles(self, which: str = "scores") -> dict[int, np.ndarray]:
+        data = getattr(self, which)
+        return {p: np.percentile(data, p, axis=0) for p in self.PERCENTILES}
+
+    def to_dict(self) -> dict:
+        def curve(which):
+            return {f"p{p}": [round(float(x), 3) for x in v]
+                    for p, v in self.percentiles(which).items()} | {
+                "mean": [round(float(x), 3) for x in getattr(self, which).mean(axis=0)]}
+        total = sum(self.pick_counts.values()) or 1
+        return {
+            "policy": self.policy,
+            "runs": self.runs,
+            "composite_score": curve("scores"),
+            "effective_dps": curve("dps"),
+            "pick_rate": {k: round(v / total, 4) for k, v in self.pick_counts.most_common()},
+        }
+
+
+def simulate_runs(runs: int, policy: str = "greedy", config: Optional[RunConfig] = None,
+                  workers: int = 1, seed: int = 0, chunk_size: int = 250) -> PowerCurveDistribution:
+    """模拟 runs 局；workers > 1 时多进程并行，结果与 workers 取值无关。"""
+    if policy not in POLICIES:
+        raise ValueError(f"未知选择策略: {policy}（可选: {', '.join(POLICIES)}）")
+    config = config if config is not None else RunConfig()
+    chunks = [(s, min(s + chunk_size, runs)) for s in range(0, runs, chunk_size)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_simulate_batch, s, e, seed, policy, config) for s, e in chunks]
+            parts = [f.result() for f in futures]
+    else:
+        parts = [_simulate_batch(s, e, seed, policy, config) for s, e in chunks]
+
+    picks = Counter()
+    for _, _, c in parts:
+        picks.update(c)
+    return PowerCurveDistribution(
+        policy=policy,
+        runs=runs,
+        scores=np.vstack([p[0] for p in parts]),
+        dps=np.vstack([p[1] for p in parts]),
+        pick_counts=picks,
+    )
+
+
+def print_distribution_report(dist: PowerCurveDistribution, top_picks: int = 8):
+    """打印战力曲线分位数表与最常选取的升级。"""
+    pct = dist.percentiles("scores")
+    print(f"\n{'=' * 90}")
+    print(f"  对局模拟：{dist.runs} 局 | 选择策略 {dist.policy}")
+    print(f"{'=' * 90}")
+    header = " | ".join(f"{f'P{p}':>7s}" for p in dist.PERCENTILES)
+    print(f"  {'层':>4s} | {header} | {'均值':>7s}")
+    print(f"  {'-' * 70}")
+    mean = dist.scores.mean(axis=0)
+    for floor in range(dist.scores.shape[1]):
+        row = " | ".join(f"{pct[p][floor]:7.2f}" for p in dist.PERCENTILES)
+        print(f"  {floor:4d} | {row} | {mean[floor]:7.2f}")
+    total = sum(dist.pick_counts.values()) or 1
+    print(f"\n  最常选取的升级：")
+    for upgrade_id, count in dist.pick_counts.most_common(top_picks):
+        print(f"    {upgrade_id:26s} {count / total:6.1%}")
+    print(f"{'=' * 90}\n")
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    policy = sys.argv[2] if len(sys.argv) > 2 else "greedy"
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+
+    start = time.perf_counter()
+    dist = simulate_runs(runs, policy, workers=workers, seed=seed)
+    print_distribution_report(dist)
+
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(dist.to_dict(), f, ensure_ascii=False, indent=2)
+    print(f"  分布已保存: {REPORT_PATH}（耗时 {time.perf_counter() - start:.1f}s）")
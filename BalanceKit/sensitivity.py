@@ -0,0 +1,667 @@
+"""
+=============================================================================
+Project Harmony — 参数敏感性分析 (Sensitivity Analysis)
+=============================================================================
+
+StrategySimulator 的数十个类常量（单调值增量、密度窗口、延迟惩罚、
+阈值阶梯、AFI放大系数……）以及音符/和弦数值，到底哪些会改变策略排名？
+
+本模块用准随机设计对这些参数联合采样，批量跑分后计算 Sobol 指数：
+    - S1 (一阶指数)：该参数单独造成的输出方差占比
+    - ST (总效应指数)：该参数及其全部交互项造成的方差占比
+输出指标：
+    - 每个策略的 composite_score
+    - 排名稳定性：与基准排名的 Kendall τ
+
+采样：
+    - sobol：Sobol 低差异序列（数字随机平移）
+    - lhs：  拉丁超立方
+两者都用于生成 Saltelli 设计矩阵 A、B、AB_i，共 N × (d + 2) 次跑分。
+
+大规模扫描（10万量级样本）：
+    - 多进程并行，按块分发
+    - 设计矩阵按块惰性生成，不在内存中展开 N × (d + 2) 行
+    - 检查点：得分逐块写入内存映射的 .npy，完成标记定期保存；中断后以相同配置
+      （含 Build 与和弦数值）重新运行即可续跑
+
+用法：
+    python3 BalanceKit/sensitivity.py [N] [sobol|lhs] [进程数] [参数组,...]
+    python3 BalanceKit/sensitivity.py 256 sobol 4 constants,notes
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import copy
+import json
+import inspect
+import time
+import hashlib
+import dataclasses
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from balance_scorer import (
+    PlayerBuild, StrategySimulator, StrategyDefinition, ChordType,
+    create_chord_registry, create_strategy_library,
+)
+from sim_cache import build_fingerprint, chord_registry_fingerprint, strategy_fingerprint
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_DIR = os.path.join(BASE_DIR, ".sim_cache", "sensitivity")
+REPORT_PATH = os.path.join(BASE_DIR, "Reports", "sensitivity_indices.json")
+
+# 模拟器实际读取的和弦字段（base_dissonance 与 explosion_* 不参与模拟）
+SIMULATED_CHORD_FIELDS = (
+    "dmg_multiplier", "fatigue_dissonance", "dot_total_ratio", "aoe_radius_mult",
+    "delay_beats", "heal_ratio", "shield_ratio", "summon_duration_mult",
+    "summon_dps_ratio", "zone_duration_mult", "zone_tick_ratio",
+)
+
+NOTE_FIELDS = ("base_dmg", "base_spd", "base_dur", "base_size")
+
+PARAMETER_GROUPS = ("constants", "tables", "notes", "chords")
+
+
+# =============================================================================
+# 第一部分：参数空间
+# =============================================================================
+
+@dataclass(frozen=True)
+class Parameter:
+    """
+    一个可采样参数。
+
+    group 决定写入位置：
+        constants → 模拟器常量 (target = 常量名)
+        tables    → AFI_AMPLIFIERS / MODIFIER_MULTIPLIERS 的一项 (target = 表名, key)
+        notes     → 音符基础值 (target = 音符, 字段)
+        chords    → 和弦字段 (target = 和弦, 字段)
+    """
+    name: str
+    group: str
+    target: tuple
+    baseline: float
+    low: float
+    high: float
+
+
+class ParameterSpace:
+    """参数集合，负责把 [0,1) 单位样本映射为参数值并构造模拟器。"""
+
+    def __init__(self, parameters: list[Parameter]):
+        self.parameters = parameters
+        self.low = np.array([p.low for p in parameters])
+        self.high = np.array([p.high for p in parameters])
+
+    def __len__(self) -> int:
+        return len(self.parameters)
+
+    @property
+    def names(self) -> list[str]:
+        return [p.name for p in self.parameters]
+
+    def scale(self, unit: np.ndarray) -> np.ndarray:
+        """把 [0,1) 样本线性映射到各参数的取值区间。"""
+        return self.low + unit * (self.high - self.low)
+
+    def make_simulator(self, values, build: PlayerBuild,
+                       chords: dict[str, ChordType]) -> StrategySimulator:
+        """
+        用一组参数值构造模拟器。
+
+        build 与 chords 不会被修改：音符与和弦按需复制，常量写在模拟器实例上。
+        """
+        note_fields: dict[str, dict[str, float]] = {}
+        chord_fields: dict[str, dict[str, float]] = {}
+        constants: dict[str, float] = {}
+        tables: dict[str, dict] = {}
+
+        for p, value in zip(self.parameters, values):
+            value = float(value)
+            if p.group == "constants":
+                constants[p.target[0]] = value
+            elif p.group == "tables":
+                table, key = p.target
+                if table not in tables:
+                    tables[table] = dict(getattr(StrategySimulator, table))
+                tables[table][key] = value
+            elif p.group == "notes":
+                note, attr = p.target
+                note_fields.setdefault(note, {})[attr] = value
+            else:
+                chord, attr = p.target
+                chord_fields.setdefault(chord, {})[attr] = value
+
+        if note_fields:
+            build = copy.copy(build)
+            build.notes = dict(build.notes)
+            for note, fields in note_fields.items():
+                build.notes[note] = dataclasses.replace(build.notes[note], **fields)
+        if chord_fields:
+            chords = dict(chords)
+            for chord, fields in chord_fields.items():
+                chords[chord] = dataclasses.replace(chords[chord], **fields)
+
+        simulator = StrategySimulator(build, chords, log_beats=False)
+        for name, value in constants.items():
+            setattr(simulator, name, value)
+        for name, table in tables.items():
+            setattr(simulator, name, table)
+        return simulator
+
+
+def simulated_constants(simulator_cls: type = StrategySimulator) -> set[str]:
+    """
+    模拟器方法中实际读取（self.常量名）的类常量。
+
+    REST_THRESHOLD、SUSTAINED_START 等留白/持续压力常量只出现在类定义里，
+    模拟不读取，采样它们只会多出 N 次跑分与纯噪声的指数。
+    """
+    return set(re.findall(r"\bself\.([A-Z][A-Z0-9_]*)\b", inspect.getsource(simulator_cls)))
+
+
+def default_parameter_space(spread: float = 0.25,
+                            groups: tuple[str, ...] = PARAMETER_GROUPS,
+                            chords: Optional[dict[str, ChordType]] = None,
+                            build: Optional[PlayerBuild] = None) -> ParameterSpace:
+    """
+    默认参数空间：每个参数在基准值 ±spread 的相对区间内变化。
+
+    基准值为 0 的和弦字段（该和弦没有这种效果）与模拟不读取的常量不参与采样。
+    """
+    chords = chords if chords is not None else create_chord_registry()
+    build = build if build is not None else PlayerBuild()
+    params = []
+    read = simulated_constants()
+
+    def add(name, group, target, baseline):
+        lo, hi = baseline * (1 - spread), baseline * (1 + spread)
+        params.append(Parameter(name, group, target, float(baseline), min(lo, hi), max(lo, hi)))
+
+    if "constants" in groups:
+        for name in sorted(dir(StrategySimulator)):
+            value = getattr(StrategySimulator, name)
+            if name in read and isinstance(value, (int, float)) and not isinstance(value, bool):
+                add(name, "constants", (name,), value)
+    if "tables" in groups:
+        for table in ("AFI_AMPLIFIERS", "MODIFIER_MULTIPLIERS"):
+            for key, value in getattr(StrategySimulator, table).items():
+                add(f"{table}[{key}]", "tables", (table, key), value)
+    if "notes" in groups:
+        for note_name, note in build.notes.items():
+            for attr in NOTE_FIELDS:
+                add(f"{note_name}.{attr}", "notes", (note_name, attr), getattr(note, attr))
+    if "chords" in groups:
+        for chord_name, chord in chords.items():
+            for attr in SIMULATED_CHORD_FIELDS:
+                value = getattr(chord, attr)
+                if value:
+                    add(f"{chord_name}.{attr}", "chords", (chord_name, attr), value)
+    return ParameterSpace(params)
+
+
+# =============================================================================
+# 第二部分：准随机采样
+# =============================================================================
+
+SOBOL_BITS = 30
+
+
+def _primitive_polynomials(count: int) -> list[tuple[int, int]]:
+    """
+    按次数从低到高枚举 GF(2) 上的本原多项式，返回 (次数, 多项式位串)。
+
+    判定：x 在 GF(2)[x]/p 中的阶恰为 2^s - 1。
+    """
+    def mulmod(a, b, poly, degree):
+        result = 0
+        while b:
+            if b & 1:
+                result ^= a
+            b >>= 1
+            a <<= 1
+            if a >> degree & 1:
+                a ^= poly
+        return result
+
+    def powmod(exp, poly, degree):
+        result, base = 1, mulmod(0b10, 1, poly, degree)
+        while exp:
+            if exp & 1:
+                result = mulmod(result, base, poly, degree)
+            base = mulmod(base, base, poly, degree)
+            exp >>= 1
+        return result
+
+    def prime_factors(n):
+        factors, d = set(), 2
+        while d * d <= n:
+            while n % d == 0:
+                factors.add(d)
+                n //= d
+            d += 1
+        if n > 1:
+            factors.add(n)
+        return factors
+
+    found = []
+    degree = 1
+    while len(found) < count:
+        order = (1 << degree) - 1
+        factors = prime_factors(order)
+        for poly in range(1 << degree | 1, 1 << (degree + 1), 2):
+            if powmod(order, poly, degree) != 1:
+                continue
+            if all(powmod(order // q, poly, degree) != 1 for q in factors):
+                found.append((degree, poly))
+                if len(found) == count:
+                    break
+        degree += 1
+    return found
+
+
+def sobol_directions(dims: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    dims 维 Sobol 序列的方向数 (dims × SOBOL_BITS) 与随机数字平移 (dims,)。
+
+    第 1 维使用单位方向数；其余各维依次使用本原多项式，初始方向数
+    m_k（奇数，m_k < 2^k）由 seed 确定。
+    """
+    rng = np.random.default_rng(seed)
+    bits = SOBOL_BITS
+    directions = np.zeros((dims, bits), dtype=np.int64)
+    directions[0] = [1 << (bits - 1 - k) for k in range(bits)]
+    for d, (degree, poly) in enumerate(_primitive_polynomials(dims - 1), start=1):
+        m = [int(rng.integers(0, 1 << k)) * 2 + 1 for k in range(degree)]
+        v = [m[k] << (bits - 1 - k) for k in range(min(degree, bits))]
+        for k in range(degree, bits):
+            value = v[k - degree] ^ (v[k - degree] >> degree)
+            for i in range(1, degree):
+                if poly >> (degree - i) & 1:
+                    value ^= v[k - i]
+            v.append(value)
+        directions[d] = v[:bits]
+    shift = rng.integers(0, 1 << bits, size=dims, dtype=np.int64)
+    return directions, shift
+
+
+def sobol_points(index: np.ndarray, directions: np.ndarray, shift: np.ndarray) -> np.ndarray:
+    """Sobol 序列中第 index 个点（任意下标，不必连续），值域 [0,1)。"""
+    index = np.asarray(index, dtype=np.int64)
+    gray = index ^ (index >> 1)
+    points = np.zeros((len(index), len(directions)), dtype=np.int64)
+    for k in range(SOBOL_BITS):
+        if not (gray >> k).any():
+            break
+        bit = (gray >> k) & 1
+        points ^= bit[:, None] * directions[:, k][None, :]
+    return (points ^ shift) / float(1 << SOBOL_BITS)
+
+
+def sobol_sample(n: int, dims: int, seed: int = 0) -> np.ndarray:
+    """
+    n 个 dims 维的 Sobol 点，值域 [0,1)。
+
+    施加随机数字平移 (XOR)，保持序列的 (t,s) 网格性质。
+    """
+    if n > 1 << SOBOL_BITS:
+        raise ValueError(f"Sobol 点数不能超过 2^{SOBOL_BITS}")
+    return sobol_points(np.arange(n), *sobol_directions(dims, seed))
+
+
+def latin_hypercube(n: int, dims: int, seed: int = 0) -> np.ndarray:
+    """n 个 dims 维的拉丁超立方样本：每维 n 个等宽分层各取一点。"""
+    rng = np.random.default_rng(seed)
+    strata = np.argsort(rng.random((n, dims)), axis=0)
+    return (strata + rng.random((n, dims))) / n
+
+
+SAMPLERS = {"sobol": sobol_sample, "lhs": latin_hypercube}
+
+
+class SaltelliDesign:
+    """
+    Saltelli 设计矩阵的惰性视图，共 n × (d + 2) 行、d 列。
+
+    行布局：[A; B; AB_1; …; AB_d]，AB_i 为 A 的第 i 列替换为 B 的第 i 列。
+    rows(lo, hi) 只生成所需的行：sobol 按下标直接计算基础样本 [A | B] 的对应点，
+    内存只与块大小有关；lhs 的分层需要全体样本，保留 n × 2d 的基础样本
+    （仍只是完整设计矩阵的 2/(d+2)）。
+    """
+
+    def __init__(self, space: ParameterSpace, n: int, sampler: str = "sobol", seed: int = 0):
+        if sampler not in SAMPLERS:
+            raise ValueError(f"未知的采样方法: {sampler}")
+        if sampler == "sobol" and n > 1 << SOBOL_BITS:
+            raise ValueError(f"Sobol 点数不能超过 2^{SOBOL_BITS}")
+        self.space = space
+        self.n = n
+        self.d = len(space)
+        self._sobol = sobol_directions(2 * self.d, seed) if sampler == "sobol" else None
+        self._base = latin_hypercube(n, 2 * self.d, seed) if sampler == "lhs" else None
+
+    def __len__(self) -> int:
+        return self.n * (self.d + 2)
+
+    def _unit_base(self, index: np.ndarray) -> np.ndarray:
+        if self._sobol is not None:
+            return sobol_points(index, *self._sobol)
+        return self._base[index]
+
+    def rows(self, lo: int, hi: int) -> np.ndarray:
+        """第 lo ~ hi-1 行（已映射到参数取值区间）。"""
+        r = np.arange(lo, hi)
+        block, index = np.divmod(r, self.n)
+        base = self._unit_base(index)
+        rows = base[:, :self.d].copy()
+        b = base[:, self.d:]
+        is_b = block == 1
+        rows[is_b] = b[is_b]
+        ab = np.flatnonzero(block >= 2)
+        column = block[ab] - 2
+        rows[ab, column] = b[ab, column]
+        return self.space.scale(rows)
+
+
+def saltelli_design(space: ParameterSpace, n: int, sampler: str = "sobol",
+                    seed: int = 0) -> np.ndarray:
+    """完整的 Saltelli 设计矩阵，形状 (n × (d + 2), d)（小规模分析用；大规模扫描见 SaltelliDesign）。"""
+    design = SaltelliDesign(space, n, sampler, seed)
+    return design.rows(0, len(design))
+
+
+# =============================================================================
+# 第三部分：批量跑分（并行 + 检查点）
+# =============================================================================
+
+_worker_context: dict = {}
+
+
+def _worker_init(space, build, chords, strategies, design):
+    _worker_context.update(space=space, build=build, chords=chords, strategies=strategies,
+                           design=design)
+
+
+def _worker_evaluate(lo: int, hi: int) -> np.ndarray:
+    context = dict(_worker_context)
+    rows = context.pop("design").rows(lo, hi)
+    return evaluate_rows(rows, **context)
+
+
+def evaluate_rows(rows: np.ndarray, space: ParameterSpace, build: PlayerBuild,
+                  chords: dict[str, ChordType],
+                  strategies: list[StrategyDefinition]) -> np.ndarray:
+    """对每行参数值跑一遍策略库，返回 (行数 × 策略数) 的 composite_score 矩阵。"""
+    out = np.empty((len(rows), len(strategies)))
+    for r, values in enumerate(rows):
+        simulator = space.make_simulator(values, build, chords)
+        for s, strategy in enumerate(strategies):
+            out[r, s] = simulator.simulate(strategy).composite_score
+    return out
+
+
+@dataclass
+class SweepConfig:
+    """一次扫描的配置（决定设计矩阵与检查点文件）。"""
+    n: int = 256
+    sampler: str = "sobol"
+    seed: int = 0
+    spread: float = 0.25
+    groups: tuple[str, ...] = PARAMETER_GROUPS
+    workers: int = 1
+    chunk_size: int = 256
+    checkpoint_every: float = 30.0   # 秒
+
+    def fingerprint(self, space: ParameterSpace, strategies: list[StrategyDefinition],
+                    build: PlayerBuild, chords: dict[str, ChordType]) -> str:
+        """检查点指纹：设计参数 + 参数空间 + 策略动作序列 + Build（含升级状态）与和弦注册表。"""
+        payload = (self.n, self.sampler, self.seed, self.chunk_size,
+                   tuple((p.name, p.low, p.high) for p in space.parameters),
+                   tuple(strategy_fingerprint(s) for s in strategies),
+                   build_fingerprint(build), chord_registry_fingerprint(chords))
+        return hashlib.blake2b(repr(payload).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class Checkpoint:
+    """
+    扫描检查点：<指纹>.outputs.npy 为得分矩阵的内存映射文件，块完成时直接写入对应行；
+    <指纹>.done.npy 为各块的完成标记。定期保存时只刷新映射文件并重写完成标记
+    （每块 1 字节），不再整体重写得分矩阵；先刷新得分、后写标记，
+    中断时最多重算上次保存之后完成的块。
+    """
+
+    def __init__(self, directory: str, fingerprint: str, shape: tuple, chunks: int):
+        os.makedirs(directory, exist_ok=True)
+        self.outputs_path = os.path.join(directory, f"{fingerprint}.outputs.npy")
+        self.done_path = os.path.join(directory, f"{fingerprint}.done.npy")
+        self.outputs, self.done = None, np.zeros(chunks, dtype=bool)
+        try:
+            outputs = np.load(self.outputs_path, mmap_mode="r+")
+            done = np.load(self.done_path)
+            if outputs.shape == shape and done.shape == (chunks,):
+                self.outputs, self.done = outputs, done.astype(bool)
+        except (OSError, ValueError):
+            pass
+        if self.outputs is None:
+            self.outputs = np.lib.format.open_memmap(self.outputs_path, mode="w+",
+                                                     dtype=np.float64, shape=shape)
+
+    def save(self):
+        self.outputs.flush()
+        tmp = f"{self.done_path}.tmp.npy"
+        np.save(tmp, self.done)
+        os.replace(tmp, self.done_path)
+
+
+def run_sweep(space: ParameterSpace, config: SweepConfig,
+              build: Optional[PlayerBuild] = None,
+              chords: Optional[dict[str, ChordType]] = None,
+              strategies: Optional[list[StrategyDefinition]] = None,
+              checkpoint_dir: Optional[str] = CHECKPOINT_DIR,
+              progress: bool = True) -> np.ndarray:
+    """
+    对 Saltelli 设计矩阵的每一行跑分，返回 (n × (d + 2), 策略数) 的得分矩阵。
+
+    设计矩阵按块惰性生成。checkpoint_dir 不为 None 时，得分写入
+    <checkpoint_dir>/<配置指纹>.outputs.npy（返回值即该文件的内存映射），
+    以相同配置再次调用会跳过已完成的块。
+    """
+    build = build if build is not None else PlayerBuild()
+    chords = chords if chords is not None else create_chord_registry()
+    strategies = strategies if strategies is not None else create_strategy_library()
+
+    design = SaltelliDesign(space, config.n, config.sampler, config.seed)
+    chunks = [(start, min(start + config.chunk_size, len(design)))
+              for start in range(0, len(design), config.chunk_size)]
+    shape = (len(design), len(strategies))
+
+    checkpoint = None
+    if checkpoint_dir:
+        checkpoint = Checkpoint(checkpoint_dir, config.fingerprint(space, strategies, build, chords),
+                                shape, len(chunks))
+        outputs, done = checkpoint.outputs, checkpoint.done
+    else:
+        outputs, done = np.zeros(shape), np.zeros(len(chunks), dtype=bool)
+    pending = [i for i, finished in enumerate(done) if not finished]
+    if progress and len(pending) < len(chunks):
+        print(f"  从检查点恢复：{len(chunks) - len(pending)}/{len(chunks)} 块已完成")
+
+    start_time = last_save = time.perf_counter()
+
+    def record(i, block):
+        nonlocal last_save
+        lo, hi = chunks[i]
+        outputs[lo:hi] = block
+        done[i] = True
+        now = time.perf_counter()
+        if checkpoint and now - last_save >= config.checkpoint_every:
+            checkpoint.save()
+            last_save = now
+        if progress:
+            finished = int(done.sum())
+            print(f"\r  跑分进度 {finished}/{len(chunks)} 块 "
+                  f"({now - start_time:.0f}s)", end="", flush=True)
+
+    if config.workers > 1:
+        with ProcessPoolExecutor(max_workers=config.workers, initializer=_worker_init,
+                                 initargs=(space, build, chords, strategies, design)) as pool:
+            futures = {i: pool.submit(_worker_evaluate, *chunks[i]) for i in pending}
+            for i, future in futures.items():
+                record(i, future.result())
+    else:
+        for i in pending:
+            record(i, evaluate_rows(design.rows(*chunks[i]), space, build, chords, strategies))
+
+    if progress and pending:
+        print()
+    if checkpoint:
+        checkpoint.save()
+    return outputs
+
+
+# =============================================================================
+# 第四部分：Sobol 指数
+# =============================================================================
+
+def kendall_tau(scores: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """每行得分与参考得分之间的 Kendall τ（排名一致度，1 = 排名完全相同）。"""
+    i, j = np.triu_indices(scores.shape[1], k=1)
+    ref_sign = np.sign(reference[i] - reference[j])
+    row_sign = np.sign(scores[:, i] - scores[:, j])
+    return (row_sign * ref_sign).sum(axis=1) / len(i)
+
+
+def sobol_indices(y: np.ndarray, n: int, d: int, n_boot: int = 100,
+                  seed: int = 0) -> dict[str, np.ndarray]:
+    """
+    由 Saltelli 设计的输出向量计算各参数的 S1 / ST 及 95% 置信半宽。
+
+    估计量：S1 — Saltelli (2010)；ST — Jansen (1999)。
+    """
+    f_a, f_b = y[:n], y[n:2 * n]
+    f_ab = y[2 * n:].reshape(d, n)
+    rng = np.random.default_rng(seed)
+
+    def estimate(idx):
+        a, b, ab = f_a[idx], f_b[idx], f_ab[:, idx]
+        var = np.var(np.concatenate([a, b]))
+        if var <= 1e-12:
+            return np.zeros(d), np.zeros(d)
+        s1 = np.mean(b * (ab - a), axis=1) / var
+        st = 0.5 * np.mean((a - ab) ** 2, axis=1) / var
+        return s1, st
+
+    s1, st = estimate(np.arange(n))
+    boot = [estimate(rng.integers(0, n, n)) for _ in range(n_boot)]
+    s1_conf = 1.96 * np.std([b[0] for b in boot], axis=0)
+    st_conf = 1.96 * np.std([b[1] for b in boot], axis=0)
+    return {"S1": s1, "S1_conf": s1_conf, "ST": st, "ST_conf": st_conf}
+
+
+@dataclass
+class SensitivityReport:
+    """敏感性分析结果。"""
+    parameters: list[str]
+    strategies: list[str]
+    score_indices: dict[str, dict[str, np.ndarray]]   # 策略 → 指数
+    rank_indices: dict[str, np.ndarray]                # 排名稳定性 (Kendall τ) 的指数
+    mean_tau: float
+    top1_kept: float                                    # 榜首策略不变的样本比例
+    evaluations: int
+
+    def ranked(self, key: str = "ST") -> list[tuple[str, float, float, float]]:
+        """按排名稳定性指数排序：(参数, 排名ST, 平均得分ST, 最大得分ST)。"""
+        score_st = np.array([v[key] for v in self.score_indices.values()])
+        rows = [
+            (name, float(self.rank_indices[key][p]),
+             float(score_st[:, p].mean()), float(score_st[:, p].max()))
+            for p, name in enumerate(self.parameters)
+        ]
+        return sorted(rows, key=lambda r: (r[1], r[2]), reverse=True)
+
+    def to_dict(self) -> dict:
+        def pack(indices):
+            return {k: [round(float(x), 5) for x in v] for k, v in indices.items()}
+        return {
+            "parameters": self.parameters,
+            "evaluations": self.evaluations,
+            "mean_kendall_tau": round(self.mean_tau, 4),
+            "top1_kept_ratio": round(self.top1_kept, 4),
+            "rank_stability": pack(self.rank_indices),
+            "composite_score": {s: pack(v) for s, v in self.score_indices.items()},
+        }
+
+
+def analyze(space: ParameterSpace, config: SweepConfig, outputs: np.ndarray,
+            baseline_scores: np.ndarray, strategies: list[StrategyDefinition]) -> SensitivityReport:
+    """由得分矩阵计算 composite_score 与排名稳定性的 Sobol 指数。"""
+    n, d = config.n, len(space)
+    tau = kendall_tau(outputs, baseline_scores)
+    top1 = np.mean(outputs.argmax(axis=1) == baseline_scores.argmax())
+    return SensitivityReport(
+        parameters=space.names,
+        strategies=[s.name for s in strategies],
+        score_indices={s.name: sobol_indices(outputs[:, k], n, d)
+                       for k, s in enumerate(strategies)},
+        rank_indices=sobol_indices(tau, n, d),
+        mean_tau=float(tau.mean()),
+        top1_kept=float(top1),
+        evaluations=len(outputs),
+    )
+
+
+def run_sensitivity(config: Optional[SweepConfig] = None,
+                    build: Optional[PlayerBuild] = None,
+                    checkpoint_dir: Optional[str] = CHECKPOINT_DIR,
+                    progress: bool = True) -> SensitivityReport:
+    """完整流程：构造参数空间 → 采样 → 批量跑分 → 计算指数。"""
+    config = config if config is not None else SweepConfig()
+    build = build if build is not None else PlayerBuild()
+    chords = create_chord_registry()
+    strategies = create_strategy_library()
+    space = default_parameter_space(config.spread, config.groups, chords, build)
+
+    baseline_sim = StrategySimulator(build, chords, log_beats=False)
+    baseline = np.array([baseline_sim.simulate(s).composite_score for s in strategies])
+
+    outputs = run_sweep(space, config, build, chords, strategies, checkpoint_dir, progress)
+    return analyze(space, config, outputs, baseline, strategies)
+
+
+def print_sensitivity_report(report: SensitivityReport, top: int = 20):
+    """打印按排名稳定性总效应指数排序的参数表。"""
+    print(f"\n{'=' * 90}")
+    print(f"  参数敏感性分析（{len(report.parameters)} 个参数，{report.evaluations} 次跑分）")
+    print(f"  平均 Kendall τ = {report.mean_tau:.3f} | 榜首不变比例 = {report.top1_kept:.1%}")
+    print(f"{'=' * 90}")
+    print(f"  {'参数':36s} | {'排名 ST':>8s} | {'得分 ST(均)':>10s} | {'得分 ST(最大)':>12s}")
+    print(f"  {'-' * 84}")
+    for name, rank_st, mean_st, max_st in report.ranked()[:top]:
+        print(f"  {name:36s} | {rank_st:8.3f} | {mean_st:10.3f} | {max_st:12.3f}")
+    print(f"{'=' * 90}\n")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    sampler = sys.argv[2] if len(sys.argv) > 2 else "sobol"
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+    groups = tuple(sys.argv[4].split(",")) if len(sys.argv) > 4 else PARAMETER_GROUPS
+
+    config = SweepConfig(n=n, sampler=sampler, workers=workers, groups=groups)
+    start = time.perf_counter()
+    report = run_sensitivity(config)
+    print_sensitivity_report(report)
+
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+    print(f"  指数已保存: {REPORT_PATH}（耗时 {time.perf_counter() - start:.1f}s）")
@@ -0,0 +1,234 @@
+"""
+=============================================================================
+Project Harmony — 模拟结果缓存 (Simulation Cache)
+=============================================================================
+
+StrategySimulator.simulate 的结果只取决于四样输入：
+    1. PlayerBuild 的全部数值（音符基础值/加成 + 全局修正）
+    2. 策略的动作序列 (StrategyDefinition.actions)
+    3. 和弦注册表
+    4. 模拟器常量（类属性、得分权重、参数转换比率）
+另外模拟器的输出选项（log_beats / record_trace）决定结果里带哪些明细，
+命中率表（hit_table，见 spatial_encounter.py）替换距离命中率，二者也计入上下文。
+
+本模块对这四者分别计算内容指纹，组合成缓存键，缓存 SimulationResult：
+    - 内存层：LRU，进程内复用（同一次报告中重复的 Build × 策略）
+    - 磁盘层（可选）：按键分片存储的 pickle 文件，跨进程/跨次运行复用
+
+微调一个数值后重新生成报告时，只有指纹发生变化的 (Build, 策略) 组合
+会被重新模拟，其余全部命中缓存。
+
+注意：命中时返回的是缓存结果的浅拷贝（strategy_name 替换为当前策略名），
+beat_log / fatigue_trace 与缓存共享，调用方不应原地修改。
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import hashlib
+import dataclasses
+from collections import OrderedDict
+from typing import Optional
+
+import balance_scorer
+from balance_scorer import (
+    PlayerBuild, StrategyDefinition, SimulationResult, ChordType, StrategySimulator,
+)
+
+
+# 缓存格式版本：SimulationResult 结构或模拟逻辑变化时递增，使旧缓存全部失效
+CACHE_VERSION = 2
+
+# 模拟器读取的模块级参数转换比率
+UNIT_CONSTANTS = ("DMG_PER_POINT", "SPD_PER_POINT", "DUR_PER_POINT", "SIZE_PER_POINT")
+
+
+# =============================================================================
+# 第一部分：内容指纹
+# =============================================================================
+
+def _digest(payload) -> str:
+    return hashlib.blake2b(repr(payload).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def build_fingerprint(build: PlayerBuild) -> str:
+    """Build 指纹：所有音符的基础值与加成 + 全部全局修正字段。"""
+    notes = tuple(
+        (name, n.base_dmg, n.base_spd, n.base_dur, n.base_size,
+         n.bonus_dmg, n.bonus_spd, n.bonus_dur, n.bonus_size)
+        for name, n in sorted(build.notes.items())
+    )
+    scalars = []
+    for f in dataclasses.fields(build):
+        if f.name == "notes":
+            continue
+        value = getattr(build, f.name)
+        if isinstance(value, (set, frozenset)):
+            value = tuple(sorted(value))
+        scalars.append((f.name, value))
+    return _digest((notes, tuple(scalars)))
+
+
+def strategy_fingerprint(strategy: StrategyDefinition) -> str:
+    """策略指纹：只取动作序列（名称和描述不影响模拟结果）。"""
+    return _digest(tuple(
+        (a.note, a.is_chord, a.chord_type, a.is_rest, a.modifier)
+        for a in strategy.actions
+    ))
+
+
+def chord_registry_fingerprint(chords: dict[str, ChordType]) -> str:
+    """和弦注册表指纹：按名称排序后的全部字段。"""
+    return _digest(tuple(
+        (key, dataclasses.astuple(chord)) for key, chord in sorted(chords.items())
+    ))
+
+
+def simulator_fingerprint(simulator: StrategySimulator) -> str:
+    """模拟器指纹：全部大写类常量（含子类覆盖）+ 得分权重 + 参数转换比率。"""
+    cls = type(simulator)
+    constants = []
+    for name in sorted(dir(cls)):
+        if not name.isupper():
+            continue
+        value = getattr(simulator, name)
+        if isinstance(value, dict):
+            value = tuple(sorted(value.items()))
+        constants.append((name, value))
+    weights = (simulator.w_dps, simulator.w_survival, simulator.w_risk)
+    units = tuple(getattr(balance_scorer, name) for name in UNIT_CONSTANTS)
+    return _digest((tuple(constants), weights, units))
+
+
+def context_fingerprint(simulator: StrategySimulator,
+                        chords_fp: Optional[str] = None,
+                        simulator_fp: Optional[str] = None) -> str:
+    """
+    模拟上下文指纹（Build + 和弦注册表 + 模拟器常量），同一模拟器下所有策略共享。
+
+    批量评估大量 Build 时，和弦注册表与模拟器常量通常不变，
+    可预先计算 chords_fp / simulator_fp 传入，只对 Build 重新哈希。
+    """
+    return _digest((
+        CACHE_VERSION,
+        build_fingerprint(simulator.build),
+        chords_fp or chord_registry_fingerprint(simulator.chords),
+        simulator_fp or simulator_fingerprint(simulator),
+        (simulator.log_beats, simulator.record_trace),
+        simulator.hit_table.fingerprint if simulator.hit_table is not None else None,
+    ))
+
+
+def simulation_key(simulator: StrategySimulator, strategy: StrategyDefinition,
+                   context: Optional[str] = None) -> str:
+    """一次模拟的完整缓存键。"""
+    if context is None:
+        context = context_fingerprint(simulator)
+    return _digest((context, strategy_fingerprint(strategy)))
+
+
+# =============================================================================
+# 第二部分：两级缓存
+# =============================================================================
+
+@dataclasses.dataclass
+class CacheStats:
+    """缓存命中统计。"""
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.hits + self.disk_hits + self.misses
+
+    def __str__(self) -> str:
+        return (f"内存命中 {self.hits} | 磁盘命中 {self.disk_hits} | "
+                f"重新模拟 {self.misses}")
+
+
+class SimulationCache:
+    """
+    SimulationResult 的内容寻址缓存。
+
+    Args:
+        maxsize:  内存层最多保留的结果数（LRU 淘汰）。
+        disk_dir: 磁盘层目录；为 None 时只使用内存层。
+    """
+
+    def __init__(self, maxsize: int = 4096, disk_dir: Optional[str] = None):
+        self.maxsize = maxsize
+        self.disk_dir = disk_dir
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, SimulationResult] = OrderedDict()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[SimulationResult]:
+        """查找缓存结果，依次查询内存层与磁盘层。"""
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            self.stats.hits += 1
+            return result
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, "rb") as f:
+                    result = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                result = None
+            if result is not None:
+                self._remember(key, result)
+                self.stats.disk_hits += 1
+                return result
+        return None
+
+    def put(self, key: str, result: SimulationResult):
+        """写入缓存（磁盘层采用临时文件 + 原子替换，允许多进程并发写入）。"""
+        self._remember(key, result)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+
+    def _remember(self, key: str, result: SimulationResult):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def context_key(self, simulator: StrategySimulator) -> str:
+        """计算模拟器的上下文指纹（见 context_fingerprint）。"""
+        return context_fingerprint(simulator)
+
+    def simulate(self, simulator: StrategySimulator, strategy: StrategyDefinition,
+                 context: Optional[str] = None) -> SimulationResult:
+        """
+        带缓存的 simulator.simulate(strategy)。
+
+        对同一模拟器连续调用时，可先用 context_key() 计算一次上下文
+        指纹并传入 context，避免对每个策略重复哈希 Build 与和弦注册表。
+        """
+        key = simulation_key(simulator, strategy, context)
+        cached = self.get(key)
+        if cached is None:
+            self.stats.misses += 1
+            cached = simulator.simulate(strategy)
+            self.put(key, cached)
+        return dataclasses.replace(cached, strategy_name=strategy.name)
+
+    def clear(self):
+        """清空内存层（磁盘层保留）。"""
+        self._memory.clear()
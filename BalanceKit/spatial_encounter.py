@@ -0,0 +1,570 @@
+"""
+=============================================================================
+Project Harmony — 空间遭遇模拟与命中率标定 (Spatial Encounter Simulator)
+=============================================================================
+
+StrategySimulator 的距离命中率是解析近似：
+    range_hit = min(1, 有效射程 / REFERENCE_RANGE) + SIZE补偿，AOE/区域和弦再 +0.3
+音符的 actual_speed / actual_duration / actual_radius 与 coverage_area 从未参与
+真正的碰撞。本模块在二维平面上真实推进弹体与敌人波次：
+
+    1. 敌人在玩家周围 350~600 像素的环上生成，以 80 像素/秒斜向逼近玩家，
+       被命中两次后死亡，接触玩家后移除；每波把场上敌人补齐到固定数量，
+       目标密度不随命中率变化（参数取自 Godot 的 enemy_base.gd / enemy_spawner.gd）。
+       敌人进入 300 像素时玩家以移动速度后撤
+    2. 每拍自动瞄准最近的敌人施法：普通弹体命中即消失；AOE弹体命中或到期时
+       在落点爆炸；区域在玩家前方 200 像素展开，每 0.5 秒判定一次
+    3. 碰撞宽相位用均匀网格空间哈希（与 collision_optimizer.gd 同为 128 像素
+       单元格），numpy 向量化：敌人按单元格排序，弹体按邻近单元格二分查找候选；
+       窄相位对弹体本帧的运动线段做扫掠判定，不会因帧间位移过大而穿透
+    4. 命中率 = 命中的事件数 / 结算的事件数（弹体、爆炸或区域跳数）
+
+HitRateTable 把每种弹体形态（速度、存活时间、半径、AOE/区域范围）的实测
+命中率缓存到 .sim_cache/hit_rates.json，并以基础C音符（REFERENCE_RANGE 的
+定义来源）为锚点标定：C音符的实测命中率对齐到解析公式的值，其余形态按
+相对比例换算。把表传给 StrategySimulator(hit_table=...) 即可替换解析近似。
+
+用法：
+    python3 BalanceKit/spatial_encounter.py                  # 三阶段 Build 的解析 vs 实测命中率
+    python3 BalanceKit/spatial_encounter.py 后期 60          # 指定阶段与遭遇秒数
+    python3 BalanceKit/spatial_encounter.py stress           # 压测：dense 与 barrage 两个场景
+    python3 BalanceKit/spatial_encounter.py stress barrage   # 约 3000 弹体 × 2000 敌人同屏
+    python3 BalanceKit/spatial_encounter.py stress 2000 40   # 自定义：每波敌人数 每拍弹体数
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import math
+import hashlib
+import dataclasses
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from balance_scorer import (
+    ChordType, PlayerBuild, StrategySimulator, create_base_notes,
+    SPD_PER_POINT, DUR_PER_POINT, SIZE_PER_POINT, DEFAULT_BEAT_INTERVAL, PLAYER_MOVE_SPEED,
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TABLE_PATH = os.path.join(BASE_DIR, ".sim_cache", "hit_rates.json")
+
+# 命中率表格式版本：遭遇模型逻辑变化时递增，使缓存的实测值全部失效
+TABLE_VERSION = 1
+
+# 标定锚点：REFERENCE_RANGE 按基础C音符的射程定义
+REFERENCE_NOTE = "C"
+
+
+# =============================================================================
+# 第一部分：遭遇参数与弹体形态
+# =============================================================================
+
+@dataclass(frozen=True)
+class EncounterConfig:
+    """遭遇场景参数（默认值取自 Godot 实现）。"""
+    duration: float = 40.0            # 遭遇时长（秒）
+    dt: float = 1.0 / 30.0            # 物理步长（秒）；弹体按线段扫掠判定，不会穿透
+    beat_interval: float = DEFAULT_BEAT_INTERVAL
+    volley: int = 1                   # 每拍发射的弹体数
+    volley_spread: float = 0.17       # 多发弹体之间的夹角（弧度，约10°）
+    wave_interval: float = 2.0        # 波次间隔（秒）
+    wave_size: int = 12               # 场上敌人数：每波把敌人补齐到该数量
+    spawn_min: float = 350.0          # 生成距离下限（enemy_spawner.min_spawn_distance）
+    spawn_max: float = 600.0          # 生成距离上限（enemy_spawner.spawn_radius）
+    enemy_speed: float = 80.0         # enemy_base.move_speed
+    enemy_strafe: float = 0.6         # 敌人移动方向偏离正对玩家的角度（弧度，左右随机）
+    enemy_radius: float = 16.0        # enemy_base.collision_radius
+    enemy_hits: int = 2               # 敌人承受几次命中后死亡
+    player_radius: float = 14.0       # 接触判定中的玩家半径
+    player_speed: float = PLAYER_MOVE_SPEED
+    kite_distance: float = 300.0      # 最近的敌人进入该距离时玩家后撤
+    zone_offset: float = 200.0        # 区域在瞄准方向上的展开距离（_spawn_field）
+    zone_radius: float = 100.0        # 区域最大半径（_spawn_field.max_size）
+    zone_tick: float = 0.5            # 区域判定间隔
+    cell_size: float = 128.0          # 空间哈希单元格（collision_optimizer.cell_size）
+    seed: int = 7
+
+    @property
+    def fingerprint(self) -> str:
+        payload = repr((TABLE_VERSION, dataclasses.astuple(self)))
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class ProjectileShape:
+    """
+    一次施法在空间中的形态。
+
+    Attributes:
+        kind:     "bolt"（普通弹体）/ "aoe"（命中或到期时爆炸）/ "zone"（持续区域）
+        speed:    弹体速度（像素/秒）；区域为 0
+        lifetime: 弹体存活时间 / 区域持续时间（秒）
+        radius:   弹体碰撞半径（像素）
+        area:     爆炸半径 / 区域半径（像素）；普通弹体为 0
+    """
+    kind: str
+    speed: float
+    lifetime: float
+    radius: float
+    area: float = 0.0
+
+    @classmethod
+    def of(cls, note, chord: Optional[ChordType] = None,
+           config: EncounterConfig = EncounterConfig()) -> "ProjectileShape":
+        """音符（NoteStats 或 NoteView）+ 和弦 → 形态；区域优先于 AOE（与解析近似一致）。"""
+        speed = note.total_spd * SPD_PER_POINT
+        lifetime = note.total_dur * DUR_PER_POINT
+        radius = note.total_size * SIZE_PER_POINT
+        if chord is not None and chord.zone_tick_ratio > 0:
+            # 与 StrategySimulator 的区域跳数一致：持续 zone_duration_mult × DUR 秒
+            return cls("zone", 0.0, chord.zone_duration_mult * note.total_dur, radius,
+                       config.zone_radius)
+        if chord is not None and chord.aoe_radius_mult > 0:
+            return cls("aoe", speed, lifetime, radius, radius * chord.aoe_radius_mult)
+        return cls("bolt", speed, lifetime, radius)
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}|{self.speed:g}|{self.lifetime:g}|{self.radius:g}|{self.area:g}"
+
+
+# =============================================================================
+# 第二部分：均匀网格空间哈希
+# =============================================================================
+
+class SpatialHash:
+    """
+    向量化的均匀网格空间哈希。
+
+    build 时把点按所在单元格的键排序；查询时对每个查询点的邻近单元格
+    二分查找键区间，一次得到全部 (查询点, 点) 候选对，不逐个 Python 循环。
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self._order = np.empty(0, dtype=np.int64)
+        self._keys = np.empty(0, dtype=np.int64)
+
+    def _cells(self, points: np.ndarray) -> np.ndarray:
+        return np.floor(points / self.cell_size).astype(np.int64)
+
+    @staticmethod
+    def _key(cells: np.ndarray) -> np.ndarray:
+        # 单元格坐标远小于 2^31，偏移后拼成一个 int64 键
+        return ((cells[:, 0] + (1 << 31)) << 32) | (cells[:, 1] + (1 << 31))
+
+    def build(self, points: np.ndarray):
+        keys = self._key(self._cells(points))
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+    def candidates(self, queries: np.ndarray, reach: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        与各查询点距离可能 ≤ reach 的点：返回 (查询点下标, 点下标) 两个等长数组。
+        只保证不漏（候选来自覆盖 reach 的邻近单元格），精确距离由调用方判定。
+        """
+        if len(queries) == 0 or len(self._keys) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        span = max(1, math.ceil(reach / self.cell_size))
+        base = self._cells(queries)
+        q_parts, p_parts = [], []
+        for dx in range(-span, span + 1):
+            for dy in range(-span, span + 1):
+                keys = self._key(base + (dx, dy))
+                lo = np.searchsorted(self._keys, keys, side="left")
+                hi = np.searchsorted(self._keys, keys, side="right")
+                counts = hi - lo
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                q = np.repeat(np.arange(len(queries)), counts)
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                q_parts.append(q)
+                p_parts.append(self._order[np.repeat(lo, counts) + offsets])
+        if not q_parts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(q_parts), np.concatenate(p_parts)
+
+
+def _segment_distance_sq(a: np.ndarray, b: np.ndarray, p: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """点 p 到线段 a→b 的距离平方，以及最近点在线段上的参数 s ∈ [0, 1]。"""
+    ab = b - a
+    length_sq = (ab * ab).sum(axis=1)
+    s = np.where(length_sq > 0, ((p - a) * ab).sum(axis=1) / np.maximum(length_sq, 1e-12), 0.0)
+    s = np.clip(s, 0.0, 1.0)
+    closest = a + ab * s[:, None]
+    d = p - closest
+    return (d * d).sum(axis=1), s
+
+
+# =============================================================================
+# 第三部分：遭遇模拟
+# =============================================================================
+
+@dataclass
+class EncounterStats:
+    """一次遭遇的统计。"""
+    events: int = 0            # 结算的事件数（弹体 / 爆炸 / 区域跳）
+    hits: int = 0              # 其中命中至少一个敌人的事件数
+    kills: int = 0
+    casts: int = 0
+    ticks: int = 0
+    pair_checks: int = 0       # 窄相位精确判定的候选对总数
+    peak_projectiles: int = 0
+    peak_enemies: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.events if self.events else 0.0
+
+
+class Encounter:
+    """
+    单一弹体形态的二维遭遇。以玩家为原点（玩家后撤时整个场景反向平移），
+    全部状态为 numpy 数组，每帧：生成波次 → 施法 → 敌人移动与玩家后撤 →
+    弹体移动与碰撞 → 区域判定 → 清理死亡敌人。
+    """
+
+    def __init__(self, shape: ProjectileShape, config: EncounterConfig = EncounterConfig()):
+        self.shape = shape
+        self.config = config
+        self.rng = np.random.default_rng(config.seed)
+        self.grid = SpatialHash(config.cell_size)
+        self.stats = EncounterStats()
+        self.enemy_pos = np.empty((0, 2))
+        self.enemy_hits = np.empty(0, dtype=np.int64)
+        self.enemy_side = np.empty(0)
+        self.proj_pos = np.empty((0, 2))
+        self.proj_vel = np.empty((0, 2))
+        self.proj_age = np.empty(0)
+        self.zone_pos = np.empty((0, 2))
+        self.zone_next = np.empty(0)
+        self.zone_end = np.empty(0)
+
+    # ---- 生成 ----
+
+    def _spawn_wave(self):
+        """
+        把场上敌人补齐到 wave_size：敌人密度不随命中率变化，
+        不同弹体形态在同样的目标密度下比较。
+        """
+        cfg = self.config
+        count = cfg.wave_size - len(self.enemy_pos)
+        if count <= 0:
+            return
+        angle = self.rng.uniform(0, 2 * math.pi, count)
+        dist = self.rng.uniform(cfg.spawn_min, cfg.spawn_max, count)
+        wave = np.column_stack((np.cos(angle) * dist, np.sin(angle) * dist))
+        self.enemy_pos = np.concatenate((self.enemy_pos, wave))
+        self.enemy_hits = np.concatenate((self.enemy_hits, np.zeros(count, dtype=np.int64)))
+        self.enemy_side = np.concatenate((self.enemy_side, self.rng.choice((-1.0, 1.0), count)))
+
+    def _cast(self, now: float):
+        """自动瞄准最近的敌人；场上没有敌人时不施法。"""
+        if len(self.enemy_pos) == 0:
+            return
+        cfg, shape = self.config, self.shape
+        target = self.enemy_pos[np.argmin((self.enemy_pos ** 2).sum(axis=1))]
+        aim = math.atan2(target[1], target[0])
+        self.stats.casts += 1
+        if shape.kind == "zone":
+            center = np.array([[math.cos(aim), math.sin(aim)]]) * cfg.zone_offset
+            self.zone_pos = np.concatenate((self.zone_pos, center))
+            self.zone_next = np.append(self.zone_next, now + cfg.zone_tick)
+            self.zone_end = np.append(self.zone_end, now + shape.lifetime)
+            return
+        spread = (np.arange(cfg.volley) - (cfg.volley - 1) / 2) * cfg.volley_spread + aim
+        vel = np.column_stack((np.cos(spread), np.sin(spread))) * shape.speed
+        self.proj_pos = np.concatenate((self.proj_pos, np.zeros((cfg.volley, 2))))
+        self.proj_vel = np.concatenate((self.proj_vel, vel))
+        self.proj_age = np.concatenate((self.proj_age, np.zeros(cfg.volley)))
+
+    # ---- 碰撞 ----
+
+    def _area_hits(self, centers: np.ndarray, radius: float) -> tuple[np.ndarray, np.ndarray]:
+        """圆形范围内的敌人：返回 (范围下标, 敌人下标) 命中对。"""
+        reach = radius + self.config.enemy_radius
+        q, e = self.grid.candidates(centers, reach)
+        self.stats.pair_checks += len(q)
+        d = self.enemy_pos[e] - centers[q]
+        inside = (d * d).sum(axis=1) <= reach * reach
+        return q[inside], e[inside]
+
+    def _resolve_bursts(self, centers: np.ndarray, direct_hit: np.ndarray):
+        """AOE 爆炸：直接命中的必然算命中；范围内每个敌人受一次伤害。"""
+        q, e = self._area_hits(centers, self.shape.area)
+        hit = direct_hit.copy()
+        hit[q] = True
+        np.add.at(self.enemy_hits, e, 1)
+        self.stats.events += len(centers)
+        self.stats.hits += int(hit.sum())
+
+    def _move_projectiles(self, dt: float):
+        if len(self.proj_pos) == 0:
+            return
+        cfg, shape = self.config, self.shape
+        start = self.proj_pos
+        end = start + self.proj_vel * dt
+        self.proj_age = self.proj_age + dt
+
+        # 宽相位：以线段中点为查询点，半径覆盖半段位移 + 双方半径
+        step = shape.speed * dt
+        reach = shape.radius + cfg.enemy_radius
+        q, e = self.grid.candidates((start + end) / 2, reach + step / 2)
+        self.stats.pair_checks += len(q)
+        d2, s = _segment_distance_sq(start[q], end[q], self.enemy_pos[e])
+        touching = d2 <= reach * reach
+        q, e, s = q[touching], e[touching], s[touching]
+
+        # 每个弹体取线段上最先碰到的敌人
+        first = np.lexsort((s, q))
+        q, e, s = q[first], e[first], s[first]
+        keep = np.ones(len(q), dtype=bool)
+        keep[1:] = q[1:] != q[:-1]
+        q, e, s = q[keep], e[keep], s[keep]
+
+        hit = np.zeros(len(start), dtype=bool)
+        hit[q] = True
+        expired = ~hit & (self.proj_age >= shape.lifetime)
+
+        if shape.kind == "aoe":
+            impact = start[q] + (end[q] - start[q]) * s[:, None]
+            centers = np.concatenate((impact, end[expired]))
+            direct = np.concatenate((np.ones(len(q), dtype=bool), np.zeros(int(expired.sum()), dtype=bool)))
+            self._resolve_bursts(centers, direct)
+        else:
+            np.add.at(self.enemy_hits, e, 1)
+            self.stats.events += len(q) + int(expired.sum())
+            self.stats.hits += len(q)
+
+        alive = ~(hit | expired)
+        self.proj_pos = end[alive]
+        self.proj_vel = self.proj_vel[alive]
+        self.proj_age = self.proj_age[alive]
+
+    def _tick_zones(self, now: float):
+        if len(self.zone_pos) == 0:
+            return
+        due = self.zone_next <= now + 1e-9
+        if due.any():
+            idx = np.flatnonzero(due)
+            q, e = self._area_hits(self.zone_pos[idx], self.shape.area)
+            np.add.at(self.enemy_hits, e, 1)
+            self.stats.events += len(idx)
+            self.stats.hits += len(np.unique(q))
+            self.zone_next[idx] += self.config.zone_tick
+        alive = self.zone_next <= self.zone_end + 1e-9
+        self.zone_pos = self.zone_pos[alive]
+        self.zone_next = self.zone_next[alive]
+        self.zone_end = self.zone_end[alive]
+
+    def _move_enemies(self, dt: float):
+        cfg = self.config
+        if len(self.enemy_pos) == 0:
+            return
+        dist = np.sqrt((self.enemy_pos ** 2).sum(axis=1))
+        inward = -self.enemy_pos / np.maximum(dist, 1e-9)[:, None]
+        tangent = np.column_stack((-inward[:, 1], inward[:, 0])) * self.enemy_side[:, None]
+        heading = inward * math.cos(cfg.enemy_strafe) + tangent * math.sin(cfg.enemy_strafe)
+        self.enemy_pos = self.enemy_pos + heading * (cfg.enemy_speed * dt)
+
+        # 玩家后撤：背离最近的敌人移动，等价于场景整体反向平移
+        dist = np.sqrt((self.enemy_pos ** 2).sum(axis=1))
+        nearest = int(np.argmin(dist))
+        if dist[nearest] < cfg.kite_distance:
+            retreat = min(cfg.player_speed * dt, cfg.kite_distance - dist[nearest])
+            shift = self.enemy_pos[nearest] / max(dist[nearest], 1e-9) * retreat
+            self.enemy_pos = self.enemy_pos + shift
+            self.proj_pos = self.proj_pos + shift
+            self.zone_pos = self.zone_pos + shift
+            dist = np.sqrt((self.enemy_pos ** 2).sum(axis=1))
+
+        # 接触玩家的敌人移除（玩家受击，不计击杀）
+        keep = dist > cfg.enemy_radius + cfg.player_radius
+        self._keep_enemies(keep)
+
+    def _keep_enemies(self, keep: np.ndarray):
+        self.enemy_pos = self.enemy_pos[keep]
+        self.enemy_hits = self.enemy_hits[keep]
+        self.enemy_side = self.enemy_side[keep]
+
+    def _remove_dead(self):
+        dead = self.enemy_hits >= self.config.enemy_hits
+        if dead.any():
+            self.stats.kills += int(dead.sum())
+            self._keep_enemies(~dead)
+
+    # ---- 主循环 ----
+
+    def run(self) -> EncounterStats:
+        cfg = self.config
+        steps = int(round(cfg.duration / cfg.dt))
+        next_wave = 0.0
+        next_beat = 0.0
+        for i in range(steps):
+            now = i * cfg.dt
+            if now + 1e-9 >= next_wave:
+                self._spawn_wave()
+                next_wave += cfg.wave_interval
+            if now + 1e-9 >= next_beat:
+                self._cast(now)
+                next_beat += cfg.beat_interval
+            self._move_enemies(cfg.dt)
+            self.grid.build(self.enemy_pos)
+            self._move_projectiles(cfg.dt)
+            self._tick_zones(now)
+            self._remove_dead()
+            self.stats.ticks += 1
+            self.stats.peak_projectiles = max(self.stats.peak_projectiles, len(self.proj_pos))
+            self.stats.peak_enemies = max(self.stats.peak_enemies, len(self.enemy_pos))
+        return self.stats
+
+
+def run_encounter(shape: ProjectileShape, config: EncounterConfig = EncounterConfig()) -> EncounterStats:
+    return Encounter(shape, config).run()
+
+
+# =============================================================================
+# 第四部分：标定后的命中率表
+# =============================================================================
+
+class HitRateTable:
+    """
+    弹体形态 → 命中率 的缓存表，供 StrategySimulator(hit_table=...) 使用。
+
+    未见过的形态在首次查询时跑一次遭遇模拟，实测值按 config 指纹持久化到
+    path（None 表示只缓存在内存）。查询结果经过标定：
+        命中率 = min(1, 实测值 × 解析C音符命中率 / 实测C音符命中率)
+    """
+
+    def __init__(self, path: Optional[str] = TABLE_PATH,
+                 config: EncounterConfig = EncounterConfig()):
+        self.path = path
+        self.config = config
+        self.fingerprint = config.fingerprint
+        self.measured: dict[str, float] = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("fingerprint") == self.fingerprint:
+                self.measured = state["rates"]
+        self._scale: Optional[float] = None
+
+    def measure(self, shape: ProjectileShape) -> float:
+        """形态的实测命中率（未标定）。"""
+        rate = self.measured.get(shape.key)
+        if rate is None:
+            rate = self.measured[shape.key] = run_encounter(shape, self.config).hit_rate
+            self._dirty = True
+        return rate
+
+    @property
+    def scale(self) -> float:
+        """标定系数：把基础C音符的实测命中率对齐到解析公式的值。"""
+        if self._scale is None:
+            note = create_base_notes()[REFERENCE_NOTE]
+            analytic = StrategySimulator(PlayerBuild(), {}, log_beats=False).note_range_hit(note)
+            measured = self.measure(ProjectileShape.of(note, None, self.config))
+            self._scale = analytic / measured if measured > 0 else 1.0
+        return self._scale
+
+    def range_hit(self, note, chord: Optional[ChordType] = None) -> float:
+        """音符（+和弦）的标定命中率，替换解析的 range_hit（含AOE加成）。"""
+        shape = ProjectileShape.of(note, chord, self.config)
+        return min(1.0, self.measure(shape) * self.scale)
+
+    def save(self):
+        """把新测得的形态写回缓存文件（原子替换）。"""
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": self.fingerprint, "rates": self.measured},
+                      f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+# =============================================================================
+# 第五部分：报告
+# =============================================================================
+
+def print_hit_rate_report(phase: str, simulator: StrategySimulator, table: HitRateTable):
+    """逐音符对比解析近似与空间模拟的命中率（单音 / AOE和弦 / 区域和弦）。"""
+    view = simulator.build.view()
+    forms = {"单音": None, "AOE": simulator.chords["减三和弦"], "区域": simulator.chords["属七和弦"]}
+    print(f"\n[{phase}] 距离命中率：解析近似 → 空间模拟（标定系数 {table.scale:.3f}）")
+    print(f"  {'音符':4s} | {'射程':>6s} | {'半径':>4s} | " +
+          " | ".join(f"{name:>13s}" for name in forms))
+    for name in sorted(simulator.build.notes):
+        note = view.note(name)
+        cells = []
+        for chord in forms.values():
+            analytic = simulator.note_range_hit(note)
+            if chord is not None:
+                analytic = min(1.0, analytic + 0.3)
+            cells.append(f"{analytic:5.2f} → {table.range_hit(note, chord):5.2f}")
+        print(f"  {name:4s} | {note.effective_range:6.0f} | "
+              f"{note.total_size * SIZE_PER_POINT:4.0f} | " + " | ".join(cells))
+
+
+# 压测场景：(每波敌人数, 每拍弹体数, 弹体速度, 弹体存活秒数)
+STRESS_SCENARIOS = {
+    "dense": (2000, 40, 600.0, 4.0),      # 敌人密集：约 2000 敌人、数十弹体同屏
+    "barrage": (2000, 1000, 200.0, 5.0),  # 弹幕：慢速弹体飞抵敌群前约 3000 个同屏
+}
+
+
+def run_stress(wave_size: int, volley: int, speed: float = 600.0, lifetime: float = 4.0):
+    """压测：大量敌人与弹体同屏时的每帧耗时（敌人不会死亡，弹体命中即消失）。"""
+    config = EncounterConfig(duration=10.0, wave_size=wave_size, wave_interval=2.0,
+                             volley=volley, volley_spread=2 * math.pi / max(volley, 1),
+                             enemy_hits=1_000_000)
+    shape = ProjectileShape("bolt", speed, lifetime, 24.0)
+    start = time.perf_counter()
+    stats = run_encounter(shape, config)
+    elapsed = time.perf_counter() - start
+    print(f"\n压测：每波 {wave_size} 敌人，每拍 {volley} 弹体（{speed:g} 像素/秒），{stats.ticks} 帧")
+    print(f"  同屏峰值：弹体 {stats.peak_projectiles}，敌人 {stats.peak_enemies}")
+    print(f"  窄相位候选对平均 {stats.pair_checks / max(stats.ticks, 1):.0f} 对/帧（共 {stats.pair_checks}），"
+          f"暴力检测在同屏峰值时需 {stats.peak_projectiles * stats.peak_enemies} 对/帧")
+    print(f"  耗时 {elapsed:.2f} 秒，平均 {elapsed / stats.ticks * 1000:.2f} 毫秒/帧，"
+          f"命中率 {stats.hit_rate:.2f}")
+
+
+if __name__ == "__main__":
+    from balance_scorer import create_chord_registry
+    from generate_report import build_scenarios
+
+    if len(sys.argv) > 1 and sys.argv[1] == "stress":
+        if len(sys.argv) > 3:
+            run_stress(int(sys.argv[2]), int(sys.argv[3]))
+        else:
+            for name in sys.argv[2:] or STRESS_SCENARIOS:
+                run_stress(*STRESS_SCENARIOS[name])
+        sys.exit(0)
+
+    scenarios = build_scenarios()
+    phases = [sys.argv[1]] if len(sys.argv) > 1 else list(scenarios)
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else EncounterConfig.duration
+    table = HitRateTable(config=EncounterConfig(duration=duration))
+    chords = create_chord_registry()
+    start = time.perf_counter()
+    for phase in phases:
+        print_hit_rate_report(phase, StrategySimulator(scenarios[phase], chords, log_beats=False), table)
+    table.save()
+    print(f"\n共 {len(table.measured)} 种弹体形态，耗时 {time.perf_counter() - start:.1f} 秒"
+          f"（已缓存到 {os.path.relpath(TABLE_PATH, BASE_DIR)}）")
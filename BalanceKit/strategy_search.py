@@ -0,0 +1,376 @@
+"""
+=============================================================================
+Project Harmony — 策略进化搜索 (Strategy Search)
+=============================================================================
+
+create_strategy_library() 中的12个策略全部是手写的。本模块用遗传算法
+在32拍动作序列空间中搜索综合得分最高的策略，用于回答：
+"是否存在某个未被列出的序列，全面压制现有策略？"
+例如恰好卡在单调/密度阈值之下的"擦边"打法。
+
+基因编码：
+    每一拍是一个基因，取值为以下之一：
+        ("rest",)                   休止符
+        ("note", 音符, 修饰符)      单音（修饰符可为空）
+        ("chord", 根音, 和弦类型)   和弦
+    一个策略就是32个基因组成的元组，可直接作为适应度缓存的键。
+
+搜索流程：
+    - 初始种群 = 策略库中的12个策略 + 随机序列
+    - 锦标赛选择 + 单点交叉 + 逐拍变异 + 精英保留
+    - 每代先对种群去重，只把缓存中没有的序列成批送去模拟
+      （可选多进程并行），适应度为 StrategySimulator.composite_score
+
+输出：
+    Top-N 策略及其"漏洞标记"（击败策略库最强者、擦边阈值、
+    未解锁的扩展和弦、单音依赖等），便于设计师定位数值漏洞。
+
+用法：
+    python3 BalanceKit/strategy_search.py [代数] [种群大小] [随机种子]
+=============================================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from balance_scorer import (
+    PlayerBuild, StrategySimulator, StrategyAction, StrategyDefinition,
+    SimulationResult, ChordType,
+    create_chord_registry, create_strategy_library,
+)
+
+
+# =============================================================================
+# 第一部分：基因编码
+# =============================================================================
+
+WHITE_NOTES = ("C", "D", "E", "F", "G", "A", "B")
+MODIFIERS = ("", "C#", "D#", "F#", "G#", "A#")
+REST_GENE = ("rest",)
+
+Gene = tuple
+Genome = tuple[Gene, ...]
+
+
+def action_to_gene(action: StrategyAction) -> Gene:
+    """将策略动作转换为基因。"""
+    if action.is_rest:
+        return REST_GENE
+    if action.is_chord:
+        return ("chord", action.note, action.chord_type)
+    return ("note", action.note, action.modifier)
+
+
+def strategy_to_genome(strategy: StrategyDefinition) -> Genome:
+    """将策略转换为基因组。"""
+    return tuple(action_to_gene(a) for a in strategy.actions)
+
+
+def genome_to_strategy(genome: Genome, name: str,
+                       description: str = "进化搜索生成") -> StrategyDefinition:
+    """将基因组还原为可模拟的策略定义。"""
+    actions = []
+    for i, gene in enumerate(genome):
+        if gene[0] == "rest":
+            actions.append(StrategyAction(i, "", False, "", True))
+        elif gene[0] == "chord":
+            actions.append(StrategyAction(i, gene[1], True, gene[2]))
+        else:
+            actions.append(StrategyAction(i, gene[1], modifier=gene[2]))
+    return StrategyDefinition(name, description, actions)
+
+
+def describe_genome(genome: Genome) -> str:
+    """紧凑的单行表示，例如 `C G+C# - C[大三和弦]`。"""
+    parts = []
+    for gene in genome:
+        if gene[0] == "rest":
+            parts.append("-")
+        elif gene[0] == "chord":
+            parts.append(f"{gene[1]}[{gene[2]}]")
+        else:
+            parts.append(gene[1] + (f"+{gene[2]}" if gene[2] else ""))
+    return " ".join(parts)
+
+
+@dataclass
+class GeneAlphabet:
+    """
+    基因取值空间及各类基因的抽样概率。
+
+    默认偏向单音，避免随机序列被和弦/休止淹没。
+    """
+    chord_types: tuple[str, ...]
+    rest_prob: float = 0.12
+    chord_prob: float = 0.15
+    modifier_prob: float = 0.20
+
+    def random_gene(self, rng: random.Random) -> Gene:
+        roll = rng.random()
+        if roll < self.rest_prob:
+            return REST_GENE
+        if roll < self.rest_prob + self.chord_prob:
+            return ("chord", rng.choice(WHITE_NOTES), rng.choice(self.chord_types))
+        mod = rng.choice(MODIFIERS[1:]) if rng.random() < self.modifier_prob else ""
+        return ("note", rng.choice(WHITE_NOTES), mod)
+
+
+# =============================================================================
+# 第二部分：批量适应度评估
+# =============================================================================
+
+_worker_simulator: Optional[StrategySimulator] = None
+
+
+def _worker_init(build: PlayerBuild, chords: dict[str, ChordType]):
+    global _worker_simulator
+    _worker_simulator = StrategySimulator(build, chords, log_beats=False)
+
+
+def _worker_evaluate(genomes: list[Genome]) -> list[SimulationResult]:
+    return [_worker_simulator.simulate(genome_to_strategy(genome, "candidate")) for genome in genomes]
+
+
+class FitnessEvaluator:
+    """
+    带缓存的批量适应度评估器。
+
+    缓存以基因组本身为键；一批待评估基因组先去重、再剔除已缓存的，
+    剩余部分按块分发给进程池（workers <= 1 时在本进程内顺序执行）。
+    """
+
+    def __init__(self, build: PlayerBuild, chords: dict[str, ChordType],
+                 workers: int = 1, chunk_size: int = 64):
+        self.build = build
+        self.chords = chords
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.cache: dict[Genome, SimulationResult] = {}
+        self.evaluations = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if workers > 1:
+            self._pool = ProcessPoolExecutor(
+                workers, initializer=_worker_init, initargs=(build, chords))
+        else:
+            _worker_init(build, chords)
+
+    def evaluate(self, genomes: list[Genome]) -> list[SimulationResult]:
+        pending = list(dict.fromkeys(g for g in genomes if g not in self.cache))
+        if pending:
+            chunks = [pending[i:i + self.chunk_size]
+                      for i in range(0, len(pending), self.chunk_size)]
+            if self._pool is not None:
+                batches = self._pool.map(_worker_evaluate, chunks)
+            else:
+                batches = map(_worker_evaluate, chunks)
+            for chunk, results in zip(chunks, batches):
+                for genome, result in zip(chunk, results):
+                    self.cache[genome] = result
+            self.evaluations += len(pending)
+        return [self.cache[g] for g in genomes]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+# =============================================================================
+# 第三部分：遗传算法
+# =============================================================================
+
+@dataclass
+class SearchConfig:
+    """遗传算法参数。"""
+    generations: int = 60
+    population_size: int = 120
+    elite_count: int = 8
+    tournament_size: int = 4
+    crossover_rate: float = 0.8
+    mutation_rate: float = 0.06     # 每拍的变异概率
+    strategy_length: int = 32
+    seed: int = 0
+
+
+@dataclass
+class SearchFinding:
+    """搜索得到的一个策略及其诊断标记。"""
+    genome: Genome
+    result: SimulationResult
+    flags: list[str] = field(default_factory=list)
+
+    @property
+    def score(self) -> float:
+        return self.result.composite_score
+
+
+class StrategySearch:
+    """在固定Build下进化搜索高分策略。"""
+
+    def __init__(self, build: Optional[PlayerBuild] = None,
+                 chord_registry: Optional[dict[str, ChordType]] = None,
+                 config: Optional[SearchConfig] = None,
+                 workers: int = 1):
+        self.build = build if build is not None else PlayerBuild()
+        self.chords = chord_registry if chord_registry is not None else create_chord_registry()
+        self.config = config or SearchConfig()
+        self.alphabet = GeneAlphabet(tuple(self.chords))
+        self.rng = random.Random(self.config.seed)
+        self.evaluator = FitnessEvaluator(self.build, self.chords, workers)
+        self.library = create_strategy_library()
+        self.history: list[float] = []
+
+    # ---- 遗传算子 ----
+
+    def _random_genome(self) -> Genome:
+        return tuple(self.alphabet.random_gene(self.rng)
+                     for _ in range(self.config.strategy_length))
+
+    def _tournament(self, population: list[Genome], scores: list[float]) -> Genome:
+        picks = self.rng.sample(range(len(population)), self.config.tournament_size)
+        return population[max(picks, key=lambda i: scores[i])]
+
+    def _crossover(self, a: Genome, b: Genome) -> Genome:
+        if len(a) < 2 or self.rng.random() >= self.config.crossover_rate:
+            return a
+        cut = self.rng.randrange(1, len(a))
+        return a[:cut] + b[cut:]
+
+    def _mutate(self, genome: Genome) -> Genome:
+        genes = list(genome)
+        for i in range(len(genes)):
+            if self.rng.random() < self.config.mutation_rate:
+                genes[i] = self.alphabet.random_gene(self.rng)
+        # 偶尔整段复制，帮助发现周期性结构（段长不超过基因组长度）
+        if len(genes) >= 2 and self.rng.random() < self.config.mutation_rate:
+            span = self.rng.choice([s for s in (2, 4, 8) if s <= len(genes)])
+            src = self.rng.randrange(0, len(genes) - span + 1)
+            dst = self.rng.randrange(0, len(genes) - span + 1)
+            genes[dst:dst + span] = genes[src:src + span]
+        return tuple(genes)
+
+    def _initial_population(self) -> list[Genome]:
+        length = self.config.strategy_length
+        population = []
+        for strategy in self.library:
+            genome = strategy_to_genome(strategy)
+            population.append((genome * (length // len(genome) + 1))[:length])
+        while len(population) < self.config.population_size:
+            population.append(self._random_genome())
+        return population
+
+    # ---- 主循环 ----
+
+    def run(self, top_n: int = 10, verbose: bool = False) -> list[SearchFinding]:
+        """执行进化搜索，返回整个搜索过程中得分最高的 top_n 个不同策略。"""
+        cfg = self.config
+        population = self._initial_population()
+
+        for gen in range(cfg.generations):
+            scores = [r.composite_score for r in self.evaluator.evaluate(population)]
+            ranked = sorted(range(len(population)), key=lambda i: scores[i], reverse=True)
+            self.history.append(scores[ranked[0]])
+            if verbose:
+                print(f"  第{gen + 1:3d}代 | 最高 {scores[ranked[0]]:6.1f} | "
+                      f"平均 {sum(scores) / len(scores):6.1f} | "
+                      f"累计模拟 {self.evaluator.evaluations}")
+
+            next_pop = [population[i] for i in ranked[:cfg.elite_count]]
+            while len(next_pop) < cfg.population_size:
+                a = self._tournament(population, scores)
+                b = self._tournament(population, scores)
+                next_pop.append(self._mutate(self._crossover(a, b)))
+            population = next_pop
+
+        self.evaluator.evaluate(population)
+        return self.findings(top_n)
+
+    def findings(self, top_n: int) -> list[SearchFinding]:
+        """从适应度缓存中取出得分最高的策略并附加诊断标记。"""
+        best = sorted(self.evaluator.cache.items(),
+                      key=lambda item: item[1].composite_score, reverse=True)[:top_n]
+        return [SearchFinding(g, r, self.diagnose(g, r)) for g, r in best]
+
+    def library_best(self) -> SimulationResult:
+        results = self.evaluator.evaluate(
+            [strategy_to_genome(s) for s in self.library])
+        return max(results, key=lambda r: r.composite_score)
+
+    # ---- 漏洞诊断 ----
+
+    def diagnose(self, genome: Genome, result: SimulationResult) -> list[str]:
+        """标记可疑的"擦边"或退化特征。"""
+        sim = StrategySimulator
+        flags = []
+        if result.composite_score > self.library_best().composite_score:
+            flags.append("压制策略库最强者")
+        if sim.MONOTONY_WARN - 10 <= result.peak_monotony < sim.MONOTONY_WARN:
+            flags.append("单调值擦边")
+        if sim.DENSITY_MILD - 10 <= result.peak_density < sim.DENSITY_MILD:
+            flags.append("密度值擦边")
+        if sim.DISSONANCE_PAIN - 10 <= result.peak_dissonance < sim.DISSONANCE_PAIN:
+            flags.append("不和谐值擦边")
+
+        chords_used = {g[2] for g in genome if g[0] == "chord" and g[2] in self.chords}
+        if not self.build.extended_chord_enabled and any(
+                self.chords[c].is_extended for c in chords_used):
+            flags.append("使用未解锁的扩展和弦")
+
+        casts = [g[1] for g in genome if g[0] != "rest"]
+        if casts:
+            note, count = Counter(casts).most_common(1)[0]
+            if count / len(casts) > 0.5:
+                flags.append(f"单音依赖({note} {count}/{len(casts)})")
+        rests = sum(1 for g in genome if g[0] == "rest")
+        if rests / len(genome) > 0.5:
+            flags.append(f"大量休止({rests}/{len(genome)})")
+        return flags
+
+    def close(self):
+        self.evaluator.close()
+
+
+# =============================================================================
+# 第四部分：主执行入口
+# =============================================================================
+
+def print_search_report(findings: list[SearchFinding], library_best: SimulationResult):
+    """打印搜索结果。"""
+    print(f"\n{'=' * 100}")
+    print(f"  策略进化搜索报告 (策略库最强: {library_best.strategy_name} "
+          f"{library_best.composite_score:.1f})")
+    print(f"{'=' * 100}")
+    for rank, f in enumerate(findings, 1):
+        r = f.result
+        print(f"  {rank:2d}. 综合 {f.score:6.1f} | 有效DPS {r.effective_dps:6.1f} | "
+              f"生存 {r.survival_score:5.1f} | 风险 {r.risk_score:5.1f} | "
+              f"峰值 单调{r.peak_monotony:5.1f}/密度{r.peak_density:5.1f}/不和谐{r.peak_dissonance:5.1f}")
+        print(f"      {describe_genome(f.genome)}")
+        if f.flags:
+            print(f"      标记: {', '.join(f.flags)}")
+    print(f"{'=' * 100}\n")
+
+
+if __name__ == "__main__":
+    generations = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    population = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+    search = StrategySearch(config=SearchConfig(
+        generations=generations, population_size=population, seed=seed))
+    start = time.perf_counter()
+    findings = search.run(top_n=10, verbose=True)
+    print_search_report(findings, search.library_best())
+    print(f"  共模拟 {search.evaluator.evaluations} 个不同序列，"
+          f"耗时 {time.perf_counter() - start:.1f}s")
+    search.close()
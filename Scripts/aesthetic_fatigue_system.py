@@ -160,6 +160,17 @@ class FatigueConfig:
     基于听觉疲劳的生理学研究 (Dobrucki 2017)：
     持续的声学刺激导致感官适应和听觉疲劳。"""
 
+    # ---- 插件维度权重 ----
+    weight_extra: dict = field(default_factory=dict)
+    """插件维度的权重（维度名 → 权重），见第五部分的维度注册表。
+    内置八个维度使用上面的 weight_* 字段；插件维度只有列在这里时才会计算
+    （权重可以为 0：计算并写入 components.extra，但不计入 AFI）。"""
+
+    skip_zero_weight_dimensions: bool = False
+    """为 True 时权重为 0 的维度不实例化、不计算，省去其开销；这些维度的分量与
+    诊断字段记为 NaN，维度名列入 components.skipped，也不产生恢复建议。
+    默认 False：所有维度照常计算，权重只影响 AFI 的加权和。"""
+
     # ---- 密度与留白参数 ----
     density_optimal_rate: float = 2.0
     """最佳施法频率（次/秒）。低于此值不产生密度疲劳。
@@ -266,6 +277,7 @@ class SpellEvent:
         chord_type: 和弦类型名称（如 "大三和弦"），若非和弦则为 None
         chord_notes: 和弦包含的所有音符，若非和弦则为 None
         beat_position: 在当前小节中的节拍位置 (0.0 ~ 1.0)
+        timbre: 施放时的音色武器名称（ChapterTimbre），未知时为 None
     """
     timestamp: float
     note: Note
@@ -273,6 +285,7 @@ class SpellEvent:
     chord_type: Optional[str] = None
     chord_notes: Optional[tuple[Note, ...]] = None
     beat_position: float = 0.0
+    timbre: Optional[str] = None
 
 
 # =============================================================================
@@ -336,6 +349,36 @@ def weighted_shannon_entropy(events: list[tuple], decay_func, current_time: floa
     return entropy / max_entropy if max_entropy > 0 else 0.0
 
 
+def weighted_entropy(categories, weights) -> float:
+    """
+    weighted_shannon_entropy 的预计算权重版本：categories 与 weights 按位置对应。
+
+    多个维度共享同一组时间衰减权重（AestheticFatigueEngine.decay_weights）时使用，
+    累加顺序与逐事件计算衰减相同，结果完全一致。
+    """
+    if len(categories) <= 1:
+        return 0.0
+
+    weighted_counts: dict = defaultdict(float)
+    total_weight = 0.0
+
+    for cat, w in zip(categories, weights):
+        weighted_counts[cat] += w
+        total_weight += w
+
+    if total_weight <= 0 or len(weighted_counts) <= 1:
+        return 0.0
+
+    entropy = 0.0
+    for wc in weighted_counts.values():
+        if wc > 0:
+            p = wc / total_weight
+            entropy -= p * math.log2(p)
+
+    max_entropy = math.log2(len(weighted_counts)) if len(weighted_counts) > 1 else 1.0
+    return entropy / max_entropy if max_entropy > 0 else 0.0
+
+
 def transition_entropy(sequence: list, vocab_size: int) -> float:
     """
     计算转移熵 H(X_next | X_current)。
@@ -406,7 +449,412 @@ def quantize_interval(interval: float, num_bins: int, max_val: float) -> int:
 
 
 # =============================================================================
-# 第五部分：核心疲劳计算引擎
+# 第五部分：疲劳维度插件
+# =============================================================================
+
+class FatigueDimension:
+    """
+    疲劳维度插件基类。
+
+    引擎维护一个按时间排序的滑动窗口（deque），通过四个钩子通知维度：
+        on_append(event, window)   事件进入窗口之后（window[-1] 即该事件）
+        on_evict(event, window)    事件离开窗口之后（window 已不含该事件）
+        on_advance(now, window)    每次计算疲劳之前（施法或查询）
+        read(now, window)          返回该维度的疲劳值 [0, 1]
+    钩子可以维护增量状态，让 read 不必每次遍历整个窗口。引擎构造时把各维度重写过的
+    钩子展开为列表，未重写的钩子不会被调用。
+    read 之后 details() 返回要写入 FatigueComponents 的诊断字段（如 pitch_entropy）。
+
+    Attributes:
+        name:          分量名。内置维度为 FatigueComponents 的字段名，插件维度写入 components.extra
+        weight_field:  FatigueConfig 中的权重字段；为空时权重取 config.weight_extra[name]
+        label:         显示名
+        detail_fields: details() 返回的字段名（维度被跳过时这些字段记为 NaN）
+    """
+    name: str = ""
+    weight_field: str = ""
+    label: str = ""
+    detail_fields: tuple[str, ...] = ()
+
+    def __init__(self, engine: "AestheticFatigueEngine"):
+        self.engine = engine
+        self.config = engine.config
+
+    def on_append(self, event: SpellEvent, window: deque):
+        pass
+
+    def on_evict(self, event: SpellEvent, window: deque):
+        pass
+
+    def on_advance(self, current_time: float, window: deque):
+        pass
+
+    def read(self, current_time: float, window: deque) -> float:
+        raise NotImplementedError
+
+    def details(self) -> dict:
+        return {}
+
+
+# 维度注册表：名称 → 维度类，注册顺序即 AFI 的求和顺序
+DIMENSION_REGISTRY: dict[str, type[FatigueDimension]] = {}
+
+
+def register_dimension(cls: type[FatigueDimension]) -> type[FatigueDimension]:
+    """类装饰器：注册一个疲劳维度。"""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} 缺少维度名")
+    DIMENSION_REGISTRY[cls.name] = cls
+    return cls
+
+
+def dimension_weight(config: FatigueConfig, cls: type[FatigueDimension]) -> float:
+    """维度在配置中的权重。"""
+    if cls.weight_field:
+        return getattr(config, cls.weight_field)
+    return config.weight_extra.get(cls.name, 0.0)
+
+
+@register_dimension
+class PitchDimension(FatigueDimension):
+    """维度 1：音高熵（带时间衰减）。"""
+    name = "pitch_fatigue"
+    weight_field = "weight_pitch_entropy"
+    label = "音高熵"
+    detail_fields = ("pitch_entropy",)
+
+    def __init__(self, engine):
+        super().__init__(engine)
+        self._pitches: deque[int] = deque()
+
+    def on_append(self, event, window):
+        self._pitches.append(event.note.value)
+
+    def on_evict(self, event, window):
+        self._pitches.popleft()
+
+    def read(self, current_time, window):
+        self._entropy = weighted_entropy(self._pitches, self.engine.decay_weights(current_time))
+        return 1.0 - self._entropy
+
+    def details(self):
+        return {"pitch_entropy": self._entropy}
+
+
+@register_dimension
+class TransitionDimension(FatigueDimension):
+    """维度 2：转移熵。增量维护窗口内相邻音符对的计数。"""
+    name = "transition_fatigue"
+    weight_field = "weight_transition_entropy"
+    label = "转移熵"
+    detail_fields = ("transition_entropy",)
+
+    def __init__(self, engine):
+        super().__init__(engine)
+        self._pairs: dict[tuple, int] = defaultdict(int)
+        self._sources: dict = defaultdict(int)
+
+    def on_append(self, event, window):
+        if len(window) >= 2:
+            src = window[-2].note.value
+            self._pairs[(src, event.note.value)] += 1
+            self._sources[src] += 1
+
+    def on_evict(self, event, window):
+        if window:
+            src = event.note.value
+            pair = (src, window[0].note.value)
+            self._pairs[pair] -= 1
+            if not self._pairs[pair]:
+                del self._pairs[pair]
+            self._sources[src] -= 1
+            if not self._sources[src]:
+                del self._sources[src]
+
+    def read(self, current_time, window):
+        total = len(window) - 1
+        cond_entropy = 0.0
+        for (src, _), count in self._pairs.items():
+            cond_entropy -= count / total * math.log2(count / self._sources[src])
+        self._entropy = cond_entropy / math.log2(12)
+        return 1.0 - self._entropy
+
+    def details(self):
+        return {"transition_entropy": self._entropy}
+
+
+@register_dimension
+class RhythmDimension(FatigueDimension):
+    """维度 3：节奏熵。增量维护窗口内相邻事件间隔的量化桶。"""
+    name = "rhythm_fatigue"
+    weight_field = "weight_rhythm_entropy"
+    label = "节奏熵"
+    detail_fields = ("rhythm_entropy",)
+
+    def __init__(self, engine):
+        super().__init__(engine)
+        self._intervals: deque[int] = deque()   # window[i] 与 window[i-1] 的间隔桶（i ≥ 1）
+
+    def on_append(self, event, window):
+        if len(window) >= 2:
+            dt = event.timestamp - window[-2].timestamp
+            bin_idx = quantize_interval(dt, self.config.rhythm_quantize_bins, self.config.rhythm_max_interval)
+            self._intervals.append(bin_idx)
+
+    def on_evict(self, event, window):
+        if self._intervals:
+            self._intervals.popleft()
+
+    def read(self, current_time, window):
+        self._fatigue = 0.0
+        if len(window) >= 3:
+            # 间隔的时刻即后一事件的时刻：衰减权重取 window[1:] 的权重
+            entropy = weighted_entropy(self._intervals, self.engine.decay_weights(current_time)[1:])
+            self._fatigue = 1.0 - entropy
+        return self._fatigue
+
+    def details(self):
+        return {"rhythm_entropy": 1.0 - self._fatigue}
+
+
+@register_dimension
+class RecurrenceDimension(FatigueDimension):
+    """维度 4：多尺度 n-gram 递归率。增量维护窗口内各长度 n-gram 的计数。"""
+    name = "recurrence_rate"
+    weight_field = "weight_recurrence"
+    label = "递归率"
+
+    SCALE_WEIGHTS = {2: 0.3, 3: 0.4, 4: 0.3}
+
+    def __init__(self, engine):
+        super().__init__(engine)
+        self._grams: dict[int, dict[tuple, int]] = {n: defaultdict(int) for n in set(self.config.ngram_sizes)}
+        self._notes: list[int] = []
+
+    def on_append(self, event, window):
+        notes = self._notes
+        notes.append(event.note.value)
+        for n, grams in self._grams.items():
+            if len(notes) >= n:
+                grams[tuple(notes[-n:])] += 1
+
+    def on_evict(self, event, window):
+        notes = self._notes
+        for n, grams in self._grams.items():
+            if len(notes) >= n:
+                gram = tuple(notes[:n])
+                grams[gram] -= 1
+                if not grams[gram]:
+                    del grams[gram]
+        del notes[0]
+
+    def read(self, current_time, window):
+        size = len(window)
+        total_rr = 0.0
+        total_w = 0.0
+        for n in self.config.ngram_sizes:
+            if size >= n:
+                total = size - n + 1
+                rr = 0.0 if total <= 1 else 1.0 - (len(self._grams[n]) / total)
+                w = self.SCALE_WEIGHTS.get(n, 0.3)
+                total_rr += rr * w
+                total_w += w
+        return total_rr / total_w if total_w > 0 else 0.0
+
+
+@register_dimension
+class ChordDimension(FatigueDimension):
+    """维度 5：和弦多样性（带时间衰减的和弦类型熵）。"""
+    name = "chord_fatigue"
+    weight_field = "weight_chord_diversity"
+    label = "和弦多样性"
+    detail_fields = ("chord_diversity",)
+
+    def read(self, current_time, window):
+        chords = [e.chord_type or "none" for e in window]
+        entropy = weighted_entropy(chords, self.engine.decay_weights(current_time))
+        self._fatigue = 1.0 - entropy
+        return self._fatigue
+
+    def details(self):
+        return {"chord_diversity": 1.0 - self._fatigue}
+
+
+@register_dimension
+class DensityDimension(FatigueDimension):
+    """
+    维度 6：事件密度疲劳。
+
+    基于 Temperley (2019) 的均匀信息密度 (UID) 理论：
+    信息应以适中且均匀的速率呈现。过高的事件密度会超出
+    听众的信息处理能力，导致认知过载和听觉疲劳。
+
+    计算方法：
+    1. 在短时窗口内统计施法次数，得到瞬时频率
+    2. 将频率映射到 [0, 1] 的疲劳值
+    3. 低于最佳频率不产生疲劳，超过最大频率疲劳满值
+    """
+    name = "density_fatigue"
+    weight_field = "weight_density"
+    label = "事件密度"
+    detail_fields = ("density_rate",)
+
+    def read(self, current_time, window):
+        cfg = self.config
+        self._density = density = self._current_density(window, current_time)
+        if density <= cfg.density_optimal_rate:
+            return 0.0
+        # 线性映射：从最佳频率到最大频率
+        ratio = (density - cfg.density_optimal_rate) / (
+            cfg.density_max_rate - cfg.density_optimal_rate
+        )
+        return max(0.0, min(1.0, ratio))
+
+    def _current_density(self, window, current_time: float) -> float:
+        """当前短时窗口内的施法频率（次/秒）。"""
+        cutoff = current_time - self.config.density_measurement_window
+        recent = [e for e in window if e.timestamp >= cutoff]
+        if len(recent) < 2:
+            return 0.0
+        time_span = current_time - recent[0].timestamp
+        if time_span <= 0:
+            return 0.0
+        return len(recent) / time_span
+
+    def details(self):
+        return {"density_rate": self._density}
+
+
+@register_dimension
+class RestDeficitDimension(FatigueDimension):
+    """
+    维度 7：留白缺失疲劳。
+
+    基于 Lissa (1964) 的休止美学理论：
+    音乐中的休止不是"空"，而是结构的有机组成部分。
+    休止为听众提供了处理已接收信息的"呼吸空间"。
+
+    计算方法：
+    1. 统计窗口内所有间隔中，超过休止阈值的"留白"总时长
+    2. 计算留白时间占窗口总时长的比例
+    3. 与理想比例对比，缺失越多疲劳越高
+
+    窗口内每个间隔的留白时长（不足阈值记 0）随事件进出增量维护。
+    """
+    name = "rest_deficit_fatigue"
+    weight_field = "weight_rest_deficit"
+    label = "留白缺失"
+    detail_fields = ("rest_ratio",)
+
+    def __init__(self, engine):
+        super().__init__(engine)
+        self._gaps: deque[float] = deque()
+
+    def on_append(self, event, window):
+        if len(window) >= 2:
+            gap = event.timestamp - window[-2].timestamp
+            self._gaps.append(gap if gap >= self.config.rest_threshold else 0.0)
+
+    def on_evict(self, event, window):
+        if self._gaps:
+            self._gaps.popleft()
+
+    def read(self, current_time, window):
+        cfg = self.config
+        self._ratio = rest_ratio = self._rest_ratio(window, current_time)
+        if rest_ratio >= cfg.rest_ideal_ratio:
+            # 留白充足，无疲劳
+            return 0.0
+        # 留白不足：缺失比例越大，疲劳越高
+        deficit = (cfg.rest_ideal_ratio - rest_ratio) / cfg.rest_ideal_ratio
+        return max(0.0, min(1.0, deficit))
+
+    def _rest_ratio(self, window, current_time: float) -> float:
+        """窗口内留白时间占总时长的比例。"""
+        if len(window) < 2:
+            return 1.0  # 几乎没有施法，全是留白
+        cfg = self.config
+        window_start = max(window[0].timestamp, current_time - cfg.window_duration)
+        window_duration = current_time - window_start
+        if window_duration <= 0:
+            return 1.0
+        total_rest = sum(self._gaps)
+        # 也考虑最后一次施法到当前时间的间隔
+        last_gap = current_time - window[-1].timestamp
+        if last_gap >= cfg.rest_threshold:
+            total_rest += last_gap
+        return min(1.0, total_rest / window_duration)
+
+    def details(self):
+        return {"rest_ratio": self._ratio}
+
+
+@register_dimension
+class SustainedPressureDimension(FatigueDimension):
+    """
+    维度 8：持续施法压力。
+
+    基于听觉疲劳的生理学研究 (Dobrucki 2017)：
+    持续的声学刺激会导致听觉系统的感官适应（Sensory Adaptation），
+    表现为对声音的敏感度下降和主观疲劳感增加。
+
+    计算方法：
+    1. 追踪自上次有效休息以来的连续施法时长
+       （两次施法间隔超过 sustained_rest_reset 视为一次有效休息）
+    2. 超过起始阈值后，线性增长疲劳值
+    3. 达到最大阈值后，疲劳满值
+    """
+    name = "sustained_fatigue"
+    weight_field = "weight_sustained_pressure"
+    label = "持续压力"
+    detail_fields = ("sustained_duration",)
+
+    def __init__(self, engine):
+        super().__init__(engine)
+        self._start: Optional[float] = None
+        self._last: Optional[float] = None
+
+    def on_append(self, event, window):
+        if self._last is None or event.timestamp - self._last >= self.config.sustained_rest_reset:
+            self._start = event.timestamp
+        self._last = event.timestamp
+
+    def read(self, current_time, window):
+        cfg = self.config
+        self._duration = sustained = current_time - self._start if self._start is not None else 0.0
+        if sustained <= cfg.sustained_pressure_onset:
+            return 0.0
+        ratio = (sustained - cfg.sustained_pressure_onset) / (
+            cfg.sustained_pressure_max - cfg.sustained_pressure_onset
+        )
+        return max(0.0, min(1.0, ratio))
+
+    def details(self):
+        return {"sustained_duration": self._duration}
+
+
+# 内置的八个维度（恢复建议按此顺序接收各维度疲劳值）
+BUILTIN_DIMENSIONS = tuple(DIMENSION_REGISTRY)
+
+
+@register_dimension
+class TimbreDimension(FatigueDimension):
+    """
+    插件维度：音色多样性（带时间衰减的音色武器熵，事件需携带 timbre）。
+
+    对应游戏侧的章节音色武器系统（music_data.gd 的 TIMBRE_FATIGUE_PENALTY 等）。
+    默认不启用；在 config.weight_extra["timbre_fatigue"] 中给出权重后参与 AFI。
+    """
+    name = "timbre_fatigue"
+    label = "音色多样性"
+
+    def read(self, current_time, window):
+        timbres = [e.timbre or "none" for e in window]
+        return 1.0 - weighted_entropy(timbres, self.engine.decay_weights(current_time))
+
+
+# =============================================================================
+# 第六部分：核心疲劳计算引擎
 # =============================================================================
 
 class AestheticFatigueEngine:
@@ -428,19 +876,64 @@ class AestheticFatigueEngine:
         - F_density：事件密度疲劳 — 施法频率过高时的认知过载
         - F_rest：留白缺失疲劳 — 缺乏适当间歇的听觉疲劳
         - F_sustained：持续施法压力 — 长时间不休息的累积疲劳
+
+    各维度以插件形式注册在 DIMENSION_REGISTRY 中（见第五部分）。构造时按配置
+    挑出要计算的维度，把它们的钩子展开为平铺的列表，施法时依次调用。
     """
 
     def __init__(self, config: Optional[FatigueConfig] = None):
         self.config = config or FatigueConfig()
-        self._history: deque[SpellEvent] = deque(maxlen=self.config.max_history_size)
+        self._history: deque[SpellEvent] = deque()
         self._per_note_fatigue: dict[Note, float] = defaultdict(float)
         self._last_diversity_notes: set[Note] = set()
 
-        # v2.0 新增：持续施法追踪状态
-        self._sustained_casting_start: Optional[float] = None
+        # v2.0 新增：休止时间追踪状态
         self._last_event_time: Optional[float] = None
         self._accumulated_rest_time: float = 0.0
 
+        # 当前这次计算的窗口衰减权重（decay_weights 惰性计算）
+        self._weights: Optional[list[float]] = None
+
+        self._compile_dimensions()
+
+    def _compile_dimensions(self):
+        """
+        实例化要计算的维度，并收集重写过的钩子。
+
+        内置维度总是计算，插件维度在 weight_extra 中列出时计算；
+        skip_zero_weight_dimensions 为 True 时跳过其中权重为 0 的维度。
+        """
+        cfg = self.config
+        unknown = set(cfg.weight_extra) - set(DIMENSION_REGISTRY)
+        if unknown:
+            raise KeyError(f"未注册的疲劳维度: {', '.join(sorted(unknown))}")
+        self.dimensions: list[tuple[FatigueDimension, float]] = []
+        skipped = []
+        for cls in DIMENSION_REGISTRY.values():
+            if not cls.weight_field and cls.name not in cfg.weight_extra:
+                continue
+            weight = dimension_weight(cfg, cls)
+            if weight == 0.0 and cfg.skip_zero_weight_dimensions:
+                skipped.append(cls)
+            else:
+                self.dimensions.append((cls(self), weight))
+
+        def hooks(name: str) -> list:
+            base = getattr(FatigueDimension, name)
+            return [getattr(d, name) for d, _ in self.dimensions if getattr(type(d), name) is not base]
+
+        self._append_hooks = hooks("on_append")
+        self._evict_hooks = hooks("on_evict")
+        self._advance_hooks = hooks("on_advance")
+        # 内置维度写入 FatigueComponents 的同名字段，插件维度写入 components.extra
+        builtin = FatigueComponents.__dataclass_fields__
+        self._readers = [(d.name, w, d.read, d.details, d.name in builtin) for d, w in self.dimensions]
+        # 被跳过的维度：分量与诊断字段记为 NaN（而不是 FatigueComponents 的默认值）
+        self._skipped = tuple(cls.name for cls in skipped)
+        self._skipped_fields = {name: math.nan for cls in skipped if cls.name in builtin
+                                for name in (cls.name, *cls.detail_fields)}
+        self._skipped_extra = {cls.name: math.nan for cls in skipped if cls.name not in builtin}
+
     # ---- 公开接口 ----
 
     def record_spell(self, event: SpellEvent) -> "FatigueResult":
@@ -449,10 +942,14 @@ class AestheticFatigueEngine:
 
         这是系统的主入口。每次玩家施放法术时调用此方法。
         """
-        # v2.0：更新持续施法追踪
-        self._update_sustained_tracking(event.timestamp)
+        # v2.0：更新休止时间追踪
+        self._update_rest_tracking(event.timestamp)
 
+        if len(self._history) >= self.config.max_history_size and self._history:
+            self._evict()
         self._history.append(event)
+        for hook in self._append_hooks:
+            hook(event, self._history)
         self._prune_old_events(event.timestamp)
         return self._compute_fatigue(event.timestamp, event.note)
 
@@ -475,45 +972,32 @@ class AestheticFatigueEngine:
         self._history.clear()
         self._per_note_fatigue.clear()
         self._last_diversity_notes.clear()
-        self._sustained_casting_start = None
         self._last_event_time = None
         self._accumulated_rest_time = 0.0
+        self._compile_dimensions()
 
-    # ---- v2.0 新增：持续施法追踪 ----
-
-    def _update_sustained_tracking(self, current_time: float):
-        """
-        更新持续施法追踪状态。
-
-        当两次施法之间的间隔超过 sustained_rest_reset 时，
-        视为一次有效休息，重置连续施法计时器。
-        当间隔超过 rest_threshold 时，累积休止时间。
-        """
-        cfg = self.config
+    # ---- v2.0 新增：休止时间追踪 ----
 
+    def _update_rest_tracking(self, current_time: float):
+        """当两次施法之间的间隔超过 rest_threshold 时，累积休止时间。"""
         if self._last_event_time is not None:
             gap = current_time - self._last_event_time
-
-            # 检查是否构成有效休息（重置持续压力）
-            if gap >= cfg.sustained_rest_reset:
-                self._sustained_casting_start = current_time
-
-            # 累积休止时间
-            if gap >= cfg.rest_threshold:
+            if gap >= self.config.rest_threshold:
                 self._accumulated_rest_time += gap
-        else:
-            # 首次施法
-            self._sustained_casting_start = current_time
-
         self._last_event_time = current_time
 
     # ---- 内部计算方法 ----
 
+    def _evict(self):
+        event = self._history.popleft()
+        for hook in self._evict_hooks:
+            hook(event, self._history)
+
     def _prune_old_events(self, current_time: float):
         """移除超出时间窗口的旧事件。"""
         cutoff = current_time - self.config.window_duration
         while self._history and self._history[0].timestamp < cutoff:
-            self._history.popleft()
+            self._evict()
 
         # v2.0：同步清理过期的休止时间累积
         # 简化处理：随窗口滑动逐步衰减
@@ -527,69 +1011,54 @@ class AestheticFatigueEngine:
             return 1.0
         return math.pow(2.0, -dt / self.config.decay_half_life)
 
+    def decay_weights(self, current_time: float) -> list[float]:
+        """窗口内各事件的时间衰减权重；同一次疲劳计算内由各维度共享。"""
+        if self._weights is None:
+            half_life = self.config.decay_half_life
+            pow2 = math.pow
+            self._weights = [1.0 if current_time - e.timestamp <= 0
+                             else pow2(2.0, -(current_time - e.timestamp) / half_life)
+                             for e in self._history]
+        return self._weights
+
     def _compute_fatigue(self, current_time: float,
                          target_note: Optional[Note] = None) -> "FatigueResult":
         """
         核心疲劳计算流程 (v2.0)。
 
-        计算八个维度的疲劳分量，加权融合为 AFI。
+        依次读取各启用维度的疲劳分量，加权融合为 AFI。
         """
-        events = list(self._history)
-        n = len(events)
+        window = self._history
+        self._weights = None
+        for hook in self._advance_hooks:
+            hook(current_time, window)
 
         # 边界情况：事件太少
-        if n < 3:
+        if len(window) < 3:
             return FatigueResult(
                 fatigue_index=0.0,
                 fatigue_level=FatigueLevel.NONE,
-                components=FatigueComponents(),
+                components=FatigueComponents(**self._skipped_fields, extra=dict(self._skipped_extra),
+                                             skipped=self._skipped),
                 penalty=PenaltyEffect(),
                 note_specific_fatigue=0.0,
                 recovery_suggestions=[],
             )
 
-        # ---- 维度 1：音高熵 (Pitch Entropy) ----
-        pitch_events = [(e.timestamp, e.note.value) for e in events]
-        pitch_entropy = weighted_shannon_entropy(
-            pitch_events, self._decay_weight, current_time
-        )
-        pitch_fatigue = 1.0 - pitch_entropy
-
-        # ---- 维度 2：转移熵 (Transition Entropy) ----
-        note_sequence = [e.note.value for e in events]
-        trans_ent = transition_entropy(note_sequence, vocab_size=12)
-        transition_fatigue = 1.0 - trans_ent
-
-        # ---- 维度 3：节奏熵 (Rhythm Entropy) ----
-        rhythm_fatigue = self._compute_rhythm_fatigue(events, current_time)
-
-        # ---- 维度 4：n-gram 递归率 (Recurrence Rate) ----
-        recurrence = self._compute_recurrence(note_sequence)
-
-        # ---- 维度 5：和弦多样性 (Chord Diversity) ----
-        chord_fatigue = self._compute_chord_fatigue(events, current_time)
-
-        # ---- 维度 6 [v2.0 新增]：事件密度疲劳 (Event Density Fatigue) ----
-        density_fatigue = self._compute_density_fatigue(events, current_time)
-
-        # ---- 维度 7 [v2.0 新增]：留白缺失疲劳 (Rest Deficit Fatigue) ----
-        rest_deficit_fatigue = self._compute_rest_deficit_fatigue(events, current_time)
-
-        # ---- 维度 8 [v2.0 新增]：持续施法压力 (Sustained Pressure) ----
-        sustained_fatigue = self._compute_sustained_pressure(current_time)
-
-        # ---- 加权融合：AFI 公式 (v2.0) ----
-        cfg = self.config
-        afi = (
-            cfg.weight_pitch_entropy * pitch_fatigue
-            + cfg.weight_transition_entropy * transition_fatigue
-            + cfg.weight_rhythm_entropy * rhythm_fatigue
-            + cfg.weight_recurrence * recurrence
-            + cfg.weight_chord_diversity * chord_fatigue
-            + cfg.weight_density * density_fatigue
-            + cfg.weight_rest_deficit * rest_deficit_fatigue
-            + cfg.weight_sustained_pressure * sustained_fatigue
-        )
+        # ---- 加权融合：AFI = Σ 权重 × 分量（按注册顺序求和） ----
+        afi = 0.0
+        values: dict[str, float] = {}
+        fields: dict[str, float] = dict(self._skipped_fields)
+        extra: dict[str, float] = dict(self._skipped_extra)
+        for name, weight, read, details, builtin in self._readers:
+            value = read(current_time, window)
+            afi += weight * value
+            values[name] = value
+            if builtin:
+                fields[name] = value
+            else:
+                extra[name] = value
+            fields.update(details())
 
         # 钳位到 [0, 1]
         afi = max(0.0, min(1.0, afi))
@@ -609,214 +1078,19 @@ class AestheticFatigueEngine:
 
         # ---- 生成恢复建议 ----
         suggestions = self._generate_recovery_suggestions(
-            pitch_fatigue, transition_fatigue, rhythm_fatigue,
-            recurrence, chord_fatigue,
-            density_fatigue, rest_deficit_fatigue, sustained_fatigue,
+            *(values.get(name, 0.0) for name in BUILTIN_DIMENSIONS),
             current_time
         )
 
-        components = FatigueComponents(
-            pitch_entropy=pitch_entropy,
-            pitch_fatigue=pitch_fatigue,
-            transition_entropy=trans_ent,
-            transition_fatigue=transition_fatigue,
-            rhythm_entropy=1.0 - rhythm_fatigue,
-            rhythm_fatigue=rhythm_fatigue,
-            recurrence_rate=recurrence,
-            chord_diversity=1.0 - chord_fatigue,
-            chord_fatigue=chord_fatigue,
-            density_rate=self._get_current_density(events, current_time),
-            density_fatigue=density_fatigue,
-            rest_ratio=self._get_rest_ratio(events, current_time),
-            rest_deficit_fatigue=rest_deficit_fatigue,
-            sustained_duration=self._get_sustained_duration(current_time),
-            sustained_fatigue=sustained_fatigue,
-        )
-
         return FatigueResult(
             fatigue_index=afi,
             fatigue_level=level,
-            components=components,
+            components=FatigueComponents(**fields, extra=extra, skipped=self._skipped),
             penalty=penalty,
             note_specific_fatigue=note_fatigue,
             recovery_suggestions=suggestions,
         )
 
-    # ---- 原有维度计算方法 ----
-
-    def _compute_rhythm_fatigue(self, events: list[SpellEvent],
-                                current_time: float) -> float:
-        """计算节奏维度的疲劳值。"""
-        if len(events) < 3:
-            return 0.0
-
-        intervals = []
-        for i in range(1, len(events)):
-            dt = events[i].timestamp - events[i - 1].timestamp
-            bin_idx = quantize_interval(
-                dt, self.config.rhythm_quantize_bins, self.config.rhythm_max_interval
-            )
-            intervals.append((events[i].timestamp, bin_idx))
-
-        rhythm_entropy = weighted_shannon_entropy(
-            intervals, self._decay_weight, current_time
-        )
-        return 1.0 - rhythm_entropy
-
-    def _compute_recurrence(self, sequence: list) -> float:
-        """计算多尺度 n-gram 递归率。"""
-        if len(sequence) < 2:
-            return 0.0
-
-        weights = {2: 0.3, 3: 0.4, 4: 0.3}
-        total_rr = 0.0
-        total_w = 0.0
-
-        for n in self.config.ngram_sizes:
-            if len(sequence) >= n:
-                rr = ngram_recurrence_rate(sequence, n)
-                w = weights.get(n, 0.3)
-                total_rr += rr * w
-                total_w += w
-
-        return total_rr / total_w if total_w > 0 else 0.0
-
-    def _compute_chord_fatigue(self, events: list[SpellEvent],
-                               current_time: float) -> float:
-        """计算和弦多样性维度的疲劳值。"""
-        chord_events = [(e.timestamp, e.chord_type or "none") for e in events]
-        chord_entropy = weighted_shannon_entropy(
-            chord_events, self._decay_weight, current_time
-        )
-        return 1.0 - chord_entropy
-
-    # ---- v2.0 新增维度计算方法 ----
-
-    def _compute_density_fatigue(self, events: list[SpellEvent],
-                                 current_time: float) -> float:
-        """
-        计算事件密度疲劳。
-
-        基于 Temperley (2019) 的均匀信息密度 (UID) 理论：
-        信息应以适中且均匀的速率呈现。过高的事件密度会超出
-        听众的信息处理能力，导致认知过载和听觉疲劳。
-
-        计算方法：
-        1. 在短时窗口内统计施法次数，得到瞬时频率
-        2. 将频率映射到 [0, 1] 的疲劳值
-        3. 低于最佳频率不产生疲劳，超过最大频率疲劳满值
-        """
-        cfg = self.config
-        density = self._get_current_density(events, current_time)
-
-        if density <= cfg.density_optimal_rate:
-            return 0.0
-
-        # 线性映射：从最佳频率到最大频率
-        ratio = (density - cfg.density_optimal_rate) / (
-            cfg.density_max_rate - cfg.density_optimal_rate
-        )
-        return max(0.0, min(1.0, ratio))
-
-    def _compute_rest_deficit_fatigue(self, events: list[SpellEvent],
-                                      current_time: float) -> float:
-        """
-        计算留白缺失疲劳。
-
-        基于 Lissa (1964) 的休止美学理论：
-        音乐中的休止不是"空"，而是结构的有机组成部分。
-        休止为听众提供了处理已接收信息的"呼吸空间"。
-
-        计算方法：
-        1. 统计窗口内所有间隔中，超过休止阈值的"留白"总时长
-        2. 计算留白时间占窗口总时长的比例
-        3. 与理想比例对比，缺失越多疲劳越高
-        """
-        cfg = self.config
-        rest_ratio = self._get_rest_ratio(events, current_time)
-
-        if rest_ratio >= cfg.rest_ideal_ratio:
-            # 留白充足，无疲劳
-            return 0.0
-
-        # 留白不足：缺失比例越大，疲劳越高
-        deficit = (cfg.rest_ideal_ratio - rest_ratio) / cfg.rest_ideal_ratio
-        return max(0.0, min(1.0, deficit))
-
-    def _compute_sustained_pressure(self, current_time: float) -> float:
-        """
-        计算持续施法压力。
-
-        基于听觉疲劳的生理学研究 (Dobrucki 2017)：
-        持续的声学刺激会导致听觉系统的感官适应（Sensory Adaptation），
-        表现为对声音的敏感度下降和主观疲劳感增加。
-
-        计算方法：
-        1. 追踪自上次有效休息以来的连续施法时长
-        2. 超过起始阈值后，线性增长疲劳值
-        3. 达到最大阈值后，疲劳满值
-        """
-        cfg = self.config
-        sustained = self._get_sustained_duration(current_time)
-
-        if sustained <= cfg.sustained_pressure_onset:
-            return 0.0
-
-        ratio = (sustained - cfg.sustained_pressure_onset) / (
-            cfg.sustained_pressure_max - cfg.sustained_pressure_onset
-        )
-        return max(0.0, min(1.0, ratio))
-
-    # ---- 辅助计算方法 ----
-
-    def _get_current_density(self, events: list[SpellEvent],
-                             current_time: float) -> float:
-        """计算当前短时窗口内的施法频率（次/秒）。"""
-        cfg = self.config
-        cutoff = current_time - cfg.density_measurement_window
-        recent = [e for e in events if e.timestamp >= cutoff]
-        if len(recent) < 2:
-            return 0.0
-        time_span = current_time - recent[0].timestamp
-        if time_span <= 0:
-            return 0.0
-        return len(recent) / time_span
-
-    def _get_rest_ratio(self, events: list[SpellEvent],
-                        current_time: float) -> float:
-        """计算窗口内留白时间占总时长的比例。"""
-        if len(events) < 2:
-            return 1.0  # 几乎没有施法，全是留白
-
-        cfg = self.config
-        total_rest = 0.0
-        window_start = max(
-            events[0].timestamp,
-            current_time - cfg.window_duration
-        )
-        window_duration = current_time - window_start
-
-        if window_duration <= 0:
-            return 1.0
-
-        for i in range(1, len(events)):
-            gap = events[i].timestamp - events[i - 1].timestamp
-            if gap >= cfg.rest_threshold:
-                total_rest += gap
-
-        # 也考虑最后一次施法到当前时间的间隔
-        last_gap = current_time - events[-1].timestamp
-        if last_gap >= cfg.rest_threshold:
-            total_rest += last_gap
-
-        return min(1.0, total_rest / window_duration)
-
-    def _get_sustained_duration(self, current_time: float) -> float:
-        """获取当前连续施法时长（秒）。"""
-        if self._sustained_casting_start is None:
-            return 0.0
-        return current_time - self._sustained_casting_start
-
     def _compute_note_specific_fatigue(self, note: Note,
                                        current_time: float) -> float:
         """计算特定音符的个体疲劳值。"""
@@ -940,7 +1214,7 @@ class AestheticFatigueEngine:
 
 
 # =============================================================================
-# 第六部分：结果数据结构
+# 第七部分：结果数据结构
 # =============================================================================
 
 @dataclass
@@ -973,6 +1247,11 @@ class FatigueComponents:
     sustained_fatigue: float = 0.0
     """持续施法压力疲劳值。"""
 
+    extra: dict = field(default_factory=dict)
+    """插件维度的疲劳值（维度名 → 疲劳值）。"""
+    skipped: tuple = ()
+    """未计算的维度名（FatigueConfig.skip_zero_weight_dimensions），其分量与诊断字段为 NaN。"""
+
 
 @dataclass
 class PenaltyEffect:
@@ -1019,7 +1298,7 @@ class FatigueResult:
 
 
 # =============================================================================
-# 第七部分：便捷工厂与预设配置
+# 第八部分：便捷工厂与预设配置
 # =============================================================================
 
 def create_easy_config() -> FatigueConfig:
@@ -1096,7 +1375,7 @@ def create_maestro_config() -> FatigueConfig:
 
 
 # =============================================================================
-# 第八部分：演示与测试
+# 第九部分：演示与测试
 # =============================================================================
 
 def demo_scenario_monotonous():